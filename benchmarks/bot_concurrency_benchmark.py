@@ -0,0 +1,145 @@
+"""Одновременные нажатия исполнителей в Telegram-боте.
+
+Запуск:
+    python benchmarks/bot_concurrency_benchmark.py [executors ...]
+
+Каждый исполнитель одновременно «нажимает» «Мои сделки»: бот проверяет
+доступ, загружает сделки исполнителя и число задач по каждой. Сценарий
+выполняется двумя способами:
+
+* ``inline`` — синхронные вызовы сервисов прямо в цикле ``asyncio``
+  (прежнее поведение обработчиков);
+* ``pool`` — те же вызовы через :func:`database.executor.run_db`.
+
+Чтобы приблизить SQLite к сетевой СУБД, каждый запрос задерживается на
+``LATENCY_MS`` миллисекунд. Печатается общее время и наибольшая задержка
+цикла событий (как долго другие обработчики не могли выполняться).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from peewee import SqliteDatabase  # noqa: E402
+
+from database.db import db  # noqa: E402
+from database.executor import DatabaseExecutor  # noqa: E402
+from database.init import ALL_MODELS  # noqa: E402
+from database.models import (  # noqa: E402
+    Client,
+    Deal,
+    DealExecutor,
+    Executor,
+    Task,
+)
+from services import executor_service as es  # noqa: E402
+from services import task_crud as tc  # noqa: E402
+from services.task_states import QUEUED  # noqa: E402
+
+DEFAULT_SIZES = (10, 50)
+DEALS_PER_EXECUTOR = 5
+TASKS_PER_DEAL = 3
+LATENCY_MS = 2.0
+
+
+class _SlowSqlite(SqliteDatabase):
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        time.sleep(LATENCY_MS / 1000)
+        return super().execute_sql(sql, params, *args, **kwargs)
+
+
+def _seed(executors: int) -> None:
+    today = date.today()
+    with db.atomic():
+        for n in range(executors):
+            executor = Executor.create(full_name=f"Исполнитель {n}", tg_id=1000 + n)
+            for m in range(DEALS_PER_EXECUTOR):
+                client = Client.create(name=f"Клиент {n}-{m}")
+                deal = Deal.create(
+                    client=client, description="Сделка", start_date=today
+                )
+                DealExecutor.create(deal=deal, executor=executor, assigned_date=today)
+                Task.insert_many(
+                    [
+                        {
+                            "title": f"Задача {k}",
+                            "due_date": today,
+                            "deal": deal,
+                            "dispatch_state": QUEUED,
+                        }
+                        for k in range(TASKS_PER_DEAL)
+                    ]
+                ).execute()
+
+
+def _click(tg_id: int) -> int:
+    if not es.is_approved(tg_id):
+        return 0
+    return sum(
+        len(tc.get_incomplete_tasks_by_deal(deal.id))
+        for deal in es.get_deals_for_executor(tg_id)
+    )
+
+
+async def _inline(tg_id: int) -> int:
+    return _click(tg_id)
+
+
+async def _scenario(executors: int, handler) -> tuple[float, float]:
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def heartbeat() -> None:
+        nonlocal lag
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - started - 0.005)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(1000 + n) for n in range(executors)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await beat
+    return elapsed * 1000, lag * 1000
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    print(
+        f"{'executors':>9} {'inline, ms':>11} {'lag, ms':>9} "
+        f"{'pool, ms':>9} {'lag, ms':>9}"
+    )
+    for executors in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database = _SlowSqlite(str(Path(tmp) / "bench.db"))
+            db.initialize(database)
+            database.create_tables(ALL_MODELS)
+            _seed(executors)
+            database.close()
+
+            pool = DatabaseExecutor()
+            inline, inline_lag = asyncio.run(_scenario(executors, _inline))
+            pooled, pooled_lag = asyncio.run(
+                _scenario(executors, lambda tg_id: pool.run(_click, tg_id))
+            )
+            pool.shutdown()
+            database.close()
+
+        print(
+            f"{executors:>9} {inline:>11.1f} {inline_lag:>9.1f} "
+            f"{pooled:>9.1f} {pooled_lag:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
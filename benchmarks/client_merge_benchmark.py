@@ -0,0 +1,119 @@
+"""Объединение двух клиентов с большим числом сделок и полисов.
+
+Запуск:
+    python benchmarks/client_merge_benchmark.py [policies ...]
+
+Для каждого объёма создаётся временная база SQLite (как в приложении —
+через :func:`database_from_url`, WAL) с основным клиентом и
+дубликатом, у которого ``policies`` полисов в ``policies // 10`` сделках.
+Перенос папки заменён задержкой ``DRIVE_LATENCY`` секунд — так ведёт себя
+запрос к Google Drive. Сравниваются:
+
+* ``old`` — прежний путь: перенос папки и ``save()`` каждой сделки и
+  каждого полиса внутри транзакции объединения;
+* ``merge`` — :func:`merge_clients`: наборные ``UPDATE`` и постановка
+  переносов папок в очередь;
+* ``folders`` — разбор очереди :class:`FolderRelocator` после объединения.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database.db import db  # noqa: E402
+from database.init import ALL_MODELS, database_from_url  # noqa: E402
+from database.models import Client, Deal, Policy  # noqa: E402
+from services import folder_relocation  # noqa: E402
+from services.clients.client_service import merge_clients  # noqa: E402
+from services.folder_relocation import FolderRelocator  # noqa: E402
+
+DEFAULT_SIZES = (100, 500)
+DRIVE_LATENCY = 0.005
+D1 = date(2024, 1, 1)
+
+
+def _slow_rename(*args, **kwargs):
+    time.sleep(DRIVE_LATENCY)
+    return None, None
+
+
+def _seed(policies: int) -> tuple[int, int]:
+    with db.atomic():
+        primary = Client.create(name="Основной")
+        duplicate = Client.create(name="Дубликат")
+        deals = [
+            Deal.create(client=duplicate, description=f"Сделка {n}", start_date=D1)
+            for n in range(max(policies // 10, 1))
+        ]
+        Policy.insert_many(
+            [
+                {
+                    "client": duplicate,
+                    "deal": deals[n % len(deals)],
+                    "policy_number": f"PN-{n}",
+                    "start_date": D1,
+                }
+                for n in range(policies)
+            ]
+        ).execute()
+    return primary.id, duplicate.id
+
+
+def _old(primary_id: int, duplicate_id: int) -> None:
+    with db.atomic():
+        primary = Client.get_by_id(primary_id)
+        duplicate = Client.get_by_id(duplicate_id)
+        for deal in duplicate.deals:
+            _slow_rename()
+            deal.client = primary
+            deal.save()
+        for policy in duplicate.policies:
+            _slow_rename()
+            policy.client = primary
+            policy.save(only=[Policy.client])
+        duplicate.is_deleted = True
+        duplicate.save()
+
+
+def _measure(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    folder_relocation.rename_deal_folder = _slow_rename
+    folder_relocation.rename_policy_folder = _slow_rename
+    relocator = FolderRelocator(gateway=object(), autostart=False)
+    folder_relocation.set_folder_relocator(relocator)
+
+    print(f"{'policies':>9} {'old, ms':>10} {'merge, ms':>10} {'folders, ms':>12}")
+    for policies in sizes:
+        results = []
+        for step in ("old", "merge"):
+            with tempfile.TemporaryDirectory() as tmp:
+                database = database_from_url(f"sqlite:///{Path(tmp) / 'bench.db'}")
+                db.initialize(database)
+                database.create_tables(ALL_MODELS)
+                ids = _seed(policies)
+                if step == "old":
+                    results.append(_measure(_old, *ids))
+                else:
+                    results.append(_measure(merge_clients, *ids[:1], ids[1:]))
+                    results.append(_measure(relocator.run_pending))
+                database.close_all()
+        print(
+            f"{policies:>9} {results[0]:>10.1f} {results[1]:>10.1f}"
+            f" {results[2]:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
@@ -0,0 +1,155 @@
+"""Одновременные читатели и писатели SQLite.
+
+Запуск:
+    python benchmarks/db_concurrency_benchmark.py [readers ...]
+
+Для каждого числа потоков-читателей создаётся временная база SQLite. Пока
+``WRITERS`` потоков добавляют платежи небольшими транзакциями, читатели
+загружают страницы таблицы платежей (:func:`build_payment_query`).
+Сравниваются:
+
+* ``plain`` — прежняя ``SqliteDatabase`` без пула, журнал ``DELETE``;
+* ``pooled`` — база из :func:`database.init.database_from_url`: пул
+  соединений и прагмы WAL, ``synchronous=NORMAL``, ``mmap_size``,
+  ``cache_size``, ``busy_timeout``.
+
+Каждый поток работает внутри :func:`database.db.thread_connection`.
+Печатается общее время, число прочитанных страниц в секунду и число
+ошибок «database is locked».
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from peewee import OperationalError, SqliteDatabase  # noqa: E402
+
+from config import Settings  # noqa: E402
+from database.db import db, thread_connection  # noqa: E402
+from database.init import ALL_MODELS, database_from_url  # noqa: E402
+from database.models import Client, Payment, Policy  # noqa: E402
+from services.payment_service import build_payment_query  # noqa: E402
+
+DEFAULT_SIZES = (2, 8)
+WRITERS = 2
+WRITES_PER_WRITER = 200
+ROWS_PER_WRITE = 5
+SEED_POLICIES = 2_000
+
+
+def _seed() -> None:
+    with db.atomic():
+        Client.insert_many(
+            [{"name": f"Клиент {i}"} for i in range(SEED_POLICIES)]
+        ).execute()
+        Policy.insert_many(
+            [
+                {
+                    "client": i + 1,
+                    "policy_number": f"PN-{i}",
+                    "start_date": date(2024, 1, 1),
+                }
+                for i in range(SEED_POLICIES)
+            ]
+        ).execute()
+
+
+def _scenario(readers: int) -> tuple[float, float, int]:
+    stop = threading.Event()
+    pages = [0] * readers
+    locked = [0]
+    lock = threading.Lock()
+
+    def writer(n: int) -> None:
+        for step in range(WRITES_PER_WRITER):
+            try:
+                with thread_connection(), db.atomic():
+                    Payment.insert_many(
+                        [
+                            {
+                                "policy": (n * step + k) % SEED_POLICIES + 1,
+                                "amount": 100,
+                                "payment_date": date(2024, 1, 1),
+                            }
+                            for k in range(ROWS_PER_WRITE)
+                        ]
+                    ).execute()
+            except OperationalError:
+                with lock:
+                    locked[0] += 1
+
+    def reader(n: int) -> None:
+        while not stop.is_set():
+            try:
+                with thread_connection():
+                    query = build_payment_query().order_by(Payment.id.desc())
+                    list(query.limit(50))
+                pages[n] += 1
+            except OperationalError:
+                with lock:
+                    locked[0] += 1
+
+    started = time.perf_counter()
+    read_threads = [
+        threading.Thread(target=reader, args=(n,)) for n in range(readers)
+    ]
+    write_threads = [
+        threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)
+    ]
+    for thread in read_threads + write_threads:
+        thread.start()
+    for thread in write_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in read_threads:
+        thread.join()
+    return elapsed * 1000, sum(pages) / elapsed, locked[0]
+
+
+def _run_with(database, readers: int) -> tuple[float, float, int]:
+    db.initialize(database)
+    with thread_connection():
+        database.create_tables(ALL_MODELS)
+        _seed()
+    try:
+        return _scenario(readers)
+    finally:
+        close_all = getattr(database, "close_all", None)
+        if close_all is not None:
+            close_all()
+        elif not database.is_closed():
+            database.close()
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    print(
+        f"{'readers':>8} {'plain, ms':>10} {'pages/s':>8} {'locked':>7}"
+        f" {'pooled, ms':>11} {'pages/s':>8} {'locked':>7}"
+    )
+    for readers in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            plain_db = SqliteDatabase(
+                str(Path(tmp) / "plain.db"), pragmas={"foreign_keys": 1}
+            )
+            pooled_db = database_from_url(
+                f"sqlite:///{Path(tmp) / 'pooled.db'}", Settings()
+            )
+            plain = _run_with(plain_db, readers)
+            pooled = _run_with(pooled_db, readers)
+        print(
+            f"{readers:>8} {plain[0]:>10.1f} {plain[1]:>8.0f} {plain[2]:>7}"
+            f" {pooled[0]:>11.1f} {pooled[1]:>8.0f} {pooled[2]:>7}"
+        )
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
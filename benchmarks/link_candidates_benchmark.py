@@ -0,0 +1,125 @@
+"""Подбор сделок для кнопки «Привязать к сделке» на большой базе.
+
+Запуск:
+    python benchmarks/link_candidates_benchmark.py [deals ...]
+
+Для каждого объёма сделок создаётся временная база SQLite, и для одних и
+тех же ``SELECTION`` полисов без сделки сравниваются:
+
+* ``old`` — прежний путь ``PolicyTableView._on_link_deal``: все сделки с
+  клиентами через :func:`get_all_deals` и :func:`find_candidate_deals_bulk`;
+* ``service`` — :func:`resolve_link_candidates` вместе со списком сделок
+  для ручного выбора;
+* ``candidates`` — :func:`resolve_link_candidates` без списка для ручного
+  выбора (то, что нужно для автоматической привязки).
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from peewee import SqliteDatabase  # noqa: E402
+
+from database.db import db  # noqa: E402
+from database.init import ALL_MODELS  # noqa: E402
+from database.models import Client, Deal, Policy  # noqa: E402
+from services.deal_service import get_all_deals  # noqa: E402
+from services.policies.deal_linking import resolve_link_candidates  # noqa: E402
+from services.policies.deal_matching import (  # noqa: E402
+    find_candidate_deals_bulk,
+    get_deal_match_index,
+)
+
+DEFAULT_SIZES = (10_000, 50_000)
+SELECTION = 20
+
+
+def _seed(deals: int) -> None:
+    with db.atomic():
+        Client.insert_many(
+            [
+                {"name": f"Клиент {i}", "phone": f"8900{i:07d}"}
+                for i in range(deals)
+            ]
+        ).execute()
+        rows = [
+            {
+                "client": i + 1,
+                "description": f"Сделка {i}",
+                "start_date": date(2024, 1, 1),
+            }
+            for i in range(deals)
+        ]
+        for start in range(0, len(rows), 5000):
+            Deal.insert_many(rows[start : start + 5000]).execute()
+        rows = [
+            {
+                "client": i + 1,
+                "deal": i + 1,
+                "policy_number": f"PN-{i:08d}",
+                "vehicle_vin": f"XTA{i:014d}",
+                "start_date": date(2024, 1, 1),
+            }
+            for i in range(deals)
+        ]
+        for start in range(0, len(rows), 5000):
+            Policy.insert_many(rows[start : start + 5000]).execute()
+
+
+def _selection(deals: int) -> list[int]:
+    target = deals // 2
+    client = Client.get_by_id(target + 1)
+    return [
+        Policy.create(
+            client=client,
+            policy_number=f"NEW-{n}",
+            vehicle_vin=f"xta-{target:014d}" if n % 2 else None,
+            start_date=date(2024, 6, 1),
+        ).id
+        for n in range(SELECTION)
+    ]
+
+
+def _old(policy_ids: list[int]) -> None:
+    policies = list(Policy.select().where(Policy.id.in_(policy_ids)))
+    _deals_by_id = {deal.id: deal for deal in get_all_deals()}
+    find_candidate_deals_bulk(policies, limit=5)
+
+
+def _measure(func, policy_ids: list[int]) -> float:
+    started = time.perf_counter()
+    func(policy_ids)
+    return (time.perf_counter() - started) * 1000
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    print(f"{'deals':>9} {'old, ms':>10} {'service, ms':>12} {'candidates, ms':>15}")
+    for deals in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database = SqliteDatabase(str(Path(tmp) / "bench.db"))
+            db.initialize(database)
+            database.create_tables(ALL_MODELS)
+            _seed(deals)
+            policy_ids = _selection(deals)
+
+            old = _measure(_old, policy_ids)
+            service = _measure(resolve_link_candidates, policy_ids)
+            candidates = _measure(
+                lambda ids: resolve_link_candidates(ids, with_choices=False),
+                policy_ids,
+            )
+            get_deal_match_index().invalidate()
+            database.close()
+
+        print(f"{deals:>9} {old:>10.1f} {service:>12.1f} {candidates:>15.1f}")
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
@@ -0,0 +1,149 @@
+"""Сравнение поиска сделок-кандидатов по одному полису и пачкой.
+
+Запуск:
+    python benchmarks/matching_benchmark.py [deals ...]
+
+Для каждого объёма сделок создаётся временная база SQLite, после чего
+одни и те же ``BATCH`` полисов без сделки сопоставляются тремя способами:
+
+* ``loop`` — :func:`find_candidate_deal_ids` и
+  :func:`build_deal_match_index` для каждого полиса (прежний путь);
+* ``bulk`` — :func:`find_candidate_deals_bulk`;
+* ``index`` — :func:`find_candidate_deals` в цикле через общий индекс,
+  включая его первоначальное построение.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from peewee import SqliteDatabase  # noqa: E402
+
+from database.db import db  # noqa: E402
+from database.init import ALL_MODELS  # noqa: E402
+from database.models import Client, Deal, Policy  # noqa: E402
+from services.policies.deal_matching import (  # noqa: E402
+    build_deal_match_index,
+    collect_indirect_matches,
+    find_candidate_deal_ids,
+    find_candidate_deals,
+    find_candidate_deals_bulk,
+    find_strict_matches,
+    get_deal_match_index,
+    make_policy_profile,
+)
+
+DEFAULT_SIZES = (1_000, 10_000)
+BATCH = 200
+
+_BRANDS = (("Lada", "Vesta"), ("Kia", "Rio"), ("Toyota", "Camry"))
+
+
+def _seed(deals: int) -> None:
+    rnd = random.Random(deals)
+    with db.atomic():
+        Client.insert_many(
+            [
+                {"name": f"Клиент {i}", "phone": f"8900{i:07d}"}
+                for i in range(deals)
+            ]
+        ).execute()
+        Deal.insert_many(
+            [
+                {
+                    "client": i + 1,
+                    "description": f"Сделка {i}",
+                    "start_date": date(2024, 1, 1),
+                }
+                for i in range(deals)
+            ]
+        ).execute()
+        rows = []
+        for i in range(deals):
+            brand, model = rnd.choice(_BRANDS)
+            rows.append(
+                {
+                    "client": i + 1,
+                    "deal": i + 1,
+                    "policy_number": f"PN-{i:08d}",
+                    "vehicle_vin": f"XTA{i:014d}",
+                    "vehicle_brand": brand,
+                    "vehicle_model": model,
+                    "start_date": date(2024, 1, 1),
+                }
+            )
+            if len(rows) == 5000:
+                Policy.insert_many(rows).execute()
+                rows.clear()
+        if rows:
+            Policy.insert_many(rows).execute()
+
+
+def _new_policies(deals: int) -> list[Policy]:
+    rnd = random.Random(-deals)
+    policies = []
+    for n in range(BATCH):
+        target = rnd.randrange(deals)
+        client = Client.create(name=f"Новый {n}", phone=f"+7 900 {target:07d}")
+        policies.append(
+            Policy.create(
+                client=client,
+                policy_number=f"NEW-{n}",
+                vehicle_vin=f"xta-{target:014d}",
+                start_date=date(2024, 6, 1),
+            )
+        )
+    return policies
+
+
+def _loop(policies: list[Policy]) -> None:
+    for policy in policies:
+        profile = make_policy_profile(policy)
+        deal_index = build_deal_match_index(find_candidate_deal_ids(policy))
+        find_strict_matches(profile, deal_index)
+        collect_indirect_matches(profile, deal_index)
+
+
+def _index(policies: list[Policy]) -> None:
+    get_deal_match_index().invalidate()
+    for policy in policies:
+        find_candidate_deals(policy, limit=5)
+
+
+def _measure(func, policies: list[Policy]) -> float:
+    started = time.perf_counter()
+    func(policies)
+    return (time.perf_counter() - started) * 1000
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    print(f"{'deals':>9} {'loop, ms':>10} {'bulk, ms':>10} {'index, ms':>10}")
+    for deals in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database = SqliteDatabase(str(Path(tmp) / "bench.db"))
+            db.initialize(database)
+            database.create_tables(ALL_MODELS)
+            _seed(deals)
+            policies = _new_policies(deals)
+
+            loop = _measure(_loop, policies)
+            bulk = _measure(
+                lambda items: find_candidate_deals_bulk(items, limit=5), policies
+            )
+            indexed = _measure(_index, policies)
+            get_deal_match_index().invalidate()
+            database.close()
+
+        print(f"{deals:>9} {loop:>10.1f} {bulk:>10.1f} {indexed:>10.1f}")
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
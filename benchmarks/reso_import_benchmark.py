@@ -0,0 +1,166 @@
+"""Разбор таблицы выплат RESO: цикл по номерам полисов и пакетный импорт.
+
+Запуск:
+    python benchmarks/reso_import_benchmark.py [rows ...]
+
+Для каждого объёма строк создаётся временная база SQLite с полисами,
+платежами и частью открытых доходов, а таблица выплат строится в памяти
+(в среднем ``ROWS_PER_POLICY`` строк на полис, часть номеров в базе нет).
+Замеряются:
+
+* ``loop`` — прежний путь без диалогов: фильтр таблицы, сумма через
+  ``_parse_amount`` и три запроса на каждый номер. Цикл квадратичен по
+  объёму, поэтому замеряются первые ``LOOP_SAMPLE`` номеров, а время
+  пересчитывается на все;
+* ``plan`` — :func:`plan_reso_payouts`, одна группировка таблицы;
+* ``resolve`` — :func:`resolve_reso_payouts`, запросы пачками;
+* ``commit`` — :func:`commit_reso_payouts` в одной транзакции.
+
+По умолчанию замеряются 50k строк.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd  # noqa: E402
+from peewee import SqliteDatabase  # noqa: E402
+
+from database.db import db  # noqa: E402
+from database.init import ALL_MODELS  # noqa: E402
+from database.models import Client, Deal, Income, Payment, Policy  # noqa: E402
+from services.reso_table_service import (  # noqa: E402
+    DEFAULT_MAPPING,
+    _parse_amount,
+    commit_reso_payouts,
+    plan_reso_payouts,
+    resolve_reso_payouts,
+)
+
+DEFAULT_SIZES = (50_000,)
+ROWS_PER_POLICY = 5
+LOOP_SAMPLE = 300
+
+
+def _seed(policies: int) -> None:
+    """Полисы ``R-…`` с платежом; у каждого второго есть открытый доход."""
+
+    with db.atomic():
+        Client.create(name="Клиент")
+        Deal.create(client=1, description="Сделка", start_date=date(2024, 1, 1))
+        for start in range(0, policies, 5000):
+            ids = range(start, min(start + 5000, policies))
+            Policy.insert_many(
+                [
+                    {
+                        "client": 1,
+                        "deal": 1,
+                        "policy_number": f"R-{i:08d}",
+                        "start_date": date(2024, 1, 1),
+                    }
+                    for i in ids
+                ]
+            ).execute()
+            Payment.insert_many(
+                [
+                    {"policy": i + 1, "amount": 1000, "payment_date": date(2024, 1, 1)}
+                    for i in ids
+                ]
+            ).execute()
+            Income.insert_many(
+                [{"payment": i + 1, "amount": 1} for i in ids if i % 2 == 0]
+            ).execute()
+
+
+def _table(rows: int) -> pd.DataFrame:
+    """Таблица выплат: десятая часть номеров в базе отсутствует."""
+
+    rnd = random.Random(rows)
+    numbers = rows // ROWS_PER_POLICY
+    data = []
+    for _ in range(rows):
+        n = rnd.randrange(numbers)
+        number = f"R-{n:08d}" if n % 10 else f"NEW-{n:08d}"
+        amount = f"{rnd.randint(1, 99999)},{rnd.randint(0, 99):02d}"
+        data.append(
+            {
+                DEFAULT_MAPPING["policy_number"]: number,
+                DEFAULT_MAPPING["period"]: "01.01.2024 -31.12.2024",
+                DEFAULT_MAPPING["amount"]: amount,
+                DEFAULT_MAPPING["premium"]: "10 000",
+                "СТРАХОВАТЕЛЬ": f"Клиент [{n}]",
+            }
+        )
+    return pd.DataFrame(data, dtype=str)
+
+
+def _loop(df: pd.DataFrame, numbers: list[str]) -> None:
+    policy_col = DEFAULT_MAPPING["policy_number"]
+    for number in numbers:
+        rows = df[df[policy_col].astype(str).str.strip() == number]
+        rows[DEFAULT_MAPPING["amount"]].map(_parse_amount).sum()
+        policy = Policy.get_or_none(Policy.policy_number == number)
+        if policy is None:
+            continue
+        pay = policy.payments.order_by(Payment.id).first()
+        if pay:
+            (
+                Income.select()
+                .where(
+                    (Income.payment == pay.id) & (Income.received_date.is_null(True))
+                )
+                .order_by(Income.id)
+                .first()
+            )
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    print(
+        f"{'rows':>8} {'policies':>9} {'loop, ms':>10} {'plan, ms':>9} "
+        f"{'resolve, ms':>12} {'commit, ms':>11}"
+    )
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database = SqliteDatabase(str(Path(tmp) / "bench.db"))
+            db.initialize(database)
+            database.create_tables(ALL_MODELS)
+            _seed(rows // ROWS_PER_POLICY)
+            df = _table(rows)
+
+            numbers = [
+                str(n).strip()
+                for n in df[DEFAULT_MAPPING["policy_number"]].dropna().unique()
+            ]
+            sample = numbers[:LOOP_SAMPLE]
+            _, loop = _timed(_loop, df, sample)
+            loop *= len(numbers) / max(len(sample), 1)
+
+            payouts, plan = _timed(plan_reso_payouts, df)
+            _, resolve = _timed(resolve_reso_payouts, payouts)
+            _, commit = _timed(
+                lambda: commit_reso_payouts(payouts, received_date=date.today())
+            )
+            database.close()
+
+        print(
+            f"{rows:>8} {len(numbers):>9} {loop:>10.1f} {plan:>9.1f} "
+            f"{resolve:>12.1f} {commit:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
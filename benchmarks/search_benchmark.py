@@ -0,0 +1,102 @@
+"""Сравнение поиска через ``LIKE`` и через поисковый индекс.
+
+Запуск:
+    python benchmarks/search_benchmark.py [rows ...]
+
+По умолчанию замеряются 10k, 100k и 1M полисов. База создаётся во
+временном файле SQLite и удаляется после замера.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from peewee import SqliteDatabase  # noqa: E402
+
+from database.db import db  # noqa: E402
+from database.init import ALL_MODELS  # noqa: E402
+from database.models import Client, Policy  # noqa: E402
+from database.search_index import (  # noqa: E402
+    install_search_indexes,
+    reset_search_backend,
+)
+from services.policies.policy_service import build_policy_query  # noqa: E402
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+QUERIES = ("Иванов", "XTA21", "Ингосстрах", "каско")
+REPEATS = 5
+
+_SURNAMES = ("Иванов", "Петров", "Сидоров", "Кузнецов", "Смирнов", "Попов")
+_COMPANIES = ("Ингосстрах", "РЕСО", "Альфа", "ВСК", "Согласие")
+_TYPES = ("ОСАГО", "КАСКО", "Ипотека", "НС")
+
+
+def _seed(rows: int) -> None:
+    rnd = random.Random(rows)
+    clients_count = max(rows // 5, 1)
+    with db.atomic():
+        Client.insert_many(
+            [
+                {"name": f"{rnd.choice(_SURNAMES)} {i}", "phone": f"+7900{i:07d}"}
+                for i in range(clients_count)
+            ]
+        ).execute()
+    batch: list[dict] = []
+    with db.atomic():
+        for i in range(rows):
+            batch.append(
+                {
+                    "client": rnd.randint(1, clients_count),
+                    "policy_number": f"PN-{i:08d}",
+                    "insurance_company": rnd.choice(_COMPANIES),
+                    "insurance_type": rnd.choice(_TYPES),
+                    "vehicle_vin": f"XTA21{rnd.randint(0, 10**12):012d}",
+                    "start_date": date(2024, 1, 1),
+                }
+            )
+            if len(batch) == 5000:
+                Policy.insert_many(batch).execute()
+                batch.clear()
+        if batch:
+            Policy.insert_many(batch).execute()
+
+
+def _measure(text: str) -> float:
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        query = build_policy_query(search_text=text)
+        list(query.limit(30))
+        query.count()
+    return (time.perf_counter() - started) / REPEATS * 1000
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    print(f"{'rows':>9} {'query':>12} {'like, ms':>10} {'index, ms':>10}")
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database = SqliteDatabase(str(Path(tmp) / "bench.db"))
+            db.initialize(database)
+            database.create_tables(ALL_MODELS)
+            _seed(rows)
+
+            reset_search_backend()
+            like = {text: _measure(text) for text in QUERIES}
+            install_search_indexes(database)
+            indexed = {text: _measure(text) for text in QUERIES}
+            reset_search_backend()
+            database.close()
+
+        for text in QUERIES:
+            print(f"{rows:>9} {text:>12} {like[text]:>10.1f} {indexed[text]:>10.1f}")
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
@@ -0,0 +1,154 @@
+"""Каскадное мягкое удаление клиента с большим числом полисов.
+
+Запуск:
+    python benchmarks/soft_delete_benchmark.py [policies ...]
+
+Для каждого объёма создаётся временная база SQLite с клиентом, у которого
+``policies`` полисов, по ``PAYMENTS`` платежа на полис, доход и расход на
+платёж. Сравниваются:
+
+* ``walk`` — обход потомков в Python и ``soft_delete()`` каждой записи;
+* ``cascade`` — :func:`soft_delete_cascade`: по одному ``UPDATE`` на
+  модель в одной транзакции.
+
+Печатается время и число SQL-запросов.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from peewee import SqliteDatabase  # noqa: E402
+
+from database.db import db  # noqa: E402
+from database.init import ALL_MODELS  # noqa: E402
+from database.models import (  # noqa: E402
+    Client,
+    Deal,
+    DealCalculation,
+    Expense,
+    Income,
+    Payment,
+    Policy,
+)
+from services.soft_delete import soft_delete_cascade  # noqa: E402
+
+DEFAULT_SIZES = (200, 2_000)
+PAYMENTS = 2
+D1 = date(2024, 1, 1)
+
+
+def _seed(policies: int) -> int:
+    with db.atomic():
+        client = Client.create(name="Клиент")
+        deal = Deal.create(client=client, description="Сделка", start_date=D1)
+        DealCalculation.create(deal=deal, note="расчёт")
+        Policy.insert_many(
+            [
+                {
+                    "client": client,
+                    "deal": deal,
+                    "policy_number": f"PN-{i}",
+                    "start_date": D1,
+                }
+                for i in range(policies)
+            ]
+        ).execute()
+        policy_ids = [p.id for p in Policy.select(Policy.id)]
+        Payment.insert_many(
+            [
+                {"policy": pid, "amount": 100, "payment_date": D1}
+                for pid in policy_ids
+                for _ in range(PAYMENTS)
+            ]
+        ).execute()
+        payments = list(Payment.select(Payment.id, Payment.policy))
+        Income.insert_many(
+            [
+                {"payment": p.id, "amount": 10, "received_date": D1}
+                for p in payments
+            ]
+        ).execute()
+        Expense.insert_many(
+            [
+                {
+                    "payment": p.id,
+                    "policy": p.policy_id,
+                    "amount": 5,
+                    "expense_type": "агент",
+                }
+                for p in payments
+            ]
+        ).execute()
+    return client.id
+
+
+def _walk(client_id: int) -> None:
+    with db.atomic():
+        client = Client.get_by_id(client_id)
+        client.soft_delete()
+        for deal in client.deals:
+            deal.soft_delete()
+            for calc in deal.calc_entries:
+                calc.soft_delete()
+        for policy in client.policies:
+            policy.soft_delete()
+            for expense in policy.expenses:
+                expense.soft_delete()
+            for payment in policy.payments:
+                payment.soft_delete()
+                for income in payment.incomes:
+                    income.soft_delete()
+                for expense in payment.expenses:
+                    expense.soft_delete()
+
+
+def _cascade(client_id: int) -> None:
+    soft_delete_cascade(Client, [client_id])
+
+
+def _measure(func, policies: int) -> tuple[float, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        database = SqliteDatabase(str(Path(tmp) / "bench.db"))
+        db.initialize(database)
+        database.create_tables(ALL_MODELS)
+        client_id = _seed(policies)
+
+        statements = [0]
+        original = database.execute_sql
+
+        def counting(sql, params=None, *args, **kwargs):
+            statements[0] += 1
+            return original(sql, params, *args, **kwargs)
+
+        database.execute_sql = counting
+        started = time.perf_counter()
+        func(client_id)
+        elapsed = (time.perf_counter() - started) * 1000
+        database.close()
+    return elapsed, statements[0]
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    print(
+        f"{'policies':>9} {'walk, ms':>10} {'queries':>8}"
+        f" {'cascade, ms':>12} {'queries':>8}"
+    )
+    for policies in sizes:
+        walk = _measure(_walk, policies)
+        cascade = _measure(_cascade, policies)
+        print(
+            f"{policies:>9} {walk[0]:>10.1f} {walk[1]:>8}"
+            f" {cascade[0]:>12.1f} {cascade[1]:>8}"
+        )
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
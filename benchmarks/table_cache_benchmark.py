@@ -0,0 +1,141 @@
+"""Перерисовка и сортировка ``BaseTableModel`` с кэшем ячеек и без него.
+
+Запуск:
+    python benchmarks/table_cache_benchmark.py [rows ...]
+
+Модель без кэша повторяет прежнюю реализацию ``data()``: значение
+форматируется при каждом обращении. Замеряются:
+
+* перерисовка — ``data()`` для всех ролей видимых ячеек (окна по 40 строк),
+  по всей таблице;
+* сортировка — ``QSortFilterProxyModel.sort`` по столбцу даты с ролью
+  ``Qt.UserRole``, как в ``BaseTableView``.
+
+Объекты платежей создаются в памяти, база данных не нужна. По умолчанию
+замеряются 10k строк.
+"""
+
+from __future__ import annotations
+
+import datetime
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from PySide6.QtCore import (  # noqa: E402
+    QCoreApplication,
+    QDate,
+    QSortFilterProxyModel,
+    Qt,
+)
+
+from database.models import Payment  # noqa: E402
+from ui.base.base_table_model import BaseTableModel  # noqa: E402
+
+DEFAULT_SIZES = (10_000,)
+VISIBLE_ROWS = 40
+REPEATS = 3
+ROLES = (Qt.DisplayRole, Qt.UserRole, Qt.ToolTipRole, Qt.TextAlignmentRole)
+
+
+class UncachedTableModel(BaseTableModel):
+    """``data()`` без кэша — как до появления массивов по столбцам."""
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        obj = self.objects[index.row()]
+        field = self.fields[index.column()]
+        value = getattr(obj, field.name)
+        if role == Qt.UserRole:
+            if isinstance(value, datetime.date):
+                return QDate(value.year, value.month, value.day)
+            return value
+        if role == Qt.DisplayRole:
+            return self.display_text(field, value)
+        if role == Qt.ToolTipRole and isinstance(value, str) and len(value) > 40:
+            return value
+        if role == Qt.TextAlignmentRole:
+            if isinstance(value, (int, float)):
+                return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+
+def _payments(rows: int) -> list[Payment]:
+    rnd = random.Random(rows)
+    start = datetime.date(2024, 1, 1)
+    return [
+        Payment(
+            id=n + 1,
+            amount=rnd.randint(1, 5000) * 10,
+            payment_date=start + datetime.timedelta(days=rnd.randrange(365)),
+            actual_payment_date=(
+                None
+                if rnd.random() < 0.5
+                else start + datetime.timedelta(days=rnd.randrange(365))
+            ),
+        )
+        for n in range(rows)
+    ]
+
+
+def _paint(model: BaseTableModel) -> float:
+    columns = [
+        column
+        for column, field in enumerate(model.fields)
+        if field.name != "policy"
+    ]
+    started = time.perf_counter()
+    for top in range(0, model.rowCount(), VISIBLE_ROWS):
+        for row in range(top, min(top + VISIBLE_ROWS, model.rowCount())):
+            for column in columns:
+                index = model.index(row, column)
+                for role in ROLES:
+                    model.data(index, role)
+    return time.perf_counter() - started
+
+
+def _sort(model: BaseTableModel) -> float:
+    column = [f.name for f in model.fields].index("payment_date")
+    proxy = QSortFilterProxyModel()
+    proxy.setSortRole(Qt.UserRole)
+    proxy.setSourceModel(model)
+    started = time.perf_counter()
+    proxy.sort(column, Qt.AscendingOrder)
+    proxy.sort(column, Qt.DescendingOrder)
+    return (time.perf_counter() - started) / 2
+
+
+def _measure(model_class, objects: list[Payment]) -> tuple[float, float, float]:
+    model = model_class(objects, Payment)
+    first = _paint(model)
+    repaint = min(_paint(model) for _ in range(REPEATS))
+    sort = min(_sort(model) for _ in range(REPEATS))
+    return first, repaint, sort
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    QCoreApplication.instance() or QCoreApplication([])
+    print(
+        f"{'rows':>8} {'model':>9} {'first, ms':>10} {'repaint, ms':>12} "
+        f"{'sort, ms':>9}"
+    )
+    for rows in sizes:
+        objects = _payments(rows)
+        for name, model_class in (
+            ("uncached", UncachedTableModel),
+            ("cached", BaseTableModel),
+        ):
+            first, repaint, sort = _measure(model_class, objects)
+            print(
+                f"{rows:>8} {name:>9} {first * 1000:>10.1f} "
+                f"{repaint * 1000:>12.1f} {sort * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
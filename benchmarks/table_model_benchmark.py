@@ -0,0 +1,162 @@
+"""Прокрутка таблицы платежей: ``BaseTableModel`` против ``LazyTableModel``.
+
+Запуск:
+    python benchmarks/table_model_benchmark.py [rows ...]
+
+Для каждого объёма замеряются:
+
+* время до первой отрисовки (загрузка данных, видимых после открытия);
+* прокрутка всей выборки окнами по 40 строк — вызовы ``data()`` для всех
+  видимых ячеек, как при перерисовке ``QTableView``;
+* пик памяти Python (``tracemalloc``) за время прокрутки.
+
+``BaseTableModel`` для прокрутки без страниц вынужден держать все объекты
+выборки, ``LazyTableModel`` — не больше ``MAX_CACHED_BLOCKS`` блоков строк.
+По умолчанию замеряются 10k и 100k платежей во временном файле SQLite.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from peewee import SqliteDatabase  # noqa: E402
+from PySide6.QtCore import Qt  # noqa: E402
+
+from database.db import db  # noqa: E402
+from database.init import ALL_MODELS  # noqa: E402
+from database.models import Client, Payment, Policy  # noqa: E402
+from services.payment_service import build_payment_query  # noqa: E402
+from ui.base.base_table_model import BaseTableModel  # noqa: E402
+from ui.base.lazy_table_model import LazyTableModel, RowBlockSource  # noqa: E402
+
+DEFAULT_SIZES = (10_000, 100_000)
+VISIBLE_ROWS = 40
+ROLES = (Qt.DisplayRole, Qt.ToolTipRole, Qt.TextAlignmentRole)
+
+
+def _seed(rows: int) -> None:
+    rnd = random.Random(rows)
+    policies_count = max(rows // 4, 1)
+    with db.atomic():
+        Client.insert_many(
+            [{"name": f"Клиент {i}"} for i in range(max(policies_count // 3, 1))]
+        ).execute()
+        clients_count = Client.select().count()
+        for start in range(0, policies_count, 5000):
+            Policy.insert_many(
+                [
+                    {
+                        "client": rnd.randint(1, clients_count),
+                        "policy_number": f"PN-{i:08d}",
+                        "start_date": date(2024, 1, 1),
+                    }
+                    for i in range(start, min(start + 5000, policies_count))
+                ]
+            ).execute()
+        for start in range(0, rows, 5000):
+            Payment.insert_many(
+                [
+                    {
+                        "policy": rnd.randint(1, policies_count),
+                        "amount": rnd.randint(1, 500) * 100,
+                        "payment_date": date(2024, 1, 1)
+                        + timedelta(days=rnd.randrange(365)),
+                    }
+                    for _ in range(start, min(start + 5000, rows))
+                ]
+            ).execute()
+
+
+def _paint(model, row: int) -> None:
+    for r in range(row, min(row + VISIBLE_ROWS, model.rowCount())):
+        for column in range(model.columnCount()):
+            index = model.index(r, column)
+            for role in ROLES:
+                model.data(index, role)
+
+
+def _scroll(model, fetch) -> float:
+    started = time.perf_counter()
+    row = 0
+    while True:
+        while row + VISIBLE_ROWS > model.rowCount() and fetch(model):
+            pass
+        if row >= model.rowCount():
+            break
+        _paint(model, row)
+        row += VISIBLE_ROWS
+    return time.perf_counter() - started
+
+
+def _measure_base() -> tuple[float, float, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    query = build_payment_query().order_by(Payment.payment_date, Payment.id)
+    model = BaseTableModel(list(query), Payment)
+    _paint(model, 0)
+    first = time.perf_counter() - started
+    scroll = _scroll(model, lambda _model: False)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, scroll, peak / 2**20
+
+
+def _measure_lazy() -> tuple[float, float, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    template = BaseTableModel([], Payment)
+    source = RowBlockSource(
+        build_payment_query(),
+        template.fields,
+        template.display_text,
+        order_field=Payment.payment_date,
+    )
+    source.fetch_next()
+    model = LazyTableModel(source, Payment)
+    _paint(model, 0)
+    first = time.perf_counter() - started
+
+    def fetch(lazy: LazyTableModel) -> bool:
+        if not lazy.canFetchMore():
+            return False
+        lazy.fetchMore()
+        return True
+
+    scroll = _scroll(model, fetch)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, scroll, peak / 2**20
+
+
+def run(sizes: tuple[int, ...]) -> None:
+    print(
+        f"{'rows':>9} {'model':>6} {'first, ms':>10} {'scroll, s':>10} "
+        f"{'peak, MiB':>10}"
+    )
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database = SqliteDatabase(str(Path(tmp) / "bench.db"))
+            db.initialize(database)
+            database.create_tables(ALL_MODELS)
+            _seed(rows)
+            results = {"base": _measure_base(), "lazy": _measure_lazy()}
+            database.close()
+
+        for name, (first, scroll, peak) in results.items():
+            print(
+                f"{rows:>9} {name:>6} {first * 1000:>10.1f} {scroll:>10.2f} "
+                f"{peak:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    args = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    run(args)
@@ -6,24 +6,37 @@ from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
 
-from appdirs import user_log_dir
+from appdirs import user_cache_dir, user_log_dir
 from dotenv import load_dotenv
 
 
 @dataclass
 class Settings:
     database_url: str = ""
+    db_max_connections: int = 20
+    db_stale_timeout: int = 300
+    db_pool_timeout: int = 30
+    sqlite_cache_mb: int = 64
+    sqlite_mmap_mb: int = 256
+    sqlite_busy_timeout_ms: int = 5000
     log_dir: str = field(default_factory=lambda: user_log_dir("crm_desktop"))
     log_level: str = "INFO"
     detailed_logging: bool = False
     approved_executor_ids: list[int] = field(default_factory=list)
     tg_bot_token: str | None = None
+    tg_api_url: str = "https://api.telegram.org"
     admin_chat_id: int | None = None
     openai_api_key: str | None = None
     openai_base_url: str | None = None
     openai_model: str = "gpt-4o"
     ai_policy_prompt: str | None = None
     ai_document_prompt: str | None = None
+    ai_policy_concurrency: int = 4
+    ai_cache_dir: str = field(
+        default_factory=lambda: str(Path(user_cache_dir("crm_desktop")) / "ai")
+    )
+    ai_cache_max_mb: int = 200
+    ai_cache_enabled: bool = True
     drive_root_folder_id: str | None = "1-hTRZ7meDTGDQezoY_ydFkmXIng3gXFm"
     drive_service_account_file: str = "credentials.json"
     google_drive_local_root: str = r"G:\\Мой диск\\Клиенты"
@@ -46,17 +59,30 @@ def get_settings() -> Settings:
     admin_chat = os.getenv("ADMIN_CHAT_ID")
     return Settings(
         database_url=os.getenv("DATABASE_URL", ""),
+        db_max_connections=int(os.getenv("DB_MAX_CONNECTIONS") or 20),
+        db_stale_timeout=int(os.getenv("DB_STALE_TIMEOUT") or 300),
+        db_pool_timeout=int(os.getenv("DB_POOL_TIMEOUT") or 30),
+        sqlite_cache_mb=int(os.getenv("SQLITE_CACHE_MB") or 64),
+        sqlite_mmap_mb=int(os.getenv("SQLITE_MMAP_MB") or 256),
+        sqlite_busy_timeout_ms=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS") or 5000),
         log_dir=os.getenv("LOG_DIR") or user_log_dir("crm_desktop"),
         log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
         detailed_logging=os.getenv("DETAILED_LOGGING", "0").lower() in {"1", "true", "yes", "on"},
         approved_executor_ids=approved_ids,
         tg_bot_token=os.getenv("TG_BOT_TOKEN"),
+        tg_api_url=os.getenv("TG_API_URL", "https://api.telegram.org"),
         admin_chat_id=int(admin_chat) if admin_chat else None,
         openai_api_key=os.getenv("OPENAI_API_KEY"),
         openai_base_url=os.getenv("OPENAI_BASE_URL"),
         openai_model=os.getenv("OPENAI_MODEL", "gpt-4o"),
         ai_policy_prompt=os.getenv("AI_POLICY_PROMPT"),
         ai_document_prompt=os.getenv("AI_DOCUMENT_PROMPT"),
+        ai_policy_concurrency=int(os.getenv("AI_POLICY_CONCURRENCY") or 4),
+        ai_cache_dir=os.getenv("AI_CACHE_DIR")
+        or str(Path(user_cache_dir("crm_desktop")) / "ai"),
+        ai_cache_max_mb=int(os.getenv("AI_CACHE_MAX_MB") or 200),
+        ai_cache_enabled=os.getenv("AI_CACHE_ENABLED", "1").lower()
+        in {"1", "true", "yes", "on"},
         drive_root_folder_id=os.getenv("GOOGLE_ROOT_FOLDER_ID")
         or "1-hTRZ7meDTGDQezoY_ydFkmXIng3gXFm",
         drive_service_account_file=os.getenv(
@@ -13,6 +13,7 @@ os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
 sys.path.append(str(Path(__file__).resolve().parent))
 
 from database.db import db
+from database.indexes import install_indexes
 from database.models import (
     Client,
     Policy,
@@ -24,6 +25,8 @@ from database.models import (
     DealExecutor,
     DealCalculation,
     Task,
+    TelegramOutbox,
+    FolderRelocation,
 )
 
 from services.policies import policy_service as ps
@@ -87,9 +90,12 @@ def qapp():
 def ui_settings_temp_path(tmp_path, monkeypatch):
     path = tmp_path / "ui_settings.json"
     monkeypatch.setattr(ui_settings, "SETTINGS_PATH", path)
+    # снимок в памяти мог остаться от прежних тестов с другим файлом
+    monkeypatch.setattr(ui_settings, "_CACHE", None)
     try:
         yield path
     finally:
+        ui_settings.flush()
         if path.exists():
             path.unlink()
 
@@ -105,6 +111,8 @@ _MODELS = [
     DealExecutor,
     DealCalculation,
     Task,
+    TelegramOutbox,
+    FolderRelocation,
 ]
 
 
@@ -124,6 +132,7 @@ def in_memory_db():
             raise RuntimeError("Refusing to run tests on a non in-memory database")
 
     test_db.create_tables(_MODELS)
+    install_indexes(test_db)
     try:
         yield test_db
     finally:
@@ -141,6 +150,79 @@ def db_transaction(in_memory_db):
         txn.rollback()
 
 
+@pytest.fixture(autouse=True)
+def reset_deal_match_index():
+    """Индекс сопоставления не должен переживать откат транзакции теста."""
+    from services.policies.deal_matching import get_deal_match_index
+
+    get_deal_match_index().invalidate()
+    yield
+    get_deal_match_index().invalidate()
+
+
+@pytest.fixture(autouse=True)
+def reset_dashboard_cache():
+    """Снимок дашборда не должен переживать откат транзакции теста."""
+    from services.dashboard_service import get_dashboard_cache
+
+    get_dashboard_cache().reset()
+    yield
+    get_dashboard_cache().reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_pagination_cache():
+    """Кэш количества записей и курсоров страниц сбрасывается между тестами."""
+    from services.query_utils import get_query_paginator
+
+    get_query_paginator().reset()
+    yield
+    get_query_paginator().reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_distinct_values_cache():
+    """Уникальные значения столбцов не должны переживать откат транзакции теста."""
+    from services.distinct_values import get_distinct_values_provider
+
+    get_distinct_values_provider().reset()
+    yield
+    get_distinct_values_provider().reset()
+
+
+@pytest.fixture(autouse=True)
+def drive_link_resolver():
+    """Очередь ссылок на папки без фонового потока и без обращений к Drive."""
+    from services.drive_links import DriveLinkResolver, set_drive_link_resolver
+
+    resolver = DriveLinkResolver(autostart=False)
+    set_drive_link_resolver(resolver)
+    yield resolver
+    set_drive_link_resolver(None)
+
+
+@pytest.fixture(autouse=True)
+def folder_relocator():
+    """Очередь переноса папок без фонового потока."""
+    from services.folder_relocation import FolderRelocator, set_folder_relocator
+
+    relocator = FolderRelocator(autostart=False)
+    set_folder_relocator(relocator)
+    yield relocator
+    set_folder_relocator(None)
+
+
+@pytest.fixture(autouse=True)
+def ai_cache_temp_dir(tmp_path):
+    """Кэш ИИ в отдельном каталоге теста, а не в кэше пользователя."""
+    from services.ai_cache import AiCache, set_ai_cache
+
+    cache = AiCache(tmp_path / "ai-cache", 16 * 1024 * 1024)
+    set_ai_cache(cache)
+    yield cache
+    set_ai_cache(None)
+
+
 @pytest.fixture()
 def policy_folder_patches(monkeypatch):
     monkeypatch.setattr(ps, "create_policy_folder", lambda *a, **k: None)
@@ -0,0 +1,146 @@
+"""Уведомления об изменении данных для кэшей и индексов.
+
+О сохранении и удалении отдельной записи (``save``, ``create``,
+``delete_instance``) сообщает сама модель (:class:`database.models.BaseModel`).
+После массовых ``update()``/``delete()``/``insert()`` сервисы вызывают
+:func:`notify_changed` сами. Кэши подписываются через :func:`subscribe` и
+сами решают, что пересчитать. Модуль зависит только от peewee, поэтому его
+можно импортировать из любого слоя.
+
+Уведомление внутри транзакции доходит до подписчиков сразу (соединение
+этого потока уже видит изменения) и ещё раз после её завершения, если база
+создана с :class:`NotifyAfterCommitMixin`: кэш, который тем временем
+перечитал запись через соединение другого потока, получил старую версию
+и должен перечитать её снова.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Iterable
+
+from peewee import Model
+
+logger = logging.getLogger(__name__)
+
+#: Обработчик получает класс модели и идентификаторы изменённых записей.
+#: ``None`` вместо идентификаторов означает «изменения неизвестного объёма».
+ChangeListener = Callable[[type[Model], "frozenset[int] | None"], None]
+
+_listeners: list[ChangeListener] = []
+_lock = threading.Lock()
+#: Уведомления открытой транзакции потока: модель → идентификаторы или ``None``.
+_pending = threading.local()
+
+
+def subscribe(listener: ChangeListener) -> ChangeListener:
+    """Подписать обработчик на изменения. Возвращает сам обработчик."""
+
+    with _lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+    return listener
+
+
+def unsubscribe(listener: ChangeListener) -> None:
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def _transaction_database(model: type[Model]):
+    """База модели, если в ней открыта транзакция и она сообщит о фиксации."""
+
+    database = getattr(getattr(model, "_meta", None), "database", None)
+    database = getattr(database, "obj", database)  # peewee.Proxy
+    if not isinstance(database, NotifyAfterCommitMixin):
+        return None
+    return database if database.in_transaction() else None
+
+
+def _remember(model: type[Model], id_set: "frozenset[int] | None") -> None:
+    pending = getattr(_pending, "changes", None)
+    if pending is None:
+        pending = _pending.changes = {}
+    if id_set is None or model in pending and pending[model] is None:
+        pending[model] = None
+    else:
+        pending[model] = pending.get(model, frozenset()) | id_set
+
+
+def _deliver(model: type[Model], id_set: "frozenset[int] | None") -> None:
+    with _lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(model, id_set)
+        except Exception:  # noqa: BLE001 - кэши не должны ломать запись
+            logger.exception(
+                "Ошибка обработчика изменений %s для %s",
+                listener,
+                model.__name__,
+            )
+
+
+def notify_changed(
+    model: type[Model], ids: Iterable[int | None] | int | None = None
+) -> None:
+    """Сообщить подписчикам об изменении записей ``model``.
+
+    Внутри транзакции уведомление повторяется после её завершения.
+    """
+
+    if ids is None:
+        id_set = None
+    elif isinstance(ids, int):
+        id_set = frozenset((ids,))
+    else:
+        id_set = frozenset(item for item in ids if item is not None)
+        if not id_set:
+            return
+
+    if _transaction_database(model) is not None:
+        _remember(model, id_set)
+    _deliver(model, id_set)
+
+
+def flush_pending() -> None:
+    """Повторить уведомления завершившейся транзакции текущего потока."""
+
+    pending = getattr(_pending, "changes", None)
+    if not pending:
+        return
+    _pending.changes = {}
+    for model, id_set in pending.items():
+        _deliver(model, id_set)
+
+
+class NotifyAfterCommitMixin:
+    """Примесь к базе peewee: повторять уведомления транзакции после неё.
+
+    Фиксация и откат одинаково завершают транзакцию: после отката кэши,
+    пересчитанные по незафиксированным данным, тоже должны обновиться.
+    """
+
+    def commit(self):
+        try:
+            return super().commit()
+        finally:
+            flush_pending()
+
+    def rollback(self):
+        try:
+            return super().rollback()
+        finally:
+            flush_pending()
+
+
+__all__ = [
+    "ChangeListener",
+    "NotifyAfterCommitMixin",
+    "flush_pending",
+    "notify_changed",
+    "subscribe",
+    "unsubscribe",
+]
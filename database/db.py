@@ -1,6 +1,50 @@
-from peewee import Proxy
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from peewee import Proxy, SqliteDatabase
 
 # Proxy экземпляр базы данных, инициализируется в database.init
 # или в тестах через main_db.initialize(...)
 
 db = Proxy()
+
+
+def supports_background_connections(database=None) -> bool:
+    """Может ли другой поток открыть своё соединение к той же базе.
+
+    У in-memory SQLite своя база на каждое соединение, поэтому фоновый
+    поток не увидел бы данных основного.
+    """
+
+    database = database if database is not None else getattr(db, "obj", None)
+    if database is None:
+        return False
+    return not (
+        isinstance(database, SqliteDatabase) and database.database in (":memory:", "")
+    )
+
+
+@contextmanager
+def thread_connection(database=None) -> Iterator:
+    """Соединение текущего потока на время блока.
+
+    Для фоновых потоков: соединение открывается (или берётся из пула) при
+    входе и закрывается (возвращается в пул) при выходе. Если у потока
+    соединение уже открыто, оно используется и остаётся открытым — в
+    отличие от ``db.connection_context()``, который закрыл бы его.
+    """
+
+    database = database if database is not None else db
+    opened = database.is_closed()
+    if opened:
+        database.connect()
+    try:
+        yield database
+    finally:
+        if opened and not database.is_closed():
+            database.close()
+
+
+__all__ = ["db", "supports_background_connections", "thread_connection"]
@@ -0,0 +1,124 @@
+"""Выполнение синхронных запросов Peewee из асинхронного кода.
+
+Обработчики Telegram-бота работают в цикле ``asyncio``, а сервисы CRM
+обращаются к базе синхронно. :class:`DatabaseExecutor` выполняет такие
+вызовы в ограниченном пуле потоков: у каждого потока своё соединение
+(состояние соединений Peewee хранится по потокам), которое открывается при
+первом обращении и переиспользуется. Цикл событий при этом не блокируется.
+
+Пример::
+
+    deals = await run_db(es.get_deals_for_executor, user_id)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from peewee import InterfaceError, OperationalError
+
+from .db import db
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+#: Размер пула по умолчанию: не больше соединений, чем выдерживает сервер.
+DEFAULT_MAX_WORKERS = 8
+
+
+class DatabaseExecutor:
+    """Ограниченный пул потоков с собственным соединением у каждого потока."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, database=None) -> None:
+        self.max_workers = max_workers
+        self._database = database
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def database(self):
+        return self._database if self._database is not None else db
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="crm-db"
+                )
+            return self._pool
+
+    def _call(self, func: Callable[..., T], args, kwargs) -> T:
+        database = self.database
+        database.connect(reuse_if_open=True)
+        try:
+            return func(*args, **kwargs)
+        except (InterfaceError, OperationalError):
+            # соединение могло оборваться — следующий вызов откроет новое
+            if not database.in_transaction():
+                database.close()
+            raise
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Выполнить ``func(*args, **kwargs)`` в пуле и дождаться результата."""
+
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._call, func, args, kwargs)
+        return await loop.run_in_executor(self._ensure_pool(), call)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Закрыть соединения потоков и остановить пул."""
+
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        database = self.database
+        workers = getattr(pool, "_max_workers", self.max_workers)
+        barrier = threading.Barrier(workers, timeout=5)
+
+        def close_connection() -> None:
+            # барьер гарантирует, что каждая задача попадёт в свой поток
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+            if not database.is_closed():
+                database.close()
+
+        for _ in range(workers):
+            pool.submit(close_connection)
+        pool.shutdown(wait=wait)
+
+
+_executor: Optional[DatabaseExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> DatabaseExecutor:
+    """Общий для процесса исполнитель запросов."""
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DatabaseExecutor()
+        return _executor
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполнить синхронный вызов сервиса в общем пуле потоков БД."""
+
+    return await get_db_executor().run(func, *args, **kwargs)
+
+
+__all__ = [
+    "DEFAULT_MAX_WORKERS",
+    "DatabaseExecutor",
+    "get_db_executor",
+    "run_db",
+]
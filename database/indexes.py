@@ -0,0 +1,126 @@
+"""Каталог индексов для запросов к активным (не удалённым) записям.
+
+Почти все выборки сервисов начинаются с ``Model.active()``
+(``is_deleted = false``) и дальше фильтруют по внешнему ключу или дате.
+Каталог :data:`INDEX_CATALOGUE` описывает индексы под такие запросы, а
+:func:`install_indexes` создаёт их для текущей СУБД:
+
+* в PostgreSQL — частичные индексы ``... WHERE NOT is_deleted`` по
+  столбцам без ``is_deleted``: удалённые записи в индекс не попадают;
+* в SQLite — составные индексы с ``is_deleted`` на указанной позиции:
+  планировщик SQLite не применяет частичный индекс, если условие запроса
+  передано параметром (``is_deleted = ?``).
+
+Индексы создаются при старте в ``init_from_env`` и миграцией
+``006_soft_delete_indexes``.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Iterable
+
+from peewee import Model, PostgresqlDatabase
+
+from .db import db
+from .models import Deal, Expense, Income, Payment, Policy, Task
+
+logger = logging.getLogger(__name__)
+
+SOFT_DELETE_COLUMN = "is_deleted"
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Индекс таблицы ``model`` по столбцам ``columns``.
+
+    ``columns`` перечисляет столбцы составного индекса SQLite вместе с
+    ``is_deleted``; для частичного индекса PostgreSQL этот столбец
+    убирается и превращается в условие ``WHERE NOT is_deleted``.
+    """
+
+    model: type[Model]
+    columns: tuple[str, ...]
+
+    @property
+    def table(self) -> str:
+        return self.model._meta.table_name
+
+    @property
+    def key_columns(self) -> tuple[str, ...]:
+        return tuple(c for c in self.columns if c != SOFT_DELETE_COLUMN)
+
+    @property
+    def name(self) -> str:
+        return f"{self.table}_{'_'.join(self.key_columns)}_active"
+
+    def create_sql(self, database) -> str:
+        if isinstance(database, PostgresqlDatabase):
+            columns, where = self.key_columns, f' WHERE NOT "{SOFT_DELETE_COLUMN}"'
+        else:
+            columns, where = self.columns, ""
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        return (
+            f'CREATE INDEX IF NOT EXISTS "{self.name}" '
+            f'ON "{self.table}" ({quoted}){where}'
+        )
+
+
+INDEX_CATALOGUE: tuple[IndexSpec, ...] = (
+    # платежи, доходы и расходы полиса/платежа
+    IndexSpec(Payment, ("policy_id", "is_deleted")),
+    IndexSpec(Income, ("payment_id", "is_deleted")),
+    IndexSpec(Expense, ("payment_id", "is_deleted")),
+    IndexSpec(Expense, ("policy_id", "is_deleted")),
+    # полисы сделки и клиента
+    IndexSpec(Policy, ("deal_id", "is_deleted")),
+    IndexSpec(Policy, ("client_id", "is_deleted")),
+    IndexSpec(Deal, ("client_id", "is_deleted")),
+    # диапазоны дат: истекающие полисы, напоминания, отчёты
+    IndexSpec(Policy, ("end_date", "is_deleted")),
+    IndexSpec(Deal, ("reminder_date", "is_deleted")),
+    IndexSpec(Payment, ("payment_date", "is_deleted")),
+    IndexSpec(Income, ("received_date", "is_deleted")),
+    IndexSpec(Expense, ("expense_date", "is_deleted")),
+    # очередь задач: ``dispatch_state = ...`` с сортировкой по ``queued_at``
+    IndexSpec(Task, ("dispatch_state", "is_deleted", "queued_at")),
+    IndexSpec(Task, ("deal_id", "is_deleted")),
+)
+
+
+def install_indexes(
+    database=None, catalogue: Iterable[IndexSpec] = INDEX_CATALOGUE
+) -> list[str]:
+    """Создать недостающие индексы каталога, вернуть имена обработанных.
+
+    Таблицы, которых ещё нет в базе, пропускаются.
+    """
+
+    database = database if database is not None else db.obj
+    installed: list[str] = []
+    for spec in catalogue:
+        if not database.table_exists(spec.table):
+            continue
+        database.execute_sql(spec.create_sql(database))
+        installed.append(spec.name)
+    logger.debug("Индексы каталога: %s", ", ".join(installed))
+    return installed
+
+
+def drop_indexes(
+    database=None, catalogue: Iterable[IndexSpec] = INDEX_CATALOGUE
+) -> None:
+    """Удалить индексы каталога (откат миграции)."""
+
+    database = database if database is not None else db.obj
+    for spec in catalogue:
+        database.execute_sql(f'DROP INDEX IF EXISTS "{spec.name}"')
+
+
+__all__ = [
+    "INDEX_CATALOGUE",
+    "IndexSpec",
+    "drop_indexes",
+    "install_indexes",
+]
@@ -5,7 +5,7 @@
 """
 
 from decimal import Decimal
-from peewee import DecimalField
+from peewee import DecimalField, SqliteDatabase
 from playhouse.migrate import SqliteMigrator, PostgresqlMigrator, migrate
 
 from database.db import db
@@ -13,7 +13,7 @@ from database.db import db
 
 def run() -> None:
     database = db.obj
-    if database.__class__.__name__ == "SqliteDatabase":
+    if isinstance(database, SqliteDatabase):
         migrator = SqliteMigrator(database)
     else:
         migrator = PostgresqlMigrator(database)
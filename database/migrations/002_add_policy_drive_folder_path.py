@@ -4,14 +4,14 @@
     python database/migrations/002_add_policy_drive_folder_path.py
 """
 
-from peewee import CharField
+from peewee import CharField, SqliteDatabase
 from playhouse.migrate import SqliteMigrator, PostgresqlMigrator, migrate
 
 from database.db import db
 
 
 def _get_migrator(database):
-    if database.__class__.__name__ == "SqliteDatabase":
+    if isinstance(database, SqliteDatabase):
         return SqliteMigrator(database)
     return PostgresqlMigrator(database)
 
@@ -0,0 +1,54 @@
+"""Миграция: поисковые индексы для табличного поиска.
+
+Для SQLite создаются теневые таблицы FTS5 (``<table>_fts``) с триггерами
+синхронизации, для PostgreSQL — расширение ``pg_trgm`` и GIN-индексы по
+текстовым столбцам. Приложение создаёт недостающие индексы и при старте,
+но на больших базах удобнее выполнить миграцию заранее.
+
+Запуск:
+    python database/migrations/003_search_indexes.py
+"""
+
+from peewee import SqliteDatabase
+
+from database.db import db
+from database.search_index import (
+    SEARCHABLE_MODELS,
+    PostgresTrigramBackend,
+    SqliteFtsBackend,
+    install_search_indexes,
+    searchable_columns,
+)
+
+
+def run() -> None:
+    database = db.obj
+    models = [
+        model
+        for model in SEARCHABLE_MODELS
+        if database.table_exists(model._meta.table_name)
+    ]
+    backend = install_search_indexes(database, models)
+    tables = ", ".join(model._meta.table_name for model in models)
+    print(f"Поисковые индексы ({backend.name}) созданы для таблиц: {tables}")
+
+
+def rollback() -> None:
+    database = db.obj
+    for model in SEARCHABLE_MODELS:
+        if isinstance(database, SqliteDatabase):
+            fts = SqliteFtsBackend.fts_table(model)
+            for suffix in ("ai", "ad", "au"):
+                database.execute_sql(f'DROP TRIGGER IF EXISTS "{fts}_{suffix}"')
+            database.execute_sql(f'DROP TABLE IF EXISTS "{fts}"')
+        else:
+            for column in searchable_columns(model):
+                name = PostgresTrigramBackend.index_name(model, column)
+                database.execute_sql(f'DROP INDEX IF EXISTS "{name}"')
+
+
+if __name__ == "__main__":
+    from database.init import init_from_env
+
+    init_from_env()
+    run()
@@ -0,0 +1,68 @@
+"""Миграция: нормализованные теневые столбцы для поиска совпадений.
+
+Добавляет в ``client`` столбцы ``phone_norm`` и ``email_norm``, в ``policy`` —
+``vin_norm`` и ``number_norm``, создаёт по ним индексы и заполняет значения
+для существующих строк. Повторный запуск пересчитывает значения, например
+после изменения правил нормализации.
+
+Запуск:
+    python database/migrations/004_normalized_columns.py
+"""
+
+from peewee import CharField, SqliteDatabase
+from playhouse.migrate import SqliteMigrator, PostgresqlMigrator, migrate
+
+from database.db import db
+from database.normalization import NORMALIZED_COLUMNS, backfill_normalized_columns
+
+
+def _get_migrator(database):
+    if isinstance(database, SqliteDatabase):
+        return SqliteMigrator(database)
+    return PostgresqlMigrator(database)
+
+
+def run() -> None:
+    database = db.obj
+    migrator = _get_migrator(database)
+
+    for table, columns in NORMALIZED_COLUMNS.items():
+        existing_columns = {column.name for column in database.get_columns(table)}
+        existing_indexes = {index.name for index in database.get_indexes(table)}
+        operations = []
+        for name in columns:
+            if name not in existing_columns:
+                operations.append(
+                    migrator.add_column(table, name, CharField(null=True))
+                )
+            if f"{table}_{name}" not in existing_indexes:
+                operations.append(migrator.add_index(table, (name,), False))
+        with database.atomic():
+            if operations:
+                migrate(*operations)
+            updated = backfill_normalized_columns(database, table)
+        print(f"{table}: {', '.join(columns)} — обновлено строк: {updated}")
+
+
+def rollback() -> None:
+    database = db.obj
+    migrator = _get_migrator(database)
+
+    for table, columns in NORMALIZED_COLUMNS.items():
+        existing_columns = {column.name for column in database.get_columns(table)}
+        existing_indexes = {index.name for index in database.get_indexes(table)}
+        operations = []
+        for name in columns:
+            if f"{table}_{name}" in existing_indexes:
+                operations.append(migrator.drop_index(table, f"{table}_{name}"))
+            if name in existing_columns:
+                operations.append(migrator.drop_column(table, name))
+        if operations:
+            migrate(*operations)
+
+
+if __name__ == "__main__":
+    from database.init import init_from_env
+
+    init_from_env()
+    run()
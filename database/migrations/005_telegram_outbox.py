@@ -0,0 +1,35 @@
+"""Миграция: таблица очереди исходящих сообщений Telegram.
+
+Запуск:
+    python database/migrations/005_telegram_outbox.py
+"""
+
+from database.db import db
+from database.models import TelegramOutbox
+
+
+def run() -> None:
+    database = db.obj
+
+    if database.table_exists(TelegramOutbox._meta.table_name):
+        print("telegram_outbox уже существует — изменений не требуется.")
+        return
+
+    database.create_tables([TelegramOutbox])
+
+
+def rollback() -> None:
+    database = db.obj
+
+    if not database.table_exists(TelegramOutbox._meta.table_name):
+        print("telegram_outbox отсутствует — откатывать нечего.")
+        return
+
+    database.drop_tables([TelegramOutbox])
+
+
+if __name__ == "__main__":
+    from database.init import init_from_env
+
+    init_from_env()
+    run()
@@ -0,0 +1,34 @@
+"""Миграция: составные и частичные индексы для активных записей.
+
+Создаёт индексы каталога :data:`database.indexes.INDEX_CATALOGUE`: для
+PostgreSQL — частичные ``WHERE NOT is_deleted``, для SQLite — составные с
+``is_deleted``. Приложение создаёт недостающие индексы и при старте, но на
+больших базах удобнее выполнить миграцию заранее.
+
+Запуск:
+    python database/migrations/006_soft_delete_indexes.py
+"""
+
+from database.db import db
+from database.indexes import drop_indexes, install_indexes
+
+
+def run() -> None:
+    database = db.obj
+    with database.atomic():
+        names = install_indexes(database)
+    database.execute_sql("ANALYZE")
+    print(f"Индексы созданы: {', '.join(names) or 'нет таблиц'}")
+
+
+def rollback() -> None:
+    database = db.obj
+    with database.atomic():
+        drop_indexes(database)
+
+
+if __name__ == "__main__":
+    from database.init import init_from_env
+
+    init_from_env()
+    run()
@@ -0,0 +1,35 @@
+"""Миграция: таблица очереди переноса папок после объединения клиентов.
+
+Запуск:
+    python database/migrations/007_folder_relocation.py
+"""
+
+from database.db import db
+from database.models import FolderRelocation
+
+
+def run() -> None:
+    database = db.obj
+
+    if database.table_exists(FolderRelocation._meta.table_name):
+        print("folder_relocation уже существует — изменений не требуется.")
+        return
+
+    database.create_tables([FolderRelocation])
+
+
+def rollback() -> None:
+    database = db.obj
+
+    if not database.table_exists(FolderRelocation._meta.table_name):
+        print("folder_relocation отсутствует — откатывать нечего.")
+        return
+
+    database.drop_tables([FolderRelocation])
+
+
+if __name__ == "__main__":
+    from database.init import init_from_env
+
+    init_from_env()
+    run()
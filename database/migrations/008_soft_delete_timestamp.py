@@ -0,0 +1,75 @@
+"""Миграция: отметка времени мягкого удаления ``deleted_at``.
+
+Добавляет столбец во все таблицы моделей с ``is_deleted``. Каскадное
+удаление (``services/soft_delete.py``) ставит всем записям каскада одну
+отметку, а восстановление снимает пометку только с записей с той же
+отметкой, что и у восстанавливаемого корня.
+
+Запуск:
+    python database/migrations/008_soft_delete_timestamp.py
+"""
+
+from peewee import DateTimeField, SqliteDatabase
+from playhouse.migrate import SqliteMigrator, PostgresqlMigrator, migrate
+
+from database.db import db
+from database.init import ALL_MODELS
+from database.models import SoftDeleteModel
+
+
+def _get_migrator(database):
+    if isinstance(database, SqliteDatabase):
+        return SqliteMigrator(database)
+    return PostgresqlMigrator(database)
+
+
+def _soft_delete_tables() -> list[str]:
+    return [
+        model._meta.table_name
+        for model in ALL_MODELS
+        if issubclass(model, SoftDeleteModel)
+    ]
+
+
+def run() -> None:
+    database = db.obj
+    migrator = _get_migrator(database)
+
+    operations = []
+    for table in _soft_delete_tables():
+        existing_columns = {column.name for column in database.get_columns(table)}
+        if "deleted_at" not in existing_columns:
+            operations.append(
+                migrator.add_column(table, "deleted_at", DateTimeField(null=True))
+            )
+
+    if not operations:
+        print("deleted_at уже существует во всех таблицах — изменений не требуется.")
+        return
+
+    with database.atomic():
+        migrate(*operations)
+
+
+def rollback() -> None:
+    database = db.obj
+    migrator = _get_migrator(database)
+
+    operations = []
+    for table in _soft_delete_tables():
+        existing_columns = {column.name for column in database.get_columns(table)}
+        if "deleted_at" in existing_columns:
+            operations.append(migrator.drop_column(table, "deleted_at"))
+
+    if not operations:
+        print("deleted_at отсутствует — откатывать нечего.")
+        return
+
+    migrate(*operations)
+
+
+if __name__ == "__main__":
+    from database.init import init_from_env
+
+    init_from_env()
+    run()
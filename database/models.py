@@ -9,25 +9,63 @@ from peewee import (
     DateTimeField,
     DecimalField,
     ForeignKeyField,
+    IntegerField,
     TextField,
 )
 
 from database.db import db
+from database import change_events
+from database.normalization import NORMALIZED_COLUMNS
 
 
 class BaseModel(Model):
+    #: Теневые столбцы модели: столбец → (исходное поле, нормализатор).
+    normalized_fields: dict = {}
+
     class Meta:
         database = db
 
+    def save(self, *args, **kwargs):
+        """Сохранить запись, пересчитав нормализованные теневые столбцы.
+
+        Об изменении записи сообщается через :mod:`database.change_events`;
+        массовые ``update()``/``delete()`` сервисы сообщают сами.
+        """
+        if self.normalized_fields:
+            only = kwargs.get("only")
+            names = None if only is None else {getattr(f, "name", f) for f in only}
+            extra = []
+            for target, (source, normalize) in self.normalized_fields.items():
+                if names is not None and source not in names:
+                    continue
+                setattr(self, target, normalize(getattr(self, source)))
+                if names is not None and target not in names:
+                    extra.append(target)
+            if extra:
+                kwargs["only"] = list(only) + extra
+        rows = super().save(*args, **kwargs)
+        change_events.notify_changed(type(self), self._pk)
+        return rows
+
+    def delete_instance(self, *args, **kwargs):
+        """Удалить запись и сообщить кэшам об изменении."""
+        pk = self._pk
+        rows = super().delete_instance(*args, **kwargs)
+        change_events.notify_changed(type(self), pk)
+        return rows
+
 
 class SoftDeleteModel(BaseModel):
     """Base with soft-delete support via is_deleted flag."""
 
     is_deleted = BooleanField(default=False)
+    # у записей, удалённых одним каскадом, одна и та же отметка времени
+    deleted_at = DateTimeField(null=True)
 
     def soft_delete(self) -> None:
         """Mark instance as deleted without physical removal."""
         self.is_deleted = True
+        self.deleted_at = datetime.utcnow()
         self.save()
 
     @classmethod
@@ -43,6 +81,10 @@ class Client(SoftDeleteModel):
     note = TextField(null=True)
     drive_folder_path = CharField(null=True)
     drive_folder_link = CharField(null=True)
+    phone_norm = CharField(null=True, index=True)
+    email_norm = CharField(null=True, index=True)
+
+    normalized_fields = NORMALIZED_COLUMNS["client"]
 
     def __str__(self) -> str:
         return self.name
@@ -95,6 +137,10 @@ class Policy(SoftDeleteModel):
     drive_folder_path = CharField(null=True)
     drive_folder_link = CharField(null=True)
     renewed_to = CharField(null=True)
+    vin_norm = CharField(null=True, index=True)
+    number_norm = CharField(null=True, index=True)
+
+    normalized_fields = NORMALIZED_COLUMNS["policy"]
 
     def __str__(self) -> str:
         client_name = self.client.name if self.client_id else ""
@@ -166,3 +212,47 @@ class DealCalculation(SoftDeleteModel):
     note = TextField(null=True)
     created_at = DateTimeField(default=datetime.utcnow)
 
+
+class TelegramOutbox(BaseModel):
+    """Исходящее сообщение Telegram, ожидающее фоновой отправки."""
+
+    chat_id = BigIntegerField()
+    text = TextField()
+    parse_mode = CharField(null=True)
+    reply_markup = TextField(null=True)
+    # задача, которую нужно связать с отправленным сообщением
+    task = ForeignKeyField(Task, null=True, backref="outbox_messages")
+    status = CharField(default="pending")
+    attempts = IntegerField(default=0)
+    next_attempt_at = DateTimeField(default=datetime.utcnow)
+    locked_until = DateTimeField(null=True)
+    lock_token = CharField(null=True)
+    last_error = TextField(null=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+    sent_at = DateTimeField(null=True)
+
+    class Meta:
+        table_name = "telegram_outbox"
+        indexes = ((("status", "next_attempt_at"), False),)
+
+
+class FolderRelocation(BaseModel):
+    """Перенос папки сделки или полиса к другому клиенту после объединения."""
+
+    # "deal" или "policy"
+    kind = CharField()
+    target_id = IntegerField()
+    old_client_name = CharField()
+    new_client_name = CharField()
+    # общий идентификатор всех переносов одного объединения
+    batch = CharField(index=True)
+    status = CharField(default="pending")
+    attempts = IntegerField(default=0)
+    next_attempt_at = DateTimeField(default=datetime.utcnow)
+    last_error = TextField(null=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+    done_at = DateTimeField(null=True)
+
+    class Meta:
+        table_name = "folder_relocation"
+        indexes = ((("status", "next_attempt_at"), False),)
@@ -0,0 +1,130 @@
+"""Нормализованные копии полей для индексированного поиска совпадений.
+
+Сопоставление полисов со сделками и поиск дубликатов сравнивают VIN, номера
+полисов, телефоны и email без учёта регистра и разделителей. Чтобы такие
+сравнения шли по обычным B-tree индексам, нормализованные значения хранятся
+в теневых столбцах (``vin_norm``, ``number_norm``, ``phone_norm``,
+``email_norm``). Модели заполняют их при сохранении, а
+:func:`backfill_normalized_columns` пересчитывает уже существующие строки.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _clean(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    normalized = str(value).strip().lower()
+    return normalized or None
+
+
+def vin_key(value: Optional[str]) -> Optional[str]:
+    """VIN в нижнем регистре без пробелов и разделителей."""
+
+    normalized = _clean(value)
+    if normalized is None:
+        return None
+    return re.sub(r"[^0-9a-z]", "", normalized) or None
+
+
+def policy_number_key(value: Optional[str]) -> Optional[str]:
+    """Номер полиса в нижнем регистре без пробелов и разделителей."""
+
+    normalized = _clean(value)
+    if normalized is None:
+        return None
+    return re.sub(r"[^0-9a-zа-яё]", "", normalized) or None
+
+
+def phone_key(value: Optional[str]) -> Optional[str]:
+    """Телефон в виде цифр с российским кодом ``7`` вместо ``8``."""
+
+    if value is None:
+        return None
+    digits = re.sub(r"\D", "", str(value))
+    if not digits:
+        return None
+    if len(digits) == 10:
+        digits = "7" + digits
+    elif len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    return digits
+
+
+def email_key(value: Optional[str]) -> Optional[str]:
+    """Email без пробелов по краям и в нижнем регистре."""
+
+    return _clean(value)
+
+
+#: Теневые столбцы таблиц: столбец → (исходное поле, нормализатор).
+NORMALIZED_COLUMNS: dict[str, dict[str, tuple[str, Callable]]] = {
+    "client": {
+        "phone_norm": ("phone", phone_key),
+        "email_norm": ("email", email_key),
+    },
+    "policy": {
+        "vin_norm": ("vehicle_vin", vin_key),
+        "number_norm": ("policy_number", policy_number_key),
+    },
+}
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_normalized_columns(database, table: str) -> int:
+    """Пересчитать теневые столбцы ``table`` для всех строк.
+
+    Возвращает количество изменённых строк.
+    """
+
+    columns = NORMALIZED_COLUMNS[table]
+    targets = list(columns)
+    sources = [columns[target][0] for target in targets]
+    select_sql = 'SELECT "id", {} FROM "{}" ORDER BY "id"'.format(
+        ", ".join(f'"{name}"' for name in sources + targets), table
+    )
+    param = database.param
+    update_sql = 'UPDATE "{}" SET {} WHERE "id" = {}'.format(
+        table,
+        ", ".join(f'"{target}" = {param}' for target in targets),
+        param,
+    )
+
+    pending: list[tuple] = []
+    for row in database.execute_sql(select_sql).fetchall():
+        row_id = row[0]
+        raw = row[1 : 1 + len(sources)]
+        current = tuple(row[1 + len(sources) :])
+        fresh = tuple(
+            columns[target][1](value) for target, value in zip(targets, raw)
+        )
+        if fresh != current:
+            pending.append((*fresh, row_id))
+
+    with database.atomic():
+        for start in range(0, len(pending), BACKFILL_BATCH_SIZE):
+            batch = pending[start : start + BACKFILL_BATCH_SIZE]
+            database.cursor().executemany(update_sql, batch)
+    if pending:
+        logger.info(
+            "Пересчитаны нормализованные поля %s: %d строк", table, len(pending)
+        )
+    return len(pending)
+
+
+__all__ = [
+    "BACKFILL_BATCH_SIZE",
+    "NORMALIZED_COLUMNS",
+    "backfill_normalized_columns",
+    "email_key",
+    "phone_key",
+    "policy_number_key",
+    "vin_key",
+]
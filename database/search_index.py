@@ -0,0 +1,311 @@
+"""Полнотекстовые индексы для поиска по таблицам.
+
+Поиск в таблицах приложения — это подстрочное сравнение ``field LIKE '%x%'``
+по многим полям сразу, которое не может использовать обычные индексы.
+Модуль предоставляет подключаемые бэкенды поиска:
+
+* :class:`SqliteFtsBackend` — теневые таблицы FTS5 с токенизатором
+  ``trigram`` (``<table>_fts``), синхронизируемые триггерами;
+* :class:`PostgresTrigramBackend` — GIN-индексы ``pg_trgm`` по текстовым
+  столбцам;
+* :class:`SearchBackend` — запасной вариант без индексов.
+
+Индексы создаются функцией :func:`install_search_indexes`, которая
+вызывается при инициализации БД и в миграции ``003_search_indexes``.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable, Sequence
+
+from peewee import (
+    SQL,
+    CharField,
+    Field,
+    ForeignKeyField,
+    Model,
+    ModelAlias,
+    Node,
+    PostgresqlDatabase,
+    SqliteDatabase,
+    TextField,
+)
+
+from .db import db
+from .models import (
+    Client,
+    Deal,
+    DealCalculation,
+    Executor,
+    Expense,
+    Income,
+    Policy,
+    Task,
+)
+
+logger = logging.getLogger(__name__)
+
+SEARCHABLE_MODELS: tuple[type[Model], ...] = (
+    Client,
+    Deal,
+    Policy,
+    Task,
+    Income,
+    Expense,
+    Executor,
+    DealCalculation,
+)
+
+#: Триграммы не умеют искать строки короче трёх символов.
+MIN_INDEXED_QUERY_LENGTH = 3
+
+
+def searchable_columns(model: type[Model]) -> tuple[str, ...]:
+    """Вернуть имена текстовых столбцов модели, попадающих в индекс.
+
+    Нормализованные теневые столбцы (``phone_norm`` и т. п.) не индексируются:
+    они дублируют исходные поля.
+    """
+
+    shadow = getattr(model, "normalized_fields", {})
+    return tuple(
+        field.column_name
+        for field in model._meta.sorted_fields
+        if isinstance(field, (CharField, TextField))
+        and not isinstance(field, ForeignKeyField)
+        and field.name not in shadow
+    )
+
+
+def _resolve_model(field: Field) -> type[Model] | None:
+    model = getattr(field, "model", None)
+    if isinstance(model, ModelAlias):
+        model = model.model
+    return model
+
+
+class SearchBackend:
+    """Бэкенд без индексов: весь поиск выполняется через ``LIKE``."""
+
+    name = "like"
+
+    def __init__(self) -> None:
+        self._indexed: dict[type[Model], tuple[str, ...]] = {}
+
+    def install(self, database, models: Iterable[type[Model]]) -> None:
+        """Создать индексы для ``models``; базовый бэкенд ничего не делает."""
+
+    def is_indexed(self, model: type[Model]) -> bool:
+        return model in self._indexed
+
+    def split_fields(
+        self, fields: Iterable[Field], value: str
+    ) -> tuple[list[Node], list[Field]]:
+        """Разделить поля на обслуживаемые индексом и оставшиеся.
+
+        Возвращает список условий ``model.id IN (...)`` по индексам и список
+        полей, которые нужно проверить обычным ``LIKE``.
+        """
+
+        fields = list(fields)
+        if not self._indexed or len(value) < MIN_INDEXED_QUERY_LENGTH:
+            return [], fields
+
+        grouped: dict[object, tuple[object, list[str]]] = {}
+        remaining: list[Field] = []
+        for field in fields:
+            model = _resolve_model(field)
+            columns = self._indexed.get(model) if model is not None else None
+            if not columns or field.column_name not in columns:
+                remaining.append(field)
+                continue
+            key = field.model
+            _, names = grouped.setdefault(key, (field.model, []))
+            if field.column_name not in names:
+                names.append(field.column_name)
+
+        conditions: list[Node] = []
+        for source, names in grouped.values():
+            model = source.model if isinstance(source, ModelAlias) else source
+            subquery = self._match_subquery(model, names, value)
+            conditions.append(source.id.in_(subquery))
+        return conditions, remaining
+
+    def _match_subquery(
+        self, model: type[Model], columns: Sequence[str], value: str
+    ) -> Node:  # pragma: no cover - переопределяется наследниками
+        raise NotImplementedError
+
+
+class SqliteFtsBackend(SearchBackend):
+    """Поиск через теневые таблицы FTS5 с триграммным токенизатором."""
+
+    name = "sqlite-fts5"
+
+    @staticmethod
+    def fts_table(model: type[Model]) -> str:
+        return f"{model._meta.table_name}_fts"
+
+    def install(self, database, models: Iterable[type[Model]]) -> None:
+        for model in models:
+            columns = searchable_columns(model)
+            if not columns:
+                continue
+            try:
+                with database.atomic():
+                    self._install_model(database, model, columns)
+            except Exception:  # noqa: BLE001 - FTS5/trigram может отсутствовать
+                logger.warning(
+                    "Не удалось создать FTS5-индекс для %s, поиск будет "
+                    "выполняться через LIKE",
+                    model._meta.table_name,
+                    exc_info=True,
+                )
+                continue
+            self._indexed[model] = columns
+
+    def _install_model(
+        self, database, model: type[Model], columns: Sequence[str]
+    ) -> None:
+        table = model._meta.table_name
+        fts = self.fts_table(model)
+        cursor = database.execute_sql(f'PRAGMA table_info("{fts}")')
+        existing = tuple(row[1] for row in cursor.fetchall())
+        if existing == tuple(columns):
+            return
+        if existing:
+            database.execute_sql(f'DROP TABLE "{fts}"')
+        for suffix in ("ai", "ad", "au"):
+            database.execute_sql(f'DROP TRIGGER IF EXISTS "{fts}_{suffix}"')
+
+        quoted = ", ".join(f'"{name}"' for name in columns)
+        new_values = ", ".join(f'new."{name}"' for name in columns)
+        old_values = ", ".join(f'old."{name}"' for name in columns)
+        database.execute_sql(
+            f'CREATE VIRTUAL TABLE "{fts}" USING fts5({quoted}, '
+            f"content='{table}', content_rowid='id', tokenize='trigram')"
+        )
+        database.execute_sql(
+            f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{table}" '
+            f'BEGIN INSERT INTO "{fts}"(rowid, {quoted}) '
+            f"VALUES (new.id, {new_values}); END"
+        )
+        database.execute_sql(
+            f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{table}" '
+            f'BEGIN INSERT INTO "{fts}"("{fts}", rowid, {quoted}) '
+            f"VALUES ('delete', old.id, {old_values}); END"
+        )
+        database.execute_sql(
+            f'CREATE TRIGGER "{fts}_au" AFTER UPDATE ON "{table}" '
+            f'BEGIN INSERT INTO "{fts}"("{fts}", rowid, {quoted}) '
+            f"VALUES ('delete', old.id, {old_values}); "
+            f'INSERT INTO "{fts}"(rowid, {quoted}) '
+            f"VALUES (new.id, {new_values}); END"
+        )
+        database.execute_sql(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')')
+        logger.info("Создан FTS5-индекс %s", fts)
+
+    def _match_subquery(
+        self, model: type[Model], columns: Sequence[str], value: str
+    ) -> Node:
+        fts = self.fts_table(model)
+        phrase = value.replace('"', '""')
+        match = "{%s} : \"%s\"" % (" ".join(columns), phrase)
+        return SQL(f'(SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH ?)', [match])
+
+
+class PostgresTrigramBackend(SearchBackend):
+    """Поиск через GIN-индексы ``pg_trgm`` по каждому текстовому столбцу."""
+
+    name = "postgres-trgm"
+
+    @staticmethod
+    def index_name(model: type[Model], column: str) -> str:
+        return f"{model._meta.table_name}_{column}_trgm"
+
+    def install(self, database, models: Iterable[type[Model]]) -> None:
+        try:
+            database.execute_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except Exception:  # noqa: BLE001 - нет прав на расширение
+            logger.warning(
+                "Расширение pg_trgm недоступно, поиск будет выполняться через LIKE",
+                exc_info=True,
+            )
+            return
+        for model in models:
+            columns = searchable_columns(model)
+            if not columns:
+                continue
+            table = model._meta.table_name
+            for column in columns:
+                database.execute_sql(
+                    f'CREATE INDEX IF NOT EXISTS "{self.index_name(model, column)}" '
+                    f'ON "{table}" USING gin ("{column}" gin_trgm_ops)'
+                )
+            self._indexed[model] = columns
+
+    def _match_subquery(
+        self, model: type[Model], columns: Sequence[str], value: str
+    ) -> Node:
+        table = model._meta.table_name
+        pattern = f"%{value}%"
+        where = " OR ".join(f'"{name}" ILIKE %s' for name in columns)
+        return SQL(
+            f'(SELECT "id" FROM "{table}" WHERE {where})',
+            [pattern] * len(columns),
+        )
+
+
+_backends: dict[int, SearchBackend] = {}
+
+
+def _create_backend(database) -> SearchBackend:
+    if isinstance(database, SqliteDatabase):
+        return SqliteFtsBackend()
+    if isinstance(database, PostgresqlDatabase):
+        return PostgresTrigramBackend()
+    return SearchBackend()
+
+
+def get_search_backend(database=None) -> SearchBackend:
+    """Вернуть бэкенд поиска для текущей (или переданной) базы данных."""
+
+    database = database if database is not None else getattr(db, "obj", None)
+    if database is None:
+        return SearchBackend()
+    backend = _backends.get(id(database))
+    if backend is None:
+        backend = _create_backend(database)
+        _backends[id(database)] = backend
+    return backend
+
+
+def install_search_indexes(
+    database=None, models: Iterable[type[Model]] = SEARCHABLE_MODELS
+) -> SearchBackend:
+    """Создать поисковые индексы и включить их использование в запросах."""
+
+    database = database if database is not None else db.obj
+    backend = get_search_backend(database)
+    backend.install(database, models)
+    return backend
+
+
+def reset_search_backend() -> None:
+    """Забыть установленные индексы (например, после пересоздания БД)."""
+
+    _backends.clear()
+
+
+__all__ = [
+    "MIN_INDEXED_QUERY_LENGTH",
+    "PostgresTrigramBackend",
+    "SEARCHABLE_MODELS",
+    "SearchBackend",
+    "SqliteFtsBackend",
+    "get_search_backend",
+    "install_search_indexes",
+    "reset_search_backend",
+    "searchable_columns",
+]
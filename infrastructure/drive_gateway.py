@@ -146,6 +146,40 @@ class DriveGateway:
             return files[0].get("webViewLink")
         return None
 
+    def list_child_folders(self, parent_id: str) -> dict[str, str]:
+        """Вернуть подпапки ``parent_id``: имя → ссылка.
+
+        Одна выборка заменяет отдельные запросы :meth:`find_drive_folder` для
+        каждой папки одного родителя. При совпадении имён берётся первая.
+        """
+
+        service = self._get_service()
+        query = (
+            f"'{_escape_drive_query_value(parent_id)}' in parents and "
+            "mimeType = 'application/vnd.google-apps.folder' and trashed = false"
+        )
+        folders: dict[str, str] = {}
+        page_token = None
+        while True:
+            response = (
+                service.files()
+                .list(
+                    q=query,
+                    fields="nextPageToken, files(name, webViewLink)",
+                    spaces="drive",
+                    pageSize=1000,
+                    pageToken=page_token,
+                )
+                .execute()
+            )
+            for item in response.get("files", []):
+                name, link = item.get("name"), item.get("webViewLink")
+                if name and link:
+                    folders.setdefault(name, link)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return folders
+
     def upload_file(self, local_path: Path, drive_folder_id: str) -> str:
         """Загрузить файл в указанную папку Google Drive."""
 
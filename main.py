@@ -8,6 +8,8 @@ from PySide6.QtWidgets import QApplication
 from config import Settings, get_settings
 from database.init import init_from_env
 from services import executor_service as es
+from services.folder_relocation import get_folder_relocator
+from services.telegram_outbox import start_outbox_sender, stop_outbox_sender
 from core.app_context import get_app_context, init_app_context
 from ui.main_window import MainWindow
 from utils.logging_config import setup_logging
@@ -30,6 +32,9 @@ def main(settings: Settings | None = None) -> int:
 
     # ───── Проверка и подготовка окружения ─────
     es.ensure_executors_from_env(settings)
+    start_outbox_sender(settings)
+    # переносы папок, не завершённые до прошлого выхода
+    get_folder_relocator().schedule()
 
     # ───── GUI ─────
     app = QApplication.instance() or QApplication(sys.argv)
@@ -50,7 +55,10 @@ def main(settings: Settings | None = None) -> int:
 
     window = MainWindow(context=context)
     window.show()
-    return app.exec()
+    try:
+        return app.exec()
+    finally:
+        stop_outbox_sender()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+"""Дисковый кэш извлечённого текста файлов и ответов модели.
+
+Записи адресуются хэшем содержимого: текст файла — SHA-256 его байтов,
+ответ модели — хэш модели, системного промпта и текста запроса. Поэтому
+повторное открытие диалога, повтор распознавания и повторный импорт тех же
+сканов не разбирают PDF и не отправляют запрос заново, а переименование
+файла кэш не сбрасывает.
+
+Каждая запись — отдельный файл в ``<каталог>/<раздел>/<ключ[:2]>/<ключ>``;
+запись атомарна (временный файл и ``os.replace``), поэтому кэшем могут
+пользоваться несколько процессов (пул чтения PDF). Размер ограничен
+``AI_CACHE_MAX_MB``: при превышении удаляются давно не читавшиеся записи
+(время доступа — ``mtime``, чтение его обновляет). ``AI_CACHE_ENABLED=0``
+отключает кэш, :meth:`AiCache.bypass` — на время блока в текущем потоке.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TEXT_SECTION = "text"
+POLICY_SECTION = "policy"
+
+_READ_CHUNK = 1 << 20
+
+
+def file_digest(path: str | os.PathLike) -> str:
+    """SHA-256 содержимого файла."""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(_READ_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_digest(*parts: str) -> str:
+    """SHA-256 набора строк (части разделяются нулевым символом)."""
+
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class AiCache:
+    """Ограниченный по размеру кэш строк на диске с вытеснением LRU."""
+
+    def __init__(
+        self, root: str | os.PathLike, max_bytes: int, *, enabled: bool = True
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        #: размер записей на диске; считается при первой записи
+        self._size: int | None = None
+
+    # --- обход ------------------------------------------------------------
+    @contextmanager
+    def bypass(self) -> Iterator[None]:
+        """Не читать и не пополнять кэш внутри блока (в текущем потоке)."""
+
+        previous = getattr(self._local, "bypass", False)
+        self._local.bypass = True
+        try:
+            yield
+        finally:
+            self._local.bypass = previous
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and not getattr(self._local, "bypass", False)
+
+    # --- доступ -----------------------------------------------------------
+    def _path(self, section: str, key: str) -> Path:
+        return self.root / section / key[:2] / key
+
+    def get(self, section: str, key: str) -> str | None:
+        if not self.active:
+            return None
+        path = self._path(section, key)
+        try:
+            value = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            logger.warning("Не удалось прочитать кэш %s: %s", path, exc)
+            return None
+        try:
+            os.utime(path)
+        except OSError:  # pragma: no cover - запись могли вытеснить
+            pass
+        return value
+
+    def put(self, section: str, key: str, value: str) -> None:
+        if not self.active:
+            return
+        path = self._path(section, key)
+        data = value.encode("utf-8", "surrogatepass")
+        if len(data) > self.max_bytes:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                previous = path.stat().st_size
+            except FileNotFoundError:
+                previous = 0
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp_name, path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except OSError as exc:
+            logger.warning("Не удалось сохранить кэш %s: %s", path, exc)
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self._entries():
+                path.unlink(missing_ok=True)
+            self._size = 0
+
+    # --- вытеснение -------------------------------------------------------
+    def _entries(self) -> list[Path]:
+        if not self.root.exists():
+            return []
+        return [
+            path
+            for path in self.root.glob("*/*/*")
+            if path.is_file() and path.suffix != ".tmp"
+        ]
+
+    def _scan_size(self) -> int:
+        total = 0
+        for path in self._entries():
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+    def _evict(self) -> None:
+        """Удалить давно не читавшиеся записи до 90% лимита."""
+
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        # другие процессы тоже пишут в каталог: размер пересчитывается по диску
+        size = sum(entry[1] for entry in entries)
+        target = self.max_bytes * 9 // 10
+        for _mtime, entry_size, path in entries:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+        self._size = size
+
+
+_cache: AiCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_ai_cache() -> AiCache:
+    """Общий для процесса кэш по настройкам ``AI_CACHE_*``."""
+
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = AiCache(
+                settings.ai_cache_dir,
+                settings.ai_cache_max_mb * 1024 * 1024,
+                enabled=settings.ai_cache_enabled,
+            )
+        return _cache
+
+
+def set_ai_cache(cache: AiCache | None) -> None:
+    """Заменить общий кэш (``None`` — создать заново по настройкам)."""
+
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+__all__ = [
+    "AiCache",
+    "POLICY_SECTION",
+    "TEXT_SECTION",
+    "file_digest",
+    "get_ai_cache",
+    "set_ai_cache",
+    "text_digest",
+]
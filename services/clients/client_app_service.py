@@ -22,6 +22,7 @@ from services.clients.client_service import (
     merge_clients_to_dto,
     update_client_from_command,
 )
+from services.distinct_values import distinct_values
 from .dto import (
     ClientCreateCommand,
     ClientDTO,
@@ -117,6 +118,7 @@ class ClientAppService:
         *,
         column_field: Field | None = None,
         filters: Mapping[str, Any] | None = None,
+        prefix: str | None = None,
     ) -> list[dict[str, Any]]:
         filters = dict(filters or {})
         search_text = str(filters.pop("search_text", "") or "")
@@ -148,27 +150,7 @@ class ClientAppService:
         if target_field is None:
             return []
 
-        values_query = (
-            query.select(target_field)
-            .where(target_field.is_null(False))
-            .distinct()
-            .order_by(target_field.asc())
-        )
-
-        values = [
-            {"value": value, "display": value}
-            for (value,) in values_query.tuples()
-        ]
-
-        if (
-            query.select(target_field)
-            .where(target_field.is_null(True))
-            .limit(1)
-            .exists()
-        ):
-            values.insert(0, {"value": None, "display": "—"})
-
-        return values
+        return distinct_values(query, target_field, prefix=prefix)
 
     def _normalize_order_field(self, order_by: Any | None) -> Any:
         if hasattr(order_by, "name"):
@@ -5,17 +5,23 @@ import re
 import urllib.parse
 import webbrowser
 from datetime import date, datetime
-from typing import Any, Sequence
-from peewee import Model, ModelSelect, fn
+from typing import Any, Iterable, Sequence
+from peewee import JOIN, Model, ModelSelect, fn
 
 from database.models import Client, Deal, Policy, db
+from database.normalization import phone_key
+from database import change_events
 from services.container import get_drive_gateway
 from services.folder_utils import (
     create_client_drive_folder,
     rename_client_folder,
     rename_deal_folder,
-    rename_policy_folder,
 )
+from services.folder_relocation import (
+    enqueue_client_relocations,
+    get_folder_relocator,
+)
+from services.soft_delete import restore_cascade, soft_delete_cascade
 from services.validators import normalize_phone, normalize_full_name
 from services.query_utils import apply_search_and_filters
 from .dto import (
@@ -64,7 +70,7 @@ def get_client_by_phone(phone: str) -> Client | None:
         phone = normalize_phone(phone)
     except ValueError:
         return None
-    return Client.active().where(Client.phone == phone).get_or_none()
+    return Client.active().where(Client.phone_norm == phone_key(phone)).get_or_none()
 
 
 def get_clients_page(
@@ -211,12 +217,13 @@ def find_similar_clients(name: str) -> list[Client]:
     return list(query)
 
 
-def _check_duplicate_phone(phone: str, *, exclude_id: int | None = None) -> None:
+def _check_duplicate_phone(phone: str, *, exclude_ids: Iterable[int] = ()) -> None:
     if not phone:
         return
-    query = Client.active().where(Client.phone == phone)
-    if exclude_id is not None:
-        query = query.where(Client.id != exclude_id)
+    query = Client.active().where(Client.phone_norm == phone_key(phone))
+    exclude_ids = list(exclude_ids)
+    if exclude_ids:
+        query = query.where(Client.id.not_in(exclude_ids))
     existing = query.get_or_none()
     if existing:
         raise DuplicatePhoneError(phone, existing)
@@ -301,7 +308,7 @@ def update_client(client: Client, **kwargs) -> Client:
         updates["name"] = normalize_full_name(updates["name"])
     if "phone" in updates:
         updates["phone"] = normalize_phone(updates["phone"])
-        _check_duplicate_phone(updates["phone"], exclude_id=client.id)
+        _check_duplicate_phone(updates["phone"], exclude_ids=[client.id])
 
     if not updates and not is_active_provided:
         return client
@@ -374,7 +381,12 @@ def merge_clients(
     duplicate_ids: Sequence[int],
     updates: dict | None = None,
 ) -> Client:
-    """Объединить клиентов, перенеся все связанные сущности к основному."""
+    """Объединить клиентов, перенеся все связанные сущности к основному.
+
+    Сделки и полисы дубликатов переходят к основному клиенту наборными
+    ``UPDATE`` в одной транзакции; их папки переносит фоновая очередь
+    :mod:`services.folder_relocation` после фиксации.
+    """
 
     if not duplicate_ids:
         raise ClientMergeError("Список дубликатов пуст")
@@ -396,7 +408,6 @@ def merge_clients(
     duplicates = [clients_by_id[cid] for cid in unique_duplicates]
 
     with db.atomic():
-        gateway = get_drive_gateway()
         logger.info(
             "🔄 Начало объединения клиента id=%s с дубликатами %s",
             primary_client.id,
@@ -421,7 +432,10 @@ def merge_clients(
                     value = normalize_full_name(value)
                 elif key == "phone":
                     value = normalize_phone(value)
-                    _check_duplicate_phone(value, exclude_id=primary_client.id)
+                    # телефон дубликата переходит к основному клиенту
+                    _check_duplicate_phone(
+                        value, exclude_ids=[primary_client.id, *unique_duplicates]
+                    )
                 normalized_updates[key] = value
 
         updates_to_log: dict[str, Any] = {}
@@ -442,72 +456,35 @@ def merge_clients(
                 primary_client.is_deleted = not is_active_value
             primary_client.save()
 
-        for duplicate in duplicates:
-            logger.info(
-                "➡️ Перенос данных клиента id=%s → id=%s",
-                duplicate.id,
-                primary_client.id,
-            )
-            for deal in duplicate.deals:
-                new_path, new_link = rename_deal_folder(
-                    duplicate.name,
-                    deal.description,
-                    primary_client.name,
-                    deal.description,
-                    deal.drive_folder_link,
-                    deal.drive_folder_path,
-                    gateway=gateway,
-                )
-                deal.client = primary_client
-                if new_path and new_path != deal.drive_folder_path:
-                    deal.drive_folder_path = new_path
-                if new_link and new_link != deal.drive_folder_link:
-                    deal.drive_folder_link = new_link
-                deal.save()
-                logger.info(
-                    "📁 Сделка id=%s перенесена к клиенту id=%s",
-                    deal.id,
-                    primary_client.id,
-                )
-
-            for policy in duplicate.policies:
-                old_deal_desc = policy.deal.description if policy.deal_id else None
-                new_deal_desc = (
-                    policy.deal.description if policy.deal_id else None
-                )
-                new_path, new_link = rename_policy_folder(
-                    duplicate.name,
-                    policy.policy_number,
-                    old_deal_desc,
-                    primary_client.name,
-                    policy.policy_number,
-                    new_deal_desc,
-                    policy.drive_folder_link,
-                    gateway=gateway,
-                )
-                policy.client = primary_client
-                fields_to_update = [Policy.client]
-                deal_changed = False
-                if (
-                    policy.deal_id
-                    and policy.deal.client_id != primary_client.id
-                ):
-                    policy.deal = Deal.get_by_id(policy.deal_id)
-                    deal_changed = True
-                if deal_changed:
-                    fields_to_update.append(Policy.deal)
-                if new_path and new_path != policy.drive_folder_path:
-                    policy.drive_folder_path = new_path
-                    fields_to_update.append(Policy.drive_folder_path)
-                if new_link and new_link != policy.drive_folder_link:
-                    policy.drive_folder_link = new_link
-                    fields_to_update.append(Policy.drive_folder_link)
-                policy.save(only=fields_to_update)
-                logger.info(
-                    "📄 Полис id=%s перенесён к клиенту id=%s",
-                    policy.id,
-                    primary_client.id,
-                )
+        duplicate_ids_list = [d.id for d in duplicates]
+        deal_ids = [
+            deal_id
+            for (deal_id,) in Deal.select(Deal.id)
+            .where(Deal.client.in_(duplicate_ids_list))
+            .tuples()
+        ]
+        policy_ids = [
+            policy_id
+            for (policy_id,) in Policy.select(Policy.id)
+            .where(Policy.client.in_(duplicate_ids_list))
+            .tuples()
+        ]
+        # папки переносятся после фиксации транзакции, см. folder_relocation
+        enqueue_client_relocations(duplicate_ids_list, primary_client)
+        if deal_ids:
+            Deal.update(client=primary_client.id).where(
+                Deal.id.in_(deal_ids)
+            ).execute()
+        if policy_ids:
+            Policy.update(client=primary_client.id).where(
+                Policy.id.in_(policy_ids)
+            ).execute()
+        logger.info(
+            "➡️ К клиенту id=%s перенесено сделок: %s, полисов: %s",
+            primary_client.id,
+            len(deal_ids),
+            len(policy_ids),
+        )
 
         notes: list[str] = []
         if primary_client.note:
@@ -534,7 +511,7 @@ def merge_clients(
                         normalized_phone = normalize_phone(duplicate.phone)
                         _check_duplicate_phone(
                             normalized_phone,
-                            exclude_id=primary_client.id,
+                            exclude_ids=[primary_client.id, *duplicate_ids_list],
                         )
                     except ValueError:
                         continue
@@ -551,22 +528,29 @@ def merge_clients(
                 setattr(primary_client, key, value)
             primary_client.save()
 
-        for duplicate in duplicates:
-            duplicate.is_deleted = True
-            duplicate.drive_folder_path = None
-            duplicate.drive_folder_link = None
-            duplicate.save()
-            logger.info(
-                "🗑️ Клиент id=%s помечен удалённым после объединения с id=%s",
-                duplicate.id,
-                primary_client.id,
-            )
+        # отметка deleted_at ставится так же, как при обычном удалении клиента
+        Client.update(
+            is_deleted=True,
+            deleted_at=datetime.utcnow(),
+            drive_folder_path=None,
+            drive_folder_link=None,
+        ).where(Client.id.in_(duplicate_ids_list)).execute()
+        logger.info(
+            "🗑️ Клиенты id=%s помечены удалёнными после объединения с id=%s",
+            ", ".join(map(str, duplicate_ids_list)),
+            primary_client.id,
+        )
 
         logger.info(
             "✅ Завершено объединение клиента id=%s",
             primary_client.id,
         )
+        change_events.notify_changed(Client, [primary_client.id, *duplicate_ids_list])
+        change_events.notify_changed(Deal, deal_ids)
+        change_events.notify_changed(Policy, policy_ids)
 
+    if deal_ids or policy_ids:
+        get_folder_relocator().schedule()
     return primary_client
 
 
@@ -586,7 +570,10 @@ def delete_clients_by_ids(client_ids: Sequence[int]) -> int:
 
     Метод не удаляет записи из базы данных: при одном идентификаторе
     вызывается :func:`mark_client_deleted`, при нескольких —
-    :func:`mark_clients_deleted`, которые лишь помечают клиентов удалёнными.
+    :func:`mark_clients_deleted`. Они помечают удалёнными клиентов вместе
+    с их сделками, полисами, платежами, доходами и расходами (см.
+    :mod:`services.soft_delete`), а сделкам и полисам, как и клиентам,
+    дописывают «deleted» к описанию, номеру и папке.
     """
 
     ids = list(dict.fromkeys(client_ids))
@@ -634,47 +621,94 @@ def get_clients_details_by_ids(client_ids: Sequence[int]) -> list[ClientDetailsD
 # ──────────────────────────── Удаление ─────────────────────────────
 
 
+def _rename_deleted_client_folder(client: Client, gateway) -> None:
+    """Дописать «deleted» к имени и папке уже помеченного клиента."""
+    try:
+        new_name = f"{client.name} deleted"
+        new_path, new_link = rename_client_folder(
+            client.name,
+            new_name,
+            client.drive_folder_link,
+            gateway=gateway,
+        )
+        client.name = new_name
+        client.drive_folder_path = new_path
+        if new_link:
+            client.drive_folder_link = new_link
+        client.save(
+            only=[Client.name, Client.drive_folder_path, Client.drive_folder_link]
+        )
+    except Exception:
+        logger.exception("Не удалось пометить папку клиента удалённой")
+    logger.info("🗑️ Клиент id=%s: %s помечен удалённым", client.id, client.name)
+
+
+def _cascaded_children(client_ids: list[int]) -> tuple[list[Deal], list[Policy]]:
+    """Активные сделки и полисы клиентов, которые удалит каскад."""
+    deals = list(
+        Deal.select(Deal, Client)
+        .join(Client)
+        .where(Deal.client.in_(client_ids) & (Deal.is_deleted == False))
+        .order_by(Deal.id)
+    )
+    policies = list(
+        Policy.select(Policy, Client, Deal)
+        .join(Client)
+        .switch(Policy)
+        .join(Deal, JOIN.LEFT_OUTER)
+        .where(Policy.client.in_(client_ids) & (Policy.is_deleted == False))
+        .order_by(Policy.id)
+    )
+    return deals, policies
+
+
+def _delete_clients_cascade(clients: list[Client]) -> None:
+    """Пометить клиентов удалёнными каскадом и переименовать их папки.
+
+    Сделки и полисы, удалённые вместе с клиентом, получают «deleted» в
+    описании и номере так же, как при удалении по одной. Папки полисов
+    переименовываются до папок сделок, а те — до папки клиента: путь к
+    папке строится по ещё не изменённым именам родителей.
+    """
+    from services.deal_service import rename_deleted_deal_folder
+    from services.policies.policy_service import rename_deleted_policy_folder
+
+    client_ids = [client.id for client in clients]
+    deals, policies = _cascaded_children(client_ids)
+    soft_delete_cascade(Client, client_ids)
+    gateway = get_drive_gateway()
+    for policy in policies:
+        policy.is_deleted = True
+        rename_deleted_policy_folder(policy, gateway)
+    for deal in deals:
+        deal.is_deleted = True
+        rename_deleted_deal_folder(deal, gateway)
+    for client in clients:
+        client.is_deleted = True
+        _rename_deleted_client_folder(client, gateway)
+
+
 def mark_client_deleted(client_id: int):
-    """Помечает клиента как удалённого."""
+    """Помечает клиента удалённым вместе со сделками, полисами и платежами."""
     client = Client.get_or_none(Client.id == client_id)
     if client:
-        client.soft_delete()
-        try:
-            new_name = f"{client.name} deleted"
-            gateway = get_drive_gateway()
-            new_path, new_link = rename_client_folder(
-                client.name,
-                new_name,
-                client.drive_folder_link,
-                gateway=gateway,
-            )
-            client.name = new_name
-            client.drive_folder_path = new_path
-            if new_link:
-                client.drive_folder_link = new_link
-            client.save(
-                only=[Client.name, Client.drive_folder_path, Client.drive_folder_link, Client.is_deleted]
-            )
-        except Exception:
-            logger.exception("Не удалось пометить папку клиента удалённой")
-        logger.info("🗑️ Клиент id=%s: %s помечен удалённым", client.id, client.name)
+        _delete_clients_cascade([client])
     else:
         logger.warning("❗ Клиент с id=%s не найден для удаления", client_id)
 
 
 def mark_clients_deleted(client_ids: list[int]) -> int:
-    """Массово помечает клиентов удалёнными."""
+    """Массово помечает клиентов удалёнными одним каскадом."""
     if not client_ids:
         return 0
 
-    count = 0
-    for cid in client_ids:
-        before = Client.get_or_none(Client.id == cid)
-        if before and not before.is_deleted:
-            mark_client_deleted(cid)
-            count += 1
-    logger.info("🗑️ Помечено удалёнными клиентов: %s", count)
-    return count
+    clients = list(
+        Client.active().where(Client.id.in_(client_ids)).order_by(Client.id)
+    )
+    if clients:
+        _delete_clients_cascade(clients)
+    logger.info("🗑️ Помечено удалёнными клиентов: %s", len(clients))
+    return len(clients)
 
 
 def delete_clients(clients: list[ClientDTO]) -> None:
@@ -694,12 +728,62 @@ def delete_clients(clients: list[ClientDTO]) -> None:
             mark_clients_deleted(ids)
 
 
+def _restored_children(client: Client) -> tuple[list[Deal], list[Policy]]:
+    """Сделки и полисы клиента, удалённые тем же каскадом, что и он сам."""
+
+    def same_deletion(model):
+        if client.deleted_at is None:
+            return model.deleted_at.is_null()
+        return model.deleted_at == client.deleted_at
+
+    deals = list(
+        Deal.select(Deal, Client)
+        .join(Client)
+        .where(
+            (Deal.client == client.id)
+            & (Deal.is_deleted == True)
+            & same_deletion(Deal)
+        )
+        .order_by(Deal.id)
+    )
+    policies = list(
+        Policy.select(Policy, Client, Deal)
+        .join(Client)
+        .switch(Policy)
+        .join(Deal, JOIN.LEFT_OUTER)
+        .where(
+            (Policy.client == client.id)
+            & (Policy.is_deleted == True)
+            & same_deletion(Policy)
+        )
+        .order_by(Policy.id)
+    )
+    return deals, policies
+
+
 def restore_client(client_id: int):
-    """Снимает пометку удаления с клиента."""
+    """Снимает пометку удаления с клиента, его сделок, полисов и платежей.
+
+    Сделкам и полисам, удалённым вместе с клиентом, возвращаются исходные
+    описание, номер и имена папок. Как и при удалении, папки полисов
+    переименовываются раньше папок сделок.
+    """
+    from services.deal_service import rename_restored_deal_folder
+    from services.policies.policy_service import rename_restored_policy_folder
+
     client = Client.get_or_none(Client.id == client_id)
     if client:
-        client.is_deleted = False
-        client.save()
+        deals, policies = [], []
+        if client.is_deleted:
+            deals, policies = _restored_children(client)
+        restore_cascade(Client, [client_id])
+        gateway = get_drive_gateway() if deals or policies else None
+        for policy in policies:
+            policy.is_deleted = False
+            rename_restored_policy_folder(policy, gateway)
+        for deal in deals:
+            deal.is_deleted = False
+            rename_restored_deal_folder(deal, gateway)
         logger.info("✅ Клиент id=%s восстановлен", client_id)
     else:
         logger.warning("❗ Клиент с id=%s не найден для восстановления", client_id)
@@ -26,7 +26,9 @@ class ClientTableController(TableController):
     def _get_total(self, **filters):
         return self.service.count(**filters)
 
-    def get_distinct_values(self, column_key: str, *, column_field=None):
+    def get_distinct_values(
+        self, column_key: str, *, column_field=None, prefix: str | None = None
+    ):
         filters = dict(self.get_filters())
         column_filters = dict(filters.get("column_filters") or {})
         removed = False
@@ -36,10 +38,13 @@ class ClientTableController(TableController):
         if not removed:
             column_filters.pop(column_key, None)
         filters["column_filters"] = column_filters
+        search = {"prefix": prefix} if prefix else {}
         try:
             return self.service.get_distinct_values(
-                column_key, column_field=column_field, filters=filters
+                column_key, column_field=column_field, filters=filters, **search
             )
         except TypeError:
-            return self.service.get_distinct_values(column_key, filters=filters)
+            return self.service.get_distinct_values(
+                column_key, filters=filters, **search
+            )
 
@@ -1,14 +1,33 @@
-"""Функции для получения сводной информации на дашборд."""
-
+"""Функции для получения сводной информации на дашборд.
+
+Главная вкладка использует :class:`DashboardSnapshot` — все виджеты,
+собранные одним проходом по базе в общей транзакции. Снимок кэшируется
+(:func:`get_dashboard_snapshot`) на ``DASHBOARD_TTL`` секунд и сбрасывается
+при изменении задач, полисов, сделок и клиентов через
+:mod:`database.change_events`; изменения из других процессов (бота)
+подхватываются по истечении TTL.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import date, timedelta
 from functools import lru_cache
+from typing import Callable, Optional
 
-from peewee import Case, ModelSelect, fn
+from peewee import JOIN, Case, ModelSelect, fn
 from playhouse.shortcuts import prefetch
 
+from database.db import db
 from database.models import Client, Deal, Policy, Task
+from database import change_events
 from .task_states import SENT
 
+#: Время жизни снимка дашборда, секунд.
+DASHBOARD_TTL = 60.0
+DASHBOARD_LIMIT = 10
+REMINDER_DAYS = 14
+
 
 def get_dashboard_counters() -> dict:
     """Вернуть агрегированные счётчики сущностей и задач."""
@@ -79,34 +98,22 @@ def get_basic_stats() -> dict:
 
 def count_assistant_tasks() -> int:
     """Количество задач, отправленных ассистенту в Telegram."""
-    return (
-        Task.active()
-        .where((Task.dispatch_state == SENT) & (Task.is_done == False))
-        .count()
-    )
+    return get_dashboard_snapshot().counters["tasks"]["assistant"]
 
 
 def count_sent_tasks() -> int:
     """Количество задач, отправленных в Telegram (по ``queued_at``)."""
-    return (
-        Task.active().where(Task.queued_at.is_null(False)).count()
-    )
+    return get_dashboard_snapshot().counters["tasks"]["sent"]
 
 
 def count_working_tasks() -> int:
     """Количество задач, находящихся у помощника в работе."""
-    return (
-        Task.active().where(Task.tg_chat_id.is_null(False)).count()
-    )
+    return get_dashboard_snapshot().counters["tasks"]["working"]
 
 
 def count_unconfirmed_tasks() -> int:
     """Количество задач с заметкой, но не подтверждённых пользователем."""
-    return (
-        Task.active()
-        .where(Task.note.is_null(False) & (Task.is_done == False))
-        .count()
-    )
+    return get_dashboard_snapshot().counters["tasks"]["unconfirmed"]
 
 
 def get_upcoming_tasks(limit: int = 10) -> list[Task]:
@@ -209,3 +216,196 @@ def _policy_dashboard_fields() -> tuple:
 def _policy_dashboard_select() -> ModelSelect:
     """Запрос на выборку полей ``Policy`` с проверкой наличия Drive-колонок."""
     return Policy.select(*_policy_dashboard_fields())
+
+
+# ───────────── снимок дашборда ─────────────
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Данные всех виджетов главной вкладки на один момент времени."""
+
+    counters: dict
+    upcoming_tasks: list[Task]
+    expiring_policies: list[Policy]
+    deal_reminders: list[Deal]
+    reminder_counts: dict[date, int]
+    built_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+
+
+def _upcoming_tasks_joined(limit: int) -> list[Task]:
+    deal_client = Client.alias()
+    policy_client = Client.alias()
+    query = (
+        Task.select(Task, Deal, deal_client, *_policy_dashboard_fields(), policy_client)
+        .join(Deal, JOIN.LEFT_OUTER, on=(Task.deal == Deal.id), attr="deal")
+        .join(
+            deal_client,
+            JOIN.LEFT_OUTER,
+            on=(Deal.client == deal_client.id),
+            attr="client",
+        )
+        .switch(Task)
+        .join(Policy, JOIN.LEFT_OUTER, on=(Task.policy == Policy.id), attr="policy")
+        .join(
+            policy_client,
+            JOIN.LEFT_OUTER,
+            on=(Policy.client == policy_client.id),
+            attr="client",
+        )
+        .where((Task.is_deleted == False) & (Task.is_done == False))
+        .order_by(Task.due_date.asc(), Task.id.asc())
+        .limit(limit)
+    )
+    return list(query)
+
+
+def _expiring_policies_joined(limit: int) -> list[Policy]:
+    query = (
+        Policy.select(*_policy_dashboard_fields(), Client, Deal)
+        .join(Client, JOIN.LEFT_OUTER, on=(Policy.client == Client.id), attr="client")
+        .switch(Policy)
+        .join(Deal, JOIN.LEFT_OUTER, on=(Policy.deal == Deal.id), attr="deal")
+        .where(
+            (Policy.is_deleted == False)
+            & (Policy.end_date.is_null(False))
+            & (
+                Policy.renewed_to.is_null(True)
+                | (Policy.renewed_to == "")
+                | (Policy.renewed_to == "Нет")
+            )
+        )
+        .order_by(Policy.end_date.asc(), Policy.id.asc())
+        .limit(limit)
+    )
+    return list(query)
+
+
+def _deal_reminders_joined(limit: int) -> list[Deal]:
+    query = (
+        Deal.select(Deal, Client)
+        .join(Client, JOIN.LEFT_OUTER, on=(Deal.client == Client.id), attr="client")
+        .where(
+            (Deal.is_deleted == False)
+            & (Deal.is_closed == False)
+            & (Deal.reminder_date.is_null(False))
+        )
+        .order_by(Deal.reminder_date.asc(), Deal.id.asc())
+        .limit(limit)
+    )
+    return list(query)
+
+
+def build_dashboard_snapshot(
+    limit: int = DASHBOARD_LIMIT, reminder_days: int = REMINDER_DAYS
+) -> DashboardSnapshot:
+    """Собрать все виджеты дашборда в одной транзакции.
+
+    Связанные сделки, полисы и клиенты подтягиваются соединениями, а не
+    отдельными запросами ``prefetch``, поэтому снимок строится за пять
+    запросов независимо от содержимого списков.
+    """
+
+    with db.atomic():
+        return DashboardSnapshot(
+            counters=get_dashboard_counters(),
+            upcoming_tasks=_upcoming_tasks_joined(limit),
+            expiring_policies=_expiring_policies_joined(limit),
+            deal_reminders=_deal_reminders_joined(limit),
+            reminder_counts=get_deal_reminder_counts(reminder_days),
+        )
+
+
+class DashboardSnapshotCache:
+    """Последний снимок дашборда с TTL и сбросом при изменениях данных."""
+
+    WATCHED_MODELS = (Task, Policy, Deal, Client)
+
+    def __init__(
+        self,
+        ttl: float = DASHBOARD_TTL,
+        builder: Callable[[], DashboardSnapshot] = build_dashboard_snapshot,
+    ) -> None:
+        self.ttl = ttl
+        self._builder = builder
+        self._lock = threading.RLock()
+        self._snapshot: Optional[DashboardSnapshot] = None
+        self._version = 0
+        self._built_version = -1
+        change_events.subscribe(self._on_change)
+
+    def _on_change(self, model, _ids) -> None:
+        if model in self.WATCHED_MODELS:
+            with self._lock:
+                self._version += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._version += 1
+
+    def peek(self) -> Optional[DashboardSnapshot]:
+        """Последний снимок без обращения к базе (может быть устаревшим)."""
+
+        return self._snapshot
+
+    def is_fresh(self) -> bool:
+        with self._lock:
+            snapshot = self._snapshot
+            return (
+                snapshot is not None
+                and self._built_version == self._version
+                and snapshot.age < self.ttl
+            )
+
+    def refresh(self) -> DashboardSnapshot:
+        """Построить новый снимок и сохранить его."""
+
+        with self._lock:
+            version = self._version
+        snapshot = self._builder()
+        with self._lock:
+            # изменения во время построения оставляют снимок устаревшим
+            if self._snapshot is None or snapshot.built_at >= self._snapshot.built_at:
+                self._snapshot = snapshot
+                self._built_version = version
+        return snapshot
+
+    def get(self) -> DashboardSnapshot:
+        """Свежий снимок: из кэша или построенный заново."""
+
+        if self.is_fresh():
+            return self._snapshot
+        return self.refresh()
+
+
+_cache: Optional[DashboardSnapshotCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_dashboard_cache() -> DashboardSnapshotCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DashboardSnapshotCache()
+        return _cache
+
+
+def get_dashboard_snapshot() -> DashboardSnapshot:
+    """Свежий снимок дашборда (из кэша, если он не устарел)."""
+
+    return get_dashboard_cache().get()
+
+
+def peek_dashboard_snapshot() -> Optional[DashboardSnapshot]:
+    """Последний построенный снимок без обращения к базе."""
+
+    return get_dashboard_cache().peek()
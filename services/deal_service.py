@@ -27,7 +27,7 @@ from database.models import (
     Executor,
 )
 from services.clients import get_client_by_id
-from services.query_utils import apply_search_and_filters
+from services.query_utils import apply_search_and_filters, get_query_paginator
 from services.folder_utils import (
     create_deal_folder,
     find_drive_folder,
@@ -35,6 +35,7 @@ from services.folder_utils import (
     extract_folder_id,
 )
 from services import deal_journal
+from services.soft_delete import DELETED_SUFFIX, soft_delete_cascade
 
 logger = logging.getLogger(__name__)
 
@@ -396,33 +397,62 @@ def update_deal(
 # ──────────────────────────── Удаление ─────────────────────────────
 
 
+def rename_deleted_deal_folder(deal: Deal, gateway: DriveGateway) -> None:
+    """Дописать «deleted» к описанию и папке уже помеченной сделки."""
+    try:
+        from services.folder_utils import rename_deal_folder
+
+        new_desc = f"{deal.description}{DELETED_SUFFIX}"
+        new_path, _ = rename_deal_folder(
+            deal.client.name,
+            deal.description,
+            deal.client.name,
+            new_desc,
+            deal.drive_folder_link,
+            deal.drive_folder_path,
+            gateway=gateway,
+        )
+        deal.description = new_desc
+        deal.drive_folder_path = new_path
+        deal.save(only=[Deal.description, Deal.drive_folder_path])
+        logger.info("Сделка id=%s помечена удалённой", deal.id)
+    except Exception:
+        logger.exception("Не удалось пометить папку сделки удалённой")
+
+
+def rename_restored_deal_folder(deal: Deal, gateway: DriveGateway) -> None:
+    """Убрать «deleted» из описания и папки восстановленной сделки."""
+    if not deal.description.endswith(DELETED_SUFFIX):
+        return
+    try:
+        from services.folder_utils import rename_deal_folder
+
+        new_desc = deal.description[: -len(DELETED_SUFFIX)]
+        new_path, _ = rename_deal_folder(
+            deal.client.name,
+            deal.description,
+            deal.client.name,
+            new_desc,
+            deal.drive_folder_link,
+            deal.drive_folder_path,
+            gateway=gateway,
+        )
+        deal.description = new_desc
+        deal.drive_folder_path = new_path
+        deal.save(only=[Deal.description, Deal.drive_folder_path])
+        logger.info("Сделка id=%s восстановлена", deal.id)
+    except Exception:
+        logger.exception("Не удалось вернуть имя папки восстановленной сделки")
+
+
 def mark_deal_deleted(deal_id: int, *, gateway: DriveGateway | None = None):
+    """Пометить сделку удалённой вместе с её расчётами."""
     with db.atomic():
         deal = Deal.get_or_none(Deal.id == deal_id)
         if deal:
-            deal.soft_delete()
-            try:
-                from services.folder_utils import rename_deal_folder
-
-                resolved_gateway = _resolve_gateway(gateway)
-                new_desc = f"{deal.description} deleted"
-                new_path, _ = rename_deal_folder(
-                    deal.client.name,
-                    deal.description,
-                    deal.client.name,
-                    new_desc,
-                    deal.drive_folder_link,
-                    deal.drive_folder_path,
-                    gateway=resolved_gateway,
-                )
-                deal.description = new_desc
-                deal.drive_folder_path = new_path
-                deal.save(
-                    only=[Deal.description, Deal.drive_folder_path, Deal.is_deleted]
-                )
-                logger.info("Сделка id=%s помечена удалённой", deal.id)
-            except Exception:
-                logger.exception("Не удалось пометить папку сделки удалённой")
+            soft_delete_cascade(Deal, [deal.id])
+            deal.is_deleted = True
+            rename_deleted_deal_folder(deal, _resolve_gateway(gateway))
         else:
             logger.warning("❗ Сделка с id=%s не найдена для удаления", deal_id)
 
@@ -471,6 +501,10 @@ def apply_deal_filters(
 # ──────────────────────────── Пагинация ─────────────────────────────
 
 
+#: Модели, изменения которых влияют на количество сделок в выборке.
+_DEAL_PAGE_MODELS = (Deal, Client, Policy, DealExecutor, Executor)
+
+
 def fetch_deals_page_with_total(
     page: int,
     per_page: int,
@@ -493,9 +527,12 @@ def fetch_deals_page_with_total(
         **filters,
     )
 
-    total = query.count()
+    paginator = get_query_paginator()
+    total = paginator.total(query, models=_DEAL_PAGE_MODELS)
 
     # 👉 Стабильная сортировка
+    keyset_field = None
+    descending = normalized_order_dir == "desc"
     if order_by == "executor":
         query = (
             query.switch(Deal)
@@ -527,6 +564,7 @@ def fetch_deals_page_with_total(
             query = query.order_by(Client.name.asc(), Deal.id.asc())
     elif order_by and hasattr(Deal, order_by):
         order_field = getattr(Deal, order_by)
+        keyset_field = order_field
         query = _ensure_distinct_order_columns(
             query,
             (order_field, f"order_{order_by}"),
@@ -543,9 +581,17 @@ def fetch_deals_page_with_total(
             (Deal.id, "order_deal_id"),
         )
         query = query.order_by(Deal.start_date.desc(), Deal.id.desc())
+        keyset_field, descending = Deal.start_date, True
 
-    offset = (page - 1) * per_page
-    page_query = query.limit(per_page).offset(offset)
+    page_query = paginator.page(
+        query,
+        page,
+        per_page,
+        order_field=keyset_field,
+        id_field=Deal.id,
+        descending=descending,
+        models=_DEAL_PAGE_MODELS,
+    )
 
     from peewee import prefetch
 
@@ -556,6 +602,7 @@ def fetch_deals_page_with_total(
         Policy,
     )
     )
+    paginator.remember(page_query, prefetched_deals)
     if not prefetched_deals:
         return [], total
 
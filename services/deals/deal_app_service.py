@@ -7,13 +7,15 @@ from typing import Mapping, MutableMapping, Sequence
 
 from peewee import JOIN
 
-from database.models import Client, Deal, DealExecutor, Executor
+from database.models import Client, Deal, DealExecutor, Executor, Policy
 from services.deal_service import (
     build_deal_query,
     fetch_deals_page_with_total,
     get_deals_page,
     get_distinct_statuses,
 )
+from services.distinct_values import distinct_values
+from services.query_utils import FilterValues, filter_kind
 
 from .dto import DealRowDTO, deals_to_row_dtos
 
@@ -85,7 +87,9 @@ class DealAppService:
         self,
         column_key: str,
         *,
+        column_field: object | None = None,
         filters: Mapping[str, object] | None = None,
+        prefix: str | None = None,
     ) -> list[dict[str, object]] | None:
         filters = dict(filters or {})
         search_text = str(filters.get("search_text") or "")
@@ -104,124 +108,23 @@ class DealAppService:
         )
 
         if column_key == "executor":
-            executor_query = (
-                Executor.select(Executor.full_name)
-                .join(DealExecutor)
-                .where(DealExecutor.deal.in_(query.select(Deal.id).distinct()))
-                .where(Executor.full_name.is_null(False))
-                .distinct()
-                .order_by(Executor.full_name.asc())
-            )
-            values = [
-                {"value": executor.full_name, "display": executor.full_name}
-                for executor in executor_query
-            ]
-            null_executor_exists = (
-                query.select(Deal.id)
-                .switch(Deal)
+            # у сделки может не быть исполнителя: «—» — сделки без него
+            query = (
+                query.switch(Deal)
                 .join(DealExecutor, JOIN.LEFT_OUTER)
                 .join(Executor, JOIN.LEFT_OUTER)
-                .where(
-                    (DealExecutor.id.is_null(True))
-                    | (Executor.full_name.is_null(True))
-                )
-                .limit(1)
-                .exists()
-            )
-            if null_executor_exists:
-                values.insert(0, {"value": None, "display": "—"})
-            return values
-
-        if column_key == "status":
-            rows = (
-                Deal.select(Deal.status)
-                .where(Deal.id.in_(query.select(Deal.id).distinct()))
-                .where(Deal.status.is_null(False))
-                .distinct()
-                .order_by(Deal.status.asc())
             )
-            values = [
-                {"value": row.status, "display": row.status}
-                for row in rows
-            ]
-            if (
-                query.select(Deal.status)
-                .where(Deal.status.is_null(True))
-                .limit(1)
-                .exists()
-            ):
-                values.insert(0, {"value": None, "display": "—"})
-            return values
-
-        if column_key == "client":
-            rows = (
-                Client.select(Client.name)
-                .join(Deal)
-                .where(Deal.id.in_(query.select(Deal.id).distinct()))
-                .where(Client.name.is_null(False))
-                .distinct()
-                .order_by(Client.name.asc())
-            )
-            values = [
-                {"value": row.name, "display": row.name}
-                for row in rows
-            ]
-            if (
-                query.select(Client.name)
-                .where(Client.name.is_null(True))
-                .limit(1)
-                .exists()
-            ):
-                values.insert(0, {"value": None, "display": "—"})
-            return values
-
-        if column_key == "closed_reason":
-            rows = (
-                Deal.select(Deal.closed_reason)
-                .where(Deal.id.in_(query.select(Deal.id).distinct()))
-                .where(Deal.closed_reason.is_null(False))
-                .distinct()
-                .order_by(Deal.closed_reason.asc())
-            )
-            values = [
-                {"value": row.closed_reason, "display": row.closed_reason}
-                for row in rows
-            ]
-            if (
-                query.select(Deal.closed_reason)
-                .where(Deal.closed_reason.is_null(True))
-                .limit(1)
-                .exists()
-            ):
-                values.insert(0, {"value": None, "display": "—"})
-            return values
 
         target_field = self._COLUMN_FILTER_MAP.get(column_key)
         if target_field is None:
             return None
-
-        rows = (
-            query.select(target_field)
-            .where(target_field.is_null(False))
-            .distinct()
-            .order_by(target_field.asc())
+        return distinct_values(
+            query,
+            target_field,
+            prefix=prefix,
+            models=(Client, Policy, DealExecutor, Executor),
         )
 
-        values = [
-            {"value": value, "display": value}
-            for (value,) in rows.tuples()
-        ]
-
-        if (
-            query.select(target_field)
-            .where(target_field.is_null(True))
-            .limit(1)
-            .exists()
-        ):
-            values.insert(0, {"value": None, "display": "—"})
-
-        return values
-
     # ------------------------------------------------------------------
     # Вспомогательные методы
     # ------------------------------------------------------------------
@@ -239,7 +142,8 @@ class DealAppService:
             normalized = self._normalize_filter_values(value)
             if not normalized:
                 continue
-            converted[field] = normalized
+            # вид фильтра определяет условие SQL (см. query_utils)
+            converted[field] = FilterValues(normalized, kind=filter_kind(value))
         return converted
 
     @staticmethod
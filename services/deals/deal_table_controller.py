@@ -6,7 +6,6 @@ import logging
 from typing import Any
 
 from PySide6.QtCore import Qt, QTimer
-from PySide6.QtWidgets import QApplication, QMessageBox, QProgressDialog
 
 from database.models import Deal
 from services.deal_service import get_deal_by_id, mark_deal_deleted
@@ -58,14 +57,7 @@ class DealTableController(TableController):
     ) -> None:
         self._apply_items(items, total_count)
 
-    def load_data(self) -> None:  # noqa: PLR0915 - сложность аналогична базовой
-        progress = QProgressDialog("Загрузка...", "Отмена", 0, 0, self.view)
-        progress.setWindowModality(Qt.WindowModal)
-        progress.setAutoClose(False)
-        progress.setAutoReset(False)
-        progress.show()
-        QApplication.processEvents()
-
+    def load_data(self) -> None:
         filters = self.get_filters()
         column_filters = filters.get("column_filters")
         logger.debug("column_filters=%s", column_filters)
@@ -87,27 +79,21 @@ class DealTableController(TableController):
         )
 
         order_by = self._normalize_order_by(order_by)
+        page = self.view.page
+        per_page = self.view.per_page
 
         logger.debug("load_data filters=%s sort=%s %s", filters, order_by, order_dir)
 
-        try:
-            items, total = self.service.get_page(
-                self.view.page,
-                self.view.per_page,
+        def run_task() -> tuple[list[DealRowDTO], int]:
+            return self.service.get_page(
+                page,
+                per_page,
                 order_by=order_by,
                 order_dir=order_dir,
                 **filters,
             )
-            self._pending_total = total
-            logger.debug("loaded %d items of %d", len(items), total)
-        except Exception as exc:  # noqa: BLE001
-            logger.exception("Ошибка при загрузке сделок")
-            QMessageBox.critical(self.view, "Ошибка", str(exc))
-            progress.close()
-            return
 
-        progress.close()
-        self._apply_items(items, self._pending_total)
+        self.load_page(run_task)
 
     def _get_page(self, *args: Any, **kwargs: Any) -> list[DealRowDTO]:
         if "order_by" in kwargs:
@@ -125,7 +111,11 @@ class DealTableController(TableController):
         return self.service.count(*args, **kwargs)
 
     def get_distinct_values(
-        self, column_key: str, *, column_field: Any | None = None
+        self,
+        column_key: str,
+        *,
+        column_field: Any | None = None,
+        prefix: str | None = None,
     ):
         filters = self.get_filters()
         column_filters = dict(filters.get("column_filters") or {})
@@ -136,12 +126,15 @@ class DealTableController(TableController):
         if not removed:
             column_filters.pop(column_key, None)
         filters["column_filters"] = column_filters
+        search = {"prefix": prefix} if prefix else {}
         try:
             return self.service.get_distinct_values(
-                column_key, column_field=column_field, filters=filters
+                column_key, column_field=column_field, filters=filters, **search
             )
         except TypeError:
-            return self.service.get_distinct_values(column_key, filters=filters)
+            return self.service.get_distinct_values(
+                column_key, filters=filters, **search
+            )
         except AttributeError:
             return None
 
@@ -0,0 +1,312 @@
+"""Уникальные значения столбцов для меню фильтров в заголовках таблиц.
+
+:class:`DistinctValuesProvider` считает значения одним ``GROUP BY`` по
+отфильтрованной выборке и кэширует результат по сигнатуре запроса
+(модель, столбец, фильтры). Кэш сбрасывается при записи через сервисы
+(:mod:`database.change_events`) и по истечении :data:`DISTINCT_CACHE_TTL`.
+
+У столбцов с большим числом значений (клиенты, номера полисов) возвращаются
+только :data:`DISTINCT_VALUES_LIMIT` самых частых, остальные ищутся по
+префиксу. Если уже закэширован полный список для более короткого префикса,
+новый префикс отбирается из него без запроса к базе.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+
+from peewee import Expression, Field, Model, ModelSelect, SqliteDatabase, fn
+from playhouse.shortcuts import Cast
+
+from database.db import db
+from database import change_events
+from services.query_utils import query_signature
+
+#: Сколько значений возвращать без поиска по префиксу.
+DISTINCT_VALUES_LIMIT = 200
+#: Время жизни закэшированных значений, секунд. Страхует от записей,
+#: прошедших мимо :mod:`database.change_events`.
+DISTINCT_CACHE_TTL = 60.0
+#: Сколько наборов значений (столбец × фильтры) хранить в кэше.
+DISTINCT_CACHE_SIZE = 128
+
+NULL_DISPLAY = "—"
+
+
+class DistinctValues(list):
+    """Варианты фильтра ``[{"value": ..., "display": ...}, ...]``.
+
+    ``NULL`` (если встречается) идёт первым с подписью «—». ``counts`` —
+    число записей для каждого значения. Если ``truncated`` ложно, список
+    полный и отсортирован по значению; иначе это самые частые значения по
+    убыванию частоты, а остальные доступны только через поиск по префиксу.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[dict[str, Any]] = (),
+        *,
+        counts: dict[Any, int] | None = None,
+        truncated: bool = False,
+    ) -> None:
+        super().__init__(items)
+        self.counts = dict(counts or {})
+        self.truncated = truncated
+
+
+class _Entry:
+    __slots__ = ("rows", "truncated", "models", "stored_at")
+
+    def __init__(self, rows, truncated, models, stored_at) -> None:
+        #: пары ``(значение, количество)`` в порядке выдачи
+        self.rows: list[tuple[Any, int]] = rows
+        self.truncated: bool = truncated
+        self.models: frozenset = models
+        self.stored_at: float = stored_at
+
+
+def _query_models(query: ModelSelect, field: Any) -> frozenset:
+    models = {query.model}
+    field_model = getattr(field, "model", None)
+    if isinstance(field_model, type) and issubclass(field_model, Model):
+        models.add(field_model)
+    return frozenset(models)
+
+
+def _field_key(field: Any) -> tuple:
+    model = getattr(field, "model", None)
+    return (getattr(model, "__name__", None), getattr(field, "name", repr(field)))
+
+
+def _sort_key(row: tuple[Any, int]) -> tuple:
+    value = row[0]
+    return (value is not None, value)
+
+
+def _matches_prefix(value: Any, prefix: str) -> bool:
+    return value is not None and str(value).casefold().startswith(prefix)
+
+
+def _glob_prefix(prefix: str) -> str:
+    """Шаблон ``GLOB`` «начинается с ``prefix``» в любом регистре: ``[пП][еЕ]*``."""
+
+    parts = []
+    for char in prefix:
+        cases = sorted({c for c in (char, char.lower(), char.upper()) if len(c) == 1})
+        if len(cases) == 1 and char not in "*?[":
+            parts.append(char)
+        else:
+            parts.append("[" + "".join(cases) + "]")
+    return "".join(parts) + "*"
+
+
+def _prefix_condition(field: Field, prefix: str) -> Expression:
+    """Текст ``field`` начинается с ``prefix`` без учёта регистра.
+
+    ``startswith`` даёт ``ILIKE`` в PostgreSQL, а в SQLite — ``LIKE``, который
+    не учитывает регистр только у латиницы. Для SQLite поэтому строится
+    шаблон ``GLOB`` с обоими регистрами каждой буквы, как и при отборе
+    префикса из кэша (:func:`_matches_prefix`).
+    """
+
+    text = Cast(field, "TEXT")
+    if isinstance(db.obj, SqliteDatabase):
+        return Expression(text, "GLOB", _glob_prefix(prefix))
+    return text.startswith(prefix)
+
+
+class DistinctValuesProvider:
+    """Кэш уникальных значений столбцов по сигнатуре фильтров."""
+
+    def __init__(
+        self,
+        ttl: float = DISTINCT_CACHE_TTL,
+        maxsize: int = DISTINCT_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._epoch = 0
+        change_events.subscribe(self._on_change)
+
+    # --- сброс ------------------------------------------------------------
+    def _on_change(self, model, _ids) -> None:
+        with self._lock:
+            self._epoch += 1
+            for key in [k for k, v in self._entries.items() if model in v.models]:
+                del self._entries[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    # --- выборка ----------------------------------------------------------
+    def values(
+        self,
+        query: ModelSelect,
+        field: Field,
+        *,
+        prefix: str | None = None,
+        limit: int | None = DISTINCT_VALUES_LIMIT,
+        models: Iterable[type[Model]] = (),
+    ) -> DistinctValues:
+        """Уникальные значения ``field`` в выборке ``query``.
+
+        ``query`` — отфильтрованная выборка таблицы без фильтра по самому
+        столбцу; её сортировка отбрасывается, записи считаются по первичному
+        ключу основной модели. ``models`` — модели, присоединённые к
+        ``query``: их запись тоже сбрасывает кэш (основная модель и модель
+        ``field`` учитываются сами). ``prefix`` оставляет значения, текстовое
+        представление которых начинается с него (без учёта регистра),
+        ``limit=None`` снимает ограничение числа значений. Запросы с
+        ``GROUP BY`` не поддерживаются.
+        """
+
+        prefix = (prefix or "").strip() or None
+        base = (query_signature(query), _field_key(field), limit)
+        entry = self._lookup(base + (prefix,))
+        if entry is None and prefix:
+            entry = self._narrow(base, prefix)
+        if entry is None:
+            with self._lock:
+                epoch = self._epoch
+            entry = self._fetch(query, field, prefix, limit, models)
+            with self._lock:
+                # запись во время выборки могла сделать результат устаревшим
+                if epoch == self._epoch:
+                    self._store(base + (prefix,), entry)
+        return self._build(entry)
+
+    def _lookup(self, key: tuple) -> _Entry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._clock() - entry.stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key: tuple, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _narrow(self, base: tuple, prefix: str) -> _Entry | None:
+        """Отобрать ``prefix`` из полного списка для более короткого префикса."""
+
+        for length in range(len(prefix) - 1, -1, -1):
+            shorter = base + (prefix[:length] or None,)
+            entry = self._lookup(shorter)
+            if entry is None or entry.truncated:
+                continue
+            folded = prefix.casefold()
+            rows = [row for row in entry.rows if _matches_prefix(row[0], folded)]
+            narrowed = _Entry(rows, False, entry.models, entry.stored_at)
+            with self._lock:
+                self._store(base + (prefix,), narrowed)
+            return narrowed
+        return None
+
+    def _fetch(
+        self,
+        query: ModelSelect,
+        field: Field,
+        prefix: str | None,
+        limit: int | None,
+        models: Iterable[type[Model]],
+    ) -> _Entry:
+        # выборка остаётся подзапросом «запись → значение», а группировка и
+        # сортировка идут снаружи: у исходной выборки меняется только список
+        # столбцов, её соединения, условия и DISTINCT сохраняются
+        source = (
+            query.select(
+                query.model._meta.primary_key.alias("row_id"), field.alias("value")
+            )
+            .order_by()
+            .limit(None)
+            .offset(None)
+        )
+        if prefix:
+            source = source.where(_prefix_condition(field, prefix))
+        source = source.alias("src")
+        value = source.c.value
+        count = fn.COUNT(fn.DISTINCT(source.c.row_id))
+        grouped = (
+            query.model.select(value, count)
+            .from_(source)
+            .group_by(value)
+            .order_by(value.is_null(False), count.desc(), value.asc())
+        )
+        if limit is not None:
+            # ещё одна строка под ``NULL`` и одна — чтобы заметить обрезку
+            grouped = grouped.limit(limit + 2)
+        # столбец подзапроса приходит из базы как есть (даты SQLite — строки)
+        convert = getattr(field, "python_value", None) or (lambda raw: raw)
+        rows = [(convert(raw), int(total)) for raw, total in grouped.tuples()]
+
+        truncated = False
+        if limit is not None:
+            nulls = [row for row in rows if row[0] is None]
+            values = [row for row in rows if row[0] is not None]
+            truncated = len(values) > limit
+            rows = nulls + values[:limit]
+        if not truncated:
+            try:
+                rows.sort(key=_sort_key)
+            except TypeError:
+                rows.sort(key=lambda row: (row[0] is not None, str(row[0])))
+        return _Entry(
+            rows,
+            truncated,
+            frozenset(models) | _query_models(query, field),
+            self._clock(),
+        )
+
+    @staticmethod
+    def _build(entry: _Entry) -> DistinctValues:
+        items = [
+            {"value": value, "display": NULL_DISPLAY if value is None else value}
+            for value, _count in entry.rows
+        ]
+        return DistinctValues(
+            items, counts=dict(entry.rows), truncated=entry.truncated
+        )
+
+
+_provider: DistinctValuesProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def get_distinct_values_provider() -> DistinctValuesProvider:
+    """Общий для процесса кэш уникальных значений."""
+
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = DistinctValuesProvider()
+        return _provider
+
+
+def distinct_values(query: ModelSelect, field: Field, **kwargs: Any) -> DistinctValues:
+    """Сокращение для :meth:`DistinctValuesProvider.values` общего кэша."""
+
+    return get_distinct_values_provider().values(query, field, **kwargs)
+
+
+__all__ = [
+    "DISTINCT_VALUES_LIMIT",
+    "DistinctValues",
+    "DistinctValuesProvider",
+    "distinct_values",
+    "get_distinct_values_provider",
+]
@@ -0,0 +1,214 @@
+"""Фоновое заполнение ссылок на папки сделок в Google Drive.
+
+Выдача задач из очереди не должна ждать Google Drive внутри транзакции,
+поэтому вместо поиска папки для каждой задачи (``refresh_deal_drive_link``)
+сделки без ссылки ставятся в очередь :func:`schedule_drive_link_refresh`,
+а фоновый поток разбирает её после транзакции.
+
+Поиск группируется по родительской папке клиента: подпапки родителя
+читаются одним запросом :meth:`DriveGateway.list_child_folders` и
+кэшируются на :data:`DRIVE_FOLDERS_TTL` секунд, ссылки всех найденных
+сделок записываются одним коротким ``UPDATE``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Iterable
+
+from peewee import Case
+
+from core.app_context import get_app_context
+from database.db import db, thread_connection
+from database.models import Client, Deal
+from infrastructure.drive_gateway import DriveGateway, sanitize_drive_name
+from database import change_events
+from services.folder_utils import extract_folder_id, sanitize_name
+
+logger = logging.getLogger(__name__)
+
+#: Задержка перед разбором очереди: задачи одной выдачи попадают в одну пачку.
+DRIVE_LINK_DELAY = 0.5
+#: Время жизни списка подпапок родительской папки, секунд.
+DRIVE_FOLDERS_TTL = 300.0
+
+
+def _deal_folder_name(description: str | None) -> str:
+    # как ``refresh_deal_drive_link`` и ``DriveGateway.find_drive_folder``
+    return sanitize_drive_name(sanitize_name(f"Сделка - {description}"))
+
+
+def _missing_link():
+    return Deal.drive_folder_link.is_null(True) | (Deal.drive_folder_link == "")
+
+
+class DriveLinkResolver:
+    """Очередь сделок без ссылки на папку и фоновый поток её разбора.
+
+    ``autostart=False`` отключает поток: очередь разбирается только вызовом
+    :meth:`resolve_pending` (используется в тестах).
+    """
+
+    def __init__(
+        self,
+        gateway: DriveGateway | None = None,
+        *,
+        autostart: bool = True,
+        ttl: float = DRIVE_FOLDERS_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._gateway = gateway
+        self.autostart = autostart
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._pending: set[int] = set()
+        self._deadline = 0.0
+        self._worker: threading.Thread | None = None
+        #: родительская папка → (время чтения, имя подпапки → ссылка)
+        self._folders: dict[str, tuple[float, dict[str, str]]] = {}
+
+    @property
+    def gateway(self) -> DriveGateway:
+        return self._gateway or get_app_context().drive_gateway
+
+    # --- очередь ----------------------------------------------------------
+    def schedule(self, deal_ids: Iterable[int]) -> None:
+        """Поставить сделки в очередь поиска ссылки на папку."""
+
+        ids = {deal_id for deal_id in deal_ids if deal_id is not None}
+        if not ids:
+            return
+        with self._lock:
+            self._pending |= ids
+            self._deadline = time.monotonic() + DRIVE_LINK_DELAY
+            if self.autostart and (
+                self._worker is None or not self._worker.is_alive()
+            ):
+                self._worker = threading.Thread(
+                    target=self._worker_loop, name="drive-links", daemon=True
+                )
+                self._worker.start()
+            self._changed.notify()
+
+    def pending(self) -> frozenset[int]:
+        with self._lock:
+            return frozenset(self._pending)
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._changed:
+                while not self._pending or time.monotonic() < self._deadline:
+                    timeout = (
+                        self._deadline - time.monotonic() if self._pending else None
+                    )
+                    self._changed.wait(timeout)
+            try:
+                with thread_connection():
+                    self.resolve_pending()
+            except Exception:
+                logger.exception("Не удалось обновить ссылки на папки сделок")
+
+    # --- разбор -----------------------------------------------------------
+    def _child_folders(self, parent_id: str) -> dict[str, str]:
+        with self._lock:
+            cached = self._folders.get(parent_id)
+        if cached and self._clock() - cached[0] <= self.ttl:
+            return cached[1]
+        folders = self.gateway.list_child_folders(parent_id)
+        with self._lock:
+            self._folders[parent_id] = (self._clock(), folders)
+        return folders
+
+    def resolve_pending(self) -> int:
+        """Найти ссылки для сделок из очереди. Возвращает число обновлённых.
+
+        Запросы к Google Drive выполняются вне транзакций; сделки, для
+        которых папка не найдена, из очереди убираются.
+        """
+
+        with self._lock:
+            deal_ids, self._pending = self._pending, set()
+        if not deal_ids:
+            return 0
+
+        rows = (
+            Deal.select(Deal.id, Deal.description, Client.drive_folder_link)
+            .join(Client)
+            .where(Deal.id.in_(list(deal_ids)) & _missing_link())
+            .tuples()
+        )
+        by_parent: dict[str, list[tuple[int, str]]] = {}
+        for deal_id, description, client_link in rows:
+            parent_id = extract_folder_id(client_link)
+            if parent_id:
+                by_parent.setdefault(parent_id, []).append(
+                    (deal_id, _deal_folder_name(description))
+                )
+
+        links: dict[int, str] = {}
+        for parent_id, deals in by_parent.items():
+            try:
+                folders = self._child_folders(parent_id)
+            except Exception:
+                logger.exception("Не удалось прочитать папку Drive %s", parent_id)
+                continue
+            for deal_id, name in deals:
+                if name in folders:
+                    links[deal_id] = folders[name]
+        if not links:
+            return 0
+
+        with db.atomic():
+            Deal.update(
+                drive_folder_link=Case(Deal.id, list(links.items()))
+            ).where(Deal.id.in_(list(links)) & _missing_link()).execute()
+        change_events.notify_changed(Deal, links)
+        logger.info("🔗 Обновлены ссылки сделок на Drive: %d", len(links))
+        return len(links)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._folders.clear()
+
+
+_resolver: DriveLinkResolver | None = None
+_resolver_lock = threading.Lock()
+
+
+def get_drive_link_resolver() -> DriveLinkResolver:
+    """Общая для процесса очередь поиска ссылок."""
+
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = DriveLinkResolver()
+        return _resolver
+
+
+def set_drive_link_resolver(resolver: DriveLinkResolver | None) -> None:
+    """Заменить общую очередь (``None`` — создать заново при обращении)."""
+
+    global _resolver
+    with _resolver_lock:
+        _resolver = resolver
+
+
+def schedule_drive_link_refresh(deals: Iterable[Deal]) -> None:
+    """Поставить в очередь сделки ``deals``, у которых нет ссылки на папку."""
+
+    ids = [deal.id for deal in deals if deal and not deal.drive_folder_link]
+    if ids:
+        get_drive_link_resolver().schedule(ids)
+
+
+__all__ = [
+    "DriveLinkResolver",
+    "get_drive_link_resolver",
+    "schedule_drive_link_refresh",
+    "set_drive_link_resolver",
+]
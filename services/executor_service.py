@@ -9,6 +9,7 @@ from services.query_utils import apply_search_and_filters
 from config import Settings, get_settings
 from database.db import db
 from database.models import Client, Deal, DealExecutor, Executor
+from database import change_events
 from .task_states import QUEUED
 
 logger = logging.getLogger(__name__)
@@ -49,6 +50,17 @@ def approve_executor(tg_id: int) -> None:
         logger.info("Исполнитель id=%s одобрен", tg_id)
 
 
+def _notify_deal_executor_changed(deal_id: int) -> None:
+    """Сообщить кэшам о смене исполнителя сделки.
+
+    Назначения удаляются массовым ``delete()``, о котором модели сами не
+    сообщают; столбец «Исполнитель» сделок зависит и от ``DealExecutor``,
+    и от самой сделки.
+    """
+    change_events.notify_changed(DealExecutor)
+    change_events.notify_changed(Deal, deal_id)
+
+
 def assign_executor(deal_id: int, tg_id: int, note: str | None = None) -> None:
     """Assign executor to a deal, replacing previous assignment."""
     executor = ensure_executor(tg_id)
@@ -58,6 +70,7 @@ def assign_executor(deal_id: int, tg_id: int, note: str | None = None) -> None:
         DealExecutor.create(
             deal=deal_id, executor=executor, assigned_date=date.today(), note=note
         )
+    _notify_deal_executor_changed(deal_id)
     logger.info("Исполнитель id=%s назначен на сделку id=%s", tg_id, deal_id)
     if old_executor and old_executor.tg_id != tg_id and is_approved(old_executor.tg_id):
         from services.telegram_service import notify_executor
@@ -73,6 +86,7 @@ def unassign_executor(deal_id: int) -> None:
     ex = get_executor_for_deal(deal_id)
     cnt = DealExecutor.delete().where(DealExecutor.deal_id == deal_id).execute()
     if cnt:
+        _notify_deal_executor_changed(deal_id)
         logger.info("Исполнитель отвязан от сделки id=%s", deal_id)
         if ex and is_approved(ex.tg_id):
             from services.telegram_service import notify_executor
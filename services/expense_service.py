@@ -5,14 +5,15 @@ from decimal import Decimal
 from typing import Any
 
 from peewee import Alias, Field, JOIN, fn, Case
-from playhouse.shortcuts import Cast
 
 from database.db import db
 from database.models import Client, Deal, Expense, Income, Payment, Policy
 from services.payment_service import get_payment_by_id
+from services.soft_delete import soft_delete_cascade
 from services.query_utils import (
-    _normalize_filter_values,
     apply_search_and_filters,
+    filter_condition,
+    get_query_paginator,
     sum_amounts_by_completion,
 )
 
@@ -149,7 +150,8 @@ def mark_expenses_deleted(expense_ids: list[int]) -> int:
     """Массово пометить расходы удалёнными."""
     if not expense_ids:
         return 0
-    return Expense.update(is_deleted=True).where(Expense.id.in_(expense_ids)).execute()
+    # с отметкой ``deleted_at``, чтобы восстановление платежа не вернуло их
+    return soft_delete_cascade(Expense, expense_ids)[Expense]
 
 
 # ─────────────────────────── Добавление ───────────────────────────
@@ -265,6 +267,10 @@ def update_expense(expense: Expense, **kwargs):
 # ──────────────────────── Постраничный вывод ───────────────────────
 
 
+#: Модели, изменения которых влияют на количество расходов в выборке.
+_EXPENSE_PAGE_MODELS = (Expense, Payment, Policy, Client, Deal, Income)
+
+
 def fetch_expenses_page_with_total(
     page: int,
     per_page: int,
@@ -298,9 +304,17 @@ def fetch_expenses_page_with_total(
         order_by=order_by,
         order_dir=normalized_order_dir,
     )
-    total = base_query.count()
-    offset = (page - 1) * per_page
-    paged_query = base_query.limit(per_page).offset(offset)
+    paginator = get_query_paginator()
+    total = paginator.total(base_query, models=_EXPENSE_PAGE_MODELS)
+    paged_query = paginator.page(
+        base_query,
+        page,
+        per_page,
+        order_field=_resolve_expense_order_field(order_by),
+        id_field=Expense.id,
+        descending=normalized_order_dir == "desc",
+        models=_EXPENSE_PAGE_MODELS,
+    )
     return paged_query, total
 
 
@@ -374,33 +388,52 @@ def apply_expense_filters(
         if date_to:
             query = query.where(Expense.expense_date <= date_to)
 
-    def _build_having_condition(expr, value):
-        values, include_null = _normalize_filter_values(value)
-        if not values and not include_null:
-            return None
-        condition = None
-        for item in values:
-            candidate = Cast(expr, "TEXT").contains(item)
-            condition = candidate if condition is None else (condition | candidate)
-        if include_null:
-            null_candidate = expr.is_null(True)
-            condition = (
-                null_candidate if condition is None else (condition | null_candidate)
-            )
-        return condition
-
     for expression, filter_value in (
         (INCOME_TOTAL, income_total_filter),
         (OTHER_EXPENSE_TOTAL, other_expense_total_filter),
         (NET_INCOME, net_income_filter),
     ):
-        having_condition = _build_having_condition(expression, filter_value)
+        having_condition = filter_condition(expression, filter_value)
         if having_condition is not None:
             query = query.having(having_condition)
 
     return query
 
 
+def _resolve_expense_order_field(order_by: str | Field | None):
+    """Поле сортировки расходов по имени ``field`` или ``model__field``."""
+
+    if not order_by:
+        return None
+    field_obj = None
+    if isinstance(order_by, str):
+        field_obj = getattr(Expense, order_by, None)
+        if field_obj is None and "__" in order_by:
+            prefix, attr = order_by.split("__", 1)
+            related_map = {
+                "payment": Payment,
+                "policy": Policy,
+                "client": Client,
+                "deal": Deal,
+            }
+            model = related_map.get(prefix)
+            if model is not None:
+                field_obj = getattr(model, attr, None)
+        if field_obj is None:
+            logger.debug(
+                "Unknown order_by='%s', defaulting to expense_date", order_by
+            )
+            field_obj = Expense.expense_date
+    else:
+        field_obj = order_by
+
+    if isinstance(field_obj, Alias):
+        field_obj = field_obj.unwrap()
+    if hasattr(field_obj, "asc") and hasattr(field_obj, "desc"):
+        return field_obj
+    return None
+
+
 def build_expense_query(
     search_text=None,
     show_deleted=False,
@@ -460,39 +493,13 @@ def build_expense_query(
         expense_date_range=expense_date_range,
         column_filters=column_filters,
     )
-    if order_by:
-        field_obj = None
-        if isinstance(order_by, str):
-            field_obj = getattr(Expense, order_by, None)
-            if field_obj is None and "__" in order_by:
-                prefix, attr = order_by.split("__", 1)
-                related_map = {
-                    "payment": Payment,
-                    "policy": Policy,
-                    "client": Client,
-                    "deal": Deal,
-                }
-                model = related_map.get(prefix)
-                if model is not None:
-                    field_obj = getattr(model, attr, None)
-            if field_obj is None:
-                logger.debug(
-                    "Unknown order_by='%s', defaulting to expense_date", order_by
-                )
-                field_obj = Expense.expense_date
-        else:
-            field_obj = order_by
-
-        if isinstance(field_obj, Alias):
-            field_obj = field_obj.unwrap()
-
-        if field_obj is not None and hasattr(field_obj, "asc") and hasattr(field_obj, "desc"):
-            order_expr = (
-                field_obj.desc()
-                if normalized_order_dir == "desc"
-                else field_obj.asc()
-            )
-            query = query.order_by(order_expr)
+    field_obj = _resolve_expense_order_field(order_by)
+    if field_obj is not None:
+        descending = normalized_order_dir == "desc"
+        order_exprs = [field_obj.desc() if descending else field_obj.asc()]
+        if field_obj is not Expense.id:
+            order_exprs.append(Expense.id.desc() if descending else Expense.id.asc())
+        query = query.order_by(*order_exprs)
     logger.debug("expense query SQL: %s", query.sql())
     return query
 
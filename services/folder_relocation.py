@@ -0,0 +1,377 @@
+"""Очередь переноса папок сделок и полисов после объединения клиентов.
+
+:func:`services.clients.client_service.merge_clients` меняет владельца
+сделок и полисов двумя ``UPDATE`` и в той же транзакции записывает в
+таблицу ``folder_relocation`` по заданию на каждую перенесённую папку
+(:func:`enqueue_client_relocations`). Сами папки — локальные перемещения и
+переименования на Google Drive — переносит :class:`FolderRelocator` уже
+после фиксации транзакции, поэтому время объединения не зависит от
+скорости Drive.
+
+Задания хранятся в базе: незавершённые переносы продолжаются после
+перезапуска приложения (:meth:`FolderRelocator.schedule` при старте).
+Неудачная попытка повторяется с экспоненциальной задержкой, после
+:data:`MAX_ATTEMPTS` попыток задание помечается как ``failed``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from peewee import JOIN, Value, fn
+
+from core.app_context import get_app_context
+from database.db import db, thread_connection
+from database.models import Client, Deal, FolderRelocation, Policy
+from infrastructure.drive_gateway import DriveGateway
+from database import change_events
+from services.folder_utils import rename_deal_folder, rename_policy_folder
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+DEAL = "deal"
+POLICY = "policy"
+
+#: Задержка перед разбором очереди после постановки заданий, секунд.
+RELOCATION_DELAY = 0.5
+#: После стольких неудачных попыток задание помечается как ``failed``.
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30.0
+BACKOFF_MAX = 30 * 60.0
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+def backoff_delay(attempts: int) -> float:
+    """Задержка перед повтором после ``attempts`` неудачных попыток."""
+
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+@dataclass(frozen=True)
+class RelocationProgress:
+    """Состояние переноса папок: всего заданий, выполнено, с ошибкой."""
+
+    total: int
+    done: int
+    failed: int
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.done - self.failed
+
+    @property
+    def finished(self) -> bool:
+        return self.pending == 0
+
+
+def enqueue_client_relocations(
+    duplicate_ids: Iterable[int], primary: Client, batch: str | None = None
+) -> str:
+    """Поставить в очередь перенос папок сделок и полисов ``duplicate_ids``.
+
+    Вызывается в транзакции объединения до смены владельца: задания
+    создаются двумя ``INSERT ... SELECT`` без загрузки записей
+    (значения по умолчанию модели здесь не подставляются, поэтому все
+    столбцы перечислены явно). Сначала
+    идут сделки, затем полисы — в том же порядке, что и при переносе
+    вручную. Возвращает идентификатор пачки заданий.
+    """
+
+    ids = list(duplicate_ids)
+    batch = batch or uuid.uuid4().hex
+    now = _utcnow()
+    columns = [
+        FolderRelocation.kind,
+        FolderRelocation.target_id,
+        FolderRelocation.old_client_name,
+        FolderRelocation.new_client_name,
+        FolderRelocation.batch,
+        FolderRelocation.status,
+        FolderRelocation.attempts,
+        FolderRelocation.next_attempt_at,
+        FolderRelocation.created_at,
+    ]
+    for kind, model in ((DEAL, Deal), (POLICY, Policy)):
+        rows = (
+            model.select(
+                Value(kind),
+                model.id,
+                Client.name,
+                Value(primary.name),
+                Value(batch),
+                Value(PENDING),
+                Value(0),
+                Value(now),
+                Value(now),
+            )
+            .join(Client, on=(model.client == Client.id))
+            .where(model.client.in_(ids))
+            .order_by(model.client, model.id)
+        )
+        FolderRelocation.insert_from(rows, columns).execute()
+    return batch
+
+
+def relocation_progress(batch: str | None = None) -> RelocationProgress:
+    """Прогресс переноса пачки ``batch`` или всей очереди."""
+
+    query = FolderRelocation.select(
+        FolderRelocation.status, fn.COUNT(FolderRelocation.id)
+    )
+    if batch is not None:
+        query = query.where(FolderRelocation.batch == batch)
+    counts = dict(query.group_by(FolderRelocation.status).tuples())
+    return RelocationProgress(
+        total=sum(counts.values()),
+        done=counts.get(DONE, 0),
+        failed=counts.get(FAILED, 0),
+    )
+
+
+class FolderRelocator:
+    """Фоновый разбор очереди ``folder_relocation``.
+
+    ``autostart=False`` отключает поток: очередь разбирается только вызовом
+    :meth:`run_pending` (используется в тестах).
+    """
+
+    def __init__(
+        self,
+        gateway: DriveGateway | None = None,
+        *,
+        autostart: bool = True,
+        clock: Callable[[], datetime] = _utcnow,
+    ) -> None:
+        self._gateway = gateway
+        self.autostart = autostart
+        self._clock = clock
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    @property
+    def gateway(self) -> DriveGateway:
+        return self._gateway or get_app_context().drive_gateway
+
+    # --- поток ------------------------------------------------------------
+    def schedule(self) -> None:
+        """Разобрать очередь в фоне (после объединения или при старте)."""
+
+        if not self.autostart:
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._worker_loop, name="folder-relocation", daemon=True
+                )
+                self._worker.start()
+        self._wake.set()
+
+    def _next_due(self) -> Optional[float]:
+        next_at = (
+            FolderRelocation.select(fn.MIN(FolderRelocation.next_attempt_at))
+            .where(FolderRelocation.status == PENDING)
+            .scalar()
+        )
+        if next_at is None:
+            return None
+        if isinstance(next_at, str):
+            next_at = datetime.fromisoformat(next_at)
+        return max((next_at - self._clock()).total_seconds(), 0.0)
+
+    def _worker_loop(self) -> None:
+        timeout: Optional[float] = None
+        while True:
+            self._wake.wait(timeout)
+            # задания одного объединения разбираются одной пачкой
+            time.sleep(RELOCATION_DELAY)
+            self._wake.clear()
+            try:
+                with thread_connection():
+                    self.run_pending()
+                    timeout = self._next_due()
+            except Exception:
+                logger.exception("Ошибка переноса папок после объединения")
+                timeout = BACKOFF_BASE
+
+    # --- разбор -----------------------------------------------------------
+    def run_pending(
+        self,
+        batch: str | None = None,
+        *,
+        on_progress: Callable[[RelocationProgress], None] | None = None,
+    ) -> int:
+        """Выполнить задания, срок которых наступил. Возвращает число успешных.
+
+        Каждое задание — отдельный перенос папки и короткий ``UPDATE``
+        сделки или полиса; ``on_progress`` вызывается после каждого задания.
+        """
+
+        due = (FolderRelocation.status == PENDING) & (
+            FolderRelocation.next_attempt_at <= self._clock()
+        )
+        if batch is not None:
+            due &= FolderRelocation.batch == batch
+        jobs = list(FolderRelocation.select().where(due).order_by(FolderRelocation.id))
+        if not jobs:
+            return 0
+
+        def target_ids(kind: str):
+            return FolderRelocation.select(FolderRelocation.target_id).where(
+                due & (FolderRelocation.kind == kind)
+            )
+
+        # сделки и полисы всех заданий — двумя запросами до переноса папок
+        targets = {
+            DEAL: {d.id: d for d in Deal.select().where(Deal.id.in_(target_ids(DEAL)))},
+            POLICY: {
+                p.id: p
+                for p in Policy.select(Policy, Deal)
+                .join(Deal, JOIN.LEFT_OUTER)
+                .where(Policy.id.in_(target_ids(POLICY)))
+            },
+        }
+        gateway = self.gateway
+        done = 0
+        changed: dict[type, list[int]] = {Deal: [], Policy: []}
+        for job in jobs:
+            try:
+                target = targets.get(job.kind, {}).get(job.target_id)
+                model, fields = self._relocate(job, target, gateway)
+            except Exception as exc:
+                self._mark_failed_attempt(job, exc)
+            else:
+                # новый путь и отметка о выполнении — одной фиксацией
+                with db.atomic():
+                    if fields:
+                        model.update(fields).where(
+                            model.id == job.target_id
+                        ).execute()
+                    FolderRelocation.update(
+                        status=DONE, done_at=self._clock(), last_error=None
+                    ).where(FolderRelocation.id == job.id).execute()
+                if model is not None:
+                    changed[model].append(job.target_id)
+                done += 1
+            if on_progress is not None:
+                on_progress(relocation_progress(job.batch))
+
+        for model, ids in changed.items():
+            if ids:
+                change_events.notify_changed(model, ids)
+        logger.info("📁 Перенесено папок после объединения: %d из %d", done, len(jobs))
+        return done
+
+    def _relocate(self, job: FolderRelocation, target, gateway: DriveGateway):
+        """Перенести папку задания, вернуть модель и изменившиеся поля."""
+
+        if target is None:
+            return None, {}
+        if job.kind == DEAL:
+            new_path, new_link = rename_deal_folder(
+                job.old_client_name,
+                target.description,
+                job.new_client_name,
+                target.description,
+                target.drive_folder_link,
+                target.drive_folder_path,
+                gateway=gateway,
+            )
+        else:
+            deal_desc = target.deal.description if target.deal_id else None
+            new_path, new_link = rename_policy_folder(
+                job.old_client_name,
+                target.policy_number,
+                deal_desc,
+                job.new_client_name,
+                target.policy_number,
+                deal_desc,
+                target.drive_folder_link,
+                gateway=gateway,
+            )
+
+        model = type(target)
+        fields = {}
+        if new_path and new_path != target.drive_folder_path:
+            fields[model.drive_folder_path] = new_path
+        if new_link and new_link != target.drive_folder_link:
+            fields[model.drive_folder_link] = new_link
+        return model, fields
+
+    def _mark_failed_attempt(self, job: FolderRelocation, exc: Exception) -> None:
+        attempts = job.attempts + 1
+        give_up = attempts >= MAX_ATTEMPTS
+        delay = backoff_delay(attempts)
+        FolderRelocation.update(
+            attempts=attempts,
+            status=FAILED if give_up else PENDING,
+            next_attempt_at=self._clock() + timedelta(seconds=delay),
+            last_error=str(exc),
+        ).where(FolderRelocation.id == job.id).execute()
+        if give_up:
+            logger.warning(
+                "Папка %s id=%s не перенесена к клиенту «%s»: %s",
+                job.kind,
+                job.target_id,
+                job.new_client_name,
+                exc,
+            )
+        else:
+            logger.info(
+                "Перенос папки %s id=%s: попытка %d не удалась (%s), "
+                "повтор через %.0f с",
+                job.kind,
+                job.target_id,
+                attempts,
+                exc,
+                delay,
+            )
+
+
+_relocator: FolderRelocator | None = None
+_relocator_lock = threading.Lock()
+
+
+def get_folder_relocator() -> FolderRelocator:
+    """Общая для процесса очередь переноса папок."""
+
+    global _relocator
+    with _relocator_lock:
+        if _relocator is None:
+            _relocator = FolderRelocator()
+        return _relocator
+
+
+def set_folder_relocator(relocator: FolderRelocator | None) -> None:
+    """Заменить общую очередь (``None`` — создать заново при обращении)."""
+
+    global _relocator
+    with _relocator_lock:
+        _relocator = relocator
+
+
+__all__ = [
+    "DONE",
+    "FAILED",
+    "FolderRelocator",
+    "PENDING",
+    "RelocationProgress",
+    "backoff_delay",
+    "enqueue_client_relocations",
+    "get_folder_relocator",
+    "relocation_progress",
+    "set_folder_relocator",
+]
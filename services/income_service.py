@@ -1,18 +1,20 @@
 """Сервисные функции для учёта доходов."""
 
 import logging
-from typing import Any
+from typing import Any, Iterable
 from decimal import Decimal
 
-from peewee import JOIN, Field, fn, Case
+from peewee import JOIN, Field, fn, Case, chunked
 from peewee import SqliteDatabase
 from database.db import db
 from database.models import Client, Income, Payment, Policy, Deal, Executor, DealExecutor
 from services.query_utils import (
     apply_search_and_filters,
+    get_query_paginator,
     sum_amounts_by_completion,
 )
 from services.payment_service import get_payment_by_id
+from services.soft_delete import soft_delete_cascade
 from services import executor_service as es
 from services.telegram_service import notify_executor
 
@@ -99,11 +101,12 @@ def mark_incomes_deleted(income_ids: list[int]) -> int:
     """Массово пометить доходы удалёнными."""
     if not income_ids:
         return 0
-    return (
-        Income.update(is_deleted=True)
-        .where(Income.id.in_(income_ids))
-        .execute()
-    )
+    # с отметкой ``deleted_at``, чтобы восстановление платежа не вернуло их
+    return soft_delete_cascade(Income, income_ids)[Income]
+
+
+#: Модели, изменения которых влияют на количество доходов в выборке.
+_INCOME_PAGE_MODELS = (Income, Payment, Policy, Client, Deal, DealExecutor, Executor)
 
 
 def fetch_incomes_page_with_total(
@@ -147,7 +150,8 @@ def fetch_incomes_page_with_total(
         join_executor=join_executor,
         **kwargs,
     )
-    total = base_query.count()
+    paginator = get_query_paginator()
+    total = paginator.total(base_query, models=_INCOME_PAGE_MODELS)
     logger.debug(
         "\U0001F50E built income query. join_executor=%s order_by=%s order_dir=%s",
         join_executor,
@@ -164,20 +168,30 @@ def fetch_incomes_page_with_total(
     else:
         field = order_by or Income.received_date
 
+    descending = normalized_order_dir == "desc"
     order_fields = []
+    keyset_field = field
     if (
         (join_executor or (column_filters and Executor.full_name in column_filters))
         and not isinstance(db.obj, SqliteDatabase)
     ):
         order_fields.append(Income.id)
-    order_fields.append(
-        field.desc() if normalized_order_dir == "desc" else field.asc()
-    )
+        keyset_field = None
+    order_fields.append(field.desc() if descending else field.asc())
+    if field is not Income.id:
+        order_fields.append(Income.id.desc() if descending else Income.id.asc())
     sorted_query = base_query.order_by(*order_fields)
     logger.debug("\U0001F4DD final SQL: %s", sorted_query.sql())
 
-    offset = (page - 1) * per_page
-    paged_query = sorted_query.limit(per_page).offset(offset)
+    paged_query = paginator.page(
+        sorted_query,
+        page,
+        per_page,
+        order_field=keyset_field,
+        id_field=Income.id,
+        descending=descending,
+        models=_INCOME_PAGE_MODELS,
+    )
     return paged_query, total
 
 
@@ -215,6 +229,13 @@ def get_incomes_page(
     return paged_query
 
 # Уведомления
+def _income_received_text(income: Income, policy: Policy, deal: Deal) -> str:
+    desc = f" — {deal.description}" if deal and deal.description else ""
+    return (
+        f"💰 По вашей сделке #{deal.id}{desc} поступило вознаграждение {income.amount:g} по полису {policy.policy_number}"
+    )
+
+
 def _notify_income_received(income: Income) -> None:
     payment = income.payment
     if not payment:
@@ -225,12 +246,43 @@ def _notify_income_received(income: Income) -> None:
     ex = es.get_executor_for_deal(policy.deal_id)
     if not ex or not es.is_approved(ex.tg_id):
         return
-    deal = policy.deal
-    desc = f" — {deal.description}" if deal and deal.description else ""
-    text = (
-        f"💰 По вашей сделке #{deal.id}{desc} поступило вознаграждение {income.amount:g} по полису {policy.policy_number}"
-    )
-    notify_executor(ex.tg_id, text)
+    notify_executor(ex.tg_id, _income_received_text(income, policy, policy.deal))
+
+
+def notify_incomes_received(income_ids: Iterable[int]) -> None:
+    """Уведомить исполнителей о поступивших доходах после массовой записи.
+
+    Доходы с полисами и сделками и исполнители сделок выбираются одним
+    запросом на пачку, а не отдельными запросами на каждый доход.
+    """
+    for chunk in chunked(list(income_ids), 500):
+        incomes = list(
+            Income.select(Income, Payment, Policy)
+            .join(Payment)
+            .join(Policy)
+            .where(Income.id.in_(chunk) & Income.received_date.is_null(False))
+        )
+        deal_ids = {income.payment.policy.deal_id for income in incomes} - {None}
+        if not deal_ids:
+            continue
+        executors = {
+            link.deal_id: link.executor
+            for link in DealExecutor.select(DealExecutor, Executor)
+            .join(Executor)
+            .where(DealExecutor.deal.in_(deal_ids) & (Executor.is_active == True))
+        }
+        if not executors:
+            continue
+        deals = {
+            deal.id: deal for deal in Deal.select().where(Deal.id.in_(list(executors)))
+        }
+        for income in incomes:
+            policy = income.payment.policy
+            ex = executors.get(policy.deal_id)
+            if ex is None:
+                continue
+            text = _income_received_text(income, policy, deals[policy.deal_id])
+            notify_executor(ex.tg_id, text)
 
 
 # ─────────────────────────── Добавление ───────────────────────────
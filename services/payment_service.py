@@ -2,7 +2,7 @@
 
 import logging
 from collections import defaultdict
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Any
 
@@ -10,8 +10,11 @@ from peewee import JOIN, ModelSelect, fn, Field, Case
 
 from database.db import db
 from database.models import Client, Expense, Income, Payment, Policy
+from database import change_events
+from services.soft_delete import restore_cascade, soft_delete_cascade
 from services.query_utils import (
     apply_search_and_filters,
+    get_query_paginator,
     sum_amounts_by_completion,
 )
 
@@ -24,7 +27,12 @@ logger = logging.getLogger(__name__)
 def _soft_delete_payment_relations(
     payment: Payment, *, keep_non_zero_expenses: bool
 ) -> tuple[int, int, bool]:
-    """Удалить связанные записи платежа с учётом ненулевых расходов."""
+    """Удалить связанные записи платежа с учётом ненулевых расходов.
+
+    Платёж и его доходы и расходы получают одну отметку ``deleted_at``, как
+    при каскадном удалении, поэтому :func:`restore_payment` возвращает их
+    вместе с платежом.
+    """
 
     def _delete_payment(target: Payment) -> None:
         if hasattr(target, "soft_delete"):
@@ -33,7 +41,6 @@ def _soft_delete_payment_relations(
             target.delete_instance()
 
     incomes_deleted = expenses_deleted = 0
-    has_active_non_zero_expenses = False
     payment_deleted = False
 
     with db.atomic():
@@ -42,14 +49,7 @@ def _soft_delete_payment_relations(
                 (Income.payment == payment) & (Income.is_deleted == False)
             )
         )
-        if active_incomes:
-            income_ids = [income.id for income in active_incomes]
-            incomes_deleted = (
-                Income.update(is_deleted=True)
-                .where(Income.id.in_(income_ids))
-                .execute()
-            )
-
+        income_ids = [income.id for income in active_incomes]
         active_expenses = list(
             Expense.select().where(
                 (Expense.payment == payment) & (Expense.is_deleted == False)
@@ -61,29 +61,37 @@ def _soft_delete_payment_relations(
         non_zero_expense_ids = [
             expense.id for expense in active_expenses if expense.amount != 0
         ]
-
-        if zero_expense_ids:
-            expenses_deleted += (
-                Expense.update(is_deleted=True)
-                .where(Expense.id.in_(zero_expense_ids))
-                .execute()
-            )
-
-        if keep_non_zero_expenses:
-            has_active_non_zero_expenses = bool(non_zero_expense_ids)
-            if not has_active_non_zero_expenses:
-                _delete_payment(payment)
-                payment_deleted = True
-        else:
-            if non_zero_expense_ids:
-                expenses_deleted += (
-                    Expense.update(is_deleted=True)
-                    .where(Expense.id.in_(non_zero_expense_ids))
-                    .execute()
-                )
+        has_active_non_zero_expenses = bool(non_zero_expense_ids)
+        if not (keep_non_zero_expenses and has_active_non_zero_expenses):
             _delete_payment(payment)
             payment_deleted = True
+        expense_ids = zero_expense_ids
+        if not keep_non_zero_expenses:
+            expense_ids = zero_expense_ids + non_zero_expense_ids
+
+        # потомки получают отметку платежа
+        mark = {
+            "is_deleted": True,
+            "deleted_at": getattr(payment, "deleted_at", None) or datetime.utcnow(),
+        }
+        if income_ids:
+            incomes_deleted = (
+                Income.update(**mark).where(Income.id.in_(income_ids)).execute()
+            )
+        if expense_ids:
+            expenses_deleted = (
+                Expense.update(**mark)
+                .where(Expense.id.in_(expense_ids))
+                .execute()
+            )
 
+    # о платеже сообщает его ``save``, о массовых UPDATE — сама функция
+    if incomes_deleted:
+        change_events.notify_changed(Income, income_ids)
+    if expenses_deleted:
+        change_events.notify_changed(
+            Expense, [expense.id for expense in active_expenses]
+        )
     if keep_non_zero_expenses and has_active_non_zero_expenses:
         logger.warning(
             "⚠️ Платёж id=%s не удалён из-за активных ненулевых расходов",
@@ -120,6 +128,10 @@ def get_payments_by_client_id(client_id: int) -> ModelSelect:
     )
 
 
+#: Модели, изменения которых влияют на количество платежей в выборке.
+_PAYMENT_PAGE_MODELS = (Payment, Policy, Client, Income, Expense)
+
+
 def fetch_payments_page_with_total(
     page: int,
     per_page: int,
@@ -146,21 +158,26 @@ def fetch_payments_page_with_total(
         order_dir=normalized_order_dir,
         payment_date_range=payment_date_range,
     )
-    total = base_query.count()
+    paginator = get_query_paginator()
+    total = paginator.total(base_query, models=_PAYMENT_PAGE_MODELS)
     if not order_by:
         order_field = Payment.payment_date
     elif isinstance(order_by, str):
         order_field = getattr(Payment, order_by, Payment.payment_date)
     else:
         order_field = order_by or Payment.payment_date
-    order_expr = (
-        order_field.desc()
-        if normalized_order_dir == "desc"
-        else order_field.asc()
-    )
-    offset = (page - 1) * per_page
-    paged_query = (
-        base_query.order_by(order_expr).offset(offset).limit(per_page)
+    descending = normalized_order_dir == "desc"
+    order_exprs = [order_field.desc() if descending else order_field.asc()]
+    if order_field is not Payment.id:
+        order_exprs.append(Payment.id.desc() if descending else Payment.id.asc())
+    paged_query = paginator.page(
+        base_query.order_by(*order_exprs),
+        page,
+        per_page,
+        order_field=order_field,
+        id_field=Payment.id,
+        descending=descending,
+        models=_PAYMENT_PAGE_MODELS,
     )
     return paged_query, total
 
@@ -195,52 +212,44 @@ def get_payments_page(
 
 
 def mark_payment_deleted(payment_id: int):
-    """Пометить платёж удалённым."""
-    payment = Payment.get_or_none(Payment.id == payment_id)
-    if not payment:
+    """Пометить платёж удалённым вместе с доходами и расходами."""
+    if not Payment.select().where(Payment.id == payment_id).exists():
         logger.warning("❗ Платёж с id=%s не найден для удаления", payment_id)
         return
 
-    income_deleted, expense_deleted, _ = _soft_delete_payment_relations(
-        payment, keep_non_zero_expenses=False
-    )
+    counts = soft_delete_cascade(Payment, [payment_id])
 
     logger.info(
         "🗑️ Помечен удалённым платёж id=%s; доходов=%s, расходов=%s",
         payment_id,
-        income_deleted,
-        expense_deleted,
+        counts[Income],
+        counts[Expense],
     )
 
 
+def mark_payments_deleted(payment_ids: list[int]) -> int:
+    """Массово пометить платежи удалёнными вместе с доходами и расходами."""
+    if not payment_ids:
+        return 0
+    counts = soft_delete_cascade(Payment, payment_ids)
+    return counts[Payment]
+
+
 def restore_payment(payment_id: int):
     """Снять пометку удаления с платежа и связанных записей."""
-    payment = Payment.get_or_none(Payment.id == payment_id)
-    if not payment:
+    if not Payment.select().where(Payment.id == payment_id).exists():
         logger.warning(
             "❗ Платёж с id=%s не найден для восстановления", payment_id
         )
         return
 
-    with db.atomic():
-        income_restored = (
-            Income.update(is_deleted=False)
-            .where(Income.payment == payment)
-            .execute()
-        )
-        expense_restored = (
-            Expense.update(is_deleted=False)
-            .where(Expense.payment == payment)
-            .execute()
-        )
-        payment.is_deleted = False
-        payment.save(only=[Payment.is_deleted])
+    counts = restore_cascade(Payment, [payment_id])
 
     logger.info(
         "♻️ Восстановлен платёж id=%s; доходов=%s, расходов=%s",
         payment_id,
-        income_restored,
-        expense_restored,
+        counts[Income],
+        counts[Expense],
     )
 
 
@@ -254,7 +263,7 @@ def mark_payments_paid(payment_ids: list[int], paid_date: date | None = None) ->
     if not payment_ids:
         return 0
     paid_date = paid_date or date.today()
-    return (
+    updated = (
         Payment.update(actual_payment_date=paid_date)
         .where(
             (Payment.id.in_(payment_ids))
@@ -262,6 +271,8 @@ def mark_payments_paid(payment_ids: list[int], paid_date: date | None = None) ->
         )
         .execute()
     )
+    change_events.notify_changed(Payment, payment_ids)
+    return updated
 
 
 # ─────────────────────────── Добавление ───────────────────────────
@@ -360,22 +371,10 @@ def sync_policy_payments(policy: Policy, payments: list[dict] | None) -> None:
         zero_payment_ids = [pid for (pid,) in subq.tuples()]
         zero_payments_deleted = income_deleted = expense_deleted = 0
         if zero_payment_ids:
-            with db.atomic():
-                zero_payments_deleted = (
-                    Payment.update(is_deleted=True)
-                    .where(Payment.id.in_(zero_payment_ids))
-                    .execute()
-                )
-                income_deleted = (
-                    Income.update(is_deleted=True)
-                    .where(Income.payment_id.in_(zero_payment_ids))
-                    .execute()
-                )
-                expense_deleted = (
-                    Expense.update(is_deleted=True)
-                    .where(Expense.payment_id.in_(zero_payment_ids))
-                    .execute()
-                )
+            counts = soft_delete_cascade(Payment, zero_payment_ids)
+            zero_payments_deleted = counts[Payment]
+            income_deleted = counts.get(Income, 0)
+            expense_deleted = counts.get(Expense, 0)
         logger.info(
             "🗑️ Для полиса id=%s авто-нулевые платежи удалены: платежей=%s, доходов=%s, расходов=%s",
             policy.id,
@@ -29,14 +29,23 @@ from .policy_service import (
     get_unique_policy_field_values,
     attach_premium,
 )
+from .deal_linking import (
+    DealChoice,
+    LinkCandidate,
+    LinkCandidates,
+    resolve_link_candidates,
+)
 from .deal_matching import (
     CandidateDeal,
+    DealMatchIndex,
     DealMatchProfile,
     PolicyMatchProfile,
     build_deal_match_index,
     collect_indirect_matches,
     find_candidate_deals,
+    find_candidate_deals_bulk,
     find_strict_matches,
+    get_deal_match_index,
     make_policy_profile,
 )
 
@@ -63,12 +72,19 @@ __all__ = [
     "get_unique_policy_field_values",
     "attach_premium",
     "add_contractor_expense",
+    "DealChoice",
+    "LinkCandidate",
+    "LinkCandidates",
+    "resolve_link_candidates",
     "CandidateDeal",
+    "DealMatchIndex",
     "DealMatchProfile",
     "PolicyMatchProfile",
     "build_deal_match_index",
     "collect_indirect_matches",
     "find_candidate_deals",
+    "find_candidate_deals_bulk",
     "find_strict_matches",
+    "get_deal_match_index",
     "make_policy_profile",
 ]
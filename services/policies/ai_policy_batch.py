@@ -0,0 +1,272 @@
+"""Параллельное распознавание пачки файлов полисов.
+
+Файлы обрабатываются конвейером: текст PDF извлекается в пуле процессов
+(разбор PyPDF2 нагружает процессор и держит GIL), а запросы к модели идут
+в ограниченном пуле потоков — не больше ``AI_POLICY_CONCURRENCY``
+одновременно. Распознавание файла начинается, как только прочитан его
+текст, не дожидаясь остальных.
+
+Результаты возвращаются в порядке файлов. Ошибка одного файла записывается
+в его :class:`PolicyFileResult` и не прерывает остальные. Отдельный файл или
+всю пачку можно отменить через :meth:`PolicyBatch.cancel`.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import (
+    CancelledError,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from services.policies import ai_policy_service
+from services.policies.ai_policy_service import (
+    AiPolicyError,
+    _read_text,
+    recognize_policy_interactive,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGE_READING = "reading"
+STAGE_RECOGNIZING = "recognizing"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+STAGE_CANCELLED = "cancelled"
+
+#: ``progress_cb(index, path, stage)`` — смена этапа обработки файла.
+ProgressCallback = Callable[[int, str, str], None]
+
+
+@dataclass
+class PolicyFileResult:
+    """Итог распознавания одного файла."""
+
+    path: str
+    data: dict | None = None
+    transcript: str = ""
+    error: str | None = None
+    cancelled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None
+
+
+class PolicyBatch:
+    """Конвейер распознавания файлов полисов с ограниченным параллелизмом.
+
+    ``read_executor`` — пул для извлечения текста; по умолчанию для
+    нескольких PDF создаётся пул процессов, иначе текст читается в потоках.
+    ``recognize`` и ``read_text`` подменяются в тестах.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str | os.PathLike],
+        *,
+        llm_workers: int | None = None,
+        read_executor: Executor | None = None,
+        progress_cb: ProgressCallback | None = None,
+        recognize: Callable[..., tuple] = recognize_policy_interactive,
+        read_text: Callable[[str], str] = _read_text,
+    ) -> None:
+        self.paths = [str(path) for path in paths]
+        self.llm_workers = max(
+            1, llm_workers or ai_policy_service.settings.ai_policy_concurrency
+        )
+        self._read_executor = read_executor
+        self._progress_cb = progress_cb
+        self._recognize = recognize
+        self._read_text = read_text
+        self._lock = threading.Lock()
+        self._cancel_all = False
+        self._cancelled: set[int] = set()
+        self._reads: dict[int, Future] = {}
+
+    # --- отмена -----------------------------------------------------------
+    def cancel(self, index: int | None = None) -> None:
+        """Отменить файл с номером ``index`` или всю пачку."""
+
+        with self._lock:
+            if index is None:
+                self._cancel_all = True
+                futures = list(self._reads.values())
+            else:
+                self._cancelled.add(index)
+                futures = [self._reads[index]] if index in self._reads else []
+        for future in futures:
+            future.cancel()
+
+    def is_cancelled(self, index: int) -> bool:
+        with self._lock:
+            return self._cancel_all or index in self._cancelled
+
+    # --- обработка --------------------------------------------------------
+    def _emit(self, index: int, stage: str) -> None:
+        if self._progress_cb is None:
+            return
+        try:
+            self._progress_cb(index, self.paths[index], stage)
+        except Exception:  # pragma: no cover - ошибка подписчика
+            logger.exception("Ошибка обработчика прогресса распознавания")
+
+    def _make_read_pool(self) -> tuple[Executor, bool]:
+        if self._read_executor is not None:
+            return self._read_executor, False
+        pdfs = sum(path.lower().endswith(".pdf") for path in self.paths)
+        if pdfs > 1:
+            try:
+                # ``spawn``: копировать процесс с потоками Qt через fork нельзя
+                return (
+                    ProcessPoolExecutor(
+                        max_workers=min(pdfs, os.cpu_count() or 1),
+                        mp_context=multiprocessing.get_context("spawn"),
+                    ),
+                    True,
+                )
+            except (OSError, NotImplementedError) as exc:
+                logger.warning(
+                    "Пул процессов недоступен, PDF читаются в потоках: %s", exc
+                )
+        return (
+            ThreadPoolExecutor(
+                max_workers=min(len(self.paths), 4), thread_name_prefix="ai-read"
+            ),
+            True,
+        )
+
+    def _text(self, index: int, future: Future) -> str | None:
+        """Текст файла или ``None``, если файл отменён или не прочитан."""
+
+        result = self._results[index]
+        try:
+            return future.result()
+        except CancelledError:
+            result.cancelled = True
+        except BrokenProcessPool:
+            logger.warning("Пул процессов прерван, %s читается повторно", result.path)
+            try:
+                return self._read_text(result.path)
+            except Exception as exc:
+                result.error = f"Не удалось прочитать файл: {exc}"
+        except Exception as exc:
+            result.error = f"Не удалось прочитать файл: {exc}"
+        self._emit(index, STAGE_CANCELLED if result.cancelled else STAGE_FAILED)
+        return None
+
+    def _recognize_one(self, index: int, text: str) -> None:
+        result = self._results[index]
+        if self.is_cancelled(index):
+            result.cancelled = True
+            self._emit(index, STAGE_CANCELLED)
+            return
+        self._emit(index, STAGE_RECOGNIZING)
+        try:
+            data, transcript, _ = self._recognize(
+                text, cancel_cb=lambda: self.is_cancelled(index)
+            )
+        except InterruptedError:
+            result.cancelled = True
+            self._emit(index, STAGE_CANCELLED)
+            return
+        except AiPolicyError as exc:
+            result.error = str(exc)
+            result.transcript = exc.transcript
+        except Exception as exc:
+            logger.exception("Ошибка распознавания %s", result.path)
+            result.error = str(exc)
+        else:
+            result.data = data
+            result.transcript = transcript
+            self._emit(index, STAGE_DONE)
+            return
+        self._emit(index, STAGE_FAILED)
+
+    def read_texts(self) -> list[str]:
+        """Только извлечь текст всех файлов тем же пулом, без распознавания.
+
+        Тексты возвращаются в порядке файлов; ошибка чтения любого файла
+        поднимается после обработки.
+        """
+
+        read_pool, own_pool = self._make_read_pool()
+        try:
+            return list(read_pool.map(self._read_text, self.paths))
+        finally:
+            if own_pool:
+                read_pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(self) -> list[PolicyFileResult]:
+        """Распознать все файлы и вернуть результаты в их порядке."""
+
+        self._results = [PolicyFileResult(path) for path in self.paths]
+        if not self.paths:
+            return self._results
+
+        read_pool, own_pool = self._make_read_pool()
+        llm_pool = ThreadPoolExecutor(
+            max_workers=min(self.llm_workers, len(self.paths)),
+            thread_name_prefix="ai-policy",
+        )
+        try:
+            with self._lock:
+                for index, path in enumerate(self.paths):
+                    self._reads[index] = read_pool.submit(self._read_text, path)
+                reads = {future: index for index, future in self._reads.items()}
+                if self._cancel_all:
+                    for future in reads:
+                        future.cancel()
+            for index in range(len(self.paths)):
+                self._emit(index, STAGE_READING)
+
+            recognitions = []
+            for future in as_completed(reads):
+                index = reads[future]
+                text = self._text(index, future)
+                if text is not None:
+                    recognitions.append(
+                        llm_pool.submit(self._recognize_one, index, text)
+                    )
+            wait(recognitions)
+        finally:
+            llm_pool.shutdown(wait=True)
+            if own_pool:
+                read_pool.shutdown(wait=False, cancel_futures=True)
+        return self._results
+
+
+def read_policy_texts(paths: Iterable[str | os.PathLike]) -> list[str]:
+    """Извлечь текст файлов параллельно, в порядке ``paths``."""
+
+    return PolicyBatch(paths).read_texts()
+
+
+def recognize_policy_files(
+    paths: Iterable[str | os.PathLike],
+    *,
+    progress_cb: ProgressCallback | None = None,
+    llm_workers: int | None = None,
+) -> list[PolicyFileResult]:
+    """Распознать файлы полисов параллельно, каждый как отдельный полис."""
+
+    return PolicyBatch(paths, progress_cb=progress_cb, llm_workers=llm_workers).run()
+
+
+__all__ = [
+    "PolicyBatch",
+    "PolicyFileResult",
+    "read_policy_texts",
+    "recognize_policy_files",
+]
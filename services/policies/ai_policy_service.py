@@ -6,6 +6,13 @@ import openai
 from PyPDF2 import PdfReader
 
 from config import get_settings
+from services.ai_cache import (
+    POLICY_SECTION,
+    TEXT_SECTION,
+    file_digest,
+    get_ai_cache,
+    text_digest,
+)
 
 settings = get_settings()
 
@@ -194,7 +201,25 @@ POLICY_FUNCTION = {
 
 
 def _read_text(path: str) -> str:
-    """Извлечь текст из PDF или текстового файла."""
+    """Извлечь текст из PDF или текстового файла.
+
+    Текст кэшируется по хэшу содержимого файла (см. :mod:`services.ai_cache`).
+    """
+    cache = get_ai_cache()
+    if not cache.active:
+        return _extract_text(path)
+    try:
+        key = file_digest(path)
+    except OSError:
+        return _extract_text(path)
+    text = cache.get(TEXT_SECTION, key)
+    if text is None:
+        text = _extract_text(path)
+        cache.put(TEXT_SECTION, key, text)
+    return text
+
+
+def _extract_text(path: str) -> str:
     if path.lower().endswith(".pdf"):
         try:
             reader = PdfReader(path)
@@ -282,6 +307,17 @@ def _chat(
     return resp.choices[0].message.tool_calls[0].function.arguments
 
 
+def _response_key(messages: List[dict]) -> str | None:
+    """Ключ кэша ответа для нового диалога «промпт + текст полиса».
+
+    Продолженные диалоги (уточнения пользователя) не кэшируются.
+    """
+    if [m["role"] for m in messages] != ["system", "user"]:
+        return None
+    prompt, text = (m["content"] for m in messages)
+    return text_digest(settings.openai_model, text_digest(prompt), text_digest(text))
+
+
 def recognize_policy_interactive(
     text: str,
     *,
@@ -292,6 +328,8 @@ def recognize_policy_interactive(
     """Распознать полис и вернуть JSON, транскрипт и сообщения.
 
     Если передан параметр ``messages``, диалог продолжается с них.
+    Ответ на новый диалог берётся из кэша, если тот же текст с тем же
+    промптом уже распознавался той же моделью.
     """
     def _check_cancel() -> None:
         if cancel_cb and cancel_cb():
@@ -309,6 +347,18 @@ def recognize_policy_interactive(
             _check_cancel()
             progress_cb(m["role"], m["content"])
 
+    cache = get_ai_cache()
+    cache_key = _response_key(messages) if cache.active else None
+    if cache_key:
+        cached = cache.get(POLICY_SECTION, cache_key)
+        if cached is not None:
+            logger.info("Ответ модели взят из кэша")
+            if progress_cb:
+                progress_cb("assistant", cached)
+            messages.append({"role": "assistant", "content": cached})
+            transcript = _log_conversation("text", messages)
+            return json.loads(cached), transcript, messages
+
     for attempt in range(MAX_ATTEMPTS):
         _check_cancel()
         answer = _chat(messages, progress_cb, cancel_cb=cancel_cb)
@@ -340,28 +390,31 @@ def recognize_policy_interactive(
             messages.append({"role": "user", "content": REMINDER})
             continue
         _check_cancel()
+        if cache_key:
+            cache.put(POLICY_SECTION, cache_key, json.dumps(data, ensure_ascii=False))
         transcript = _log_conversation("text", messages)
         return data, transcript, messages
 
 
-def process_policy_files_with_ai(paths: List[str]) -> Tuple[List[dict], List[str]]:
-    """Отправить файлы полисов в OpenAI и вернуть распарсенные данные JSON и транскрипты."""
+def process_policy_files_with_ai(
+    paths: List[str],
+    progress_cb: Callable[[int, str, str], None] | None = None,
+) -> list:
+    """Распознать файлы полисов в OpenAI, каждый как отдельный полис.
+
+    Файлы распознаются параллельно (см. :mod:`ai_policy_batch`).
+    Возвращает :class:`~services.policies.ai_policy_batch.PolicyFileResult`
+    в порядке ``paths``: у распознанных файлов заполнены ``data`` и
+    ``transcript``, у остальных — ``error`` или ``cancelled``. Ошибка
+    одного файла не отменяет результаты остальных. ``progress_cb`` —
+    как в :class:`~services.policies.ai_policy_batch.PolicyBatch`.
+    """
     if not paths:
-        return [], []
+        return []
 
-    results: List[dict] = []
-    conversations: List[str] = []
-    for path in paths:
-        text = _read_text(path)
-        try:
-            data, transcript, _ = recognize_policy_interactive(text)
-        except AiPolicyError as exc:
-            raise ValueError(
-                f"Не удалось разобрать JSON для {path}: {exc}\nДиалог:\n{exc.transcript}"
-            ) from exc
-        results.append(data)
-        conversations.append(transcript)
-    return results, conversations
+    from services.policies.ai_policy_batch import recognize_policy_files
+
+    return recognize_policy_files(paths, progress_cb=progress_cb)
 
 
 def process_policy_bundle_with_ai(paths: List[str]) -> Tuple[dict, str]:
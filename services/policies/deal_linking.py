@@ -0,0 +1,190 @@
+"""Подбор сделок для привязки выбранных полисов.
+
+:func:`resolve_link_candidates` за один проход загружает полисы, ищет
+кандидатов через :func:`find_candidate_deals_bulk` и сводит их в
+ранжированный список сделок с клиентами. Загружаются только
+сделки-кандидаты; для ручного выбора остальных сделок читаются лишь
+идентификатор, имя клиента и описание (:class:`DealChoice`). Функция не
+обращается к интерфейсу и вызывается из фонового потока.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from peewee import JOIN
+
+from database.models import Client, Deal, Policy
+from services.policies.deal_matching import CandidateDeal, find_candidate_deals_bulk
+
+#: Сколько кандидатов показывать в диалоге привязки.
+LINK_CANDIDATES_LIMIT = 5
+
+NO_CLIENT_NAME = "Без клиента"
+
+
+@dataclass
+class LinkCandidate:
+    """Сделка-кандидат для всей выборки полисов."""
+
+    deal: Deal
+    score: float = 0.0
+    #: причины совпадения без повторов, в порядке появления
+    reasons: List[str] = field(default_factory=list)
+    #: причины по каждому полису, для которого сделка нашлась
+    policy_reasons: Dict[int, List[str]] = field(default_factory=dict)
+
+    @property
+    def deal_id(self) -> int:
+        return self.deal.id
+
+    @property
+    def client_name(self) -> str:
+        client = self.deal.client if self.deal.client_id else None
+        return getattr(client, "name", None) or NO_CLIENT_NAME
+
+    @property
+    def supported_policy_ids(self) -> List[int]:
+        return list(self.policy_reasons)
+
+
+@dataclass(frozen=True)
+class DealChoice:
+    """Сделка для ручного выбора: только то, что показывается в списке."""
+
+    id: int
+    client_name: str
+    description: str
+
+
+@dataclass
+class LinkCandidates:
+    """Результат :func:`resolve_link_candidates`."""
+
+    policies: List[Policy]
+    candidates: List[LinkCandidate]
+    #: сделка, к которой все полисы можно привязать без вопросов
+    auto_link: Optional[Deal] = None
+    #: остальные активные сделки для ручного выбора
+    choices: List[DealChoice] = field(default_factory=list)
+    #: идентификаторы, для которых не нашлось активных полисов
+    missing_ids: List[int] = field(default_factory=list)
+
+    def unsupported_policy_ids(self, candidate: LinkCandidate) -> List[int]:
+        return [
+            policy.id
+            for policy in self.policies
+            if policy.id not in candidate.policy_reasons
+        ]
+
+
+def _load_policies(policy_ids: Sequence[int]) -> tuple[List[Policy], List[int]]:
+    query = (
+        Policy.select(Policy, Client)
+        .join(Client, JOIN.LEFT_OUTER)
+        .where(Policy.is_deleted == False)  # noqa: E712
+        .where(Policy.id.in_(list(policy_ids)))
+    )
+    by_id = {policy.id: policy for policy in query}
+    policies = [by_id[pid] for pid in policy_ids if pid in by_id]
+    missing = [pid for pid in policy_ids if pid not in by_id]
+    return policies, missing
+
+
+def _aggregate(
+    policies: Sequence[Policy], candidates_by_policy: Sequence[List[CandidateDeal]]
+) -> Dict[int, LinkCandidate]:
+    aggregated: Dict[int, LinkCandidate] = {}
+    for policy, policy_candidates in zip(policies, candidates_by_policy):
+        for candidate in policy_candidates:
+            if candidate.deal is None:
+                continue
+            entry = aggregated.get(candidate.deal_id)
+            if entry is None:
+                entry = aggregated[candidate.deal_id] = LinkCandidate(candidate.deal)
+            entry.score += float(candidate.score or 0.0)
+            reasons = list(candidate.reasons or [])
+            entry.policy_reasons[policy.id] = reasons
+            for reason in reasons:
+                if reason not in entry.reasons:
+                    entry.reasons.append(reason)
+    return aggregated
+
+
+def _auto_link_deal(
+    candidates_by_policy: Sequence[List[CandidateDeal]],
+) -> Optional[Deal]:
+    """Единственная строгая сделка, общая для всех полисов."""
+
+    deal: Optional[Deal] = None
+    for policy_candidates in candidates_by_policy:
+        strict = [c for c in policy_candidates if c.is_strict]
+        if len(strict) != 1 or strict[0].deal is None:
+            return None
+        if deal is not None and deal.id != strict[0].deal_id:
+            return None
+        deal = strict[0].deal
+    return deal
+
+
+def list_deal_choices(exclude_ids: Iterable[int] = ()) -> List[DealChoice]:
+    """Активные сделки для ручного выбора одним узким запросом."""
+
+    excluded: Set[int] = set(exclude_ids)
+    query = (
+        Deal.select(Deal.id, Client.name, Deal.description)
+        .join(Client, JOIN.LEFT_OUTER)
+        .where(Deal.is_deleted == False)  # noqa: E712
+        .order_by(Client.name, Deal.id)
+        .tuples()
+    )
+    return [
+        DealChoice(deal_id, client_name or NO_CLIENT_NAME, description or "")
+        for deal_id, client_name, description in query
+        if deal_id not in excluded
+    ]
+
+
+def resolve_link_candidates(
+    policy_ids: Sequence[int],
+    *,
+    limit: int = LINK_CANDIDATES_LIMIT,
+    with_choices: bool = True,
+) -> LinkCandidates:
+    """Подобрать сделки для привязки полисов ``policy_ids``.
+
+    Кандидаты отсортированы по суммарной оценке по всем полисам (затем по
+    ``id`` сделки) и обрезаны до ``limit``. ``auto_link`` заполняется,
+    если у каждого полиса ровно один строгий кандидат и он общий; тогда
+    список для ручного выбора не загружается.
+    """
+
+    policies, missing = _load_policies(list(dict.fromkeys(policy_ids)))
+    result = LinkCandidates(policies=policies, candidates=[], missing_ids=missing)
+    if not policies or missing:
+        return result
+
+    candidates_by_policy = find_candidate_deals_bulk(policies, limit=limit)
+    result.auto_link = _auto_link_deal(candidates_by_policy)
+    if result.auto_link is not None:
+        return result
+
+    ranked = sorted(
+        _aggregate(policies, candidates_by_policy).values(),
+        key=lambda item: (-item.score, item.deal_id),
+    )
+    result.candidates = ranked[:limit]
+    if with_choices:
+        result.choices = list_deal_choices(c.deal_id for c in result.candidates)
+    return result
+
+
+__all__ = [
+    "DealChoice",
+    "LINK_CANDIDATES_LIMIT",
+    "LinkCandidate",
+    "LinkCandidates",
+    "list_deal_choices",
+    "resolve_link_candidates",
+]
@@ -4,16 +4,20 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import date
-from difflib import SequenceMatcher
 import logging
 import re
+import threading
+import time
 from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from playhouse.shortcuts import prefetch
 from peewee import fn
 
 from database.models import Client, Deal, Expense, Policy
+from database.normalization import phone_key, policy_number_key, vin_key
+from database import change_events
 from services import deal_journal
+from services.policies.similarity import SimilarityIndex
 
 
 logger = logging.getLogger(__name__)
@@ -26,19 +30,11 @@ def _normalize_string(value: Optional[str]) -> Optional[str]:
     return normalized or None
 
 
-def _normalize_vin(value: Optional[str]) -> Optional[str]:
-    normalized = _normalize_string(value)
-    if normalized is None:
-        return None
-    return re.sub(r"[^0-9a-z]", "", normalized)
-
-
-def _normalize_policy_number_for_match(value: Optional[str]) -> Optional[str]:
-    normalized = _normalize_string(value)
-    if normalized is None:
-        return None
-    compact = re.sub(r"[^0-9a-zа-яё]", "", normalized)
-    return compact or None
+# Правила совпадают с теневыми столбцами ``*_norm`` моделей, поэтому
+# значения из Python можно напрямую сравнивать с ними в SQL.
+_normalize_vin = vin_key
+_normalize_policy_number_for_match = policy_number_key
+_normalize_phone = phone_key
 
 
 def _normalize_text_for_match(value: Optional[str]) -> Optional[str]:
@@ -59,28 +55,6 @@ def _is_subpath(child: str, parent: str) -> bool:
     return child_clean.startswith(parent_clean + "/")
 
 
-def _normalize_phone(value: Optional[str]) -> Optional[str]:
-    if value is None:
-        return None
-    digits = re.sub(r"\D", "", value)
-    if not digits:
-        return None
-    if len(digits) == 10:
-        digits = "7" + digits
-    elif len(digits) == 11 and digits.startswith("8"):
-        digits = "7" + digits[1:]
-    return digits or None
-
-
-def _normalize_field_expression(field, remove: Sequence[str] = ()):
-    """Сформировать SQL-выражение с грубой нормализацией поля."""
-
-    expr = fn.lower(field)
-    for symbol in remove:
-        expr = fn.replace(expr, symbol, "")
-    return expr
-
-
 def _normalize_trimmed_string_expression(field):
     return fn.lower(fn.trim(field))
 
@@ -98,9 +72,6 @@ def find_candidate_deal_ids(policy: Policy) -> Optional[Set[int]]:
 
     normalized_vin = _normalize_vin(getattr(policy, "vehicle_vin", None))
     if normalized_vin:
-        vin_expr = _normalize_field_expression(
-            Policy.vehicle_vin, remove=[" ", "-", "_", ".", ",", "/", "\\"]
-        )
         vin_query = (
             Policy.select(Policy.deal_id)
             .join(Deal)
@@ -108,8 +79,7 @@ def find_candidate_deal_ids(policy: Policy) -> Optional[Set[int]]:
                 (Policy.is_deleted == False)
                 & (Deal.is_deleted == False)
                 & (Policy.deal_id.is_null(False))
-                & (Policy.vehicle_vin.is_null(False))
-                & (vin_expr == normalized_vin)
+                & (Policy.vin_norm == normalized_vin)
             )
         )
         candidate_ids.update(
@@ -120,9 +90,6 @@ def find_candidate_deal_ids(policy: Policy) -> Optional[Set[int]]:
         getattr(policy, "policy_number", None)
     )
     if normalized_number:
-        number_expr = _normalize_field_expression(
-            Policy.policy_number, remove=[" ", "-", "_", ".", ",", "/", "\\"]
-        )
         number_query = (
             Policy.select(Policy.deal_id)
             .join(Deal)
@@ -130,8 +97,7 @@ def find_candidate_deal_ids(policy: Policy) -> Optional[Set[int]]:
                 (Policy.is_deleted == False)
                 & (Deal.is_deleted == False)
                 & (Policy.deal_id.is_null(False))
-                & (Policy.policy_number.is_null(False))
-                & (number_expr == normalized_number)
+                & (Policy.number_norm == normalized_number)
             )
         )
         candidate_ids.update(
@@ -161,48 +127,26 @@ def find_candidate_deal_ids(policy: Policy) -> Optional[Set[int]]:
     client = getattr(policy, "client", None)
     normalized_phone = _normalize_phone(getattr(client, "phone", None)) if client else None
     if normalized_phone:
-        phone_expr = _normalize_field_expression(
-            Client.phone, remove=[" ", "-", "(", ")", "+", "."]
-        )
-        possible_phone_values = {normalized_phone}
-        if len(normalized_phone) == 11:
-            local_part = normalized_phone[1:]
-            possible_phone_values.add(local_part)
-            possible_phone_values.add(f"8{local_part}")
-        clients_with_phone_query = (
-            Client.select(Client.id, Client.phone)
+        phone_query = (
+            Deal.select(Deal.id)
+            .join(Client)
             .where(
-                (Client.is_deleted == False)
-                & (Client.phone.is_null(False))
-                & (phone_expr.in_(tuple(possible_phone_values)))
+                (Deal.is_deleted == False)
+                & (Client.is_deleted == False)
+                & (Client.phone_norm == normalized_phone)
             )
         )
-        matching_client_ids = [
-            client_item.id
-            for client_item in clients_with_phone_query
-            if _normalize_phone(client_item.phone) == normalized_phone
-        ]
-        if matching_client_ids:
-            phone_deals_query = (
-                Deal.select(Deal.id)
-                .where(
-                    (Deal.is_deleted == False)
-                    & (Deal.client_id.in_(matching_client_ids))
-                )
-            )
-            candidate_ids.update(item.id for item in phone_deals_query)
+        candidate_ids.update(item.id for item in phone_query)
 
     normalized_email = _normalize_string(getattr(client, "email", None)) if client else None
     if normalized_email:
-        email_expr = _normalize_trimmed_string_expression(Client.email)
         email_query = (
             Deal.select(Deal.id)
             .join(Client)
             .where(
                 (Deal.is_deleted == False)
                 & (Client.is_deleted == False)
-                & (Client.email.is_null(False))
-                & (email_expr == normalized_email)
+                & (Client.email_norm == normalized_email)
             )
         )
         candidate_ids.update(item.id for item in email_query)
@@ -232,6 +176,185 @@ def find_candidate_deal_ids(policy: Policy) -> Optional[Set[int]]:
     return candidate_ids or None
 
 
+#: Сколько значений передавать в одно условие ``IN`` при массовом поиске.
+BULK_LOOKUP_CHUNK_SIZE = 500
+
+
+def _chunked(values: Iterable[object], size: int = BULK_LOOKUP_CHUNK_SIZE):
+    items = list(values)
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _bulk_policy_field_lookup(field, values: Set[object]) -> Dict[object, Set[int]]:
+    """Одним запросом на пачку найти сделки по теневому столбцу полиса."""
+
+    result: Dict[object, Set[int]] = {}
+    for chunk in _chunked(values):
+        query = (
+            Policy.select(Policy.deal_id, field)
+            .join(Deal)
+            .where(
+                (Policy.is_deleted == False)
+                & (Deal.is_deleted == False)
+                & (Policy.deal_id.is_null(False))
+                & (field.in_(chunk))
+            )
+            .tuples()
+        )
+        for deal_id, match_key in query:
+            if deal_id is not None:
+                result.setdefault(match_key, set()).add(deal_id)
+    return result
+
+
+def _bulk_lookup_keys(
+    keys_by_kind: Dict[str, Set[object]],
+) -> Dict[str, Dict[object, Set[int]]]:
+    """Разрешить ключи каждого вида в идентификаторы сделок."""
+
+    found: Dict[str, Dict[object, Set[int]]] = {kind: {} for kind in keys_by_kind}
+
+    client_ids = keys_by_kind.get("client")
+    for chunk in _chunked(client_ids or ()):
+        query = (
+            Deal.select(Deal.client_id, Deal.id)
+            .where((Deal.is_deleted == False) & (Deal.client_id.in_(chunk)))
+            .tuples()
+        )
+        for client_id, deal_id in query:
+            found["client"].setdefault(client_id, set()).add(deal_id)
+
+    if keys_by_kind.get("vin"):
+        found["vin"] = _bulk_policy_field_lookup(
+            Policy.vin_norm, keys_by_kind["vin"]
+        )
+
+    if keys_by_kind.get("number"):
+        found["number"] = _bulk_policy_field_lookup(
+            Policy.number_norm, keys_by_kind["number"]
+        )
+
+    if keys_by_kind.get("contractor"):
+        contractor_expr = _normalize_trimmed_string_expression(Policy.contractor)
+        key = contractor_expr.alias("match_key")
+        for chunk in _chunked(keys_by_kind["contractor"]):
+            query = (
+                Policy.select(Policy.deal_id, key)
+                .join(Deal)
+                .switch(Policy)
+                .join(Expense)
+                .where(
+                    (Expense.is_deleted == False)
+                    & (Policy.is_deleted == False)
+                    & (Deal.is_deleted == False)
+                    & (Policy.deal_id.is_null(False))
+                    & (Policy.contractor.is_null(False))
+                    & (contractor_expr.in_(chunk))
+                )
+                .distinct()
+                .tuples()
+            )
+            for deal_id, match_key in query:
+                found["contractor"].setdefault(match_key, set()).add(deal_id)
+
+    for kind, key_field in (("phone", Client.phone_norm), ("email", Client.email_norm)):
+        for chunk in _chunked(keys_by_kind.get(kind) or ()):
+            query = (
+                Deal.select(Deal.id, key_field)
+                .join(Client)
+                .where(
+                    (Deal.is_deleted == False)
+                    & (Client.is_deleted == False)
+                    & (key_field.in_(chunk))
+                )
+                .tuples()
+            )
+            for deal_id, match_key in query:
+                found[kind].setdefault(match_key, set()).add(deal_id)
+
+    pairs = keys_by_kind.get("brand_model")
+    if pairs:
+        brand_expr = _normalize_trimmed_string_expression(Policy.vehicle_brand)
+        model_expr = _normalize_trimmed_string_expression(Policy.vehicle_model)
+        # Пары (марка, модель) отбираются по отдельным спискам и
+        # проверяются в Python: кортежи в ``IN`` поддерживаются не везде.
+        # Пары идут пачками по половине BULK_LOOKUP_CHUNK_SIZE: вместе
+        # марок и моделей в запросе не больше, чем значений в других поисках.
+        for pair_chunk in _chunked(pairs, BULK_LOOKUP_CHUNK_SIZE // 2):
+            brands = list({brand for brand, _ in pair_chunk})
+            models = list({model for _, model in pair_chunk})
+            query = (
+                Policy.select(
+                    Policy.deal_id,
+                    brand_expr.alias("brand"),
+                    model_expr.alias("model"),
+                )
+                .join(Deal)
+                .where(
+                    (Policy.is_deleted == False)
+                    & (Deal.is_deleted == False)
+                    & (Policy.deal_id.is_null(False))
+                    & (Policy.vehicle_brand.is_null(False))
+                    & (Policy.vehicle_model.is_null(False))
+                    & (brand_expr.in_(brands))
+                    & (model_expr.in_(models))
+                )
+                .tuples()
+            )
+            for deal_id, brand, model in query:
+                if (brand, model) in pairs:
+                    found["brand_model"].setdefault((brand, model), set()).add(
+                        deal_id
+                    )
+
+    return found
+
+
+def _attach_clients(policies: Sequence[Policy]) -> None:
+    """Загрузить клиентов полисов одним запросом вместо обращения к каждому."""
+
+    client_ids = {policy.client_id for policy in policies if policy.client_id}
+    clients: Dict[int, Client] = {}
+    for chunk in _chunked(client_ids):
+        clients.update(
+            (client.id, client)
+            for client in Client.select().where(Client.id.in_(chunk))
+        )
+    for policy in policies:
+        client = clients.get(policy.client_id)
+        if client is not None:
+            policy.client = client
+
+
+def find_candidate_deal_ids_bulk(
+    policies: Sequence[Policy],
+) -> List[Optional[Set[int]]]:
+    """Массовый аналог :func:`find_candidate_deal_ids`.
+
+    Сначала собираются нормализованные ключи всех полисов, затем каждый вид
+    ключа разрешается одним запросом на пачку значений. Результат идёт в
+    том же порядке, что и ``policies``.
+    """
+
+    _attach_clients(policies)
+    policy_keys = [_policy_lookup_keys(policy) for policy in policies]
+    keys_by_kind: Dict[str, Set[object]] = {}
+    for keys in policy_keys:
+        for kind, value in keys:
+            keys_by_kind.setdefault(kind, set()).add(value)
+
+    found = _bulk_lookup_keys(keys_by_kind)
+
+    result: List[Optional[Set[int]]] = []
+    for keys in policy_keys:
+        candidate_ids: Set[int] = set()
+        for kind, value in keys:
+            candidate_ids.update(found[kind].get(value, ()))
+        result.append(candidate_ids or None)
+    return result
+
+
 @dataclass
 class PolicyMatchProfile:
     """Набор признаков отдельного полиса для сопоставления."""
@@ -398,7 +521,9 @@ def build_deal_match_index(deal_ids: Iterable[int] | None = None) -> Dict[int, D
             return {}
         base_query = base_query.where(Deal.id.in_(ids))
 
-    deals = prefetch(base_query, Client, Policy, Expense)
+    # Полисы явно привязываются к сделкам: иначе prefetch сопоставит их с
+    # клиентами, и ``deal.policies`` будет загружаться отдельным запросом.
+    deals = prefetch(base_query, Client, (Policy, Deal), Expense)
     result: Dict[int, DealMatchProfile] = {}
 
     for deal in deals:
@@ -408,6 +533,9 @@ def build_deal_match_index(deal_ids: Iterable[int] | None = None) -> Dict[int, D
             for policy in deal.policies
             if getattr(policy, "is_deleted", False) is False
         ]
+        for policy in policies:
+            if policy.client_id == deal.client_id:
+                policy.client = client
         policy_profiles = [make_policy_profile(policy) for policy in policies]
 
         vins = {p.normalized_vehicle_vin for p in policy_profiles if p.normalized_vehicle_vin}
@@ -483,6 +611,333 @@ def build_deal_match_index(deal_ids: Iterable[int] | None = None) -> Dict[int, D
     return result
 
 
+@dataclass
+class SimilarityScores:
+    """Сходство контрагента полиса с данными сделок (``deal_id → ratio``).
+
+    Содержит только значения не ниже :data:`CONTRACTOR_SIMILARITY_THRESHOLD`.
+    """
+
+    client_names: Dict[int, float] = field(default_factory=dict)
+    contractors: Dict[int, float] = field(default_factory=dict)
+
+
+class DealSimilarity:
+    """Индексы имён клиентов и контрагентов сделок для нечёткого сравнения."""
+
+    def __init__(self) -> None:
+        self.client_names = SimilarityIndex(CONTRACTOR_SIMILARITY_THRESHOLD)
+        self.contractors = SimilarityIndex(CONTRACTOR_SIMILARITY_THRESHOLD)
+
+    @classmethod
+    def from_index(cls, deal_index: Dict[int, DealMatchProfile]) -> "DealSimilarity":
+        similarity = cls()
+        for deal_id, profile in deal_index.items():
+            similarity.add(deal_id, profile)
+        return similarity
+
+    def add(self, deal_id: int, profile: DealMatchProfile) -> None:
+        self.client_names.add(deal_id, _normalize_string(profile.client.name))
+        for contractor in profile.contractors:
+            self.contractors.add(deal_id, contractor)
+
+    def remove(self, deal_id: int, profile: DealMatchProfile) -> None:
+        self.client_names.remove(deal_id, _normalize_string(profile.client.name))
+        for contractor in profile.contractors:
+            self.contractors.remove(deal_id, contractor)
+
+    def clear(self) -> None:
+        self.client_names.clear()
+        self.contractors.clear()
+
+    def scores(self, normalized_contractor: Optional[str]) -> SimilarityScores:
+        if not normalized_contractor:
+            return SimilarityScores()
+        return SimilarityScores(
+            client_names=self.client_names.search(normalized_contractor),
+            contractors=self.contractors.search(normalized_contractor),
+        )
+
+
+class DealMatchIndex:
+    """Общий для процесса индекс профилей сделок с обратными словарями.
+
+    Индекс строится один раз через :func:`build_deal_match_index` и затем
+    обновляется по уведомлениям :mod:`database.change_events`: изменённые
+    сделки помечаются «грязными» и перечитываются одним запросом при
+    следующем обращении. Поиск кандидатов для полиса сводится к обращениям
+    к словарям ``ключ → {deal_id}`` вместо SQL-запросов с нормализацией.
+    Раз в ``max_age`` секунд индекс перестраивается целиком, чтобы учесть
+    изменения, сделанные другими процессами (например, ботом).
+    """
+
+    KEY_KINDS = (
+        "client",
+        "vin",
+        "number",
+        "contractor",
+        "phone",
+        "email",
+        "brand_model",
+    )
+    DEFAULT_MAX_AGE = 15 * 60
+
+    def __init__(self, *, max_age: float | None = DEFAULT_MAX_AGE) -> None:
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._profiles: Dict[int, DealMatchProfile] | None = None
+        self._keys: Dict[int, Dict[str, Set[object]]] = {}
+        self._maps: Dict[str, Dict[object, Set[int]]] = {
+            kind: {} for kind in self.KEY_KINDS
+        }
+        self._policy_deals: Dict[int, int] = {}
+        self._similarity = DealSimilarity()
+        self._built_at = 0.0
+        self._dirty: Dict[type, Set[int]] = {}
+
+    # --- Обновление -----------------------------------------------------
+    def invalidate(self) -> None:
+        """Сбросить индекс; он будет построен заново при обращении."""
+
+        with self._lock:
+            self._profiles = None
+            self._keys.clear()
+            for mapping in self._maps.values():
+                mapping.clear()
+            self._policy_deals.clear()
+            self._similarity.clear()
+            self._dirty.clear()
+
+    def mark_changed(self, model: type, ids: Iterable[int] | None) -> None:
+        """Пометить записи модели изменёнными (обработчик ``change_events``)."""
+
+        if model not in (Deal, Policy, Client, Expense):
+            return
+        with self._lock:
+            if self._profiles is None:
+                return
+            if ids is None:
+                self.invalidate()
+                return
+            self._dirty.setdefault(model, set()).update(ids)
+
+    def _ensure_fresh(self) -> Dict[int, DealMatchProfile]:
+        with self._lock:
+            expired = (
+                self.max_age is not None
+                and time.monotonic() - self._built_at > self.max_age
+            )
+            if self._profiles is None or expired:
+                self.invalidate()
+                self._rebuild_all()
+            elif self._dirty:
+                self._refresh_dirty()
+            assert self._profiles is not None
+            return self._profiles
+
+    def _rebuild_all(self) -> None:
+        started = time.perf_counter()
+        self._profiles = {}
+        for deal_id, profile in build_deal_match_index().items():
+            self._store(deal_id, profile)
+        self._built_at = time.monotonic()
+        logger.info(
+            "Индекс сопоставления построен: %d сделок за %.2f с",
+            len(self._profiles),
+            time.perf_counter() - started,
+        )
+
+    def _refresh_dirty(self) -> None:
+        dirty, self._dirty = self._dirty, {}
+        deal_ids: Set[int] = set(dirty.get(Deal, ()))
+
+        policy_ids = dirty.get(Policy)
+        if policy_ids:
+            deal_ids.update(
+                self._policy_deals[pid]
+                for pid in policy_ids
+                if pid in self._policy_deals
+            )
+            query = Policy.select(Policy.deal_id).where(
+                Policy.id.in_(list(policy_ids)) & Policy.deal_id.is_null(False)
+            )
+            deal_ids.update(row.deal_id for row in query)
+
+        client_ids = dirty.get(Client)
+        if client_ids:
+            for client_id in client_ids:
+                deal_ids.update(self._maps["client"].get(client_id, ()))
+            query = Deal.select(Deal.id).where(Deal.client_id.in_(list(client_ids)))
+            deal_ids.update(row.id for row in query)
+
+        expense_ids = dirty.get(Expense)
+        if expense_ids:
+            query = (
+                Policy.select(Policy.deal_id)
+                .join(Expense)
+                .where(
+                    Expense.id.in_(list(expense_ids)) & Policy.deal_id.is_null(False)
+                )
+            )
+            deal_ids.update(row.deal_id for row in query)
+
+        if not deal_ids:
+            return
+        fresh = build_deal_match_index(deal_ids)
+        for deal_id in deal_ids:
+            self._remove(deal_id)
+            profile = fresh.get(deal_id)
+            if profile is not None:
+                self._store(deal_id, profile)
+        logger.debug("Индекс сопоставления: обновлено сделок %d", len(deal_ids))
+
+    def _store(self, deal_id: int, profile: DealMatchProfile) -> None:
+        assert self._profiles is not None
+        keys = _deal_lookup_keys(profile)
+        self._profiles[deal_id] = profile
+        self._keys[deal_id] = keys
+        self._similarity.add(deal_id, profile)
+        for kind, values in keys.items():
+            mapping = self._maps[kind]
+            for value in values:
+                mapping.setdefault(value, set()).add(deal_id)
+        for policy_profile in profile.policy_profiles:
+            policy_id = getattr(policy_profile.policy, "id", None)
+            if policy_id is not None:
+                self._policy_deals[policy_id] = deal_id
+
+    def _remove(self, deal_id: int) -> None:
+        assert self._profiles is not None
+        profile = self._profiles.pop(deal_id, None)
+        keys = self._keys.pop(deal_id, {})
+        for kind, values in keys.items():
+            mapping = self._maps[kind]
+            for value in values:
+                bucket = mapping.get(value)
+                if bucket is None:
+                    continue
+                bucket.discard(deal_id)
+                if not bucket:
+                    del mapping[value]
+        if profile is not None:
+            self._similarity.remove(deal_id, profile)
+            for policy_profile in profile.policy_profiles:
+                policy_id = getattr(policy_profile.policy, "id", None)
+                if self._policy_deals.get(policy_id) == deal_id:
+                    del self._policy_deals[policy_id]
+
+    # --- Чтение -----------------------------------------------------------
+    def profiles(self) -> Dict[int, DealMatchProfile]:
+        """Вернуть профили всех активных сделок."""
+
+        with self._lock:
+            return dict(self._ensure_fresh())
+
+    def get_profiles(self, deal_ids: Iterable[int]) -> Dict[int, DealMatchProfile]:
+        """Вернуть профили только для указанных сделок."""
+
+        with self._lock:
+            profiles = self._ensure_fresh()
+            return {
+                deal_id: profiles[deal_id]
+                for deal_id in deal_ids
+                if deal_id in profiles
+            }
+
+    def lookup(self, kind: str, value: object) -> Set[int]:
+        """Вернуть сделки, у которых есть ключ ``value`` вида ``kind``."""
+
+        with self._lock:
+            self._ensure_fresh()
+            return set(self._maps[kind].get(value, ()))
+
+    def similarity_scores(
+        self, normalized_contractor: Optional[str]
+    ) -> SimilarityScores:
+        """Нечёткое сходство контрагента полиса со всеми сделками индекса."""
+
+        with self._lock:
+            self._ensure_fresh()
+            return self._similarity.scores(normalized_contractor)
+
+    def candidate_ids(self, policy: Policy) -> Optional[Set[int]]:
+        """Аналог :func:`find_candidate_deal_ids`, использующий словари индекса."""
+
+        with self._lock:
+            self._ensure_fresh()
+            candidate_ids: Set[int] = set()
+            for kind, value in _policy_lookup_keys(policy):
+                candidate_ids.update(self._maps[kind].get(value, ()))
+            return candidate_ids or None
+
+
+def _deal_lookup_keys(profile: DealMatchProfile) -> Dict[str, Set[object]]:
+    """Ключи сделки для обратных словарей :class:`DealMatchIndex`."""
+
+    client = profile.client
+    keys: Dict[str, Set[object]] = {
+        "client": {profile.deal.client_id},
+        "vin": set(profile.vins),
+        "number": set(),
+        "contractor": set(profile.expense_contractors),
+        "phone": set(),
+        "email": set(),
+        "brand_model": set(profile.brand_model_pairs),
+    }
+    for policy_profile in profile.policy_profiles:
+        number = _normalize_policy_number_for_match(policy_profile.policy_number)
+        if number:
+            keys["number"].add(number)
+    if client is not None and not getattr(client, "is_deleted", False):
+        phone = _normalize_phone(client.phone)
+        if phone:
+            keys["phone"].add(phone)
+        email = _normalize_string(client.email)
+        if email:
+            keys["email"].add(email)
+    return keys
+
+
+def _policy_lookup_keys(policy: Policy) -> List[Tuple[str, object]]:
+    """Ключи полиса, по которым ищутся сделки-кандидаты."""
+
+    keys: List[Tuple[str, object]] = []
+    if getattr(policy, "client_id", None):
+        keys.append(("client", policy.client_id))
+    vin = _normalize_vin(getattr(policy, "vehicle_vin", None))
+    if vin:
+        keys.append(("vin", vin))
+    number = _normalize_policy_number_for_match(getattr(policy, "policy_number", None))
+    if number:
+        keys.append(("number", number))
+    contractor = _normalize_string(getattr(policy, "contractor", None))
+    if contractor:
+        keys.append(("contractor", contractor))
+    client = getattr(policy, "client", None)
+    if client is not None:
+        phone = _normalize_phone(getattr(client, "phone", None))
+        if phone:
+            keys.append(("phone", phone))
+        email = _normalize_string(getattr(client, "email", None))
+        if email:
+            keys.append(("email", email))
+    brand = _normalize_string(getattr(policy, "vehicle_brand", None))
+    model = _normalize_string(getattr(policy, "vehicle_model", None))
+    if brand and model:
+        keys.append(("brand_model", (brand, model)))
+    return keys
+
+
+_deal_match_index = DealMatchIndex()
+change_events.subscribe(_deal_match_index.mark_changed)
+
+
+def get_deal_match_index() -> DealMatchIndex:
+    """Вернуть общий для процесса индекс сопоставления сделок."""
+
+    return _deal_match_index
+
+
 def find_strict_matches(
     policy_profile: PolicyMatchProfile, deal_index: Dict[int, DealMatchProfile]
 ) -> List[CandidateDeal]:
@@ -586,11 +1041,26 @@ def _format_similarity(value: float) -> str:
 
 
 def collect_indirect_matches(
-    policy_profile: PolicyMatchProfile, deal_index: Dict[int, DealMatchProfile]
+    policy_profile: PolicyMatchProfile,
+    deal_index: Dict[int, DealMatchProfile],
+    similarity: Optional[SimilarityScores] = None,
 ) -> List[CandidateDeal]:
-    """Собрать кандидатов по косвенным правилам сопоставления."""
+    """Собрать кандидатов по косвенным правилам сопоставления.
+
+    ``similarity`` — заранее посчитанное нечёткое сходство контрагента
+    (см. :meth:`DealMatchIndex.similarity_scores`); без него индексы сходства
+    строятся по ``deal_index`` на месте.
+    """
 
     matches: List[CandidateDeal] = []
+    normalized_contractor = policy_profile.normalized_contractor
+    if similarity is None:
+        if normalized_contractor:
+            similarity = DealSimilarity.from_index(deal_index).scores(
+                normalized_contractor
+            )
+        else:
+            similarity = SimilarityScores()
 
     for deal_id, deal_profile in deal_index.items():
         score = 0.0
@@ -609,30 +1079,19 @@ def collect_indirect_matches(
             reasons.append(f"Совпадает email клиента: {email_example}")
 
         contractor_reason_added = False
-        normalized_contractor = policy_profile.normalized_contractor
         if normalized_contractor:
-            client_name_normalized = _normalize_string(deal_profile.client.name)
-            if client_name_normalized:
-                similarity = SequenceMatcher(
-                    None, normalized_contractor, client_name_normalized
-                ).ratio()
-                if similarity >= CONTRACTOR_SIMILARITY_THRESHOLD:
-                    score += CONTRACTOR_NAME_WEIGHT
-                    reasons.append(
-                        "Контрагент полиса похож на имя клиента сделки "
-                        f"(совпадение {_format_similarity(similarity)})"
-                    )
-                    contractor_reason_added = True
+            name_similarity = similarity.client_names.get(deal_id)
+            if name_similarity is not None:
+                score += CONTRACTOR_NAME_WEIGHT
+                reasons.append(
+                    "Контрагент полиса похож на имя клиента сделки "
+                    f"(совпадение {_format_similarity(name_similarity)})"
+                )
+                contractor_reason_added = True
 
             if not contractor_reason_added:
-                best_similarity = 0.0
-                for contractor in deal_profile.contractors:
-                    similarity = SequenceMatcher(
-                        None, normalized_contractor, contractor
-                    ).ratio()
-                    if similarity >= CONTRACTOR_SIMILARITY_THRESHOLD and similarity > best_similarity:
-                        best_similarity = similarity
-                if best_similarity >= CONTRACTOR_SIMILARITY_THRESHOLD:
+                best_similarity = similarity.contractors.get(deal_id)
+                if best_similarity is not None:
                     score += CONTRACTOR_NAME_WEIGHT
                     reasons.append(
                         "Контрагент полиса похож на контрагента сделки "
@@ -714,14 +1173,79 @@ def find_candidate_deals(policy: Policy, limit: int = 10) -> List[CandidateDeal]
         return []
 
     policy_profile = make_policy_profile(policy)
-    candidate_ids = find_candidate_deal_ids(policy)
+    match_index = get_deal_match_index()
+    candidate_ids = match_index.candidate_ids(policy)
     if candidate_ids is None:
-        deal_index = build_deal_match_index()
+        deal_index = match_index.profiles()
     else:
-        deal_index = build_deal_match_index(candidate_ids)
+        deal_index = match_index.get_profiles(candidate_ids)
+    similarity = match_index.similarity_scores(policy_profile.normalized_contractor)
+
+    return _rank_candidates(policy, policy_profile, deal_index, limit, similarity)
+
+
+def find_candidate_deals_bulk(
+    policies: Sequence[Policy], limit: int = 10
+) -> List[List[CandidateDeal]]:
+    """Подобрать кандидатов сразу для пачки полисов (импорт, массовая привязка).
+
+    Кандидаты ищутся через :func:`find_candidate_deal_ids_bulk`, а профили
+    всех найденных сделок строятся одним вызовом
+    :func:`build_deal_match_index`. Возвращает списки кандидатов в порядке
+    ``policies``. Если хотя бы у одного полиса нет кандидатов по ключам, он
+    сравнивается со всеми активными сделками общего индекса
+    (:func:`get_deal_match_index`), как в :func:`find_candidate_deals`.
+    """
+
+    policies = list(policies)
+    if limit <= 0 or not policies:
+        return [[] for _ in policies]
+
+    candidate_sets = find_candidate_deal_ids_bulk(policies)
+    if any(ids is None for ids in candidate_sets):
+        profiles = get_deal_match_index().profiles()
+    else:
+        union: Set[int] = set()
+        for ids in candidate_sets:
+            union.update(ids)
+        profiles = build_deal_match_index(union)
+
+    deal_similarity: Optional[DealSimilarity] = None
+    results: List[List[CandidateDeal]] = []
+    for policy, candidate_ids in zip(policies, candidate_sets):
+        if candidate_ids is None:
+            deal_index = profiles
+        else:
+            deal_index = {
+                deal_id: profiles[deal_id]
+                for deal_id in candidate_ids
+                if deal_id in profiles
+            }
+        policy_profile = make_policy_profile(policy)
+        similarity = None
+        if policy_profile.normalized_contractor:
+            if deal_similarity is None:
+                deal_similarity = DealSimilarity.from_index(profiles)
+            similarity = deal_similarity.scores(policy_profile.normalized_contractor)
+        results.append(
+            _rank_candidates(policy, policy_profile, deal_index, limit, similarity)
+        )
+    return results
+
+
+def _rank_candidates(
+    policy: Policy,
+    policy_profile: PolicyMatchProfile,
+    deal_index: Dict[int, DealMatchProfile],
+    limit: int,
+    similarity: Optional[SimilarityScores] = None,
+) -> List[CandidateDeal]:
+    """Объединить строгие и косвенные совпадения и отобрать лучшие."""
 
     strict_matches = find_strict_matches(policy_profile, deal_index)
-    indirect_matches = collect_indirect_matches(policy_profile, deal_index)
+    indirect_matches = collect_indirect_matches(
+        policy_profile, deal_index, similarity
+    )
 
     combined: Dict[int, CandidateDeal] = {}
 
@@ -8,6 +8,7 @@ from peewee import Field
 
 from database.db import db
 from database.models import Client, Deal, Policy
+from services.distinct_values import distinct_values
 from services.policies.policy_service import (
     attach_premium,
     build_policy_query,
@@ -144,6 +145,7 @@ class PolicyAppService:
         *,
         column_field: Field | None = None,
         filters: Mapping[str, Any] | None = None,
+        prefix: str | None = None,
     ) -> list[dict[str, Any]]:
         filters = dict(filters or {})
         raw_column_filters = filters.pop("column_filters", None)
@@ -164,28 +166,10 @@ class PolicyAppService:
             **filters,
         )
 
-        values_query = (
-            query.select(target_field)
-            .where(target_field.is_null(False))
-            .distinct()
-            .order_by(target_field.asc())
+        return distinct_values(
+            query, target_field, prefix=prefix, models=(Client, Deal)
         )
 
-        values = [
-            {"value": value, "display": value}
-            for (value,) in values_query.tuples()
-        ]
-
-        if (
-            query.select(target_field)
-            .where(target_field.is_null(True))
-            .limit(1)
-            .exists()
-        ):
-            values.insert(0, {"value": None, "display": "—"})
-
-        return values
-
     def mark_deleted(
         self, policy_ids: Sequence[object], *, gateway: DriveGateway | None = None
     ) -> list[int]:
@@ -16,11 +16,13 @@ from infrastructure.drive_gateway import DriveGateway
 from services import executor_service as es
 from services.clients import get_client_by_id
 from services.deal_service import get_deal_by_id
+from services.distinct_values import distinct_values
 from services.folder_utils import create_policy_folder, is_drive_link, open_folder
 from services.payment_service import (
     add_payment,
     sync_policy_payments,
 )
+from services.soft_delete import DELETED_SUFFIX, soft_delete_cascade
 from services.telegram_service import notify_executor
 from services.validators import normalize_policy_number
 from services.query_utils import apply_search_and_filters
@@ -266,49 +268,109 @@ def get_policies_page(
     return query.offset(offset).limit(per_page)
 
 
+def rename_deleted_policy_folder(policy: Policy, gateway: DriveGateway) -> None:
+    """Дописать «deleted» к номеру и папке уже помеченного полиса."""
+    try:
+        from services.folder_utils import rename_policy_folder
+
+        new_number = f"{policy.policy_number}{DELETED_SUFFIX}"
+        new_path, new_link = rename_policy_folder(
+            policy.client.name,
+            policy.policy_number,
+            policy.deal.description if policy.deal_id else None,
+            policy.client.name,
+            new_number,
+            policy.deal.description if policy.deal_id else None,
+            policy.drive_folder_link
+            if is_drive_link(policy.drive_folder_link)
+            else None,
+            gateway=gateway,
+        )
+        policy.policy_number = new_number
+        fields_to_update = [Policy.policy_number]
+        if new_path and new_path != policy.drive_folder_path:
+            policy.drive_folder_path = new_path
+            fields_to_update.append(Policy.drive_folder_path)
+        if new_link and new_link != policy.drive_folder_link:
+            policy.drive_folder_link = new_link
+            fields_to_update.append(Policy.drive_folder_link)
+        policy.save(only=fields_to_update)
+        logger.info(
+            "Полис id=%s №%s помечен удалённым",
+            policy.id,
+            policy.policy_number,
+        )
+    except Exception:
+        logger.exception(
+            "Не удалось пометить папку полиса id=%s №%s удалённой",
+            policy.id,
+            policy.policy_number,
+        )
+
+
+def rename_restored_policy_folder(policy: Policy, gateway: DriveGateway) -> None:
+    """Убрать «deleted» из номера и папки восстановленного полиса.
+
+    Если исходный номер уже занят другим полисом, суффикс остаётся.
+    """
+    if not policy.policy_number.endswith(DELETED_SUFFIX):
+        return
+    new_number = policy.policy_number[: -len(DELETED_SUFFIX)]
+    taken = (
+        Policy.select()
+        .where((Policy.policy_number == new_number) & (Policy.id != policy.id))
+        .exists()
+    )
+    if taken:
+        logger.warning(
+            "Номер %s занят, полис id=%s остаётся с суффиксом удаления",
+            new_number,
+            policy.id,
+        )
+        return
+    try:
+        from services.folder_utils import rename_policy_folder
+
+        deal_desc = policy.deal.description if policy.deal_id else None
+        new_path, new_link = rename_policy_folder(
+            policy.client.name,
+            policy.policy_number,
+            deal_desc,
+            policy.client.name,
+            new_number,
+            deal_desc,
+            policy.drive_folder_link
+            if is_drive_link(policy.drive_folder_link)
+            else None,
+            gateway=gateway,
+        )
+        policy.policy_number = new_number
+        fields_to_update = [Policy.policy_number]
+        if new_path and new_path != policy.drive_folder_path:
+            policy.drive_folder_path = new_path
+            fields_to_update.append(Policy.drive_folder_path)
+        if new_link and new_link != policy.drive_folder_link:
+            policy.drive_folder_link = new_link
+            fields_to_update.append(Policy.drive_folder_link)
+        policy.save(only=fields_to_update)
+        logger.info("Полис id=%s №%s восстановлен", policy.id, policy.policy_number)
+    except Exception:
+        logger.exception(
+            "Не удалось вернуть имя папки восстановленного полиса id=%s №%s",
+            policy.id,
+            policy.policy_number,
+        )
+
+
 def mark_policy_deleted(
     policy_id: int, *, gateway: DriveGateway | None = None
 ) -> None:
+    """Пометить полис удалённым вместе с платежами, доходами и расходами."""
     policy = Policy.get_or_none(Policy.id == policy_id)
     if policy:
-        policy.soft_delete()
-        try:
-            from services.folder_utils import rename_policy_folder
-
-            new_number = f"{policy.policy_number} deleted"
-            resolved_gateway = _resolve_gateway(gateway)
-            new_path, new_link = rename_policy_folder(
-                policy.client.name,
-                policy.policy_number,
-                policy.deal.description if policy.deal_id else None,
-                policy.client.name,
-                new_number,
-                policy.deal.description if policy.deal_id else None,
-                policy.drive_folder_link
-                if is_drive_link(policy.drive_folder_link)
-                else None,
-                gateway=resolved_gateway,
-            )
-            policy.policy_number = new_number
-            fields_to_update = [Policy.policy_number, Policy.is_deleted]
-            if new_path and new_path != policy.drive_folder_path:
-                policy.drive_folder_path = new_path
-                fields_to_update.append(Policy.drive_folder_path)
-            if new_link and new_link != policy.drive_folder_link:
-                policy.drive_folder_link = new_link
-                fields_to_update.append(Policy.drive_folder_link)
-            policy.save(only=fields_to_update)
-            logger.info(
-                "Полис id=%s №%s помечен удалённым",
-                policy.id,
-                policy.policy_number,
-            )
-        except Exception:
-            logger.exception(
-                "Не удалось пометить папку полиса id=%s №%s удалённой",
-                policy.id,
-                policy.policy_number,
-            )
+        soft_delete_cascade(Policy, [policy.id])
+        policy.is_deleted = True
+        rename_deleted_policy_folder(policy, _resolve_gateway(gateway))
     else:
         logger.warning("❗ Полис id=%s не найден для удаления", policy_id)
 
@@ -316,19 +378,27 @@ def mark_policy_deleted(
 def mark_policies_deleted(
     policy_ids: list[int], *, gateway: DriveGateway | None = None
 ) -> int:
-    """Массово помечает полисы удалёнными."""
+    """Массово помечает полисы удалёнными.
+
+    Флаги полисов и их потомков меняются одним каскадом, папки
+    переименовываются после него по одной.
+    """
     if not policy_ids:
         return 0
 
-    count = 0
-    resolved_gateway = _resolve_gateway(gateway) if policy_ids else None
-    for pid in policy_ids:
-        before = Policy.get_or_none(Policy.id == pid)
-        if before and not before.is_deleted:
-            mark_policy_deleted(pid, gateway=resolved_gateway)
-            count += 1
-    logger.info("Полисов помечено удалёнными: %s", count)
-    return count
+    policies = list(
+        Policy.select(Policy, Client)
+        .join(Client)
+        .where(Policy.id.in_(policy_ids) & (Policy.is_deleted == False))
+    )
+    if policies:
+        soft_delete_cascade(Policy, [policy.id for policy in policies])
+        resolved_gateway = _resolve_gateway(gateway)
+        for policy in policies:
+            policy.is_deleted = True
+            rename_deleted_policy_folder(policy, resolved_gateway)
+    logger.info("Полисов помечено удалёнными: %s", len(policies))
+    return len(policies)
 
 
 # Уведомления
@@ -958,13 +1028,9 @@ def get_unique_policy_field_values(field_name: str) -> list[str]:
     }
     if field_name not in allowed_fields:
         raise ValueError(f"Недопустимое поле для выборки: {field_name}")
-    # Получить уникальные значения
-    q = (
-        Policy.select(getattr(Policy, field_name))
-        .where(getattr(Policy, field_name).is_null(False))
-        .distinct()
-    )
-    return sorted({getattr(p, field_name) for p in q if getattr(p, field_name)})
+    field = getattr(Policy, field_name)
+    values = distinct_values(Policy.select().where(field != ""), field, limit=None)
+    return [item["value"] for item in values if item["value"] is not None]
 
 
 def attach_premium(policies: list[Policy]) -> None:
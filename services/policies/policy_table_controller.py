@@ -64,7 +64,11 @@ class PolicyTableController(TableController):
         return super()._create_table_model(items, model_class)
 
     def get_distinct_values(
-        self, column_key: str, *, column_field: Any | None = None
+        self,
+        column_key: str,
+        *,
+        column_field: Any | None = None,
+        prefix: str | None = None,
     ) -> list[dict[str, Any]] | None:
         filters = self.get_filters()
         column_filters = dict(filters.get("column_filters") or {})
@@ -75,12 +79,15 @@ class PolicyTableController(TableController):
         if not removed:
             column_filters.pop(column_key, None)
         filters["column_filters"] = column_filters
+        search = {"prefix": prefix} if prefix else {}
         try:
             return self.service.get_distinct_values(
-                column_key, column_field=column_field, filters=filters
+                column_key, column_field=column_field, filters=filters, **search
             )
         except TypeError:
-            return self.service.get_distinct_values(column_key, filters=filters)
+            return self.service.get_distinct_values(
+                column_key, filters=filters, **search
+            )
 
 
 __all__ = ["PolicyTableController"]
@@ -0,0 +1,147 @@
+"""Быстрый поиск похожих строк для косвенного сопоставления полисов.
+
+:class:`difflib.SequenceMatcher` считает сходство как ``2 * M / T``, где
+``M`` — число совпавших символов, а ``T`` — суммарная длина строк. Число
+совпавших символов не может превышать пересечение мультимножеств символов,
+поэтому ``2 * Σ min(count_a, count_b) / T`` — точная верхняя граница
+сходства (то же, что :meth:`SequenceMatcher.quick_ratio`).
+
+:class:`SimilarityIndex` хранит векторы частот символов всех строк в матрице
+``numpy`` и одним векторным выражением отбрасывает строки, у которых граница
+ниже порога. ``SequenceMatcher`` вызывается только для оставшегося короткого
+списка, так что результат совпадает с полным перебором.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+
+@lru_cache(maxsize=65536)
+def similarity_ratio(query: str, candidate: str) -> float:
+    """``SequenceMatcher(None, query, candidate).ratio()`` с кэшированием."""
+
+    return SequenceMatcher(None, query, candidate).ratio()
+
+
+class SimilarityIndex:
+    """Индекс строк с владельцами для поиска по порогу сходства.
+
+    Каждой строке соответствует набор ключей-владельцев (например,
+    идентификаторов сделок). Матрица частот перестраивается лениво при
+    первом поиске после изменений.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self._owners: Dict[str, Set[int]] = {}
+        self._strings: List[str] = []
+        self._counts: Optional[np.ndarray] = None
+        self._lengths: Optional[np.ndarray] = None
+        self._alphabet: Dict[str, int] = {}
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def add(self, key: int, value: Optional[str]) -> None:
+        if not value:
+            return
+        with self._lock:
+            owners = self._owners.get(value)
+            if owners is None:
+                self._owners[value] = {key}
+                self._dirty = True
+            else:
+                owners.add(key)
+
+    def remove(self, key: int, value: Optional[str]) -> None:
+        if not value:
+            return
+        with self._lock:
+            owners = self._owners.get(value)
+            if owners is None:
+                return
+            owners.discard(key)
+            if not owners:
+                # Строка остаётся в матрице до перестройки, но без владельцев
+                # не попадает в результат.
+                del self._owners[value]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._owners.clear()
+            self._strings = []
+            self._counts = None
+            self._lengths = None
+            self._alphabet = {}
+            self._dirty = False
+
+    def _rebuild(self) -> None:
+        strings = list(self._owners)
+        alphabet: Dict[str, int] = {}
+        for value in strings:
+            for char in value:
+                alphabet.setdefault(char, len(alphabet))
+        counts = np.zeros((len(strings), max(len(alphabet), 1)), dtype=np.uint16)
+        for row, value in enumerate(strings):
+            for char, count in Counter(value).items():
+                counts[row, alphabet[char]] = count
+        self._strings = strings
+        self._alphabet = alphabet
+        self._counts = counts
+        self._lengths = np.fromiter(
+            (len(value) for value in strings), dtype=np.int64, count=len(strings)
+        )
+        self._dirty = False
+
+    def shortlist(self, query: str) -> List[str]:
+        """Строки, сходство которых с ``query`` может достигать порога."""
+
+        if not query:
+            return []
+        with self._lock:
+            if self._dirty or self._counts is None:
+                self._rebuild()
+            if not self._strings:
+                return []
+            vector = np.zeros(self._counts.shape[1], dtype=np.uint16)
+            for char, count in Counter(query).items():
+                column = self._alphabet.get(char)
+                if column is not None:
+                    vector[column] = min(count, np.iinfo(np.uint16).max)
+            overlap = np.minimum(self._counts, vector).sum(axis=1, dtype=np.int64)
+            bound = 2.0 * overlap / (self._lengths + len(query))
+            rows = np.flatnonzero(bound >= self.threshold)
+            return [
+                self._strings[row]
+                for row in rows
+                if self._strings[row] in self._owners
+            ]
+
+    def search(self, query: Optional[str]) -> Dict[int, float]:
+        """Вернуть ``ключ → лучшее сходство`` для сходства не ниже порога."""
+
+        result: Dict[int, float] = {}
+        if not query:
+            return result
+        for candidate in self.shortlist(query):
+            ratio = similarity_ratio(query, candidate)
+            if ratio < self.threshold:
+                continue
+            with self._lock:
+                owners = tuple(self._owners.get(candidate, ()))
+            for key in owners:
+                if ratio > result.get(key, 0.0):
+                    result[key] = ratio
+        return result
+
+
+__all__ = ["SimilarityIndex", "similarity_ratio"]
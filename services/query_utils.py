@@ -1,13 +1,53 @@
 """Utility helpers for building filtered Peewee queries."""
 
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
 from collections.abc import Iterable as IterableABC
 from decimal import Decimal
-from typing import Any, Iterable, Iterator
-
-from peewee import Case, Field, Model, ModelSelect, Node, fn
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from peewee import (
+    BooleanField,
+    Case,
+    DateField,
+    DateTimeField,
+    DecimalField,
+    Field,
+    FloatField,
+    ForeignKeyField,
+    IntegerField,
+    Model,
+    ModelSelect,
+    Node,
+    PostgresqlDatabase,
+    TimeField,
+    fn,
+)
 from playhouse.shortcuts import Cast
 
-from utils.filter_constants import CHOICE_NULL_TOKEN
+from database.search_index import get_search_backend
+from database import change_events
+from utils.filter_constants import CHOICE_NULL_TOKEN, DATE_RANGE_SEPARATOR
+
+logger = logging.getLogger(__name__)
+
+# Типы полей, текстовое представление которых состоит только из цифр и
+# разделителей. Поиск по ним имеет смысл, лишь если в запросе нет букв.
+_NUMERIC_LIKE_FIELDS = (
+    IntegerField,
+    DecimalField,
+    FloatField,
+    DateField,
+    DateTimeField,
+    TimeField,
+)
+_NUMERIC_LIKE_CHARS = frozenset("0123456789-+.,: T")
+# ``CAST(bool AS TEXT)`` даёт ``0/1`` в SQLite и ``true/false`` в PostgreSQL.
+_BOOLEAN_LIKE_CHARS = frozenset("01truefals")
 
 
 def _normalize_filter_values(value: Any) -> tuple[list[str], bool]:
@@ -42,21 +82,141 @@ def _normalize_filter_values(value: Any) -> tuple[list[str], bool]:
     return values, includes_null
 
 
-def _apply_contains_filters(
-    query: ModelSelect, items: Iterable[tuple[Field, Any]]
-) -> ModelSelect:
-    """Internal helper to apply ``contains`` filters to a query."""
-    for field, value in items:
-        values, include_null = _normalize_filter_values(value)
-        if not values and not include_null:
+# ───────────────────────── фильтры столбцов ─────────────────────────
+
+_TRUE_TEXTS = frozenset({"1", "true", "yes", "да"})
+_FALSE_TEXTS = frozenset({"0", "false", "no", "нет"})
+#: Виды фильтров, значения которых сравниваются на точное совпадение.
+_EXACT_KINDS = frozenset({"choices", "bool", "number"})
+
+
+class FilterValues(list):
+    """Строковые значения фильтра столбца вместе с его видом.
+
+    Сравнивается как обычный список строк, поэтому сервисы, которые лишь
+    передают значения дальше, не замечают разницы. ``kind`` повторяет тип
+    ``ColumnFilterState`` и определяет условие SQL (см.
+    :func:`filter_condition`): ``text`` — подстрока, ``choices``, ``bool`` и
+    ``number`` — точное совпадение, ``date_range`` — диапазон ``от..до`` в
+    формате ISO с необязательными границами.
+    """
+
+    def __init__(self, values: Iterable[str] = (), kind: str = "text") -> None:
+        super().__init__(values)
+        self.kind = kind
+
+
+def filter_kind(value: Any) -> str:
+    """Вид фильтра: у простых строк и списков — ``text``."""
+
+    return getattr(value, "kind", "text")
+
+
+def _coerce_filter_value(field: Any, text: str) -> Any | None:
+    """Привести строку фильтра к типу поля; ``None`` — если не удалось."""
+
+    target = field.rel_field if isinstance(field, ForeignKeyField) else field
+    try:
+        if isinstance(target, BooleanField):
+            lowered = text.lower()
+            if lowered in _TRUE_TEXTS:
+                return True
+            if lowered in _FALSE_TEXTS:
+                return False
+            return None
+        if isinstance(target, DateTimeField):
+            return datetime.fromisoformat(text)
+        if isinstance(target, DateField):
+            return date.fromisoformat(text[:10])
+        if isinstance(target, IntegerField):
+            return int(text)
+        if isinstance(target, DecimalField):
+            return Decimal(text)
+        if isinstance(target, FloatField):
+            return float(text)
+        if isinstance(target, Field):
+            return text
+        # выражение без типа (например, агрегат) сравнивается как число
+        return float(text)
+    except (TypeError, ValueError, ArithmeticError):
+        return None
+
+
+def _exact_condition(field: Any, values: list[str]) -> Node | None:
+    typed: list[Any] = []
+    condition: Node | None = None
+    for text in values:
+        value = _coerce_filter_value(field, text)
+        if value is None:
+            expr = Cast(field, "TEXT") == text
+            condition = expr if condition is None else (condition | expr)
+        else:
+            typed.append(value)
+    if typed:
+        expr = field == typed[0] if len(typed) == 1 else field.in_(typed)
+        condition = expr if condition is None else (expr | condition)
+    return condition
+
+
+def _date_range_condition(field: Any, values: list[str]) -> Node | None:
+    condition: Node | None = None
+    for text in values:
+        start_text, _, end_text = text.partition(DATE_RANGE_SEPARATOR)
+        try:
+            start = date.fromisoformat(start_text) if start_text else None
+            end = date.fromisoformat(end_text) if end_text else None
+        except ValueError:
+            logger.warning("Некорректный диапазон дат в фильтре: %r", text)
             continue
-        condition: Node | None = None
+        parts: list[Node] = []
+        if start is not None:
+            parts.append(field >= start)
+        if end is not None and isinstance(field, DateTimeField):
+            # конец дня включается: ``< начало следующего дня``
+            next_day = datetime.combine(end + timedelta(days=1), datetime.min.time())
+            parts.append(field < next_day)
+        elif end is not None:
+            parts.append(field <= end)
+        if not parts:
+            continue
+        expr = parts[0] if len(parts) == 1 else (parts[0] & parts[1])
+        condition = expr if condition is None else (condition | expr)
+    return condition
+
+
+def filter_condition(field: Any, value: Any) -> Node | None:
+    """Условие SQL для значения фильтра столбца ``field``.
+
+    ``value`` — строка, список строк или :class:`FilterValues`. Значение
+    ``CHOICE_NULL_TOKEN`` добавляет ``IS NULL``. Без вида фильтра значения
+    ищутся как подстроки текстового представления поля.
+    """
+
+    values, include_null = _normalize_filter_values(value)
+    if not values and not include_null:
+        return None
+    kind = filter_kind(value)
+    condition: Node | None = None
+    if values and kind in _EXACT_KINDS:
+        condition = _exact_condition(field, values)
+    elif values and kind == "date_range":
+        condition = _date_range_condition(field, values)
+    else:
         for candidate in values:
             expr = Cast(field, "TEXT").contains(candidate)
             condition = expr if condition is None else (condition | expr)
-        if include_null:
-            null_expr = field.is_null(True)
-            condition = null_expr if condition is None else (condition | null_expr)
+    if include_null:
+        null_expr = field.is_null(True)
+        condition = null_expr if condition is None else (condition | null_expr)
+    return condition
+
+
+def _apply_contains_filters(
+    query: ModelSelect, items: Iterable[tuple[Field, Any]]
+) -> ModelSelect:
+    """Internal helper to apply column filters to a query."""
+    for field, value in items:
+        condition = filter_condition(field, value)
         if condition is not None:
             query = query.where(condition)
     return query
@@ -93,9 +253,24 @@ def apply_field_filters(
     return _apply_contains_filters(query, field_filters.items())
 
 
+def _can_contain(field: Field, value: str) -> bool:
+    """Может ли текстовое представление ``field`` содержать ``value``."""
+
+    if isinstance(field, BooleanField):
+        return set(value.lower()) <= _BOOLEAN_LIKE_CHARS
+    if isinstance(field, _NUMERIC_LIKE_FIELDS):
+        return set(value) <= _NUMERIC_LIKE_CHARS
+    return True
+
+
 def build_or_condition(fields: Iterable[Field], value: str) -> Node | None:
     """Сформировать OR-условие ``field.contains(value)`` для разных моделей.
 
+    Текстовые поля моделей с поисковым индексом (см.
+    :mod:`database.search_index`) проверяются через индекс, остальные — через
+    ``CAST(field AS TEXT) LIKE``. Числовые поля и даты пропускаются, если
+    значение заведомо не может в них встретиться.
+
     Parameters:
         fields: Iterable с полями Peewee из разных моделей.
         value: Текст для поиска.
@@ -106,8 +281,12 @@ def build_or_condition(fields: Iterable[Field], value: str) -> Node | None:
     """
     if not value:
         return None
+    fields = [field for field in fields if _can_contain(field, value)]
+    indexed, remaining = get_search_backend().split_fields(fields, value)
     condition: Node | None = None
-    for field in fields:
+    for expr in indexed:
+        condition = expr if condition is None else (condition | expr)
+    for field in remaining:
         expr = Cast(field, "TEXT").contains(value)
         condition = expr if condition is None else (condition | expr)
     return condition
@@ -134,7 +313,12 @@ def apply_search_and_filters(
     combined_condition: Node | None = None
 
     if search_text:
-        fields = [f for f in model._meta.sorted_fields if isinstance(f, Field)]
+        shadow = getattr(model, "normalized_fields", {})
+        fields = [
+            f
+            for f in model._meta.sorted_fields
+            if isinstance(f, Field) and f.name not in shadow
+        ]
         if extra_fields:
             fields.extend(extra_fields)
         condition = build_or_condition(fields, search_text)
@@ -242,3 +426,352 @@ def sum_column(query: ModelSelect, field: Field) -> Decimal:
     )
     value: Any | None = aggregate.scalar()
     return _to_decimal(value)
+
+
+# ───────────────────────── постраничная выборка ─────────────────────────
+
+#: Время жизни закэшированного количества записей, секунд. Страхует от
+#: записей, прошедших мимо :mod:`database.change_events` (другие процессы,
+#: массовые операции).
+COUNT_CACHE_TTL = 15.0
+#: Сколько сигнатур фильтров хранить в кэше.
+PAGINATION_CACHE_SIZE = 256
+#: Оценке планировщика PostgreSQL доверяем только для больших выборок:
+#: маленькие таблицы дешевле посчитать точно.
+ESTIMATE_THRESHOLD = 10_000
+
+
+class PageTotal(int):
+    """Общее число записей выборки.
+
+    Ведёт себя как обычный ``int``. Если ``estimated`` истинно, значение —
+    оценка планировщика PostgreSQL, а точное число возвращает
+    :meth:`refine` (это полный ``COUNT``, его стоит вызывать в фоне).
+    """
+
+    estimated: bool
+
+    def __new__(
+        cls,
+        value: int,
+        *,
+        estimated: bool = False,
+        refine: Callable[[], int] | None = None,
+    ):
+        obj = super().__new__(cls, value)
+        obj.estimated = estimated
+        obj._refine = refine
+        return obj
+
+    def refine(self) -> "PageTotal":
+        if not self.estimated or self._refine is None:
+            return self
+        return PageTotal(self._refine())
+
+
+def query_signature(query: ModelSelect, *, ordered: bool = False) -> tuple:
+    """Сигнатура выборки: SQL и параметры без ``LIMIT/OFFSET``.
+
+    Без ``ordered`` сортировка тоже отбрасывается, чтобы количество записей
+    было общим для всех направлений сортировки.
+    """
+
+    base = query.clone().limit(None).offset(None)
+    if not ordered:
+        base = base.order_by()
+    sql, params = base.sql()
+    return sql, repr(params)
+
+
+def estimate_count(query: ModelSelect) -> int | None:
+    """Оценка числа строк по плану PostgreSQL или ``None`` для других СУБД."""
+
+    database = query.model._meta.database
+    database = getattr(database, "obj", database)
+    if not isinstance(database, PostgresqlDatabase):
+        return None
+    sql, params = query.clone().limit(None).offset(None).order_by().sql()
+    try:
+        row = database.execute_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).fetchone()
+    except Exception:  # noqa: BLE001 - оценка необязательна
+        logger.debug("EXPLAIN для оценки количества не выполнен", exc_info=True)
+        return None
+    plan = row[0] if row else None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (TypeError, LookupError, ValueError):
+        return None
+
+
+def nulls_sort_low(query: ModelSelect) -> bool:
+    """``NULL`` меньше любых значений (SQLite, MySQL), но не в PostgreSQL."""
+
+    database = query.model._meta.database
+    database = getattr(database, "obj", database)
+    return not isinstance(database, PostgresqlDatabase)
+
+
+def keyset_condition(
+    order_field: Field,
+    id_field: Field,
+    value: Any,
+    row_id: Any,
+    *,
+    descending: bool,
+    nulls_low: bool = True,
+) -> Node:
+    """Условие «строка идёт после ``(value, row_id)``» для сортировки по ключу.
+
+    Учитывает, где СУБД размещает ``NULL``: при ``nulls_low`` они идут
+    первыми по возрастанию и последними по убыванию.
+    """
+
+    after_value = order_field < value if descending else order_field > value
+    after_id = id_field < row_id if descending else id_field > row_id
+    nulls_first = nulls_low != descending
+    if value is None:
+        same_value = order_field.is_null(True) & after_id
+        if nulls_first:
+            return same_value | order_field.is_null(False)
+        return same_value
+    condition = after_value | ((order_field == value) & after_id)
+    if nulls_first:
+        return condition
+    return condition | order_field.is_null(True)
+
+
+class _CursorState:
+    """Границы уже загруженных страниц одной сортированной выборки."""
+
+    def __init__(
+        self, models: frozenset, per_page: int, order_field: Field, id_field: Field
+    ) -> None:
+        self.models = models
+        self.per_page = per_page
+        self.order_field = order_field
+        self.id_field = id_field
+        #: номер страницы → ключ её последней строки
+        self.boundaries: dict[int, tuple[Any, Any]] = {}
+        #: последняя выданная страница, строки которой ещё не переданы в
+        #: :meth:`QueryPaginator.remember`
+        self.pending: tuple[int, ModelSelect] | None = None
+
+
+class QueryPaginator:
+    """Общий движок постраничной выборки для табличных сервисов.
+
+    * Количество записей кэшируется по сигнатуре фильтров и сбрасывается
+      при изменениях моделей выборки (:mod:`database.change_events`) или по
+      истечении :data:`COUNT_CACHE_TTL`. Для PostgreSQL вместо долгого
+      ``COUNT`` можно сразу вернуть оценку планировщика.
+    * Страницы выбираются по ключу ``(поле сортировки, id)``: прочитав
+      строки страницы из :meth:`page`, вызывающий код передаёт их в
+      :meth:`remember`, и соседняя страница запрашивается условием
+      ``WHERE key > cursor LIMIT n`` без ``OFFSET``. Для страниц без
+      известной границы используется обычный ``OFFSET``.
+    """
+
+    def __init__(
+        self,
+        ttl: float = COUNT_CACHE_TTL,
+        maxsize: int = PAGINATION_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counts: OrderedDict[tuple, tuple[int, float, frozenset]] = OrderedDict()
+        self._cursors: OrderedDict[tuple, _CursorState] = OrderedDict()
+        self._epoch = 0
+        change_events.subscribe(self._on_change)
+
+    # --- сброс ------------------------------------------------------------
+    def _on_change(self, model, _ids) -> None:
+        with self._lock:
+            self._epoch += 1
+            for key in [k for k, v in self._counts.items() if model in v[2]]:
+                del self._counts[key]
+            for key in [k for k, v in self._cursors.items() if model in v.models]:
+                del self._cursors[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._counts.clear()
+            self._cursors.clear()
+
+    # --- количество записей -----------------------------------------------
+    def cached_count(self, query: ModelSelect) -> int | None:
+        """Закэшированное точное количество или ``None``."""
+
+        key = query_signature(query)
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is None:
+                return None
+            value, stored_at, _models = entry
+            if self._clock() - stored_at > self.ttl:
+                del self._counts[key]
+                return None
+            self._counts.move_to_end(key)
+            return value
+
+    def count(self, query: ModelSelect, *, models: Iterable[type[Model]] = ()) -> int:
+        """Точное количество записей с кэшированием по сигнатуре фильтров."""
+
+        cached = self.cached_count(query)
+        if cached is not None:
+            return cached
+        key = query_signature(query)
+        with self._lock:
+            epoch = self._epoch
+        value = query.count()
+        with self._lock:
+            # запись во время подсчёта могла сделать результат устаревшим
+            if epoch == self._epoch:
+                self._counts[key] = (
+                    value,
+                    self._clock(),
+                    frozenset(models) | {query.model},
+                )
+                while len(self._counts) > self.maxsize:
+                    self._counts.popitem(last=False)
+        return value
+
+    def total(
+        self,
+        query: ModelSelect,
+        *,
+        models: Iterable[type[Model]] = (),
+        allow_estimate: bool = True,
+    ) -> PageTotal:
+        """Количество записей для пагинатора.
+
+        Если точного значения нет в кэше, а PostgreSQL оценивает выборку не
+        меньше чем в :data:`ESTIMATE_THRESHOLD` строк, возвращается оценка с
+        ``estimated=True``; точное число даёт :meth:`PageTotal.refine`.
+        """
+
+        models = tuple(models)
+        cached = self.cached_count(query)
+        if cached is not None:
+            return PageTotal(cached)
+        if allow_estimate:
+            estimate = estimate_count(query)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return PageTotal(
+                    estimate,
+                    estimated=True,
+                    refine=lambda: self.count(query, models=models),
+                )
+        return PageTotal(self.count(query, models=models))
+
+    # --- страницы ---------------------------------------------------------
+    @staticmethod
+    def _row_key(row: Any, order_field: Field, id_field: Field) -> tuple | None:
+        data = getattr(row, "__data__", None)
+        if data is None or id_field.name not in data:
+            return None
+        return data.get(order_field.name), data[id_field.name]
+
+    def page(
+        self,
+        query: ModelSelect,
+        page: int,
+        per_page: int,
+        *,
+        order_field: Any = None,
+        id_field: Field | None = None,
+        descending: bool = False,
+        models: Iterable[type[Model]] = (),
+    ) -> ModelSelect:
+        """Вернуть запрос страницы ``page`` отсортированной выборки ``query``.
+
+        ``query`` уже должен быть упорядочен по ``(order_field, id_field)`` в
+        направлении ``descending``. Сортировка по ключу применяется, только
+        если оба поля — столбцы основной модели запроса; иначе страница
+        выбирается через ``OFFSET``.
+        """
+
+        page = max(page, 1)
+        offset = (page - 1) * per_page
+        if id_field is None:
+            id_field = query.model._meta.primary_key
+        if not (
+            isinstance(order_field, Field)
+            and order_field.model is query.model
+            and id_field.model is query.model
+        ):
+            return query.limit(per_page).offset(offset)
+
+        key = (query_signature(query, ordered=True), per_page)
+        with self._lock:
+            state = self._cursors.get(key)
+            if state is None:
+                state = _CursorState(
+                    frozenset(models) | {query.model}, per_page, order_field, id_field
+                )
+                self._cursors[key] = state
+                while len(self._cursors) > self.maxsize:
+                    self._cursors.popitem(last=False)
+            else:
+                self._cursors.move_to_end(key)
+            boundary = state.boundaries.get(page - 1)
+
+        if page == 1:
+            paged = query.limit(per_page)
+        elif boundary is not None:
+            condition = keyset_condition(
+                order_field,
+                id_field,
+                *boundary,
+                descending=descending,
+                nulls_low=nulls_sort_low(query),
+            )
+            paged = query.where(condition).limit(per_page)
+        else:
+            paged = query.limit(per_page).offset(offset)
+
+        with self._lock:
+            state.pending = (page, paged)
+        return paged
+
+    def remember(self, paged: ModelSelect, rows: Sequence[Any]) -> None:
+        """Запомнить ключ последней строки страницы ``paged``.
+
+        ``paged`` — запрос, который вернул :meth:`page`, ``rows`` — его
+        прочитанные строки. По ключу последней строки полной страницы
+        следующая выбирается без ``OFFSET``. Для других запросов и после
+        сброса кэша вызов ничего не делает.
+        """
+
+        with self._lock:
+            for state in self._cursors.values():
+                if state.pending is not None and state.pending[1] is paged:
+                    break
+            else:
+                return
+            page = state.pending[0]
+            state.pending = None
+            if len(rows) < state.per_page:
+                return
+            key = self._row_key(rows[-1], state.order_field, state.id_field)
+            if key is not None:
+                state.boundaries[page] = key
+
+
+_paginator: QueryPaginator | None = None
+_paginator_lock = threading.Lock()
+
+
+def get_query_paginator() -> QueryPaginator:
+    """Общий для процесса движок постраничной выборки."""
+
+    global _paginator
+    with _paginator_lock:
+        if _paginator is None:
+            _paginator = QueryPaginator()
+        return _paginator
@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+from decimal import Decimal
 from pathlib import Path
 from datetime import date, datetime
+from typing import Any, Iterable
 import logging
+import os
 import pandas as pd
+from peewee import Case, chunked, fn
 
 from PySide6.QtWidgets import QDialog, QInputDialog
 from ui.forms.column_mapping_dialog import ColumnMappingDialog
@@ -14,7 +19,10 @@ from ui.forms.income_form import IncomeForm
 from ui.forms.income_update_dialog import IncomeUpdateDialog
 from ui.forms.policy_preview_dialog import PolicyPreviewDialog
 from ui.forms.client_form import ClientForm
-from database.models import Payment
+from database.db import db
+from database.models import Income, Payment, Policy
+from database import change_events
+from services.income_service import notify_incomes_received
 from services.validators import normalize_number
 
 logger = logging.getLogger(__name__)
@@ -92,6 +100,307 @@ def _parse_amount(value) -> float:
     except Exception:
         return 0.0
 
+# ─────────────────────────── Массовый импорт ───────────────────────────
+
+#: Столбцы таблицы RESO по умолчанию (ключи как у ``ColumnMappingDialog``).
+DEFAULT_MAPPING = {
+    "policy_number": "НОМЕР ПОЛИСА",
+    "period": "НАЧИСЛЕНИЕ,С-ПО",
+    "amount": "arhvp",
+    "premium": "ПРЕМИЯ,РУБ.",
+    "insurance_type": "ПРОДУКТ",
+    "sales_channel": "Источник",
+}
+CLIENT_COLUMN = "СТРАХОВАТЕЛЬ"
+#: Столбцы, без которых выплаты нельзя записать без участия пользователя.
+REQUIRED_MAPPING_KEYS = ("policy_number", "amount")
+
+ACTION_UPDATE = "update"
+ACTION_ADD = "add"
+ACTION_MANUAL = "manual"
+ACTION_SKIP = "skip"
+
+ACTION_LABELS = {
+    ACTION_UPDATE: "Обновить доход",
+    ACTION_ADD: "Добавить доход",
+    ACTION_MANUAL: "Вручную",
+    ACTION_SKIP: "Пропустить",
+}
+
+#: Размер пачки номеров в запросах ``IN (...)``.
+RESOLVE_CHUNK_SIZE = 5000
+
+
+@dataclass
+class ResoPayout:
+    """Выплата по одному полису: все строки таблицы с этим номером."""
+
+    policy_number: str
+    #: первая строка таблицы с этим номером
+    row: dict
+    #: сумма выплаты по всем строкам
+    amount: float
+    premium: float = 0.0
+    start_date: date | None = None
+    end_date: date | None = None
+    client_name: str = ""
+    policy: Any = None
+    payment: Any = None
+    #: первый неполученный доход первого платежа полиса
+    income: Any = None
+    action: str = ACTION_MANUAL
+    #: ``False``, если в таблице нет столбца суммы и ``amount`` не из файла
+    amount_known: bool = True
+
+    def default_action(self) -> str:
+        if not self.amount_known:
+            return ACTION_MANUAL
+        if self.income is not None:
+            return ACTION_UPDATE
+        if self.payment is not None:
+            return ACTION_ADD
+        return ACTION_MANUAL
+
+
+def _parse_amounts(series: pd.Series) -> pd.Series:
+    """Векторный :func:`_parse_amount` для столбца таблицы."""
+
+    text = series.astype("string").str.strip()
+    # та же очистка, что в ``normalize_number``
+    cleaned = (
+        text.str.replace(r"[\s\u00a0]+", "", regex=True)
+        .str.replace(",", ".", regex=False)
+        .str.replace(r"[a-zA-Zа-яА-Я]+", "", regex=True)
+        .str.rstrip(".")
+    )
+    values = pd.to_numeric(cleaned, errors="coerce")
+    # редкие выражения вроде «1 000 + 5%» разбираются построчно
+    rest = values.isna() & text.fillna("").ne("")
+    if rest.any():
+        values[rest] = text[rest].map(_parse_amount)
+    return values.fillna(0.0).astype(float)
+
+
+def _parse_date_ranges(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Векторный :func:`_parse_date_range`: начала и концы периодов."""
+
+    parts = series.astype("string").str.split("-", n=1, expand=True)
+    if parts.shape[1] < 2:
+        empty = pd.Series([None] * len(series), index=series.index, dtype=object)
+        return empty, empty.copy()
+    start = parts[0].str.strip()
+    end = parts[1].str.strip()
+    result = []
+    for column in (start, end):
+        parsed = pd.to_datetime(column, format="%d.%m.%Y", errors="coerce")
+        retry = parsed.isna()
+        if retry.any():
+            parsed[retry] = pd.to_datetime(
+                column[retry], format="%Y-%m-%d", errors="coerce"
+            )
+        result.append(parsed)
+    # период разбирается целиком: без одной из дат он не используется
+    valid = result[0].notna() & result[1].notna()
+    return tuple(
+        pd.Series(
+            [d.date() if ok else None for d, ok in zip(parsed, valid)],
+            index=series.index,
+            dtype=object,
+        )
+        for parsed in result
+    )
+
+
+def _cell(value) -> str:
+    if value is None or value is pd.NA:
+        return ""
+    if isinstance(value, float) and pd.isna(value):
+        return ""
+    return str(value).strip()
+
+
+def missing_reso_columns(
+    columns: Iterable[str], mapping: dict[str, str] | None = None
+) -> list[str]:
+    """Обязательные столбцы ``mapping``, которых нет среди ``columns``."""
+
+    mapping = mapping or DEFAULT_MAPPING
+    present = set(columns)
+    return [
+        mapping.get(key) or key
+        for key in REQUIRED_MAPPING_KEYS
+        if mapping.get(key) not in present
+    ]
+
+
+def plan_reso_payouts(
+    df: pd.DataFrame, mapping: dict[str, str] | None = None
+) -> list[ResoPayout]:
+    """Сгруппировать таблицу выплат по номерам полисов.
+
+    Суммы всех строк полиса складываются одним ``groupby``, период, премия
+    и страхователь берутся из первой строки. Порядок выплат — порядок первого
+    появления номера в таблице. Если столбца суммы нет, у выплат
+    ``amount_known`` ложно и по умолчанию выбирается ручной импорт.
+    """
+
+    mapping = mapping or DEFAULT_MAPPING
+    policy_col = mapping["policy_number"]
+    amount_col = mapping.get("amount")
+    if df.empty or policy_col not in df.columns:
+        return []
+
+    numbers = df[policy_col].astype("string").str.strip()
+    present = numbers.notna() & numbers.ne("")
+    frame = df[present]
+    numbers = numbers[present]
+    if frame.empty:
+        return []
+
+    amount_known = amount_col in frame.columns
+    if amount_known:
+        amounts = _parse_amounts(frame[amount_col])
+    else:
+        amounts = pd.Series(0.0, index=frame.index)
+    totals = amounts.groupby(numbers, sort=False).sum()
+    first = frame.groupby(numbers, sort=False).head(1)
+    first_numbers = numbers[first.index]
+
+    period_col = mapping.get("period")
+    if period_col in first.columns:
+        starts, ends = _parse_date_ranges(first[period_col])
+    else:
+        starts = ends = pd.Series(None, index=first.index, dtype=object)
+    premium_col = mapping.get("premium")
+    if premium_col in first.columns:
+        premiums = _parse_amounts(first[premium_col])
+    else:
+        premiums = pd.Series(0.0, index=first.index)
+
+    payouts = []
+    records = first.to_dict("records")
+    for pos, (index, number) in enumerate(first_numbers.items()):
+        row = records[pos]
+        payouts.append(
+            ResoPayout(
+                policy_number=str(number),
+                row=row,
+                amount=float(totals[number]),
+                premium=float(premiums[index]),
+                start_date=starts[index],
+                end_date=ends[index],
+                client_name=_cell(row.get(CLIENT_COLUMN)),
+                amount_known=amount_known,
+            )
+        )
+    return payouts
+
+
+def resolve_reso_payouts(payouts: list[ResoPayout]) -> list[ResoPayout]:
+    """Найти полисы, первые платежи и открытые доходы для выплат.
+
+    Вместо запросов на каждый номер выполняются три запроса на пачку из
+    :data:`RESOLVE_CHUNK_SIZE` номеров. Заполняет ``policy``, ``payment``,
+    ``income`` и ``action`` и возвращает тот же список.
+    """
+
+    policies: dict[str, Any] = {}
+    numbers = list(dict.fromkeys(p.policy_number for p in payouts))
+    for chunk in chunked(numbers, RESOLVE_CHUNK_SIZE):
+        for policy in (
+            Policy.select()
+            .where(Policy.policy_number.in_(chunk))
+            .order_by(Policy.id.desc())
+        ):
+            # как ``get_or_none``: при дублях номера берётся первый полис
+            policies[policy.policy_number] = policy
+
+    payments: dict[int, Any] = {}
+    policy_ids = [policy.id for policy in policies.values()]
+    for chunk in chunked(policy_ids, RESOLVE_CHUNK_SIZE):
+        first_ids = (
+            Payment.select(fn.MIN(Payment.id))
+            .where(Payment.policy.in_(chunk))
+            .group_by(Payment.policy)
+        )
+        for pay in Payment.select().where(Payment.id.in_(first_ids)):
+            payments[pay.policy_id] = pay
+
+    incomes: dict[int, Any] = {}
+    payment_ids = [pay.id for pay in payments.values()]
+    for chunk in chunked(payment_ids, RESOLVE_CHUNK_SIZE):
+        first_ids = (
+            Income.select(fn.MIN(Income.id))
+            .where(Income.payment.in_(chunk) & Income.received_date.is_null(True))
+            .group_by(Income.payment)
+        )
+        for income in Income.select().where(Income.id.in_(first_ids)):
+            incomes[income.payment_id] = income
+
+    for payout in payouts:
+        payout.policy = policies.get(payout.policy_number)
+        payout.payment = payments.get(payout.policy.id) if payout.policy else None
+        payout.income = incomes.get(payout.payment.id) if payout.payment else None
+        payout.action = payout.default_action()
+    return payouts
+
+
+def commit_reso_payouts(
+    payouts: Iterable[ResoPayout], *, received_date: date
+) -> dict[str, int]:
+    """Записать доходы выплат с действиями «обновить» и «добавить».
+
+    Все изменения выполняются в одной транзакции: открытые доходы
+    обновляются одним ``UPDATE`` на пачку, новые доходы вставляются по
+    первым платежам полисов. Возвращает число обновлённых и добавленных
+    доходов. Выплаты без суммы из таблицы записать нельзя: для них
+    выбрасывается :class:`ValueError` до начала транзакции.
+    """
+
+    def money(value: float) -> Decimal:
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+
+    updates = {}
+    inserts = []
+    for payout in payouts:
+        if payout.action in (ACTION_UPDATE, ACTION_ADD) and not payout.amount_known:
+            raise ValueError(
+                f"Нет суммы выплаты по полису {payout.policy_number}: "
+                "не найден столбец суммы"
+            )
+        if payout.action == ACTION_UPDATE and payout.income is not None:
+            updates[payout.income.id] = money(payout.amount)
+        elif payout.action == ACTION_ADD and payout.payment is not None:
+            inserts.append((payout.payment.id, money(payout.amount)))
+
+    added: list[int] = []
+    with db.atomic():
+        for chunk in chunked(list(updates.items()), RESOLVE_CHUNK_SIZE // 10):
+            amount = Case(Income.id, [(pk, value) for pk, value in chunk])
+            Income.update(amount=amount, received_date=received_date).where(
+                Income.id.in_([pk for pk, _ in chunk])
+            ).execute()
+        rows = [
+            {"payment": payment_id, "amount": amount, "received_date": received_date}
+            for payment_id, amount in inserts
+        ]
+        if db.returning_clause:
+            for chunk in chunked(rows, 1000):
+                query = Income.insert_many(chunk).returning(Income.id)
+                added.extend(pk for (pk,) in query.tuples().execute())
+        else:
+            # без RETURNING идентификаторы новых доходов берутся по одному
+            added.extend(Income.insert(row).execute() for row in rows)
+
+    changed = list(updates) + added
+    if changed:
+        change_events.notify_changed(Income, changed)
+        notify_incomes_received(changed)
+    logger.info(
+        "📥 Импорт RESO: обновлено доходов %s, добавлено %s", len(updates), len(added)
+    )
+    return {"updated": len(updates), "added": len(added)}
+
 
 def select_row_from_table(df: pd.DataFrame, parent=None) -> pd.Series | None:
     """Prompt the user to select a specific row from the RESO table."""
@@ -149,48 +458,47 @@ def import_reso_payouts(
     policy_form_cls: type[PolicyForm] = PolicyForm,
     income_form_cls: type[IncomeForm] = IncomeForm,
     client_form_cls: type[ClientForm] = ClientForm,
+    numbers: Iterable[str] | None = None,
+    mapping: dict[str, str] | None = None,
 ) -> int:
     """Import RESO payout table sequentially.
 
     Each unique policy number in the table is processed one by one. For every
     policy the user can create a new policy, attach the payout to an existing
-    one or skip it. Returns the number of successfully processed policies.
+    one or skip it. ``numbers`` limits the import to the given policy numbers,
+    ``mapping`` replaces the column mapping dialog. Returns the number of
+    successfully processed policies.
     """
 
     df = load_reso_table(path)
     file_date = date.fromtimestamp(Path(path).stat().st_ctime)
 
-    mapping = {
-        "policy_number": "НОМЕР ПОЛИСА",
-        "period": "НАЧИСЛЕНИЕ,С-ПО",
-        "amount": "arhvp",
-        "premium": "ПРЕМИЯ,РУБ.",
-        "insurance_type": "ПРОДУКТ",
-        "sales_channel": "Источник",
-    }
-    if column_map_cls is not None:
-        dlg = column_map_cls(list(df.columns), parent=parent)
-        if not dlg.exec():
-            return 0
-        mapping = dlg.get_mapping()
+    if mapping is None:
+        mapping = dict(DEFAULT_MAPPING)
+        if column_map_cls is not None:
+            dlg = column_map_cls(list(df.columns), parent=parent)
+            if not dlg.exec():
+                return 0
+            mapping = dlg.get_mapping()
 
-    policy_col = mapping["policy_number"]
     premium_col = mapping.get("premium")
     type_col = mapping.get("insurance_type")
     channel_col = mapping.get("sales_channel")
-    numbers = [str(n).strip() for n in df[policy_col].dropna().unique()]
-    total = len(numbers)
+    payouts = plan_reso_payouts(df, mapping)
+    if numbers is not None:
+        wanted = set(numbers)
+        payouts = [p for p in payouts if p.policy_number in wanted]
+    resolve_reso_payouts(payouts)
+    total = len(payouts)
     processed = 0
 
-    for idx, number in enumerate(numbers, start=1):
+    for idx, payout in enumerate(payouts, start=1):
+        number = payout.policy_number
         logger.info("🔄 %s/%s: обработка полиса %s", idx, total, number)
-        selected_rows = df[df[policy_col].astype(str).str.strip() == number]
-        if selected_rows.empty:
-            continue
-        row = selected_rows.iloc[0]
+        row = payout.row
         forced_client = None
-        if "СТРАХОВАТЕЛЬ" in df.columns:
-            raw_client = str(row.get("СТРАХОВАТЕЛЬ", "")).strip()
+        if CLIENT_COLUMN in df.columns:
+            raw_client = payout.client_name
             if raw_client:
                 import re
                 from services.clients import find_similar_clients
@@ -212,17 +520,12 @@ def import_reso_payouts(
                             continue
                     else:
                         continue
-        start_date, end_date = _parse_date_range(str(row.get(mapping["period"], "")))
-
-        existing_policy = None
-        if number:
-            from database.models import Policy
-
-            existing_policy = Policy.get_or_none(Policy.policy_number == number)
+        start_date, end_date = payout.start_date, payout.end_date
+        existing_policy = payout.policy
 
         progress = f"{idx}/{total}"
         preview = preview_cls(
-            row.to_dict(),
+            dict(row),
             existing_policy=existing_policy,
             policy_form_cls=policy_form_cls,
             policy_number=number,
@@ -240,15 +543,15 @@ def import_reso_payouts(
                 if hasattr(widget, "setCurrentText"):
                     widget.setCurrentText("Ресо")
             if "insurance_type" in form.fields and type_col in df.columns:
-                ins_type = str(row.get(type_col, "")).strip()
+                ins_type = _cell(row.get(type_col))
                 if ins_type and hasattr(form.fields["insurance_type"], "setCurrentText"):
                     form.fields["insurance_type"].setCurrentText(ins_type)
             if "sales_channel" in form.fields and channel_col in df.columns:
-                channel = str(row.get(channel_col, "")).strip()
+                channel = _cell(row.get(channel_col))
                 if channel and hasattr(form.fields["sales_channel"], "setCurrentText"):
                     form.fields["sales_channel"].setCurrentText(channel)
             if premium_col in df.columns:
-                prem = _parse_amount(row.get(premium_col))
+                prem = payout.premium
                 if prem:
                     pay_date = start_date or file_date
                     pay_data = {"payment_date": pay_date, "amount": prem}
@@ -267,25 +570,28 @@ def import_reso_payouts(
         if not policy:
             continue
 
-        amount = selected_rows[mapping["amount"]].map(_parse_amount).sum()
+        amount = payout.amount
 
-        pay = (
-            policy.payments.order_by(Payment.id).first()
-            if hasattr(policy, "payments")
-            else None
-        )
-        existing_income = None
-        if pay:
-            from database.models import Income
-
-            existing_income = (
-                Income.select()
-                .where(
-                    (Income.payment == pay.id) & (Income.received_date.is_null(True))
-                )
-                .order_by(Income.id)
-                .first()
+        if payout.payment is not None and policy.id == payout.policy.id:
+            pay, existing_income = payout.payment, payout.income
+        else:
+            # полис или платёж созданы в окне предпросмотра
+            pay = (
+                policy.payments.order_by(Payment.id).first()
+                if hasattr(policy, "payments")
+                else None
             )
+            existing_income = None
+            if pay:
+                existing_income = (
+                    Income.select()
+                    .where(
+                        (Income.payment == pay.id)
+                        & (Income.received_date.is_null(True))
+                    )
+                    .order_by(Income.id)
+                    .first()
+                )
 
         from PySide6.QtWidgets import QMessageBox
 
@@ -0,0 +1,215 @@
+"""Каскадное мягкое удаление и восстановление наборами записей.
+
+Граф каскада строится по внешним ключам моделей :data:`ALL_MODELS`: запись
+модели с ``is_deleted`` принадлежит родителю, если ссылается на него
+обязательным (``null=False``) внешним ключом. Так клиент владеет сделками и
+полисами, сделка — расчётами, полис — платежами и расходами, платёж —
+доходами и расходами. Необязательные ссылки (полис → сделка, задача →
+сделка/полис) каскад не затрагивают.
+
+:func:`soft_delete_cascade` и :func:`restore_cascade` выполняют в одной
+транзакции по одному ``UPDATE`` на модель: потомки выбираются подзапросом
+по идентификаторам родителей, а не обходом записей в Python.
+
+Удаление ставит всем записям каскада одну отметку ``deleted_at``.
+Восстановление снимает пометку только с потомков с той же отметкой, что у
+восстанавливаемых корней: полис, удалённый раньше отдельно, после
+восстановления клиента остаётся удалённым. Потомки корней, удалённых без
+отметки (до её появления), восстанавливаются, если отметки нет и у них.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from peewee import Expression, ForeignKeyField, Model
+
+from database.db import db
+from database.init import ALL_MODELS
+from database.models import SoftDeleteModel
+from database import change_events
+
+logger = logging.getLogger(__name__)
+
+#: Суффикс, который удаление дописывает к описанию сделки и номеру полиса;
+#: восстановление тем же каскадом его снимает.
+DELETED_SUFFIX = " deleted"
+
+#: Сколько корневых идентификаторов передавать в одно условие ``IN``.
+CASCADE_CHUNK_SIZE = 500
+
+#: Число изменённых записей по моделям, в порядке обработки.
+CascadeCounts = Dict[type[Model], int]
+
+
+def _soft_delete_models(models: Iterable[type[Model]]) -> List[type[Model]]:
+    return [m for m in models if issubclass(m, SoftDeleteModel)]
+
+
+def cascade_children(
+    models: Iterable[type[Model]] = ALL_MODELS,
+) -> Dict[type[Model], List[Tuple[type[Model], ForeignKeyField]]]:
+    """Граф каскада: модель → [(дочерняя модель, внешний ключ на неё)]."""
+
+    soft = _soft_delete_models(models)
+    children: Dict[type[Model], List[Tuple[type[Model], ForeignKeyField]]] = {
+        model: [] for model in soft
+    }
+    for model in soft:
+        for field in model._meta.refs:
+            if field.null or field.rel_model not in children:
+                continue
+            if field.rel_model is model:
+                continue
+            children[field.rel_model].append((model, field))
+    return children
+
+
+def cascade_order(
+    root: type[Model], models: Iterable[type[Model]] = ALL_MODELS
+) -> List[Tuple[type[Model], List[Tuple[type[Model], ForeignKeyField]]]]:
+    """Потомки ``root`` в порядке обработки вместе со ссылками на родителей.
+
+    Модель идёт после всех своих родителей из поддерева, поэтому её условие
+    можно собрать из уже построенных подзапросов родителей.
+    """
+
+    soft = _soft_delete_models(models)
+    children = cascade_children(soft)
+    reachable = {root}
+    stack = [root]
+    while stack:
+        for child, _ in children.get(stack.pop(), ()):
+            if child not in reachable:
+                reachable.add(child)
+                stack.append(child)
+
+    parents: Dict[type[Model], List[Tuple[type[Model], ForeignKeyField]]] = {}
+    for parent in (m for m in soft if m in reachable):
+        for child, field in children[parent]:
+            parents.setdefault(child, []).append((parent, field))
+
+    order = []
+    done = {root}
+    pending = [m for m in soft if m in parents]
+    while pending:
+        ready = [m for m in pending if all(p in done for p, _ in parents[m])]
+        if not ready:
+            raise ValueError(f"Цикл в графе каскада от {root.__name__}")
+        for model in ready:
+            order.append((model, parents[model]))
+            done.add(model)
+            pending.remove(model)
+    return order
+
+
+def _same_deletion(model: type[Model], stamps: set) -> Expression | None:
+    """Условие «запись удалена тем же каскадом, что и корни с ``stamps``»."""
+
+    known = [stamp for stamp in stamps if stamp is not None]
+    condition = model.deleted_at.in_(known) if known else None
+    if None in stamps:
+        # корни, удалённые до появления отметок: их потомки тоже без отметки
+        legacy = model.deleted_at.is_null()
+        condition = legacy if condition is None else condition | legacy
+    return condition
+
+
+def _cascade(root: type[Model], ids: Iterable[int], deleted: bool) -> CascadeCounts:
+    root_ids = list(dict.fromkeys(i for i in ids if i is not None))
+    counts: CascadeCounts = {root: 0}
+    if not root_ids:
+        return counts
+    order = cascade_order(root)
+    for model, _ in order:
+        counts[model] = 0
+    # одна отметка на весь каскад, по ней восстановление находит его записи
+    values = {
+        "is_deleted": deleted,
+        "deleted_at": datetime.utcnow() if deleted else None,
+    }
+
+    with db.atomic():
+        for start in range(0, len(root_ids), CASCADE_CHUNK_SIZE):
+            chunk = root_ids[start : start + CASCADE_CHUNK_SIZE]
+            root_where = root.id.in_(chunk) & (root.is_deleted != deleted)
+            stamps = None
+            if not deleted:
+                stamps = {
+                    stamp
+                    for (stamp,) in root.select(root.deleted_at)
+                    .where(root_where)
+                    .distinct()
+                    .tuples()
+                }
+                if not stamps:
+                    continue
+            counts[root] += root.update(**values).where(root_where).execute()
+            # подзапросы идентификаторов поддерева, не зависящие от флага
+            scopes = {root: chunk}
+            for model, parent_refs in order:
+                condition = None
+                for parent, field in parent_refs:
+                    part = field.in_(scopes[parent])
+                    condition = part if condition is None else condition | part
+                scopes[model] = model.select(model.id).where(condition)
+                condition &= model.is_deleted != deleted
+                if stamps is not None:
+                    condition &= _same_deletion(model, stamps)
+                counts[model] += model.update(**values).where(condition).execute()
+    return counts
+
+
+def _notify(root: type[Model], ids: Iterable[int], counts: CascadeCounts) -> None:
+    change_events.notify_changed(root, list(ids))
+    for model, count in counts.items():
+        if model is not root and count:
+            change_events.notify_changed(model)
+
+
+def soft_delete_cascade(root: type[Model], ids: Iterable[int]) -> CascadeCounts:
+    """Пометить удалёнными записи ``root`` с ``ids`` и всех их потомков.
+
+    Возвращает число помеченных записей по моделям; уже удалённые записи не
+    считаются.
+    """
+
+    ids = list(ids)
+    counts = _cascade(root, ids, True)
+    _notify(root, ids, counts)
+    logger.info(
+        "🗑️ Каскадное удаление %s: %s",
+        root.__name__,
+        ", ".join(f"{m.__name__}={n}" for m, n in counts.items()),
+    )
+    return counts
+
+
+def restore_cascade(root: type[Model], ids: Iterable[int]) -> CascadeCounts:
+    """Снять пометку удаления с записей ``root`` с ``ids`` и их потомков.
+
+    Восстанавливаются только потомки, удалённые тем же каскадом, что и корни.
+    """
+
+    ids = list(ids)
+    counts = _cascade(root, ids, False)
+    _notify(root, ids, counts)
+    logger.info(
+        "♻️ Каскадное восстановление %s: %s",
+        root.__name__,
+        ", ".join(f"{m.__name__}={n}" for m, n in counts.items()),
+    )
+    return counts
+
+
+__all__ = [
+    "CASCADE_CHUNK_SIZE",
+    "CascadeCounts",
+    "DELETED_SUFFIX",
+    "cascade_children",
+    "cascade_order",
+    "restore_cascade",
+    "soft_delete_cascade",
+]
@@ -0,0 +1,305 @@
+"""Событийная выдача задач очереди исполнителям.
+
+Вместо периодического опроса Telegram-бот ждёт сигнала о новых задачах:
+
+* при PostgreSQL :func:`notify_task_queued` выполняет ``pg_notify`` в
+  транзакции постановки в очередь, а :class:`PostgresQueueListener` слушает
+  канал через ``LISTEN`` — уведомление приходит сразу после фиксации;
+* при SQLite :class:`HighWaterMarkWatcher` раз в несколько секунд сравнивает
+  максимальный ``queued_at`` задач в очереди с предыдущим значением.
+
+Постановка в очередь в том же процессе будит диспетчер через
+:mod:`database.change_events`. :class:`TaskDispatcher` выдаёт все готовые
+задачи одной транзакцией (:func:`services.task_queue.pop_dispatchable_tasks`)
+и ведёт метрики задержки выдачи.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as _dt
+import logging
+import select
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from peewee import PostgresqlDatabase, fn
+
+from database.db import db, thread_connection
+from database.executor import run_db
+from database.models import Task
+from database.change_events import notify_changed, subscribe, unsubscribe
+from .task_states import QUEUED
+
+logger = logging.getLogger(__name__)
+
+QUEUE_CHANNEL = "crm_task_queue"
+#: Интервал опроса ``queued_at`` для SQLite, секунд.
+WATCH_INTERVAL = 2.0
+#: Страховочный проход диспетчера без сигналов, секунд.
+SWEEP_INTERVAL = 300.0
+
+#: Отправка задачи исполнителю: возвращает ``(chat_id, message_id)``.
+SendTask = Callable[[Task, int], Awaitable[tuple[int, int]]]
+#: Выполнение синхронного вызова БД вне цикла событий.
+RunBlocking = Callable[..., Awaitable[Any]]
+
+
+def notify_task_queued(task_id: int) -> None:
+    """Сообщить диспетчерам о задаче, поставленной в очередь."""
+
+    database = getattr(db, "obj", None)
+    if isinstance(database, PostgresqlDatabase):
+        try:
+            database.execute_sql(
+                "SELECT pg_notify(%s, %s)", (QUEUE_CHANNEL, str(task_id))
+            )
+        except Exception:
+            logger.warning("Не удалось отправить NOTIFY для задачи %s", task_id)
+    notify_changed(Task, task_id)
+
+
+class QueueWatcher:
+    """Источник сигналов о новых задачах в очереди."""
+
+    def start(self, callback: Callable[[], None]) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        raise NotImplementedError
+
+
+class _ThreadWatcher(QueueWatcher):
+    def __init__(self) -> None:
+        self._callback: Callable[[], None] = lambda: None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, callback: Callable[[], None]) -> None:
+        self._callback = callback
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=type(self).__name__, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:  # pragma: no cover - переопределяется
+        raise NotImplementedError
+
+
+class PostgresQueueListener(_ThreadWatcher):
+    """Слушает ``LISTEN crm_task_queue`` на отдельном соединении."""
+
+    def __init__(self, database: PostgresqlDatabase, channel: str = QUEUE_CHANNEL):
+        super().__init__()
+        self.database = database
+        self.channel = channel
+
+    def _run(self) -> None:
+        # соединение LISTEN живёт отдельно от пула: оно занято всё время
+        # работы слушателя и закрывается им самим
+        listen_db = PostgresqlDatabase(
+            self.database.database, autoconnect=False, **self.database.connect_params
+        )
+        while not self._stop.is_set():
+            conn = None
+            try:
+                listen_db.connect(reuse_if_open=True)
+                conn = listen_db.connection()
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                logger.info("👂 Подписка на канал %s", self.channel)
+                # сигнал на случай задач, поставленных до подписки
+                self._callback()
+                while not self._stop.is_set():
+                    ready, _, _ = select.select([conn], [], [], 1.0)
+                    if not ready:
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self._callback()
+            except Exception:
+                logger.exception("Ошибка LISTEN %s, переподключение", self.channel)
+                self._stop.wait(5)
+            finally:
+                if conn is not None:
+                    try:
+                        listen_db.close()
+                    except Exception:
+                        pass
+
+
+class HighWaterMarkWatcher(_ThreadWatcher):
+    """Опрашивает наибольший ``queued_at`` задач в очереди."""
+
+    def __init__(self, interval: float = WATCH_INTERVAL) -> None:
+        super().__init__()
+        self.interval = interval
+        self._mark: Optional[_dt.datetime] = None
+
+    def probe(self) -> bool:
+        """Вернуть ``True``, если в очереди появились более новые задачи."""
+
+        mark = (
+            Task.select(fn.MAX(Task.queued_at))
+            .where((Task.dispatch_state == QUEUED) & (Task.is_deleted == False))
+            .scalar()
+        )
+        if isinstance(mark, str):
+            mark = _dt.datetime.fromisoformat(mark)
+        changed = mark is not None and (self._mark is None or mark > self._mark)
+        if mark is not None:
+            self._mark = mark
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with thread_connection():
+                    changed = self.probe()
+                if changed:
+                    self._callback()
+            except Exception:
+                logger.exception("Ошибка опроса очереди задач")
+            self._stop.wait(self.interval)
+
+
+def make_queue_watcher(database=None) -> QueueWatcher:
+    """Выбрать наблюдатель очереди под используемую базу данных."""
+
+    database = database or db.obj
+    if isinstance(database, PostgresqlDatabase):
+        return PostgresQueueListener(database)
+    return HighWaterMarkWatcher()
+
+
+class DispatchMetrics:
+    """Задержка между постановкой задачи в очередь и её отправкой."""
+
+    def __init__(self, window: int = 500) -> None:
+        self.dispatched = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float) -> None:
+        self.dispatched += 1
+        self._latencies.append(max(latency, 0.0))
+
+    def summary(self) -> dict[str, float]:
+        values = sorted(self._latencies)
+        if not values:
+            return {"dispatched": self.dispatched, "mean": 0.0, "p95": 0.0, "max": 0.0}
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        return {
+            "dispatched": self.dispatched,
+            "mean": sum(values) / len(values),
+            "p95": p95,
+            "max": values[-1],
+        }
+
+
+class TaskDispatcher:
+    """Выдаёт задачи из очереди исполнителям по сигналам наблюдателя."""
+
+    def __init__(
+        self,
+        send: SendTask,
+        *,
+        watcher: QueueWatcher | None = None,
+        sweep_interval: float = SWEEP_INTERVAL,
+        metrics: DispatchMetrics | None = None,
+        run_blocking: RunBlocking = run_db,
+    ) -> None:
+        self._send = send
+        self._run_blocking = run_blocking
+        self._watcher = watcher
+        self.sweep_interval = sweep_interval
+        self.metrics = metrics or DispatchMetrics()
+        self._event: asyncio.Event | None = None
+
+    async def dispatch_pending(self) -> int:
+        """Отправить все готовые задачи. Возвращает число отправленных."""
+
+        from services import task_queue as tq
+        from services.task_notifications import link_telegram_many
+
+        popped = await self._run_blocking(tq.pop_dispatchable_tasks)
+        links: list[tuple[int, int, int]] = []
+        for task, tg_id in popped:
+            try:
+                chat_id, message_id = await self._send(task, tg_id)
+            except Exception:
+                logger.exception("Не удалось отправить задачу id=%s", task.id)
+                continue
+            links.append((task.id, chat_id, message_id))
+            if task.queued_at:
+                latency = (_dt.datetime.utcnow() - task.queued_at).total_seconds()
+                self.metrics.record(latency)
+        await self._run_blocking(link_telegram_many, links)
+        if links:
+            summary = self.metrics.summary()
+            logger.info(
+                "📬 Отправлено задач: %d; задержка выдачи: среднее %.1f с, "
+                "p95 %.1f с, максимум %.1f с",
+                len(links),
+                summary["mean"],
+                summary["p95"],
+                summary["max"],
+            )
+        return len(links)
+
+    def wake(self) -> None:
+        if self._event is not None:
+            self._event.set()
+
+    async def run(self) -> None:
+        """Работать до отмены задачи asyncio."""
+
+        loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        event = self._event
+
+        def threadsafe_wake() -> None:
+            loop.call_soon_threadsafe(event.set)
+
+        def on_change(model, _ids) -> None:
+            if model is Task:
+                threadsafe_wake()
+
+        watcher = self._watcher or make_queue_watcher()
+        watcher.start(threadsafe_wake)
+        subscribe(on_change)
+        try:
+            while True:
+                try:
+                    await self.dispatch_pending()
+                except Exception:
+                    logger.exception("Ошибка выдачи задач из очереди")
+                try:
+                    await asyncio.wait_for(event.wait(), self.sweep_interval)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        finally:
+            unsubscribe(on_change)
+            watcher.stop()
+
+
+__all__ = [
+    "DispatchMetrics",
+    "HighWaterMarkWatcher",
+    "PostgresQueueListener",
+    "QUEUE_CHANNEL",
+    "QueueWatcher",
+    "TaskDispatcher",
+    "make_queue_watcher",
+    "notify_task_queued",
+]
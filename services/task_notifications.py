@@ -2,6 +2,8 @@
 
 import logging
 
+from peewee import Case
+
 from database.db import db
 from database.models import Task
 from .task_states import IDLE, SENT
@@ -42,6 +44,22 @@ def link_telegram(task_id: int, chat_id: int, msg_id: int):
     logger.info("🔗 Telegram-связь установлена для задачи id=%s", task_id)
 
 
+def link_telegram_many(links: list[tuple[int, int, int]]) -> None:
+    """Связать несколько задач с сообщениями одним запросом.
+
+    ``links`` — тройки ``(task_id, chat_id, message_id)``.
+    """
+    if not links:
+        return
+    ids = [task_id for task_id, _, _ in links]
+    with db.atomic():
+        Task.update(
+            tg_chat_id=Case(Task.id, [(tid, chat) for tid, chat, _ in links]),
+            tg_message_id=Case(Task.id, [(tid, msg) for tid, _, msg in links]),
+        ).where(Task.id.in_(ids)).execute()
+    logger.info("🔗 Telegram-связь установлена для задач: %s", ids)
+
+
 def mark_done(task_id: int, note: str | None = None) -> None:
     """Отметить задачу выполненной и уведомить администратора."""
     task = Task.get_or_none(Task.id == task_id)
@@ -85,6 +103,7 @@ def unassign_from_telegram(task_id: int) -> None:
 __all__ = [
     "notify_task",
     "link_telegram",
+    "link_telegram_many",
     "mark_done",
     "append_note",
     "unassign_from_telegram",
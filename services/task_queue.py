@@ -3,12 +3,12 @@
 import datetime as _dt
 import logging
 
-from peewee import JOIN
+from peewee import JOIN, Case, SqliteDatabase
 from playhouse.shortcuts import prefetch
 
 from database.db import db
-from database.models import Client, Deal, Policy, Task
-from services.deal_service import refresh_deal_drive_link
+from database.models import Client, Deal, DealExecutor, Executor, Policy, Task
+from services.drive_links import schedule_drive_link_refresh
 from .task_states import IDLE, QUEUED, SENT
 
 
@@ -24,6 +24,9 @@ def queue_task(task_id: int):
             t.queued_at = _dt.datetime.utcnow()
             t.save()
             logger.info("📤 Задача id=%s поставлена в очередь", t.id)
+            from services.task_dispatch import notify_task_queued
+
+            notify_task_queued(t.id)
             from services.telegram_service import notify_admin_safe
 
             notify_admin_safe(f"📤 Задача #{t.id} поставлена в очередь")
@@ -102,15 +105,15 @@ def _dispatch_tasks(
         for task in task_list:
             task.dispatch_state = SENT
             task.tg_chat_id = chat_id
-            if task.deal:
-                refresh_deal_drive_link(task.deal)
             logger.info(
                 "📬 Задача id=%s выдана в Telegram%s: chat_id=%s",
                 task.id,
                 log_suffix,
                 chat_id,
             )
-        return task_list
+    # ссылки на папки ищутся в фоне, без удержания транзакции
+    schedule_drive_link_refresh(task.deal for task in task_list)
+    return task_list
 
 
 def pop_next_by_client(chat_id: int, client_id: int) -> Task | None:
@@ -191,6 +194,9 @@ def return_to_queue(task_id: int):
             t.queued_at = _dt.datetime.utcnow()
             t.save()
             logger.info("↩ Задача id=%s возвращена в очередь", t.id)
+            from services.task_dispatch import notify_task_queued
+
+            notify_task_queued(t.id)
             from services.telegram_service import notify_admin_safe
 
             notify_admin_safe(f"↩ Задача #{t.id} возвращена в очередь")
@@ -242,9 +248,84 @@ def pop_task_by_id(chat_id: int, task_id: int) -> Task | None:
             prefetch(Task.select().where(Task.id == task.id), Deal, Policy, Client)
         )
         task = result[0] if result else None
-        if task and task.deal:
-            refresh_deal_drive_link(task.deal)
-        return task
+    if task:
+        schedule_drive_link_refresh([task.deal])
+    return task
+
+
+def _dispatch_transaction():
+    """Транзакция выдачи задач.
+
+    В SQLite блокировка записи берётся сразу (``BEGIN IMMEDIATE``): между
+    выбором задач из очереди и их отметкой другой поток ничего не запишет.
+    """
+    if isinstance(db.obj, SqliteDatabase):
+        return db.atomic("IMMEDIATE")
+    return db.atomic()
+
+
+def _claim_tasks(targets: dict[int, int]) -> list[int]:
+    """Отметить задачи ``targets`` отправленными и вернуть id отмеченных.
+
+    Возвращаются только задачи, которые перевёл из ``queued`` этот
+    ``UPDATE``: задачу, выданную тем временем другим вызовом
+    (``pop_next*``, ``pop_task_by_id``), повторно не отправить.
+    """
+    claim = Task.update(
+        dispatch_state=SENT,
+        tg_chat_id=Case(Task.id, list(targets.items())),
+    ).where(Task.id.in_(list(targets)) & (Task.dispatch_state == QUEUED))
+    if db.returning_clause:
+        return [pk for (pk,) in claim.returning(Task.id).tuples().execute()]
+    # без RETURNING (SQLite) выборка и UPDATE идут под одной блокировкой
+    # записи, см. _dispatch_transaction
+    claim.execute()
+    return list(targets)
+
+
+def pop_dispatchable_tasks(limit: int | None = None) -> list[tuple[Task, int]]:
+    """Выдать задачи очереди, у сделок которых есть активный исполнитель.
+
+    Исполнители всех сделок определяются одним запросом, а задачи помечаются
+    отправленными одним ``UPDATE`` в общей транзакции. Возвращает пары
+    ``(задача, tg_id исполнителя)`` в порядке постановки в очередь.
+    """
+    with _dispatch_transaction():
+        query = (
+            Task.active()
+            .select(Task.id, Executor.tg_id)
+            .join(DealExecutor, on=(DealExecutor.deal == Task.deal))
+            .join(Executor)
+            .switch(Task)
+            .join(Deal)
+            .where(
+                (Task.dispatch_state == QUEUED)
+                & (Deal.is_deleted == False)
+                & (Executor.is_active == True)
+            )
+            .order_by(Task.queued_at.asc(), Task.id)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        targets: dict[int, int] = {}
+        for task_id, tg_id in query.tuples():
+            targets.setdefault(task_id, tg_id)
+        if not targets:
+            return []
+
+        claimed = _claim_tasks(targets)
+        popped = (
+            Task.select()
+            .where(Task.id.in_(claimed))
+            .order_by(Task.queued_at.asc(), Task.id)
+        )
+        result = [
+            (task, targets[task.id])
+            for task in prefetch(popped, Deal, Policy, Client)
+        ]
+        logger.info("📬 Выдано задач из очереди: %d", len(result))
+    schedule_drive_link_refresh(task.deal for task, _ in result)
+    return result
 
 
 __all__ = [
@@ -256,6 +337,7 @@ __all__ = [
     "pop_next_by_deal",
     "pop_all_by_deal",
     "pop_next",
+    "pop_dispatchable_tasks",
     "return_to_queue",
     "get_queued_tasks_by_deal",
     "get_all_queued_tasks",
@@ -0,0 +1,450 @@
+"""Очередь исходящих сообщений Telegram.
+
+Сервисы не обращаются к Telegram API напрямую: :func:`enqueue_message`
+записывает сообщение в таблицу ``telegram_outbox`` (в той же транзакции, что
+и бизнес-изменение) и сразу возвращает управление. Фоновый
+:class:`OutboxSender` забирает сообщения пачками, соблюдает ограничения
+Telegram на частоту отправки и повторяет неудачные попытки с
+экспоненциальной задержкой.
+
+Отправитель может работать одновременно в нескольких процессах (настольное
+приложение и бот): сообщения захватываются условным ``UPDATE`` с арендой
+``locked_until``, поэтому каждое сообщение отправляет только один процесс.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Protocol
+
+import httpx
+
+from database.db import thread_connection
+from database.models import TelegramOutbox
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+#: Сколько сообщений забирается из таблицы за один проход.
+BATCH_SIZE = 50
+#: Не более стольких сообщений в секунду суммарно (лимит Telegram — 30).
+GLOBAL_RATE = 25.0
+#: Минимальный интервал между сообщениями в один чат, секунд.
+PER_CHAT_INTERVAL = 1.0
+#: После стольких неудачных попыток сообщение помечается как ``failed``.
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 15 * 60.0
+#: Время аренды захваченной пачки, секунд.
+LEASE_SECONDS = 120
+#: Пауза между проходами, если новых сообщений нет, секунд.
+POLL_INTERVAL = 2.0
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+class TelegramSendError(Exception):
+    """Ошибка отправки сообщения через Bot API."""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        retry_after: float | None = None,
+        permanent: bool = False,
+    ) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.permanent = permanent
+
+
+@dataclass(frozen=True)
+class SentMessage:
+    chat_id: int
+    message_id: int
+
+
+class MessageTransport(Protocol):
+    def send_message(
+        self,
+        chat_id: int,
+        text: str,
+        parse_mode: str | None = None,
+        reply_markup: str | None = None,
+    ) -> SentMessage: ...
+
+
+class BotApiTransport:
+    """Синхронный клиент метода ``sendMessage`` Telegram Bot API."""
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = "https://api.telegram.org",
+        *,
+        timeout: float = 10.0,
+        client: httpx.Client | None = None,
+    ) -> None:
+        self._url = f"{base_url.rstrip('/')}/bot{token}/sendMessage"
+        self._client = client or httpx.Client(timeout=timeout)
+
+    def close(self) -> None:
+        self._client.close()
+
+    def send_message(
+        self,
+        chat_id: int,
+        text: str,
+        parse_mode: str | None = None,
+        reply_markup: str | None = None,
+    ) -> SentMessage:
+        payload: dict[str, Any] = {"chat_id": chat_id, "text": text}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        if reply_markup:
+            payload["reply_markup"] = json.loads(reply_markup)
+        try:
+            response = self._client.post(self._url, json=payload)
+        except httpx.HTTPError as exc:
+            raise TelegramSendError(f"Сетевая ошибка: {exc}") from exc
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.status_code == 200 and data.get("ok"):
+            result = data["result"]
+            return SentMessage(result["chat"]["id"], result["message_id"])
+
+        description = data.get("description") or response.text
+        code = data.get("error_code") or response.status_code
+        retry_after = (data.get("parameters") or {}).get("retry_after")
+        raise TelegramSendError(
+            f"{code}: {description}",
+            retry_after=float(retry_after) if retry_after is not None else None,
+            # 400/403: неверный запрос или бот заблокирован — повтор не поможет
+            permanent=code in (400, 401, 403, 404),
+        )
+
+
+class RateLimiter:
+    """Ограничение частоты: общее и для каждого чата отдельно."""
+
+    def __init__(
+        self,
+        per_second: float = GLOBAL_RATE,
+        per_chat_interval: float = PER_CHAT_INTERVAL,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._global_interval = 1.0 / per_second if per_second else 0.0
+        self._per_chat_interval = per_chat_interval
+        self._clock = clock
+        self._next_global = 0.0
+        self._next_chat: dict[int, float] = {}
+
+    def chat_delay(self, chat_id: int) -> float:
+        """Сколько секунд ещё нельзя писать в ``chat_id``."""
+
+        return max(0.0, self._next_chat.get(chat_id, 0.0) - self._clock())
+
+    def global_delay(self) -> float:
+        return max(0.0, self._next_global - self._clock())
+
+    def record(self, chat_id: int) -> None:
+        now = self._clock()
+        self._next_global = now + self._global_interval
+        self._next_chat[chat_id] = now + self._per_chat_interval
+        if len(self._next_chat) > 10_000:
+            self._next_chat = {
+                key: value for key, value in self._next_chat.items() if value > now
+            }
+
+
+def backoff_delay(attempts: int) -> float:
+    """Задержка перед повтором после ``attempts`` неудачных попыток."""
+
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+def enqueue_message(
+    chat_id: int,
+    text: str,
+    *,
+    parse_mode: str | None = "HTML",
+    reply_markup: dict | None = None,
+    task_id: int | None = None,
+) -> TelegramOutbox:
+    """Поставить сообщение в очередь отправки и вернуть запись очереди."""
+
+    row = TelegramOutbox.create(
+        chat_id=chat_id,
+        text=text,
+        parse_mode=str(parse_mode) if parse_mode else None,
+        reply_markup=(
+            json.dumps(reply_markup, ensure_ascii=False) if reply_markup else None
+        ),
+        task=task_id,
+        next_attempt_at=_utcnow(),
+    )
+    logger.debug("✉ Сообщение id=%s поставлено в очередь для %s", row.id, chat_id)
+    sender = _sender
+    if sender is not None:
+        sender.wake()
+    return row
+
+
+def pending_count() -> int:
+    return TelegramOutbox.select().where(TelegramOutbox.status == PENDING).count()
+
+
+class OutboxSender:
+    """Фоновая отправка сообщений из ``telegram_outbox``."""
+
+    def __init__(
+        self,
+        transport: MessageTransport,
+        *,
+        batch_size: int = BATCH_SIZE,
+        rate_limiter: RateLimiter | None = None,
+        poll_interval: float = POLL_INTERVAL,
+        sleep: Callable[[float], None] = time.sleep,
+        on_sent: Callable[[TelegramOutbox, SentMessage], None] | None = None,
+    ) -> None:
+        self.transport = transport
+        self.batch_size = batch_size
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.poll_interval = poll_interval
+        self._sleep = sleep
+        self._on_sent = on_sent or _link_task_message
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ───────────── захват пачки ─────────────
+    def _claim(self) -> list[TelegramOutbox]:
+        now = _utcnow()
+        token = uuid.uuid4().hex
+        available = (
+            (TelegramOutbox.status == PENDING)
+            & (TelegramOutbox.next_attempt_at <= now)
+            & (
+                TelegramOutbox.locked_until.is_null()
+                | (TelegramOutbox.locked_until < now)
+            )
+        )
+        candidates = (
+            TelegramOutbox.select(TelegramOutbox.id)
+            .where(available)
+            .order_by(TelegramOutbox.id)
+            .limit(self.batch_size)
+        )
+        claimed = (
+            TelegramOutbox.update(
+                lock_token=token,
+                locked_until=now + timedelta(seconds=LEASE_SECONDS),
+            )
+            .where(TelegramOutbox.id.in_(candidates) & available)
+            .execute()
+        )
+        if not claimed:
+            return []
+        return list(
+            TelegramOutbox.select()
+            .where(TelegramOutbox.lock_token == token)
+            .order_by(TelegramOutbox.id)
+        )
+
+    def _release(self, rows: list[TelegramOutbox]) -> None:
+        if rows:
+            TelegramOutbox.update(lock_token=None, locked_until=None).where(
+                TelegramOutbox.id.in_([row.id for row in rows])
+            ).execute()
+
+    # ───────────── отправка ─────────────
+    def drain_once(self) -> int:
+        """Отправить одну пачку сообщений. Возвращает число обработанных."""
+
+        rows = self._claim()
+        if not rows:
+            return 0
+
+        sent_ids: list[int] = []
+        deferred: list[TelegramOutbox] = []
+        processed = 0
+        for row in rows:
+            if self._stop.is_set() or self.rate_limiter.chat_delay(row.chat_id):
+                # чат ещё «остывает» — сообщение уйдёт следующим проходом
+                deferred.append(row)
+                continue
+            delay = self.rate_limiter.global_delay()
+            if delay:
+                self._sleep(delay)
+            self.rate_limiter.record(row.chat_id)
+            processed += 1
+            try:
+                sent = self.transport.send_message(
+                    row.chat_id, row.text, row.parse_mode, row.reply_markup
+                )
+            except TelegramSendError as exc:
+                self._mark_failed_attempt(row, exc)
+                continue
+            except Exception as exc:  # pragma: no cover - защитный случай
+                self._mark_failed_attempt(row, TelegramSendError(str(exc)))
+                continue
+            sent_ids.append(row.id)
+            try:
+                self._on_sent(row, sent)
+            except Exception:
+                logger.warning(
+                    "Не удалось обработать отправленное сообщение id=%s",
+                    row.id,
+                    exc_info=True,
+                )
+
+        if sent_ids:
+            TelegramOutbox.update(
+                status=SENT,
+                sent_at=_utcnow(),
+                lock_token=None,
+                locked_until=None,
+            ).where(TelegramOutbox.id.in_(sent_ids)).execute()
+        self._release(deferred)
+        logger.debug(
+            "Очередь Telegram: отправлено %d, отложено %d", len(sent_ids), len(deferred)
+        )
+        return processed
+
+    def _mark_failed_attempt(self, row: TelegramOutbox, exc: TelegramSendError) -> None:
+        attempts = row.attempts + 1
+        give_up = exc.permanent or attempts >= MAX_ATTEMPTS
+        delay = exc.retry_after if exc.retry_after is not None else backoff_delay(
+            attempts
+        )
+        TelegramOutbox.update(
+            attempts=attempts,
+            status=FAILED if give_up else PENDING,
+            next_attempt_at=_utcnow() + timedelta(seconds=delay),
+            last_error=str(exc),
+            lock_token=None,
+            locked_until=None,
+        ).where(TelegramOutbox.id == row.id).execute()
+        if give_up:
+            logger.warning(
+                "Сообщение Telegram id=%s для %s не отправлено: %s",
+                row.id,
+                row.chat_id,
+                exc,
+            )
+        else:
+            logger.info(
+                "Сообщение Telegram id=%s: попытка %d не удалась (%s), "
+                "повтор через %.0f с",
+                row.id,
+                attempts,
+                exc,
+                delay,
+            )
+
+    # ───────────── фоновый поток ─────────────
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="telegram-outbox", daemon=True
+        )
+        self._thread.start()
+        logger.info("📨 Отправитель очереди Telegram запущен")
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            processed = 0
+            try:
+                with thread_connection():
+                    processed = self.drain_once()
+            except Exception:
+                logger.exception("Ошибка отправки очереди Telegram")
+            if processed >= self.batch_size:
+                continue
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+def _link_task_message(row: TelegramOutbox, sent: SentMessage) -> None:
+    if row.task_id:
+        from services.task_notifications import link_telegram
+
+        link_telegram(row.task_id, sent.chat_id, sent.message_id)
+
+
+_sender: Optional[OutboxSender] = None
+_sender_lock = threading.Lock()
+
+
+def start_outbox_sender(settings=None) -> Optional[OutboxSender]:
+    """Запустить общий для процесса отправитель, если задан токен бота."""
+
+    global _sender
+    from config import get_settings
+
+    settings = settings or get_settings()
+    if not settings.tg_bot_token:
+        logger.info("TG_BOT_TOKEN не настроен — очередь Telegram не отправляется")
+        return None
+    with _sender_lock:
+        if _sender is None:
+            _sender = OutboxSender(
+                BotApiTransport(settings.tg_bot_token, settings.tg_api_url)
+            )
+        _sender.start()
+        return _sender
+
+
+def stop_outbox_sender(timeout: float | None = 5.0) -> None:
+    global _sender
+    with _sender_lock:
+        sender, _sender = _sender, None
+    if sender is not None:
+        sender.stop(timeout)
+        transport = sender.transport
+        if isinstance(transport, BotApiTransport):
+            transport.close()
+
+
+__all__ = [
+    "BotApiTransport",
+    "FAILED",
+    "OutboxSender",
+    "PENDING",
+    "RateLimiter",
+    "SENT",
+    "SentMessage",
+    "TelegramSendError",
+    "backoff_delay",
+    "enqueue_message",
+    "pending_count",
+    "start_outbox_sender",
+    "stop_outbox_sender",
+]
@@ -1,9 +1,15 @@
+"""Уведомления исполнителям и администратору через Telegram.
+
+Функции модуля только ставят сообщения в очередь
+(:mod:`services.telegram_outbox`) и не ждут ответа Telegram API.
+"""
+
 import logging
 from pathlib import Path
-from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup, constants
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, constants
 
 from database.models import Task
-from services.task_notifications import link_telegram
+from services.telegram_outbox import enqueue_message
 
 from config import get_settings
 
@@ -12,7 +18,6 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 BOT_TOKEN = settings.tg_bot_token
-_bot = Bot(BOT_TOKEN) if BOT_TOKEN else None
 ADMIN_CHAT_ID = settings.admin_chat_id or 0
 
 
@@ -51,26 +56,29 @@ def format_exec_task(t: Task) -> tuple[str, InlineKeyboardMarkup]:
 
 
 def send_exec_task(t: Task, tg_id: int) -> None:
-    """Отправить задачу исполнителю и связать её с сообщением."""
-    if not _bot:
+    """Поставить задачу исполнителю в очередь отправки.
+
+    После отправки задача связывается с сообщением Telegram.
+    """
+    if not BOT_TOKEN:
         logger.warning("TG_BOT_TOKEN не настроен")
         return
     text, kb = format_exec_task(t)
-    msg = _bot.send_message(
-        chat_id=tg_id,
-        text=text,
-        reply_markup=kb,
+    enqueue_message(
+        tg_id,
+        text,
         parse_mode=constants.ParseMode.HTML,
+        reply_markup=kb.to_dict(),
+        task_id=t.id,
     )
-    link_telegram(t.id, msg.chat_id, msg.message_id)
 
 
 def notify_admin(text: str) -> None:
-    """Отправить текстовое уведомление администратору."""
-    if not _bot or not ADMIN_CHAT_ID:
+    """Поставить в очередь текстовое уведомление администратору."""
+    if not BOT_TOKEN or not ADMIN_CHAT_ID:
         return
     try:
-        _bot.send_message(ADMIN_CHAT_ID, text, parse_mode=constants.ParseMode.HTML)
+        enqueue_message(ADMIN_CHAT_ID, text, parse_mode=constants.ParseMode.HTML)
     except Exception as exc:
         logger.warning("Не удалось отправить уведомление администратору: %s", exc)
 
@@ -84,11 +92,10 @@ def notify_admin_safe(text: str) -> None:
 
 
 def notify_executor(tg_id: int, text: str) -> None:
-    """Отправить уведомление исполнителю."""
-    if not _bot or not tg_id:
+    """Поставить в очередь уведомление исполнителю."""
+    if not BOT_TOKEN or not tg_id:
         return
     try:
-        _bot.send_message(tg_id, text, parse_mode=constants.ParseMode.HTML)
+        enqueue_message(tg_id, text, parse_mode=constants.ParseMode.HTML)
     except Exception as exc:
         logger.warning("Не удалось отправить уведомление исполнителю %s: %s", tg_id, exc)
-
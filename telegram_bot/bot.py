@@ -26,6 +26,7 @@ from utils.logging_config import setup_logging
 from services.validators import normalize_number
 from services import deal_journal
 from database.init import init_from_env
+from database.executor import get_db_executor, run_db
 from telegram import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -125,6 +126,8 @@ from services.clients import client_service as cs
 from services import calculation_service as calc_s
 from services.container import get_sheets_sync_service
 from services.deal_service import get_deal_by_id
+from services.task_dispatch import TaskDispatcher
+from services.telegram_outbox import start_outbox_sender
 
 es.ensure_executors_from_env()
 
@@ -181,6 +184,20 @@ def fmt_task_short(t: Task) -> str:
     return f"• {t.title.strip()}"
 
 
+def _deals_with_task_counts(user_id: int) -> list[tuple]:
+    """Сделки исполнителя с количеством незавершённых задач."""
+    return [
+        (d, len(tc.get_incomplete_tasks_by_deal(d.id)))
+        for d in es.get_deals_for_executor(user_id)
+    ]
+
+
+def _mark_done_if_open(tid: int) -> None:
+    task = Task.get_or_none(Task.id == tid)
+    if task and not task.is_done:
+        tn.mark_done(tid)
+
+
 def kb_task(tid: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         [
@@ -215,10 +232,10 @@ async def notify_admin(
     """Отправить администратору информацию о задаче."""
     if not ADMIN_CHAT_ID:
         return
-    task = Task.get_or_none(Task.id == tid)
+    task = await run_db(Task.get_or_none, Task.id == tid)
     if not task:
         return
-    text = fmt_task(task)
+    text = await run_db(fmt_task, task)
     if executor:
         text += f"\n\nИсполнитель: {executor}"
     if user_text:
@@ -278,10 +295,10 @@ async def h_show_deals(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
 
     user_id = q.from_user.id
     user_name = q.from_user.full_name or ("@" + q.from_user.username) if q.from_user.username else str(user_id)
-    es.ensure_executor(user_id, user_name)
-    if not es.is_approved(user_id):
+    await run_db(es.ensure_executor, user_id, user_name)
+    if not await run_db(es.is_approved, user_id):
         if user_id in APPROVED_EXECUTOR_IDS:
-            es.approve_executor(user_id)
+            await run_db(es.approve_executor, user_id)
         else:
             if user_id not in pending_users:
                 pending_users[user_id] = (q.message.chat_id, user_name)
@@ -291,15 +308,14 @@ async def h_show_deals(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
                 show_alert=True,
             )
 
-    deals = es.get_deals_for_executor(user_id)
+    deals = await run_db(_deals_with_task_counts, user_id)
     if not deals:
         await q.answer()
         await q.message.reply_text("Нет назначенных сделок")
         return
 
     buttons = []
-    for d in deals:
-        tasks_count = len(tc.get_incomplete_tasks_by_deal(d.id))
+    for d, tasks_count in deals:
         text = (
             f"#{d.id} "
             f"{(d.client.name.split()[0] + ' ') if d.client and d.client.name else ''}"
@@ -320,19 +336,19 @@ async def h_choose_client(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
     await q.answer()
     logger.info("%s выбрал клиента", q.from_user.id)
 
-    if not es.is_approved(q.from_user.id):
+    if not await run_db(es.is_approved, q.from_user.id):
         return await q.answer("⏳ Ожидайте одобрения администратора", show_alert=True)
 
     _p, cid = q.data.split(":")
     cid = int(cid)
 
-    deals = tq.get_deals_with_queued_tasks(cid)
+    deals = await run_db(tq.get_deals_with_queued_tasks, cid)
     if not deals:
         await q.answer()
         await q.message.reply_text("Нет задач по сделкам")
         return
 
-    client = cs.get_client_by_id(cid)
+    client = await run_db(cs.get_client_by_id, cid)
     surname = client.name.split()[0] if client and client.name else ""
     buttons = [
         [InlineKeyboardButton(d.description.split()[0], callback_data=f"deal:{d.id}")]
@@ -357,13 +373,13 @@ async def h_choose_deal(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
     await q.answer()
     logger.info("%s выбрал сделку", q.from_user.id)
 
-    if not es.is_approved(q.from_user.id):
+    if not await run_db(es.is_approved, q.from_user.id):
         return await q.answer("⏳ Ожидайте одобрения администратора", show_alert=True)
 
     _p, did = q.data.split(":")
     did = int(did)
 
-    tasks = tc.get_incomplete_tasks_by_deal(did)
+    tasks = await run_db(tc.get_incomplete_tasks_by_deal, did)
     if not tasks:
         await q.answer()
         await q.message.reply_text("Нет задач")
@@ -382,22 +398,22 @@ async def h_choose_task(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query
     await q.answer()
 
-    if not es.is_approved(q.from_user.id):
+    if not await run_db(es.is_approved, q.from_user.id):
         return await q.answer("⏳ Ожидайте одобрения администратора", show_alert=True)
 
     _p, tid = q.data.split(":")
     tid = int(tid)
 
-    task = tq.pop_task_by_id(q.message.chat_id, tid)
+    task = await run_db(tq.pop_task_by_id, q.message.chat_id, tid)
     if not task:
-        task = tc.get_incomplete_task(tid)
+        task = await run_db(tc.get_incomplete_task, tid)
         if not task:
             return await q.answer("Задача не найдена", show_alert=True)
 
     msg = await q.message.reply_html(
-        fmt_task(task), reply_markup=kb_task(task.id)
+        await run_db(fmt_task, task), reply_markup=kb_task(task.id)
     )
-    tn.link_telegram(task.id, msg.chat_id, msg.message_id)
+    await run_db(tn.link_telegram, task.id, msg.chat_id, msg.message_id)
 
 
 async def h_action(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
@@ -408,7 +424,7 @@ async def h_action(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
     tid = int(tid)
 
     if action == "done":
-        tn.mark_done(tid)
+        await run_db(tn.mark_done, tid)
         await q.message.edit_text(
             "✅ Задача выполнена", parse_mode=constants.ParseMode.HTML
         )
@@ -431,9 +447,7 @@ async def h_admin_action(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
     tid = int(tid)
 
     if action == "accept":
-        task = Task.get_or_none(Task.id == tid)
-        if task and not task.is_done:
-            tn.mark_done(tid)
+        await run_db(_mark_done_if_open, tid)
         await q.message.edit_text(
             "✅ Задача подтверждена", parse_mode=constants.ParseMode.HTML
         )
@@ -449,7 +463,7 @@ async def h_admin_action(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
         )
         logger.info("Запрос информации по задаче %s", tid)
     elif action == "rework":
-        tq.queue_task(tid)
+        await run_db(tq.queue_task, tid)
         await q.message.edit_text(
             "↩ Задача возвращена на доработку",
             parse_mode=constants.ParseMode.HTML,
@@ -460,7 +474,7 @@ async def h_admin_action(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
         )
         logger.info("Задача %s возвращена на доработку", tid)
     elif action == "approve_exec":
-        es.approve_executor(tid)
+        await run_db(es.approve_executor, tid)
         info = pending_users.pop(tid, None)
         chat_id = info[0] if isinstance(info, tuple) else info
         await q.message.edit_text("Исполнитель подтверждён")
@@ -484,9 +498,7 @@ async def h_task_button(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
     tid = int(tid)
 
     if action == "task_done":
-        task = Task.get_or_none(Task.id == tid)
-        if task and not task.is_done:
-            tn.mark_done(tid)
+        await run_db(_mark_done_if_open, tid)
         await q.message.edit_text(
             "✅ Задача выполнена", parse_mode=constants.ParseMode.HTML
         )
@@ -511,7 +523,7 @@ async def h_text(update: Update, _ctx):
     if user_id in pending_calc:
         tid = pending_calc.pop(user_id)
         lines = [l.strip() for l in update.message.text.splitlines() if l.strip()]
-        task = Task.get_or_none(Task.id == tid)
+        task = await run_db(Task.get_or_none, Task.id == tid)
         if not task or not task.deal_id:
             await update.message.reply_text("⚠️ Сделка не найдена")
             return
@@ -526,7 +538,7 @@ async def h_text(update: Update, _ctx):
                 )
                 continue
             try:
-                calc = calc_s.add_calculation(task.deal_id, **data)
+                calc = await run_db(calc_s.add_calculation, task.deal_id, **data)
             except Exception as e:  # pragma: no cover - log unexpected
                 logger.exception("Не удалось добавить расчёт для %s", tid)
                 await update.message.reply_text(f"⚠️ Ошибка сохранения: {e}")
@@ -555,7 +567,9 @@ async def h_text(update: Update, _ctx):
         else str(update.effective_user.id)
     )
 
-    tn.append_note(tid, f"[TG {stamp}] {user_name}: {update.message.text}")
+    await run_db(
+        tn.append_note, tid, f"[TG {stamp}] {user_name}: {update.message.text}"
+    )
     await update.message.reply_text("Комментарий сохранён 👍")
     logger.info("Заметка добавлена к %s", tid)
     if update.message.chat_id != ADMIN_CHAT_ID:
@@ -572,7 +586,7 @@ async def h_file(update: Update, _ctx):
         return
 
     deal_id = int(m.group(1))
-    deal = get_deal_by_id(deal_id)
+    deal = await run_db(get_deal_by_id, deal_id)
     if not deal or not deal.drive_folder_path:
         return await msg.reply_text("⚠️ Папка сделки не найдена.")
 
@@ -605,73 +619,70 @@ async def h_file(update: Update, _ctx):
 
 async def h_show_tasks(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    if not es.is_approved(user_id):
+    if not await run_db(es.is_approved, user_id):
         return await update.message.reply_text("⏳ Ожидайте одобрения администратора")
-    tasks = tc.get_incomplete_tasks_for_executor(user_id)
+    tasks = await run_db(tc.get_incomplete_tasks_for_executor, user_id)
     if not tasks:
         await update.message.reply_text("Нет незавершенных задач")
         return
     for t in tasks:
         msg = await update.message.reply_html(
-            fmt_task(t), reply_markup=kb_task(t.id)
+            await run_db(fmt_task, t), reply_markup=kb_task(t.id)
         )
-        tn.link_telegram(t.id, msg.chat_id, msg.message_id)
+        await run_db(tn.link_telegram, t.id, msg.chat_id, msg.message_id)
 
 async def h_show_tasks_button(update: Update, _ctx: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query
     await q.answer()
     user_id = q.from_user.id
-    if not es.is_approved(user_id):
+    if not await run_db(es.is_approved, user_id):
         return await q.message.reply_text("⏳ Ожидайте одобрения администратора")
-    tasks = tc.get_incomplete_tasks_for_executor(user_id)
+    tasks = await run_db(tc.get_incomplete_tasks_for_executor, user_id)
     if not tasks:
         await q.message.reply_text("Нет незавершенных задач")
         return
 
-    lines = [fmt_task_short(t) for t in tasks]
+    lines = await run_db(lambda: [fmt_task_short(t) for t in tasks])
     await q.message.reply_text("\n".join(lines))
 
 
+async def _send_task(bot, task: Task, tg_id: int) -> tuple[int, int]:
+    msg = await bot.send_message(
+        chat_id=tg_id,
+        text=await run_db(fmt_task, task),
+        reply_markup=kb_task(task.id),
+        parse_mode=constants.ParseMode.HTML,
+    )
+    return msg.chat_id, msg.message_id
+
+
 async def send_pending_tasks(_ctx: ContextTypes.DEFAULT_TYPE) -> None:
     """Отправить исполнителям задачи из очереди."""
-    tasks = tq.get_all_queued_tasks()
-    for t in tasks:
-        if not t.deal_id:
-            continue
-        ex = es.get_executor_for_deal(t.deal_id)
-        if not ex or not es.is_approved(ex.tg_id):
-            continue
-        popped = tq.pop_task_by_id(ex.tg_id, t.id)
-        if not popped:
-            continue
-        msg = await _ctx.bot.send_message(
-            chat_id=ex.tg_id,
-            text=fmt_task(popped),
-            reply_markup=kb_task(popped.id),
-            parse_mode=constants.ParseMode.HTML,
-        )
-        tn.link_telegram(popped.id, msg.chat_id, msg.message_id)
+    await TaskDispatcher(
+        lambda task, tg_id: _send_task(_ctx.bot, task, tg_id)
+    ).dispatch_pending()
 
 
 # ───────────── main ─────────────
 async def _start_dispatcher(app: Application) -> None:
-    """Schedule periodic sending of pending tasks."""
-    if app.job_queue:
-        app.job_queue.run_repeating(send_pending_tasks, interval=60)
-    else:
-        import asyncio, types
+    """Запустить отправку задач из очереди по мере их появления."""
+    start_outbox_sender()
+    dispatcher = TaskDispatcher(lambda task, tg_id: _send_task(app.bot, task, tg_id))
+    app.create_task(dispatcher.run())
 
-        async def loop() -> None:
-            ctx = types.SimpleNamespace(bot=app.bot)
-            while True:
-                await send_pending_tasks(ctx)
-                await asyncio.sleep(60)
 
-        app.create_task(loop())
+async def _stop_db_executor(_app: Application) -> None:
+    get_db_executor().shutdown()
 
 
 def main() -> None:
-    app = Application.builder().token(BOT_TOKEN).post_init(_start_dispatcher).build()
+    app = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .post_init(_start_dispatcher)
+        .post_shutdown(_stop_db_executor)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", h_start))
     app.add_handler(CallbackQueryHandler(h_show_deals, pattern="^deals$"))
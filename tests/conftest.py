@@ -254,3 +254,13 @@ def dummy_deal():
             self.saved = True
 
     return DummyDeal()
+
+
+@pytest.fixture
+def fake_telegram():
+    """Локальный фейковый Telegram Bot API."""
+    from fake_telegram_server import FakeTelegramServer
+
+    server = FakeTelegramServer().start()
+    yield server
+    server.stop()
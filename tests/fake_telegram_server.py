@@ -0,0 +1,102 @@
+"""Локальный сервер, имитирующий метод ``sendMessage`` Telegram Bot API.
+
+Используется в тестах очереди уведомлений, а также для ручной проверки:
+запустите ``python tests/fake_telegram_server.py`` и укажите
+``TG_API_URL=http://127.0.0.1:8081`` — сообщения будут печататься в консоль.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeTelegramServer:
+    """HTTP-сервер с записью принятых сообщений и заданными ошибками."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.messages: list[dict] = []
+        self._failures: deque[tuple[int, dict]] = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(
+        self, status: int, description: str = "error", retry_after: int | None = None
+    ) -> None:
+        """Ответить ошибкой на следующий запрос."""
+
+        body = {"ok": False, "error_code": status, "description": description}
+        if retry_after is not None:
+            body["parameters"] = {"retry_after": retry_after}
+        with self._lock:
+            self._failures.append((status, body))
+
+    def start(self) -> "FakeTelegramServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _respond(self, payload: dict) -> tuple[int, dict]:
+        with self._lock:
+            if self._failures:
+                return self._failures.popleft()
+            self.messages.append(payload)
+            message_id = len(self.messages)
+        return 200, {
+            "ok": True,
+            "result": {
+                "message_id": message_id,
+                "chat": {"id": payload.get("chat_id")},
+                "text": payload.get("text"),
+            },
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):  # noqa: N802 - имя задаёт http.server
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.endswith("/sendMessage"):
+                    status, body = server._respond(payload)
+                else:
+                    status, body = 404, {"ok": False, "error_code": 404}
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *_args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    fake = FakeTelegramServer(port=8081)
+    original = fake._respond
+
+    def _print(payload: dict):
+        print(f"→ {payload.get('chat_id')}: {payload.get('text')}")
+        return original(payload)
+
+    fake._respond = _print
+    print(f"Фейковый Bot API слушает {fake.url}")
+    fake._server.serve_forever()
@@ -0,0 +1,79 @@
+import json
+import os
+
+from services import ai_cache
+from services.ai_cache import AiCache
+from services.policies import ai_policy_service
+
+
+def _policy() -> dict:
+    schema = ai_policy_service.POLICY_SCHEMA["properties"]["policy"]
+    return {
+        "client_name": "К",
+        "policy": dict.fromkeys(schema["required"], ""),
+        "payments": [],
+    }
+
+
+def test_text_extracted_once_per_content(monkeypatch, tmp_path):
+    calls = []
+    original = ai_policy_service._extract_text
+    monkeypatch.setattr(
+        ai_policy_service,
+        "_extract_text",
+        lambda path: calls.append(path) or original(path),
+    )
+    first = tmp_path / "a.txt"
+    first.write_text("полис", encoding="utf-8")
+    copy = tmp_path / "b.txt"
+    copy.write_text("полис", encoding="utf-8")
+
+    assert ai_policy_service._read_text(str(first)) == "полис"
+    assert ai_policy_service._read_text(str(copy)) == "полис"
+    assert calls == [str(first)]
+
+    first.write_text("другой", encoding="utf-8")
+    assert ai_policy_service._read_text(str(first)) == "другой"
+    with ai_cache.get_ai_cache().bypass():
+        ai_policy_service._read_text(str(copy))
+    assert calls == [str(first), str(first), str(copy)]
+
+
+def test_validated_answers_cached(monkeypatch):
+    answers = ["не JSON", json.dumps(_policy())]
+    sent = []
+
+    def fake_chat(messages, progress_cb=None, *, cancel_cb=None):
+        sent.append(len(messages))
+        return answers.pop(0)
+
+    monkeypatch.setattr(ai_policy_service, "_chat", fake_chat)
+
+    data, _, _ = ai_policy_service.recognize_policy_interactive("текст")
+    again, transcript, messages = ai_policy_service.recognize_policy_interactive(
+        "текст"
+    )
+
+    assert again == data
+    assert sent == [2, 4]
+    assert messages[-1]["role"] == "assistant" and "assistant" in transcript
+
+    answers.append(json.dumps(_policy()))
+    ai_policy_service.recognize_policy_interactive("другой текст")
+    assert sent == [2, 4, 2]
+
+
+def test_least_recently_used_entries_evicted(tmp_path):
+    cache = AiCache(tmp_path, max_bytes=300)
+    for n in range(3):
+        cache.put("text", f"{n:02d}key", "x" * 100)
+        path = tmp_path / "text" / f"{n:02d}" / f"{n:02d}key"
+        os.utime(path, (n, n))
+
+    assert cache.get("text", "00key") == "x" * 100  # чтение освежает запись
+    cache.put("text", "03key", "y" * 100)
+
+    assert cache.get("text", "01key") is None
+    assert cache.get("text", "02key") is None
+    assert cache.get("text", "00key") is not None
+    assert cache.get("text", "03key") is not None
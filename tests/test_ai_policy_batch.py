@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from config import Settings
+from services.policies import ai_policy_service
+from services.policies.ai_policy_batch import (
+    STAGE_CANCELLED,
+    STAGE_DONE,
+    STAGE_FAILED,
+    PolicyBatch,
+)
+
+
+def _policy(number: str) -> dict:
+    schema = ai_policy_service.POLICY_SCHEMA["properties"]["policy"]
+    fields = dict.fromkeys(schema["required"], "")
+    fields["policy_number"] = number
+    return {"client_name": "К", "policy": fields, "payments": []}
+
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    """Совместимый с OpenAI ``/chat/completions``: номер полиса — текст файла."""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_POST(self):  # noqa: N802 - http.server API
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        text = body["messages"][1]["content"]
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(0.2)
+        with cls.lock:
+            cls.active -= 1
+        arguments = "не JSON" if text == "BAD" else json.dumps(_policy(text))
+        payload = {
+            "id": "c",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": "t",
+                                "type": "function",
+                                "function": {
+                                    "name": "extract_policy",
+                                    "arguments": arguments,
+                                },
+                            }
+                        ],
+                    },
+                }
+            ],
+        }
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    FakeOpenAI.active = FakeOpenAI.peak = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    monkeypatch.setattr(
+        ai_policy_service,
+        "settings",
+        Settings(
+            openai_api_key="key",
+            openai_base_url=f"http://127.0.0.1:{server.server_port}/v1",
+            ai_policy_concurrency=3,
+        ),
+    )
+    yield FakeOpenAI
+    server.shutdown()
+    server.server_close()
+
+
+def _files(tmp_path, contents: list[str]) -> list[str]:
+    paths = []
+    for n, text in enumerate(contents):
+        path = tmp_path / f"policy{n}.txt"
+        path.write_text(text, encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def test_batch_runs_in_parallel_and_keeps_order(fake_openai, tmp_path):
+    paths = _files(tmp_path, ["P-1", "BAD", "P-3", "P-4", "P-5", "P-6"])
+    stages = []
+
+    results = PolicyBatch(
+        paths, progress_cb=lambda index, path, stage: stages.append((index, stage))
+    ).run()
+
+    assert [r.path for r in results] == paths
+    assert [r.data["policy"]["policy_number"] for r in results if r.ok] == [
+        "P-1",
+        "P-3",
+        "P-4",
+        "P-5",
+        "P-6",
+    ]
+    failed = results[1]
+    assert not failed.ok and "JSON" in failed.error and failed.transcript
+    assert (1, STAGE_FAILED) in stages
+    assert sorted(i for i, stage in stages if stage == STAGE_DONE) == [0, 2, 3, 4, 5]
+    assert fake_openai.peak == 3
+
+
+def test_cancel_single_file(tmp_path):
+    paths = _files(tmp_path, ["A", "B", "C"])
+    started = threading.Event()
+    batch = None
+
+    def recognize(text, *, cancel_cb):
+        if text == "B":
+            started.set()
+            while not cancel_cb():
+                time.sleep(0.01)
+            raise InterruptedError
+        started.wait(1)
+        batch.cancel(1)
+        return {"text": text}, text, []
+
+    stages = []
+    batch = PolicyBatch(
+        paths,
+        llm_workers=3,
+        recognize=recognize,
+        progress_cb=lambda index, path, stage: stages.append((index, stage)),
+    )
+    results = batch.run()
+
+    assert [r.data for r in results] == [{"text": "A"}, None, {"text": "C"}]
+    assert results[1].cancelled and results[1].error is None
+    assert [i for i, stage in stages if stage == STAGE_CANCELLED] == [1]
+
+
+def test_process_policy_files_returns_every_result(fake_openai, tmp_path):
+    paths = _files(tmp_path, ["BAD", "P-2", "BAD"])
+
+    results = ai_policy_service.process_policy_files_with_ai(paths)
+
+    assert [r.path for r in results] == paths
+    assert [r.ok for r in results] == [False, True, False]
+    assert results[1].data["policy"]["policy_number"] == "P-2"
+    assert all("JSON" in r.error for r in (results[0], results[2]))
+
+
+def test_read_texts_keeps_file_order(tmp_path):
+    paths = _files(tmp_path, ["первый", "второй", "третий"])
+
+    texts = PolicyBatch(
+        paths, read_text=lambda path: open(path, encoding="utf-8").read()
+    ).read_texts()
+
+    assert texts == ["первый", "второй", "третий"]
@@ -1,7 +1,13 @@
+import json
+from functools import partial
+from pathlib import Path
 from types import SimpleNamespace
 
+from PySide6.QtCore import QCoreApplication
 from PySide6.QtWidgets import QDialog, QMessageBox
 
+from services.policies.ai_policy_batch import PolicyBatch
+from services.policies.ai_policy_service import AiPolicyError
 from ui.forms.ai_policy_files_dialog import AiPolicyFilesDialog
 
 
@@ -44,3 +50,104 @@ def test_moves_files_to_local_folder_when_only_path_set(tmp_path, qapp, monkeypa
         assert moved == expected
     finally:
         dialog.deleteLater()
+
+
+def test_separate_files_are_recognized_as_a_batch(tmp_path, qapp, monkeypatch):
+    def recognize(text, *, cancel_cb):
+        if text == "BAD":
+            raise AiPolicyError("Не удалось разобрать JSON", [], "диалог")
+        return {"policy": text}, text, []
+
+    monkeypatch.setattr(
+        "ui.forms.ai_policy_files_dialog.PolicyBatch",
+        partial(
+            PolicyBatch,
+            recognize=recognize,
+            read_text=lambda path: Path(path).read_text(encoding="utf-8"),
+        ),
+    )
+    monkeypatch.setattr(QMessageBox, "exec", lambda self: None)
+    imported: list[str] = []
+    moved: list[str] = []
+
+    class DummyImportPolicyJsonForm:
+        def __init__(self, *args, json_text, **kwargs):
+            imported.append(json_text)
+            self.imported_policy = SimpleNamespace(
+                drive_folder_link="", drive_folder_path=str(tmp_path / "dest")
+            )
+
+        def exec(self):
+            return True
+
+    monkeypatch.setattr(
+        "ui.forms.ai_policy_files_dialog.ImportPolicyJsonForm",
+        DummyImportPolicyJsonForm,
+    )
+    monkeypatch.setattr(
+        "services.folder_utils.move_file_to_folder",
+        lambda src, dest: moved.append(Path(src).name),
+    )
+
+    files = []
+    for name, text in (("a.txt", "P-1"), ("b.txt", "BAD"), ("c.txt", "P-3")):
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        files.append(path)
+
+    dialog = AiPolicyFilesDialog(initial_files=files)
+    try:
+        dialog.separate_check.setChecked(True)
+        dialog.on_process()
+        dialog._batch_worker.wait(5000)
+        QCoreApplication.sendPostedEvents()
+
+        assert dialog.result() == QDialog.Accepted
+        assert [json.loads(text)["policy"] for text in imported] == ["P-1", "P-3"]
+        assert moved == ["a.txt", "c.txt"]
+        assert dialog.list_widget.item(1).text().endswith("ошибка")
+    finally:
+        dialog.deleteLater()
+
+
+def test_bundle_files_are_read_in_the_worker_thread(tmp_path, qapp, monkeypatch):
+    import threading
+
+    main_thread = threading.get_ident()
+    read_in: list[int] = []
+
+    def read_texts(paths):
+        read_in.append(threading.get_ident())
+        return [Path(path).read_text(encoding="utf-8") for path in paths]
+
+    def recognize(text, *, messages, progress_cb, cancel_cb):
+        return {"policy": "P-1"}, "диалог", messages
+
+    monkeypatch.setattr(
+        "ui.forms.ai_policy_files_dialog.read_policy_texts", read_texts
+    )
+    monkeypatch.setattr(
+        "ui.forms.ai_policy_files_dialog.recognize_policy_interactive", recognize
+    )
+    monkeypatch.setattr("ui.forms.ai_policy_files_dialog._get_prompt", lambda: "PROMPT")
+    monkeypatch.setattr(QMessageBox, "exec", lambda self: None)
+    monkeypatch.setattr(AiPolicyFilesDialog, "_import_policy", lambda *a: False)
+
+    files = []
+    for name in ("a.txt", "b.txt"):
+        path = tmp_path / name
+        path.write_text(name.upper(), encoding="utf-8")
+        files.append(path)
+
+    dialog = AiPolicyFilesDialog(initial_files=files)
+    try:
+        dialog.on_process()
+        dialog._worker.wait(5000)
+        QCoreApplication.sendPostedEvents()
+
+        assert read_in and read_in[0] != main_thread
+        assert dialog._messages[0] == {"role": "system", "content": "PROMPT"}
+        assert "===== b.txt =====\nB.TXT" in dialog._messages[1]["content"]
+        assert "A.TXT" in dialog.conv_edit.toPlainText()
+    finally:
+        dialog.deleteLater()
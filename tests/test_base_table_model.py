@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+from PySide6.QtCore import QDate, Qt
+
+from database.models import Payment
+from ui.base.base_table_model import BaseTableModel
+
+
+def _column(model: BaseTableModel, name: str) -> int:
+    return [f.name for f in model.fields].index(name)
+
+
+def test_cells_are_formatted_once_per_column(qapp, monkeypatch):
+    payments = [
+        Payment(amount=1500 + n, payment_date=date(2024, 1, n + 1)) for n in range(5)
+    ]
+    model = BaseTableModel(payments, Payment)
+    calls: list[str] = []
+    original = model.display_text
+
+    def counting(field, value):
+        calls.append(field.name)
+        return original(field, value)
+
+    monkeypatch.setattr(model, "display_text", counting)
+    column = _column(model, "payment_date")
+
+    for _ in range(3):
+        for row in range(len(payments)):
+            index = model.index(row, column)
+            model.data(index)
+            model.data(index, Qt.UserRole)
+            model.data(index, Qt.TextAlignmentRole)
+
+    assert calls == ["payment_date"] * len(payments)
+    index = model.index(2, column)
+    assert model.data(index) == "03.01.2024"
+    assert model.data(index, Qt.UserRole) == QDate(2024, 1, 3)
+
+    amount = model.index(0, _column(model, "amount"))
+    assert model.data(amount) == "1 500,00 ₽"
+    assert model.data(amount, Qt.TextAlignmentRole) == Qt.AlignRight | Qt.AlignVCenter
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_set_data_refreshes_cached_cell(qapp, make_policy_with_payment):
+    _, _, _, payment = make_policy_with_payment(payment_kwargs={"amount": 100})
+    model = BaseTableModel([payment], Payment)
+    index = model.index(0, _column(model, "amount"))
+    assert model.data(index) == "100,00 ₽"
+
+    assert model.setData(index, 250)
+    assert model.data(index) == "250,00 ₽"
+    assert model.data(index, Qt.UserRole) == 250
+
+
+def test_replaced_row_refreshed_on_data_changed(qapp):
+    model = BaseTableModel([Payment(amount=10, payment_date=None)], Payment)
+    column = _column(model, "payment_date")
+    assert model.data(model.index(0, column)) == "—"
+
+    model.objects[0] = Payment(amount=10, payment_date=date(2024, 5, 1))
+    index = model.index(0, column)
+    model.dataChanged.emit(index, index, [Qt.DisplayRole])
+    assert model.data(index) == "01.05.2024"
+
+    # замена списка без сигнала тоже не оставляет устаревших строк
+    model.objects.append(Payment(amount=20, payment_date=date(2024, 6, 1)))
+    assert model.data(model.index(1, column)) == "01.06.2024"
@@ -0,0 +1,54 @@
+import pytest
+
+from database import change_events
+from database.init import database_from_url
+from database.models import Executor
+
+
+@pytest.fixture()
+def notifying_db():
+    database = database_from_url("sqlite:///:memory:")
+    with database.bind_ctx([Executor]):
+        database.create_tables([Executor])
+        yield database
+    database.close()
+
+
+@pytest.fixture()
+def seen():
+    calls: list[tuple] = []
+
+    def listener(model, ids):
+        calls.append((model, ids))
+
+    change_events.subscribe(listener)
+    yield calls
+    change_events.unsubscribe(listener)
+
+
+def test_notifications_are_repeated_after_commit(notifying_db, seen):
+    with notifying_db.atomic():
+        executor = Executor.create(full_name="A", tg_id=1)
+        executor.save()
+        # соединение этого потока видит изменения сразу
+        assert seen == [(Executor, frozenset({executor.id}))] * 2
+
+    assert seen[2:] == [(Executor, frozenset({executor.id}))]
+
+
+def test_notifications_are_repeated_after_rollback(notifying_db, seen):
+    with notifying_db.atomic() as txn:
+        Executor.create(full_name="A", tg_id=1)
+        change_events.notify_changed(Executor)
+        txn.rollback(False)
+
+    assert seen[-1] == (Executor, None)
+    assert len(seen) == 3
+
+
+def test_autocommit_writes_notify_once(notifying_db, seen):
+    executor = Executor.create(full_name="A", tg_id=1)
+
+    assert seen == [(Executor, frozenset({executor.id}))]
+    change_events.flush_pending()
+    assert len(seen) == 1
@@ -7,10 +7,13 @@ from services.clients.client_service import (
     ClientMergeError,
     merge_clients,
 )
+from services.folder_relocation import RelocationProgress, relocation_progress
 
 
 @pytest.mark.usefixtures("in_memory_db")
-def test_merge_clients_transfers_relations_and_updates_fields(monkeypatch):
+def test_merge_clients_transfers_relations_and_updates_fields(
+    monkeypatch, folder_relocator
+):
     primary = Client.create(
         name="Primary Client",
         note="Primary note",
@@ -116,17 +119,27 @@ def test_merge_clients_transfers_relations_and_updates_fields(monkeypatch):
                 drive_link,
             )
         )
-        return (f"https://policy/{old_policy_number}", None)
+        return (
+            f"/renamed/policy/{old_policy_number}",
+            f"https://policy/{old_policy_number}",
+        )
 
     monkeypatch.setattr(
-        "services.clients.client_service.rename_deal_folder", fake_rename_deal_folder
+        "services.folder_relocation.rename_deal_folder", fake_rename_deal_folder
     )
     monkeypatch.setattr(
-        "services.clients.client_service.rename_policy_folder", fake_rename_policy_folder
+        "services.folder_relocation.rename_policy_folder", fake_rename_policy_folder
     )
 
     merge_clients(primary.id, [duplicate_one.id, duplicate_two.id])
 
+    # папки переносятся очередью после объединения
+    assert deal_rename_calls == [] and policy_rename_calls == []
+    assert relocation_progress() == RelocationProgress(total=4, done=0, failed=0)
+    assert Deal.get_by_id(deal_one.id).client_id == primary.id
+    assert folder_relocator.run_pending() == 4
+    assert relocation_progress().finished
+
     updated_primary = Client.get_by_id(primary.id)
     assert updated_primary.email == "duplicate1@example.com"
     assert updated_primary.phone == "+79112223344"
@@ -152,7 +165,9 @@ def test_merge_clients_transfers_relations_and_updates_fields(monkeypatch):
     assert updated_policy_two.deal_id == deal_two.id
     assert updated_policy_one.deal.client_id == primary.id
     assert updated_policy_two.deal.client_id == primary.id
+    assert updated_policy_one.drive_folder_path == "/renamed/policy/POLICY-1"
     assert updated_policy_one.drive_folder_link == "https://policy/POLICY-1"
+    assert updated_policy_two.drive_folder_path == "/renamed/policy/POLICY-2"
     assert updated_policy_two.drive_folder_link == "https://policy/POLICY-2"
 
     updated_duplicate_one = Client.get_by_id(duplicate_one.id)
@@ -204,6 +219,30 @@ def test_merge_clients_transfers_relations_and_updates_fields(monkeypatch):
     ]
 
 
+@pytest.mark.usefixtures("in_memory_db")
+def test_merge_clients_moves_phone_from_duplicate():
+    primary = Client.create(name="Primary")
+    duplicate = Client.create(name="Duplicate", phone="8 (911) 222-33-44")
+
+    merge_clients(primary.id, [duplicate.id])
+
+    assert Client.get_by_id(primary.id).phone == "+79112223344"
+    assert Client.get_by_id(duplicate.id).is_deleted is True
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_merge_clients_stamps_deleted_at_on_duplicates():
+    primary = Client.create(name="Primary")
+    duplicate = Client.create(name="Duplicate")
+
+    merge_clients(primary.id, [duplicate.id])
+
+    refreshed = Client.get_by_id(duplicate.id)
+    assert refreshed.is_deleted is True
+    assert refreshed.deleted_at is not None
+    assert Client.get_by_id(primary.id).deleted_at is None
+
+
 @pytest.mark.usefixtures("in_memory_db")
 def test_merge_clients_activates_deleted_primary_when_is_active_true():
     primary = Client.create(name="Primary", is_deleted=True)
@@ -0,0 +1,118 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from PySide6.QtCore import Qt
+
+from database.models import Payment, Policy
+from services.payment_service import build_payment_query
+from services.query_utils import FilterValues, filter_condition
+from ui import settings as ui_settings
+from ui.base.base_table_view import BaseTableView
+from ui.common.multi_filter_proxy import ColumnFilterState
+from utils.filter_constants import CHOICE_NULL_TOKEN
+
+
+def _amounts(column_filters) -> list[Decimal]:
+    query = build_payment_query(column_filters=column_filters)
+    return sorted(payment.amount for payment in query)
+
+
+@pytest.fixture
+def payments(make_policy_with_payment):
+    rows = [
+        ("PN-1", Decimal("100"), date(2024, 1, 10), None),
+        ("PN-10", Decimal("1000"), date(2024, 2, 10), date(2024, 2, 11)),
+        ("PN-2", Decimal("250.50"), date(2024, 3, 10), None),
+    ]
+    for number, amount, payment_date, actual in rows:
+        make_policy_with_payment(
+            policy_kwargs={"policy_number": number},
+            payment_kwargs={
+                "amount": amount,
+                "payment_date": payment_date,
+                "actual_payment_date": actual,
+            },
+        )
+
+
+@pytest.mark.usefixtures("in_memory_db", "payments")
+def test_choices_match_exact_values():
+    # как подстрока «PN-1» совпала бы и с «PN-10»
+    assert _amounts({Policy.policy_number: FilterValues(["PN-1"], "choices")}) == [
+        Decimal("100")
+    ]
+    assert _amounts({Policy.policy_number: ["PN-1"]}) == [
+        Decimal("100"),
+        Decimal("1000"),
+    ]
+    assert _amounts({Payment.amount: FilterValues(["250.50"], "choices")}) == [
+        Decimal("250.50")
+    ]
+
+
+@pytest.mark.usefixtures("in_memory_db", "payments")
+def test_date_range_and_null_choice():
+    in_range = FilterValues(["2024-02-01..2024-03-31"], "date_range")
+    assert _amounts({Payment.payment_date: in_range}) == [
+        Decimal("250.50"),
+        Decimal("1000"),
+    ]
+    open_start = FilterValues(["..2024-01-31"], "date_range")
+    assert _amounts({Payment.payment_date: open_start}) == [Decimal("100")]
+
+    unpaid = FilterValues([CHOICE_NULL_TOKEN], "choices")
+    assert _amounts({Payment.actual_payment_date: unpaid}) == [
+        Decimal("100"),
+        Decimal("250.50"),
+    ]
+
+
+def test_bool_filter_compares_values():
+    condition = filter_condition(Payment.is_deleted, FilterValues(["0"], "bool"))
+    sql, params = Payment.select().where(condition).sql()
+    assert "CAST" not in sql.upper()
+    assert params[-1] is False
+
+
+def test_date_range_sent_to_services():
+    state = ColumnFilterState(
+        "date_range", {"from": "2024-02-01", "to": None}, display="с 01.02.2024"
+    )
+    assert state.backend_value() == "2024-02-01.."
+
+
+@pytest.mark.usefixtures("in_memory_db", "ui_settings_temp_path")
+def test_proxy_skips_filters_applied_by_query(qapp, make_policy_with_payment):
+    ui_settings._CACHE = None
+    _, _, _, first = make_policy_with_payment(policy_kwargs={"policy_number": "A-1"})
+    _, _, _, second = make_policy_with_payment(policy_kwargs={"policy_number": "B-2"})
+
+    view = BaseTableView(model_class=Payment)
+    view.COLUMN_FIELD_MAP = {0: Policy.policy_number}
+    view.set_model_class_and_items(Payment, [first, second], total_count=2)
+    view.on_filter_changed = lambda *args, **kwargs: None
+    view._apply_column_filter(0, ColumnFilterState("text", "A-1"))
+    qapp.processEvents()
+    # до перезагрузки строки текущей страницы фильтрует прокси
+    assert view.proxy.rowCount() == 1
+
+    calls: list[int] = []
+    matcher = view._column_filter_matchers[0]
+    view._column_filter_matchers[0] = lambda raw, display: (
+        calls.append(1) or matcher(raw, display)
+    )
+    view.controller.get_filters()
+    view.controller.load_page(
+        lambda: ([first], 1),
+        lambda items, total: view.set_model_class_and_items(
+            Payment, items, total_count=total
+        ),
+    )
+    qapp.processEvents()
+
+    assert view.proxy.rowCount() == 1
+    assert calls == []
+    index = view.proxy.index(0, 0)
+    assert "A-1" in view.proxy.data(index, Qt.DisplayRole)
+    view.deleteLater()
@@ -1,7 +1,18 @@
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
+from database.db import db
 from database.models import Client, Deal, Policy, Task
-from services.dashboard_service import get_dashboard_counters
+from database.change_events import unsubscribe
+from services.dashboard_service import (
+    DashboardSnapshotCache,
+    build_dashboard_snapshot,
+    get_dashboard_counters,
+    get_deal_reminder_counts,
+    get_expiring_policies,
+    get_upcoming_deal_reminders,
+    get_upcoming_tasks,
+)
+from services.task_crud import add_task
 from services.task_states import SENT
 
 
@@ -100,3 +111,104 @@ def test_dashboard_counters_empty(db_transaction):
         "working": 0,
         "unconfirmed": 0,
     }
+
+
+def _seed_dashboard(today, number="POL-SNAP"):
+    client = Client.create(name="Клиент")
+    deal = Deal.create(
+        client=client,
+        description="Сделка",
+        start_date=today,
+        reminder_date=today + timedelta(days=2),
+    )
+    policy = Policy.create(
+        client=client,
+        deal=deal,
+        policy_number=number,
+        start_date=today,
+        end_date=today + timedelta(days=30),
+    )
+    Task.create(title="По сделке", due_date=today, deal=deal)
+    Task.create(title="По полису", due_date=today + timedelta(days=1), policy=policy)
+    return client, deal, policy
+
+
+def test_snapshot_matches_individual_widgets(db_transaction):
+    today = date.today()
+    _seed_dashboard(today)
+
+    snapshot = build_dashboard_snapshot()
+
+    assert snapshot.counters == get_dashboard_counters()
+    assert [t.id for t in snapshot.upcoming_tasks] == [
+        t.id for t in get_upcoming_tasks()
+    ]
+    assert [p.id for p in snapshot.expiring_policies] == [
+        p.id for p in get_expiring_policies()
+    ]
+    assert [d.id for d in snapshot.deal_reminders] == [
+        d.id for d in get_upcoming_deal_reminders()
+    ]
+    assert snapshot.reminder_counts == get_deal_reminder_counts()
+
+    by_deal, by_policy = snapshot.upcoming_tasks
+    assert by_deal.deal.client.name == "Клиент"
+    assert by_policy.policy.policy_number == "POL-SNAP"
+    assert by_policy.policy.client.name == "Клиент"
+    assert snapshot.expiring_policies[0].deal.description == "Сделка"
+
+
+def test_snapshot_uses_fixed_number_of_queries(db_transaction, monkeypatch):
+    today = date.today()
+    for n in range(3):
+        _seed_dashboard(today, number=f"POL-{n}")
+    build_dashboard_snapshot()  # прогрев списка столбцов полиса
+
+    database = db.obj
+    executed: list[str] = []
+    original_execute_sql = database.__class__.execute_sql
+
+    def spy(self, sql, params=None, *args, **kwargs):
+        executed.append(sql)
+        return original_execute_sql(self, sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(database.__class__, "execute_sql", spy)
+    snapshot = build_dashboard_snapshot()
+    for task in snapshot.upcoming_tasks:
+        if task.deal_id:
+            task.deal.client.name
+        if task.policy_id:
+            task.policy.client.name
+    monkeypatch.undo()
+
+    queries = [sql for sql in executed if not sql.startswith(("SAVEPOINT", "RELEASE"))]
+    assert len(queries) == 5
+
+
+def test_snapshot_cache_ttl_and_invalidation(db_transaction):
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return build_dashboard_snapshot()
+
+    cache = DashboardSnapshotCache(ttl=60, builder=builder)
+    try:
+        assert cache.peek() is None
+        first = cache.get()
+        assert cache.get() is first
+        assert len(builds) == 1
+
+        add_task(title="Новая", due_date=date.today())
+        assert not cache.is_fresh()
+        assert cache.peek() is first
+
+        second = cache.get()
+        assert second is not first
+        assert second.counters["entities"]["tasks"] == 1
+        assert len(builds) == 2
+
+        cache.ttl = 0
+        assert cache.get() is not second
+    finally:
+        unsubscribe(cache._on_change)
@@ -0,0 +1,126 @@
+import threading
+
+from peewee import IntegerField, Model
+from playhouse.pool import PooledSqliteDatabase
+
+from config import Settings
+from database.db import supports_background_connections, thread_connection
+from database.init import database_from_url
+
+
+def _counter_model(database):
+    class Counter(Model):
+        value = IntegerField()
+
+        class Meta:
+            database = None
+
+    Counter._meta.set_database(database)
+    return Counter
+
+
+def test_sqlite_file_is_pooled_with_pragmas(tmp_path):
+    settings = Settings(db_max_connections=3, sqlite_cache_mb=8, sqlite_mmap_mb=16)
+    database = database_from_url(f"sqlite:///{tmp_path / 'crm.db'}", settings)
+    assert isinstance(database, PooledSqliteDatabase)
+    assert database._max_connections == 3
+    assert supports_background_connections(database)
+
+    def pragma(name):
+        return database.execute_sql(f"PRAGMA {name}").fetchone()[0]
+
+    with thread_connection(database):
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1
+        assert pragma("foreign_keys") == 1
+        assert pragma("busy_timeout") == settings.sqlite_busy_timeout_ms
+        assert pragma("cache_size") == -8 * 1024
+        assert pragma("mmap_size") == 16 * 1024 * 1024
+    database.close_all()
+
+    memory = database_from_url("sqlite:///:memory:", settings)
+    assert not isinstance(memory, PooledSqliteDatabase)
+    assert not supports_background_connections(memory)
+
+
+def test_thread_connection_returns_connections_to_pool(tmp_path):
+    database = database_from_url(f"sqlite:///{tmp_path / 'crm.db'}", Settings())
+    Counter = _counter_model(database)
+    with thread_connection(database):
+        database.create_tables([Counter])
+        # уже открытое соединение потока вложенный блок не закрывает
+        with thread_connection(database):
+            Counter.create(value=1)
+        assert not database.is_closed()
+    assert database.is_closed()
+
+    errors: list[BaseException] = []
+    writing = threading.Event()
+    release = threading.Event()
+
+    def writer():
+        with thread_connection(database), database.atomic():
+            Counter.create(value=2)
+            writing.set()
+            release.wait(5)
+
+    def reader():
+        try:
+            with thread_connection(database):
+                # WAL: читатель видит последнюю зафиксированную версию
+                assert [c.value for c in Counter.select()] == [1]
+        except BaseException as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    write_thread = threading.Thread(target=writer)
+    write_thread.start()
+    assert writing.wait(5)
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join(5)
+    release.set()
+    write_thread.join(5)
+
+    assert errors == []
+    assert len(database._in_use) == 0
+    with thread_connection(database):
+        assert Counter.select().count() == 2
+    database.close_all()
+
+
+def test_exhausted_pool_waits_for_free_connection(tmp_path):
+    settings = Settings(db_max_connections=1, db_pool_timeout=5)
+    database = database_from_url(f"sqlite:///{tmp_path / 'crm.db'}", settings)
+    holding = threading.Event()
+    release = threading.Event()
+    errors: list[BaseException] = []
+
+    def holder():
+        with thread_connection(database):
+            holding.set()
+            release.wait(5)
+
+    def waiter():
+        try:
+            with thread_connection(database):
+                database.execute_sql("SELECT 1")
+        except BaseException as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    hold_thread = threading.Thread(target=holder)
+    hold_thread.start()
+    assert holding.wait(5)
+    wait_thread = threading.Thread(target=waiter)
+    wait_thread.start()
+    # единственное соединение занято: второй поток ждёт, а не падает
+    wait_thread.join(0.3)
+    assert wait_thread.is_alive()
+    release.set()
+    hold_thread.join(5)
+    wait_thread.join(5)
+
+    assert errors == []
+    assert not wait_thread.is_alive()
+    database.close_all()
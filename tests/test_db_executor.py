@@ -0,0 +1,67 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+from peewee import SqliteDatabase
+
+from database.executor import DatabaseExecutor
+
+
+def test_blocking_calls_do_not_block_event_loop():
+    executor = DatabaseExecutor(max_workers=4)
+
+    async def scenario():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await asyncio.gather(*(executor.run(time.sleep, 0.2) for _ in range(4)))
+        elapsed = time.perf_counter() - started
+        beat.cancel()
+        return elapsed, ticks
+
+    try:
+        elapsed, ticks = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert elapsed < 0.6
+    assert ticks >= 5
+
+
+def test_each_worker_reuses_its_own_connection(tmp_path):
+    database = SqliteDatabase(str(tmp_path / "executor.db"))
+    executor = DatabaseExecutor(max_workers=2, database=database)
+
+    opened = []
+
+    def whoami():
+        database.execute_sql("SELECT 1")
+        opened.append(database.connection())
+        return threading.get_ident(), id(database.connection())
+
+    async def scenario():
+        results = []
+        for _ in range(6):
+            results.append(await executor.run(whoami))
+        return results
+
+    results = asyncio.run(scenario())
+    connections: dict[int, set[int]] = {}
+    for thread_id, connection_id in results:
+        connections.setdefault(thread_id, set()).add(connection_id)
+    assert all(len(ids) == 1 for ids in connections.values())
+    assert threading.get_ident() not in connections
+
+    executor.shutdown()
+    for connection in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
@@ -1,6 +1,7 @@
 from datetime import date
 
 from database.models import Client, Deal
+from services import executor_service
 from services.deals.deal_app_service import DealAppService
 
 
@@ -117,3 +118,22 @@ def test_deal_app_service_description_and_calculation_filters(in_memory_db):
     calculation_filters = service._convert_column_filters({"calculations": ["Calc-1"]})
     calculation_query = service._build_query(column_filters=calculation_filters)
     assert {deal.id for deal in calculation_query} == {alpha.id}
+
+
+def test_deal_app_service_distinct_executor_follows_executor_writes(in_memory_db):
+    client = Client.create(name="Client")
+    deal = Deal.create(client=client, description="Deal", start_date=date.today())
+    service = DealAppService()
+
+    def executors():
+        return [item["value"] for item in service.get_distinct_values("executor")]
+
+    assert executors() == [None]
+
+    executor_service.assign_executor(deal.id, 101)
+    executor = executor_service.get_executor(101)
+    executor_service.update_executor(executor, full_name="Иванов")
+    assert executors() == ["Иванов"]
+
+    executor_service.unassign_executor(deal.id)
+    assert executors() == [None]
@@ -0,0 +1,131 @@
+import contextlib
+import threading
+from datetime import date
+
+import pytest
+from PySide6.QtCore import QCoreApplication, QEvent
+
+from database.db import db
+from database.models import Client, Deal, Policy
+from services.policies.deal_linking import resolve_link_candidates
+from ui.views import policy_table_view as policy_view
+
+
+@pytest.fixture
+def executed(monkeypatch) -> list[str]:
+    calls: list[str] = []
+    original = db.obj.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        calls.append(sql)
+        return original(sql, params, *args, **kwargs)
+
+    monkeypatch.setitem(vars(db.obj), "execute_sql", spy)
+    return calls
+
+
+def _policies(client: Client, count: int, **kwargs) -> list[Policy]:
+    return [
+        Policy.create(
+            client=client,
+            policy_number=f"{client.name}-{n}",
+            start_date=date(2024, 1, 1),
+            **kwargs,
+        )
+        for n in range(count)
+    ]
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_candidates_ranked_with_clients_and_choices():
+    owner = Client.create(name="Иванов", phone="+7 900 111-22-33")
+    first = Deal.create(client=owner, description="КАСКО", start_date=date(2024, 1, 1))
+    second = Deal.create(client=owner, description="ОСАГО", start_date=date(2024, 1, 1))
+    other = Deal.create(
+        client=Client.create(name="Петров"),
+        description="ИФЛ",
+        start_date=date(2024, 1, 1),
+    )
+    policies = _policies(owner, 2)
+
+    result = resolve_link_candidates([p.id for p in policies] + [policies[0].id])
+
+    assert result.missing_ids == []
+    assert result.auto_link is None
+    assert [p.id for p in result.policies] == [p.id for p in policies]
+    assert {c.deal_id for c in result.candidates} == {first.id, second.id}
+    top = result.candidates[0]
+    assert top.client_name == "Иванов"
+    assert sorted(top.supported_policy_ids) == sorted(p.id for p in policies)
+    assert result.unsupported_policy_ids(top) == []
+    assert [choice.id for choice in result.choices] == [other.id]
+    assert result.choices[0].client_name == "Петров"
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_auto_link_and_missing_policies():
+    owner = Client.create(name="Сидоров")
+    deal = Deal.create(client=owner, description="КАСКО", start_date=date(2024, 1, 1))
+    Policy.create(
+        client=owner,
+        deal=deal,
+        policy_number="OLD",
+        vehicle_vin="XTA000111",
+        start_date=date(2023, 1, 1),
+    )
+    renewals = _policies(owner, 2, vehicle_vin="XTA000111")
+
+    result = resolve_link_candidates([p.id for p in renewals])
+    assert result.auto_link is not None and result.auto_link.id == deal.id
+    assert result.choices == []
+
+    missing = resolve_link_candidates([renewals[0].id, 10**6])
+    assert missing.missing_ids == [10**6]
+    assert missing.candidates == []
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_query_count_does_not_grow_with_selection(executed):
+    owner = Client.create(name="Орлов", phone="+7 900 444-55-66")
+    for n in range(3):
+        Deal.create(client=owner, description=f"D{n}", start_date=date(2024, 1, 1))
+    policies = _policies(owner, 20)
+
+    executed.clear()
+    resolve_link_candidates([policies[0].id], with_choices=False)
+    single = len(executed)
+
+    executed.clear()
+    result = resolve_link_candidates([p.id for p in policies], with_choices=False)
+    assert len(executed) == single
+    assert len(result.candidates) == 3
+
+
+def test_link_worker_is_joined_when_view_is_destroyed(
+    in_memory_db, qapp, monkeypatch
+):
+    client = Client.create(name="Иванов")
+    policies = _policies(client, 1)
+    started = threading.Event()
+
+    def slow_resolve(policy_ids):
+        started.set()
+        while not worker.isInterruptionRequested():
+            started.wait(0.01)
+        return None
+
+    monkeypatch.setattr(policy_view, "supports_background_connections", lambda: True)
+    monkeypatch.setattr(policy_view, "thread_connection", contextlib.nullcontext)
+    monkeypatch.setattr(policy_view, "resolve_link_candidates", slow_resolve)
+    view = policy_view.PolicyTableView()
+    qapp.processEvents()
+    monkeypatch.setattr(view, "get_selected_multiple", lambda: policies)
+
+    view._on_link_deal()
+    worker = view._link_worker
+    assert started.wait(5)
+
+    view.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    assert not worker.isRunning()
@@ -0,0 +1,117 @@
+from datetime import date
+
+import pytest
+
+from database.models import Client, Deal, Policy
+from database import change_events
+from services.deal_service import add_deal, mark_deal_deleted
+from services.policies.deal_matching import (
+    DealMatchIndex,
+    find_candidate_deal_ids,
+    get_deal_match_index,
+)
+
+pytestmark = pytest.mark.usefixtures("in_memory_db")
+
+
+@pytest.fixture()
+def no_drive(monkeypatch):
+    monkeypatch.setattr(
+        "services.deal_service.create_deal_folder", lambda *a, **k: (None, None)
+    )
+
+
+def _make_deal(client, description="Сделка", **policy_fields):
+    deal = Deal.create(
+        client=client, description=description, start_date=date(2024, 1, 1)
+    )
+    if policy_fields:
+        policy_fields.setdefault("policy_number", f"{description}-{client.id}")
+        Policy.create(
+            client=client,
+            deal=deal,
+            start_date=date(2024, 1, 1),
+            **policy_fields,
+        )
+    return deal
+
+
+def test_lookup_maps_normalized_keys():
+    client = Client.create(
+        name="ООО Ключи", phone="8 (905) 000-11-22", email=" A@B.RU "
+    )
+    deal = _make_deal(
+        client,
+        vehicle_vin="xta-210 99",
+        policy_number="AB 123/45",
+        vehicle_brand=" Lada ",
+        vehicle_model="Vesta",
+    )
+
+    index = DealMatchIndex()
+
+    assert index.lookup("client", client.id) == {deal.id}
+    assert index.lookup("vin", "xta21099") == {deal.id}
+    assert index.lookup("number", "ab12345") == {deal.id}
+    assert index.lookup("phone", "79050001122") == {deal.id}
+    assert index.lookup("email", "a@b.ru") == {deal.id}
+    assert index.lookup("brand_model", ("lada", "vesta")) == {deal.id}
+
+
+def test_candidate_ids_match_sql_lookup():
+    owner = Client.create(name="ООО Владелец", phone="+7 905 111-22-33")
+    by_vin = _make_deal(Client.create(name="ООО VIN"), vehicle_vin="VIN-0001")
+    by_number = _make_deal(Client.create(name="ООО Номер"), policy_number="NUM 7")
+    by_phone = _make_deal(Client.create(name="ООО Тел", phone="89051112233"))
+    _make_deal(Client.create(name="ООО Чужой"), vehicle_vin="OTHER")
+
+    policy = Policy.create(
+        client=owner,
+        policy_number="num-7",
+        vehicle_vin="vin 0001",
+        start_date=date(2024, 2, 1),
+    )
+
+    expected = find_candidate_deal_ids(policy)
+    assert expected == {by_vin.id, by_number.id, by_phone.id}
+    assert get_deal_match_index().candidate_ids(policy) == expected
+
+
+def test_service_changes_update_index_incrementally(monkeypatch, no_drive):
+    client = Client.create(name="ООО Инкремент")
+    first = add_deal(
+        client_id=client.id, start_date=date(2024, 1, 1), description="Первая"
+    )
+
+    index = get_deal_match_index()
+    assert index.lookup("client", client.id) == {first.id}
+
+    rebuilds = []
+    monkeypatch.setattr(index, "_rebuild_all", lambda: rebuilds.append(True))
+
+    second = add_deal(
+        client_id=client.id, start_date=date(2024, 1, 2), description="Вторая"
+    )
+    assert index.lookup("client", client.id) == {first.id, second.id}
+
+    mark_deal_deleted(first.id)
+    assert index.lookup("client", client.id) == {second.id}
+    assert first.id not in index.profiles()
+    assert rebuilds == []
+
+
+def test_unknown_scope_forces_full_rebuild():
+    client = Client.create(name="ООО Полная")
+    deal = _make_deal(client)
+
+    index = get_deal_match_index()
+    assert index.lookup("client", client.id) == {deal.id}
+
+    # массовая вставка о себе не сообщает
+    other_id = Deal.insert(
+        client=client, description="Вне сервиса", start_date=date(2024, 1, 1)
+    ).execute()
+    assert index.lookup("client", client.id) == {deal.id}
+
+    change_events.notify_changed(Deal)
+    assert index.lookup("client", client.id) == {deal.id, other_id}
@@ -0,0 +1,148 @@
+import random
+from datetime import date
+from difflib import SequenceMatcher
+
+import pytest
+
+from database.models import Client, Deal, Policy
+from services.policies import build_deal_match_index, make_policy_profile
+from services.policies.deal_matching import (
+    CONTRACTOR_SIMILARITY_THRESHOLD,
+    collect_indirect_matches,
+    get_deal_match_index,
+)
+from services.policies.similarity import SimilarityIndex
+
+_WORDS = ("ооо", "ип", "альфа", "бета", "страх", "авто", "иванов", "петров", "групп")
+_ALPHABET = "абвгдежзиклмнопрстуфхцчшщыэюя -\"."
+
+
+def _random_name(rnd: random.Random) -> str:
+    words = [rnd.choice(_WORDS) for _ in range(rnd.randint(1, 3))]
+    name = list(" ".join(words))
+    for _ in range(rnd.randint(0, 3)):
+        pos = rnd.randrange(len(name) + 1)
+        action = rnd.random()
+        if action < 0.4:
+            name.insert(pos, rnd.choice(_ALPHABET))
+        elif name and pos < len(name):
+            if action < 0.7:
+                del name[pos]
+            else:
+                name[pos] = rnd.choice(_ALPHABET)
+    return "".join(name)
+
+
+def _brute_force(query, owned, threshold):
+    result = {}
+    for key, value in owned:
+        ratio = SequenceMatcher(None, query, value).ratio()
+        if ratio >= threshold and ratio > result.get(key, 0.0):
+            result[key] = ratio
+    return result
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_similarity_index_matches_sequence_matcher(seed):
+    rnd = random.Random(seed)
+    owned = [(rnd.randrange(150), _random_name(rnd)) for _ in range(400)]
+    index = SimilarityIndex(CONTRACTOR_SIMILARITY_THRESHOLD)
+    for key, value in owned:
+        index.add(key, value)
+
+    for _ in range(60):
+        query = _random_name(rnd)
+        assert index.search(query) == _brute_force(
+            query, owned, CONTRACTOR_SIMILARITY_THRESHOLD
+        )
+
+
+def test_similarity_index_prunes_before_exact_scoring():
+    index = SimilarityIndex(0.8)
+    for key, value in enumerate(["ооо альфа", "ооо альфа+", "ип петров", "бета групп"]):
+        index.add(key, value)
+
+    assert index.shortlist("ооо альфа") == ["ооо альфа", "ооо альфа+"]
+
+
+def test_similarity_index_remove_and_shared_strings():
+    index = SimilarityIndex(0.8)
+    index.add(1, "ооо альфа")
+    index.add(2, "ооо альфа")
+
+    index.remove(1, "ооо альфа")
+    assert index.search("ооо альфа") == {2: 1.0}
+
+    index.remove(2, "ооо альфа")
+    assert index.search("ооо альфа") == {}
+
+
+def _reference_contractor_reasons(policy_profile, deal_index):
+    """Прежний перебор SequenceMatcher по всем сделкам."""
+
+    contractor = policy_profile.normalized_contractor
+    result = {}
+    for deal_id, profile in deal_index.items():
+        name = (profile.client.name or "").strip().lower()
+        ratio = SequenceMatcher(None, contractor, name).ratio() if name else 0.0
+        if ratio >= CONTRACTOR_SIMILARITY_THRESHOLD:
+            result[deal_id] = ("name", round(ratio, 2))
+            continue
+        best = max(
+            (SequenceMatcher(None, contractor, c).ratio() for c in profile.contractors),
+            default=0.0,
+        )
+        if best >= CONTRACTOR_SIMILARITY_THRESHOLD:
+            result[deal_id] = ("contractor", round(best, 2))
+    return result
+
+
+def _contractor_reasons(matches):
+    result = {}
+    for match in matches:
+        for reason in match.reasons:
+            if reason.startswith("Контрагент полиса похож"):
+                kind = "name" if "имя клиента" in reason else "contractor"
+                ratio = float(reason.rsplit(" ", 1)[1].rstrip(")"))
+                result[match.deal_id] = (kind, ratio)
+    return result
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_collect_indirect_matches_parity_with_sequence_matcher():
+    rnd = random.Random(42)
+    for n in range(60):
+        client = Client.create(name=_random_name(rnd) or f"клиент {n}")
+        deal = Deal.create(
+            client=client, description=f"Сделка {n}", start_date=date(2024, 1, 1)
+        )
+        for m in range(rnd.randint(0, 2)):
+            Policy.create(
+                client=client,
+                deal=deal,
+                policy_number=f"P-{n}-{m}",
+                contractor=_random_name(rnd),
+                start_date=date(2024, 1, 1),
+            )
+
+    deal_index = build_deal_match_index()
+    match_index = get_deal_match_index()
+    for n in range(25):
+        policy = Policy.create(
+            client=Client.create(name=f"Новый {n}"),
+            policy_number=f"NEW-{n}",
+            contractor=_random_name(rnd),
+            start_date=date(2024, 6, 1),
+        )
+        profile = make_policy_profile(policy)
+        expected = _reference_contractor_reasons(profile, deal_index)
+
+        adhoc = collect_indirect_matches(profile, deal_index)
+        shared = collect_indirect_matches(
+            profile,
+            deal_index,
+            match_index.similarity_scores(profile.normalized_contractor),
+        )
+
+        assert _contractor_reasons(adhoc) == expected
+        assert _contractor_reasons(shared) == expected
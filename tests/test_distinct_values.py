@@ -0,0 +1,125 @@
+from datetime import date
+
+import pytest
+
+from database.db import db
+from database.models import Client, Deal
+from database import change_events
+from services.distinct_values import DistinctValuesProvider
+
+
+def _deals(names: dict[str, int]) -> None:
+    for name, deals_count in names.items():
+        client = Client.create(name=name)
+        for n in range(deals_count):
+            Deal.create(client=client, description=f"D{n}", start_date=date.today())
+
+
+@pytest.fixture
+def executed(monkeypatch) -> list[str]:
+    calls: list[str] = []
+    original = db.obj.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        calls.append(sql)
+        return original(sql, params, *args, **kwargs)
+
+    monkeypatch.setitem(vars(db.obj), "execute_sql", spy)
+    return calls
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_top_values_by_frequency_with_counts():
+    _deals({"Иванов": 3, "Петров": 1, "Сидоров": 2})
+    provider = DistinctValuesProvider()
+    query = Deal.select().join(Client)
+
+    full = provider.values(query, Client.name)
+    assert [item["value"] for item in full] == ["Иванов", "Петров", "Сидоров"]
+    assert full.counts == {"Иванов": 3, "Петров": 1, "Сидоров": 2}
+    assert not full.truncated
+
+    top = provider.values(query, Client.name, limit=2)
+    assert [item["value"] for item in top] == ["Иванов", "Сидоров"]
+    assert top.truncated
+
+    found = provider.values(query, Client.name, limit=2, prefix="Пет")
+    assert [item["value"] for item in found] == ["Петров"]
+    assert not found.truncated
+
+    # префикс ищется в базе без учёта регистра, как и в кэше
+    lower = provider.values(query, Client.name, limit=2, prefix="пЕт")
+    assert [item["value"] for item in lower] == ["Петров"]
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_values_cached_until_service_write(executed):
+    _deals({"Иванов": 1})
+    deal = Deal.create(
+        client=Client.create(name="Петров"), description="X", start_date=date.today()
+    )
+    Deal.update(reminder_date=None).execute()
+    provider = DistinctValuesProvider()
+    query = Deal.select().where(Deal.is_deleted == False)
+
+    first = provider.values(query, Deal.reminder_date)
+    assert first == [{"value": None, "display": "—"}]
+    assert first.counts == {None: 2}
+
+    executed.clear()
+    assert provider.values(query, Deal.reminder_date) == first
+    assert executed == []
+
+    deal.reminder_date = date(2024, 5, 1)
+    deal.save()
+    change_events.notify_changed(Deal, deal.id)
+    values = provider.values(query, Deal.reminder_date)
+    assert [item["value"] for item in values] == [None, date(2024, 5, 1)]
+    assert executed
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_longer_prefix_narrowed_without_query(executed):
+    _deals({"Анна": 1, "Антон": 2, "Борис": 1})
+    provider = DistinctValuesProvider()
+    query = Deal.select().join(Client)
+
+    found = provider.values(query, Client.name, prefix="А")
+    assert [item["value"] for item in found] == ["Анна", "Антон"]
+    executed.clear()
+    narrowed = provider.values(query, Client.name, prefix="Ант")
+    assert [item["value"] for item in narrowed] == ["Антон"]
+    assert narrowed.counts == {"Антон": 2}
+    assert executed == []
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_grouping_query_wraps_distinct_selection(executed):
+    _deals({"Иванов": 2, "Петров": 1})
+    provider = DistinctValuesProvider()
+    query = Deal.select().join(Client).distinct().order_by(Deal.description)
+
+    values = provider.values(query, Client.name)
+
+    assert values.counts == {"Иванов": 2, "Петров": 1}
+    (sql,) = [sql for sql in executed if "GROUP BY" in sql.upper()]
+    # группировка без DISTINCT, а в DISTINCT-подзапросе нет ORDER BY, который
+    # PostgreSQL запрещает по столбцам не из списка выборки
+    assert not sql.upper().startswith("SELECT DISTINCT")
+    inner = sql[sql.index("(SELECT") : sql.index(') AS "src"')]
+    assert "ORDER BY" not in inner.upper()
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_joined_models_reset_cache(executed):
+    _deals({"Иванов": 1})
+    provider = DistinctValuesProvider()
+    query = Deal.select().join(Client).where(Client.name == "Иванов")
+
+    provider.values(query, Deal.description, models=(Client,))
+    executed.clear()
+    change_events.notify_changed(Client)
+    assert provider.values(query, Deal.description, models=(Client,)) == [
+        {"value": "D0", "display": "D0"}
+    ]
+    assert executed
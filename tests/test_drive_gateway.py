@@ -72,3 +72,28 @@ def test_find_drive_folder_escapes_apostrophes(monkeypatch, drive_settings):
     assert files_resource.list_calls, "Запрос к Google Drive не был выполнен"
     query = files_resource.list_calls[-1]["q"]
     assert "O\\'Brien" in query
+
+
+def test_list_child_folders_reads_all_pages(monkeypatch, drive_settings):
+    pages = iter(
+        [
+            {
+                "files": [{"name": "A", "webViewLink": "la"}],
+                "nextPageToken": "next",
+            },
+            {"files": [{"name": "B", "webViewLink": "lb"}, {"name": "A"}]},
+        ]
+    )
+
+    class PagedFiles(_FakeFilesResource):
+        def list(self, **kwargs):
+            self.list_calls.append(kwargs)
+            return _FakeExecute(next(pages))
+
+    files_resource = PagedFiles({})
+    gateway = DriveGateway(drive_settings)
+    monkeypatch.setattr(gateway, "_get_service", lambda: _FakeService(files_resource))
+
+    assert gateway.list_child_folders("parent") == {"A": "la", "B": "lb"}
+    assert [call["pageToken"] for call in files_resource.list_calls] == [None, "next"]
+    assert "'parent' in parents" in files_resource.list_calls[0]["q"]
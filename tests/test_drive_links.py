@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+
+from database.models import Client, Deal
+from services.drive_links import DriveLinkResolver
+from services.task_queue import pop_all_by_deal
+
+
+class FakeGateway:
+    def __init__(self, folders: dict[str, dict[str, str]]):
+        self.folders = folders
+        self.calls: list[str] = []
+
+    def list_child_folders(self, parent_id):
+        self.calls.append(parent_id)
+        return self.folders.get(parent_id, {})
+
+
+def _deal(client: Client, description: str) -> Deal:
+    return Deal.create(
+        client=client, description=description, start_date=datetime.date.today()
+    )
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_dispatch_defers_drive_lookup(drive_link_resolver, make_task):
+    client = Client.create(name="C", drive_folder_link="https://drive/folders/p1")
+    deal = _deal(client, "Каско")
+    for n in range(3):
+        make_task(client=client, deal=deal, title=f"T{n}")
+    gateway = FakeGateway({"p1": {"Сделка - Каско": "https://drive/deal"}})
+    drive_link_resolver._gateway = gateway
+
+    assert len(pop_all_by_deal(chat_id=1, deal_id=deal.id)) == 3
+    assert gateway.calls == []
+    assert drive_link_resolver.pending() == {deal.id}
+
+    assert drive_link_resolver.resolve_pending() == 1
+    assert gateway.calls == ["p1"]
+    assert Deal.get_by_id(deal.id).drive_folder_link == "https://drive/deal"
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_lookups_batched_per_parent_and_cached():
+    first = Client.create(name="A", drive_folder_link="https://drive/folders/p1")
+    second = Client.create(name="B", drive_folder_link="https://drive/folders/p2")
+    deals = [_deal(first, "Одна"), _deal(first, "Две"), _deal(second, "Три")]
+    missing = _deal(first, "Нет папки")
+    gateway = FakeGateway(
+        {
+            "p1": {"Сделка - Одна": "L1", "Сделка - Две": "L2"},
+            "p2": {"Сделка - Три": "L3"},
+        }
+    )
+    now = [0.0]
+    resolver = DriveLinkResolver(
+        gateway, autostart=False, ttl=60, clock=lambda: now[0]
+    )
+
+    resolver.schedule([d.id for d in deals] + [missing.id])
+    assert resolver.resolve_pending() == 3
+    assert sorted(gateway.calls) == ["p1", "p2"]
+    links = [Deal.get_by_id(d.id).drive_folder_link for d in deals]
+    assert links == ["L1", "L2", "L3"]
+
+    resolver.schedule([missing.id])
+    resolver.resolve_pending()
+    assert len(gateway.calls) == 2
+
+    now[0] = 61
+    gateway.folders["p1"]["Сделка - Нет папки"] = "L4"
+    resolver.schedule([missing.id])
+    assert resolver.resolve_pending() == 1
+    assert Deal.get_by_id(missing.id).drive_folder_link == "L4"
@@ -1024,6 +1024,8 @@ def test_column_filter_passed_to_payment_service(
         return original_fetch_page(page, per_page, **kwargs)
 
     def spy_build_payment_query(*args, **kwargs):
+        # таблица платежей прокручивается без страниц и строит запрос сама
+        captured_column_filters.append(kwargs.get("column_filters"))
         query = original_build_query(*args, **kwargs)
         captured_sql.append(query.sql())
         return query
@@ -0,0 +1,127 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from database.db import db
+from database.models import Client, Deal, FolderRelocation, Policy
+from services import folder_relocation as fr
+from services.clients.client_service import merge_clients
+
+D1 = date(2024, 1, 1)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = datetime.utcnow() + timedelta(seconds=1)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _client_with_policies(name: str, count: int) -> Client:
+    client = Client.create(name=name)
+    deal = Deal.create(client=client, description=f"Сделка {name}", start_date=D1)
+    for n in range(count):
+        Policy.create(
+            client=client, deal=deal, policy_number=f"{name}-{n}", start_date=D1
+        )
+    return client
+
+
+@pytest.fixture
+def renames(monkeypatch) -> list[tuple]:
+    calls: list[tuple] = []
+
+    def fake_deal(old_client, old_desc, new_client, new_desc, *args, **kwargs):
+        calls.append(("deal", old_client, new_client))
+        return f"/{new_client}/{new_desc}", None
+
+    def fake_policy(old_client, number, old_deal, new_client, *args, **kwargs):
+        calls.append(("policy", old_client, new_client))
+        return f"/{new_client}/{number}", None
+
+    monkeypatch.setattr(fr, "rename_deal_folder", fake_deal)
+    monkeypatch.setattr(fr, "rename_policy_folder", fake_policy)
+    return calls
+
+
+def test_merge_statements_do_not_depend_on_size(in_memory_db, monkeypatch, renames):
+    executed: list[str] = []
+    original = db.obj.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        executed.append(sql)
+        return original(sql, params, *args, **kwargs)
+
+    monkeypatch.setitem(vars(db.obj), "execute_sql", spy)
+
+    counts = []
+    for size in (2, 20):
+        primary = Client.create(name=f"Основной {size}")
+        duplicate = _client_with_policies(f"Дубль {size}", size)
+        executed.clear()
+        merge_clients(primary.id, [duplicate.id])
+        counts.append(len(executed))
+        assert Policy.select().where(Policy.client == primary).count() == size
+
+    assert counts[0] == counts[1]
+    assert renames == []
+    assert fr.relocation_progress().total == (1 + 2) + (1 + 20)
+
+
+def test_relocation_retries_and_reports_progress(in_memory_db, renames, monkeypatch):
+    primary = Client.create(name="Основной")
+    duplicate = _client_with_policies("Дубль", 2)
+    merge_clients(primary.id, [duplicate.id])
+    batch = FolderRelocation.select().get().batch
+
+    clock = Clock()
+    relocator = fr.FolderRelocator(gateway=object(), autostart=False, clock=clock)
+    original = fr.rename_policy_folder
+    failures = iter([True])
+
+    def flaky(*args, **kwargs):
+        if next(failures, False):
+            raise OSError("Drive недоступен")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(fr, "rename_policy_folder", flaky)
+    progress: list[fr.RelocationProgress] = []
+
+    assert relocator.run_pending(batch, on_progress=progress.append) == 2
+    assert [p.done for p in progress] == [1, 1, 2]
+    assert fr.relocation_progress(batch).pending == 1
+    failed = FolderRelocation.get(FolderRelocation.attempts == 1)
+    assert failed.last_error == "Drive недоступен"
+
+    # повтор только после задержки
+    assert relocator.run_pending(batch) == 0
+    clock.now += timedelta(seconds=fr.backoff_delay(1))
+    assert relocator.run_pending(batch) == 1
+    assert fr.relocation_progress(batch) == fr.RelocationProgress(3, 3, 0)
+    assert Policy.get_by_id(failed.target_id).drive_folder_path.startswith(
+        "/Основной/"
+    )
+    assert [call[0] for call in renames] == ["deal", "policy", "policy"]
+
+
+def test_relocation_gives_up_after_max_attempts(in_memory_db, monkeypatch):
+    primary = Client.create(name="Основной")
+    duplicate = Client.create(name="Дубль")
+    Deal.create(client=duplicate, description="D", start_date=D1)
+    merge_clients(primary.id, [duplicate.id])
+
+    def broken(*args, **kwargs):
+        raise OSError("нет доступа")
+
+    monkeypatch.setattr(fr, "rename_deal_folder", broken)
+    clock = Clock()
+    relocator = fr.FolderRelocator(gateway=object(), autostart=False, clock=clock)
+    for _ in range(fr.MAX_ATTEMPTS):
+        relocator.run_pending()
+        clock.now += timedelta(seconds=fr.BACKOFF_MAX)
+
+    job = FolderRelocation.get()
+    assert job.status == fr.FAILED
+    assert job.attempts == fr.MAX_ATTEMPTS
+    assert fr.relocation_progress().finished
@@ -21,6 +21,7 @@ from services.income_service import (
     get_incomes_page,
     get_income_amounts_by_deal_id,
 )
+from services.payment_service import restore_payment
 from services.query_utils import sum_column
 
 
@@ -60,6 +61,21 @@ def test_mark_incomes_deleted(in_memory_db):
     assert active_ids == [inc3.id]
 
 
+def test_mark_incomes_deleted_survive_payment_restore(in_memory_db):
+    """Bulk-deleted incomes are stamped and not restored with their payment."""
+
+    income = _create_income(received_date=date.today(), amount=10, suffix="1")
+    mark_incomes_deleted([income.id])
+    assert Income.get_by_id(income.id).deleted_at is not None
+
+    # платёж, удалённый без отметки, как до её появления
+    Payment.update(is_deleted=True).where(Payment.id == income.payment_id).execute()
+    restore_payment(income.payment_id)
+
+    assert Payment.get_by_id(income.payment_id).is_deleted is False
+    assert Income.get_by_id(income.id).is_deleted is True
+
+
 def test_get_incomes_page_pagination_and_deleted(in_memory_db):
     """``get_incomes_page`` paginates and hides deleted incomes by default."""
 
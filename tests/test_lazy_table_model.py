@@ -0,0 +1,126 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from PySide6.QtCore import Qt
+
+from database.db import db
+from database.models import Client, Deal
+from ui.base.base_table_model import BaseTableModel
+from ui.base.lazy_table_model import LazyTableModel, RowBlockSource
+
+
+def _create_deals(count: int, seed: int = 11) -> list[Deal]:
+    rnd = random.Random(seed)
+    clients = [Client.create(name=f"Клиент {n}") for n in range(3)]
+    deals = []
+    for n in range(count):
+        reminder = (
+            None
+            if rnd.random() < 0.3
+            else date(2024, 1, 1) + timedelta(days=rnd.randrange(4))
+        )
+        deals.append(
+            Deal.create(
+                client=clients[n % len(clients)],
+                description=f"Сделка {n}",
+                start_date=date(2024, 1, 1),
+                reminder_date=reminder,
+            )
+        )
+    return deals
+
+
+def _source(query, **kwargs) -> RowBlockSource:
+    template = BaseTableModel([], Deal)
+    return RowBlockSource(query, template.fields, template.display_text, **kwargs)
+
+
+def _load_all(source: RowBlockSource) -> None:
+    while not source.exhausted:
+        source.fetch_next()
+
+
+@pytest.mark.usefixtures("in_memory_db")
+@pytest.mark.parametrize("descending", [False, True])
+def test_blocks_follow_full_query_order(descending):
+    """Блоки по ключу повторяют сплошную выборку, включая NULL."""
+    _create_deals(53)
+    source = _source(
+        Deal.select(),
+        order_field=Deal.reminder_date,
+        descending=descending,
+        block_size=7,
+    )
+    _load_all(source)
+
+    order = Deal.reminder_date.desc() if descending else Deal.reminder_date.asc()
+    id_order = Deal.id.desc() if descending else Deal.id.asc()
+    expected = [deal.id for deal in Deal.select().order_by(order, id_order)]
+    assert source.row_count == 53
+    assert [source.row(i)[0] for i in range(source.row_count)] == expected
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_evicted_blocks_are_reloaded(monkeypatch):
+    _create_deals(40)
+    source = _source(
+        Deal.select(), order_field=Deal.id, block_size=5, max_blocks=2
+    )
+    _load_all(source)
+    assert source.cached_blocks == 2
+
+    executed: list[str] = []
+    original = db.obj.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        executed.append(sql)
+        return original(sql, params, *args, **kwargs)
+
+    monkeypatch.setitem(vars(db.obj), "execute_sql", spy)
+    first = source.row(0)
+    assert first[0] == Deal.select(Deal.id).order_by(Deal.id).scalar()
+    assert executed, "вытесненный блок должен загружаться заново"
+    assert source.cached_blocks == 2
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_foreign_key_labels_loaded_per_block(monkeypatch):
+    deals = _create_deals(12)
+    executed: list[str] = []
+    original = db.obj.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        executed.append(sql)
+        return original(sql, params, *args, **kwargs)
+
+    monkeypatch.setitem(vars(db.obj), "execute_sql", spy)
+    source = _source(Deal.select(), order_field=Deal.id, block_size=50)
+    source.fetch_next()
+
+    # одна выборка строк и одна — подписей клиентов
+    assert len(executed) == 2
+    client_column = [f.name for f in source.fields].index("client")
+    texts = [source.row(i)[1][client_column] for i in range(source.row_count)]
+    assert texts == [str(deal.client) for deal in deals]
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_model_fetches_rows_on_demand(qapp):
+    _create_deals(25)
+    source = _source(Deal.select(), order_field=Deal.id, block_size=10)
+    source.fetch_next()
+    model = LazyTableModel(source, Deal)
+
+    assert model.rowCount() == 10
+    assert model.canFetchMore()
+    model.fetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 25
+    assert not model.canFetchMore()
+
+    column = [f.name for f in model.fields].index("description")
+    last = model.index(24, column)
+    assert model.data(last) == "Сделка 24"
+    assert model.data(last, Qt.UserRole) is None
+    assert model.get_item(24).description == "Сделка 24"
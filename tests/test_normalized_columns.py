@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+
+from database.models import Client, Policy
+from database.normalization import backfill_normalized_columns
+from services.clients.client_service import (
+    DuplicatePhoneError,
+    _check_duplicate_phone,
+    get_client_by_phone,
+    merge_clients,
+)
+
+pytestmark = pytest.mark.usefixtures("in_memory_db")
+
+
+def test_save_fills_normalized_columns():
+    client = Client.create(
+        name="Иванов", phone="8 (905) 123-45-67", email=" A@B.RU "
+    )
+    policy = Policy.create(
+        client=client,
+        policy_number="ab-123/45",
+        vehicle_vin="XTA 2109-9",
+        start_date=date(2024, 1, 1),
+    )
+
+    assert (client.phone_norm, client.email_norm) == ("79051234567", "a@b.ru")
+    assert (policy.number_norm, policy.vin_norm) == ("ab12345", "xta21099")
+
+
+def test_save_only_includes_shadow_columns():
+    client = Client.create(name="Петров", phone="+79050000000")
+
+    client.phone = "8 905 111 22 33"
+    client.save(only=[Client.phone])
+
+    assert Client.get_by_id(client.id).phone_norm == "79051112233"
+
+
+def test_backfill_recomputes_stale_rows(in_memory_db):
+    client = Client.create(name="Сидоров", phone="+7 905 000 00 01")
+    Client.update(phone="8 905 000 00 02", phone_norm=None).where(
+        Client.id == client.id
+    ).execute()
+
+    assert backfill_normalized_columns(in_memory_db, "client") == 1
+    assert Client.get_by_id(client.id).phone_norm == "79050000002"
+    assert backfill_normalized_columns(in_memory_db, "client") == 0
+
+
+def test_phone_lookups_ignore_stored_formatting():
+    legacy = Client.create(name="Кузнецов", phone="8 (905) 777-66-55")
+
+    assert get_client_by_phone("+7 905 777 66 55") == legacy
+    with pytest.raises(DuplicatePhoneError):
+        _check_duplicate_phone("+79057776655")
+    _check_duplicate_phone("+79057776655", exclude_ids=[legacy.id])
+
+
+def test_merge_keeps_duplicate_phone_chosen_for_primary():
+    primary = Client.create(name="Основной")
+    duplicate = Client.create(name="Дубль", phone="8 (905) 111-22-33")
+
+    merge_clients(primary.id, [duplicate.id], {"phone": "+7 905 111 22 33"})
+
+    assert Client.get_by_id(primary.id).phone == "+79051112233"
+    with pytest.raises(DuplicatePhoneError):
+        _check_duplicate_phone("+79051112233", exclude_ids=[duplicate.id])
@@ -81,6 +81,28 @@ def test_notify_on_income_received(monkeypatch, sent_notify):
     assert 'P' in sent_notify.get('text', '')
 
 
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_notify_incomes_received_in_bulk(monkeypatch, make_policy_with_payment):
+    from database.models import DealExecutor, Executor, Income
+
+    _, deal, _, payment = make_policy_with_payment(
+        policy_kwargs={"policy_number": "P1"}
+    )
+    _, _, _, other = make_policy_with_payment(policy_kwargs={"policy_number": "P2"})
+    today = datetime.date.today()
+    executor = Executor.create(full_name="E", tg_id=505)
+    DealExecutor.create(deal=deal, executor=executor, assigned_date=today)
+    received = Income.create(payment=payment, amount=10, received_date=today)
+    pending = Income.create(payment=payment, amount=20)
+    unassigned = Income.create(payment=other, amount=30, received_date=today)
+    sent = []
+    monkeypatch.setattr(ins, "notify_executor", lambda tg_id, text: sent.append(tg_id))
+
+    ins.notify_incomes_received([received.id, pending.id, unassigned.id])
+
+    assert sent == [505]
+
 def test_notify_task_resends_message(in_memory_db, monkeypatch):
     client = Client.create(name='C')
     deal = Deal.create(client=client, description='D', start_date=datetime.date.today())
@@ -0,0 +1,138 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from database.db import db
+from database.models import Client, Deal
+from database import change_events
+from services.deal_service import fetch_deals_page_with_total
+from services.query_utils import PageTotal, QueryPaginator
+import services.query_utils as query_utils
+
+
+def _create_deals(count: int, seed: int = 7) -> None:
+    rnd = random.Random(seed)
+    client = Client.create(name="Клиент пагинации")
+    for n in range(count):
+        reminder = (
+            None
+            if rnd.random() < 0.3
+            else date(2024, 1, 1) + timedelta(days=rnd.randrange(5))
+        )
+        Deal.create(
+            client=client,
+            description=f"Сделка {n}",
+            start_date=date(2024, 1, 1),
+            reminder_date=reminder,
+        )
+
+
+def _spy_sql(monkeypatch) -> list[str]:
+    executed: list[str] = []
+    database = db.obj
+    original = database.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        executed.append(sql)
+        return original(sql, params, *args, **kwargs)
+
+    # setitem по __dict__ при откате удаляет атрибут экземпляра, а не
+    # оставляет вместо него связанный метод
+    monkeypatch.setitem(vars(database), "execute_sql", spy)
+    return executed
+
+
+@pytest.mark.usefixtures("in_memory_db")
+@pytest.mark.parametrize("order_dir", ["asc", "desc"])
+def test_keyset_pages_match_offset_order(order_dir, monkeypatch):
+    """Листание по ключу даёт тот же порядок, что и сплошная выборка."""
+    _create_deals(47)
+    expected, total = fetch_deals_page_with_total(
+        1, 100, order_by="reminder_date", order_dir=order_dir
+    )
+    assert total == 47
+
+    seen = []
+    for page in range(1, 7):
+        deals, _ = fetch_deals_page_with_total(
+            page, 8, order_by="reminder_date", order_dir=order_dir
+        )
+        seen.extend(deal.id for deal in deals)
+    assert seen == [deal.id for deal in expected]
+
+    # возврат на уже просмотренную страницу тоже идёт по курсору
+    executed = _spy_sql(monkeypatch)
+    back, _ = fetch_deals_page_with_total(
+        3, 8, order_by="reminder_date", order_dir=order_dir
+    )
+    assert [deal.id for deal in back] == seen[16:24]
+    # сервис сделок сам передаёт прочитанные строки в paginator.remember
+    assert not [sql for sql in executed if "OFFSET" in sql.upper()]
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_next_page_uses_cursor_instead_of_offset(monkeypatch):
+    _create_deals(20)
+    paginator = QueryPaginator()
+    query = Deal.select().order_by(Deal.reminder_date.asc(), Deal.id.asc())
+
+    first = paginator.page(
+        query, 1, 5, order_field=Deal.reminder_date, id_field=Deal.id
+    )
+    first_rows = list(first)
+    paginator.remember(first, first_rows)
+    first_ids = [deal.id for deal in first_rows]
+
+    executed = _spy_sql(monkeypatch)
+    second = paginator.page(
+        query, 2, 5, order_field=Deal.reminder_date, id_field=Deal.id
+    )
+    second_ids = [deal.id for deal in second]
+
+    assert "OFFSET" not in executed[-1].upper()
+    expected = [deal.id for deal in query.limit(10)]
+    assert first_ids + second_ids == expected
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_total_cached_per_filters_and_invalidated_on_write(monkeypatch):
+    _create_deals(6)
+    executed = _spy_sql(monkeypatch)
+
+    _, total = fetch_deals_page_with_total(1, 5, order_by="reminder_date")
+    counts = [sql for sql in executed if "COUNT(" in sql.upper()]
+    assert total == 6 and len(counts) == 1
+
+    executed.clear()
+    _, total = fetch_deals_page_with_total(
+        2, 5, order_by="start_date", order_dir="desc"
+    )
+    assert total == 6
+    assert not [sql for sql in executed if "COUNT(" in sql.upper()]
+
+    deal = Deal.create(
+        client=Client.get(), description="Новая", start_date=date(2024, 2, 1)
+    )
+    change_events.notify_changed(Deal, deal.id)
+    executed.clear()
+    _, total = fetch_deals_page_with_total(1, 5, order_by="reminder_date")
+    assert total == 7
+    assert [sql for sql in executed if "COUNT(" in sql.upper()]
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_estimated_total_refines_to_exact_count(monkeypatch):
+    _create_deals(3)
+    monkeypatch.setattr(query_utils, "estimate_count", lambda query: 25_000)
+    paginator = QueryPaginator()
+
+    total = paginator.total(Deal.select(), models=(Deal,))
+    assert isinstance(total, PageTotal)
+    assert total.estimated and total == 25_000
+
+    exact = total.refine()
+    assert not exact.estimated and exact == 3
+    # точное значение попало в кэш и больше не заменяется оценкой
+    assert paginator.total(Deal.select()) == 3
+    assert not paginator.total(Deal.select()).estimated
@@ -4,14 +4,18 @@ from types import SimpleNamespace
 
 import pytest
 
+from database.db import db
 from database.models import Client, Deal, Expense, Payment, Policy
-from services.policies import find_candidate_deals
+from services.policies import find_candidate_deals, find_candidate_deals_bulk
 from services.policies.deal_matching import (
     BRAND_MODEL_DATE_WEIGHT,
+    BULK_LOOKUP_CHUNK_SIZE,
     EMAIL_MATCH_WEIGHT,
     CandidateDeal,
+    _bulk_lookup_keys,
     build_deal_match_index,
     find_candidate_deal_ids,
+    find_candidate_deal_ids_bulk,
 )
 
 
@@ -59,19 +63,19 @@ def test_find_candidate_deals_orders_and_merges(caplog, monkeypatch):
         ),
     ]
 
-    monkeypatch.setattr(
-        "services.policies.deal_matching.find_candidate_deal_ids",
-        lambda _: expected_candidates,
+    fake_index = SimpleNamespace(
+        candidate_ids=lambda _: expected_candidates,
+        get_profiles=lambda ids: captured_calls.append(set(ids)) or deal_index,
+        profiles=lambda: captured_calls.append(None) or deal_index,
+        similarity_scores=lambda _contractor: None,
     )
     monkeypatch.setattr(
-        "services.policies.deal_matching.build_deal_match_index",
-        lambda ids=None: captured_calls.append(
-            None if ids is None else set(ids)
-        ) or deal_index,
+        "services.policies.deal_matching.get_deal_match_index",
+        lambda: fake_index,
     )
     monkeypatch.setattr(
         "services.policies.deal_matching.make_policy_profile",
-        lambda _: SimpleNamespace(),
+        lambda _: SimpleNamespace(normalized_contractor=None),
     )
     monkeypatch.setattr(
         "services.policies.deal_matching.find_strict_matches",
@@ -79,7 +83,7 @@ def test_find_candidate_deals_orders_and_merges(caplog, monkeypatch):
     )
     monkeypatch.setattr(
         "services.policies.deal_matching.collect_indirect_matches",
-        lambda _policy, _index: indirect_matches,
+        lambda _policy, _index, _similarity=None: indirect_matches,
     )
 
     candidates = find_candidate_deals(policy, limit=5)
@@ -207,3 +211,137 @@ def test_find_candidate_deals_fallback_without_candidates(monkeypatch):
     assert find_candidate_deals(candidate_policy, limit=5) == []
     assert captured_calls == [None]
 
+
+
+def _seed_bulk_matching():
+    owner = Client.create(
+        name="ООО Пакет", phone="8 905 222-33-44", email="bulk@x.ru"
+    )
+    deal_vin = Deal.create(
+        client=owner, description="VIN", start_date=date(2024, 1, 1)
+    )
+    Policy.create(
+        client=owner,
+        deal=deal_vin,
+        policy_number="BULK-1",
+        vehicle_vin="XTA-0001",
+        vehicle_brand="Lada",
+        vehicle_model="Vesta",
+        start_date=date(2024, 1, 1),
+    )
+    other = Client.create(name="ООО Другой", email=" BULK@X.RU ")
+    deal_email = Deal.create(
+        client=other, description="Email", start_date=date(2024, 2, 1)
+    )
+    contractor_policy = Policy.create(
+        client=other,
+        deal=deal_email,
+        policy_number="BULK 2",
+        contractor="Acme",
+        start_date=date(2024, 2, 1),
+    )
+    payment = Payment.create(
+        policy=contractor_policy, amount=100, payment_date=date(2024, 2, 2)
+    )
+    Expense.create(
+        policy=contractor_policy, payment=payment, amount=10, expense_type="агент"
+    )
+
+    newcomer = Client.create(name="ООО Новый", phone="+7 (905) 222 33 44")
+    return [
+        Policy.create(
+            client=newcomer,
+            policy_number="NEW-1",
+            vehicle_vin="xta 0001",
+            start_date=date(2024, 3, 1),
+        ),
+        Policy.create(
+            client=newcomer,
+            policy_number="bulk-2",
+            contractor=" ACME ",
+            start_date=date(2024, 3, 1),
+        ),
+        Policy.create(
+            client=Client.create(name="ООО Одиночка"),
+            policy_number="LONE",
+            vehicle_brand=" lada",
+            vehicle_model="VESTA ",
+            start_date=date(2024, 3, 1),
+        ),
+        Policy.create(
+            client=Client.create(name="ООО Пусто"),
+            policy_number="NONE-1",
+            start_date=date(2024, 3, 1),
+        ),
+    ]
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_find_candidate_deal_ids_bulk_matches_per_policy_lookup():
+    policies = _seed_bulk_matching()
+
+    expected = [find_candidate_deal_ids(policy) for policy in policies]
+
+    assert find_candidate_deal_ids_bulk(policies) == expected
+    assert expected[-1] is None
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_find_candidate_deals_bulk_matches_single_policy_results(monkeypatch):
+    policies = _seed_bulk_matching()[:3]
+    expected = [
+        [(c.deal_id, c.score, c.reasons) for c in find_candidate_deals(p, limit=5)]
+        for p in policies
+    ]
+    fresh = [Policy.get_by_id(policy.id) for policy in policies]
+
+    database = db.obj
+    executed: list[str] = []
+    original_execute_sql = database.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        executed.append(sql)
+        return original_execute_sql(sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(database, "execute_sql", spy)
+
+    results = find_candidate_deals_bulk(fresh, limit=5)
+
+    assert [
+        [(c.deal_id, c.score, c.reasons) for c in candidates]
+        for candidates in results
+    ] == expected
+    # клиенты + по запросу на вид ключа + построение профилей сделок
+    assert len(executed) <= 12
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_bulk_brand_model_lookup_is_chunked(monkeypatch):
+    client = Client.create(name="ООО Марки")
+    deal = Deal.create(client=client, description="Авто", start_date=date(2024, 1, 1))
+    Policy.create(
+        client=client,
+        deal=deal,
+        policy_number="BM-1",
+        start_date=date(2024, 1, 1),
+        vehicle_brand="Lada",
+        vehicle_model="Vesta",
+    )
+    pairs = {(f"brand{n}", f"model{n}") for n in range(1200)} | {("lada", "vesta")}
+
+    database = db.obj
+    params_sizes: list[int] = []
+    original_execute_sql = database.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        params_sizes.append(len(params or ()))
+        return original_execute_sql(sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(database, "execute_sql", spy)
+
+    found = _bulk_lookup_keys({"brand_model": pairs})
+
+    assert found["brand_model"] == {("lada", "vesta"): {deal.id}}
+    assert len(params_sizes) == 5
+    # марки и модели пачки плюс флаги is_deleted
+    assert max(params_sizes) <= BULK_LOOKUP_CHUNK_SIZE + 2
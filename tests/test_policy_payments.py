@@ -163,6 +163,36 @@ def test_sync_policy_payments_auto_deletes_zero_expenses(in_memory_db, make_poli
     assert Expense.get_by_id(zero_expense.id).is_deleted is True
 
 
+def test_restore_payment_removed_by_sync_restores_relations(
+    in_memory_db, make_policy_with_payment
+):
+    d1 = datetime.date(2024, 1, 1)
+    _, _, policy, payment = make_policy_with_payment(
+        policy_kwargs={"policy_number": "P", "start_date": d1, "end_date": d1},
+        payment_kwargs={"amount": 100, "payment_date": d1},
+    )
+    income = Income.create(payment=payment, amount=100, received_date=d1)
+    zero_expense = Expense.create(
+        payment=payment,
+        policy=policy,
+        amount=0,
+        expense_type="контрагент",
+        expense_date=d1,
+    )
+
+    pay_svc.sync_policy_payments(policy, [])
+    deleted_at = Payment.get_by_id(payment.id).deleted_at
+    assert deleted_at is not None
+    assert Income.get_by_id(income.id).deleted_at == deleted_at
+    assert Expense.get_by_id(zero_expense.id).deleted_at == deleted_at
+
+    pay_svc.restore_payment(payment.id)
+
+    assert Payment.get_by_id(payment.id).is_deleted is False
+    assert Income.get_by_id(income.id).is_deleted is False
+    assert Expense.get_by_id(zero_expense.id).is_deleted is False
+
+
 def test_sync_policy_payments_keeps_payment_with_non_zero_expense(
     in_memory_db, make_policy_with_payment, caplog
 ):
@@ -0,0 +1,173 @@
+"""Планы основных запросов ``build_*_query`` на заполненной базе.
+
+Тесты выполняют ``EXPLAIN QUERY PLAN`` для запросов, которые строят
+сервисы, и падают, если выборка по отфильтрованной таблице перестала
+использовать индекс из :data:`database.indexes.INDEX_CATALOGUE` и
+превратилась в полный просмотр таблицы.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from peewee import PostgresqlDatabase, SqliteDatabase
+
+from database.db import db
+from database.indexes import INDEX_CATALOGUE, IndexSpec
+from database.models import Client, Deal, Expense, Income, Payment, Policy, Task
+from services.deal_service import build_deal_query
+from services.income_service import build_income_query
+from services.payment_service import build_payment_query
+from services.policies.policy_service import build_policy_query
+from services.query_utils import FilterValues
+from services.task_crud import build_task_query
+
+ROWS = 300
+START = date(2020, 1, 1)
+RANGE = (date(2020, 3, 1), date(2020, 3, 10))
+DATE_FILTER = FilterValues(["2020-03-01..2020-03-10"], "date_range")
+
+
+@pytest.fixture
+def seeded(in_memory_db):
+    with db.atomic():
+        Client.insert_many([{"name": f"Клиент {i}"} for i in range(ROWS)]).execute()
+        Deal.insert_many(
+            [
+                {
+                    "client": i + 1,
+                    "description": f"Сделка {i}",
+                    "start_date": START,
+                    "reminder_date": START + timedelta(days=i),
+                    "is_deleted": i % 10 == 0,
+                }
+                for i in range(ROWS)
+            ]
+        ).execute()
+        Policy.insert_many(
+            [
+                {
+                    "client": i + 1,
+                    "deal": i + 1,
+                    "policy_number": f"PN-{i}",
+                    "start_date": START,
+                    "end_date": START + timedelta(days=i),
+                }
+                for i in range(ROWS)
+            ]
+        ).execute()
+        Payment.insert_many(
+            [
+                {
+                    "policy": i + 1,
+                    "amount": 100,
+                    "payment_date": START + timedelta(days=i),
+                }
+                for i in range(ROWS)
+            ]
+        ).execute()
+        Income.insert_many(
+            [
+                {
+                    "payment": i + 1,
+                    "amount": 10,
+                    "received_date": START + timedelta(days=i),
+                }
+                for i in range(ROWS)
+            ]
+        ).execute()
+        Expense.insert_many(
+            [
+                {
+                    "payment": i + 1,
+                    "policy": i + 1,
+                    "amount": 5,
+                    "expense_type": "агент",
+                    "expense_date": START + timedelta(days=i),
+                }
+                for i in range(ROWS)
+            ]
+        ).execute()
+        Task.insert_many(
+            [
+                {
+                    "title": f"Задача {i}",
+                    "due_date": START,
+                    "deal": i + 1,
+                    "dispatch_state": "queued" if i % 30 == 0 else "idle",
+                    "queued_at": datetime(2020, 1, 1) + timedelta(minutes=i),
+                }
+                for i in range(ROWS)
+            ]
+        ).execute()
+    in_memory_db.execute_sql("ANALYZE")
+    return in_memory_db
+
+
+def query_plan(query) -> list[str]:
+    sql, params = query.sql()
+    cursor = db.obj.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params)
+    return [row[-1] for row in cursor.fetchall()]
+
+
+def _index_names(model) -> set[str]:
+    names = {spec.name for spec in INDEX_CATALOGUE if spec.model is model}
+    assert names, f"в каталоге нет индексов для {model.__name__}"
+    return names
+
+
+HOT_QUERIES = {
+    "payments_by_date": (
+        lambda: build_payment_query(payment_date_range=RANGE),
+        Payment,
+    ),
+    "incomes_by_date": (
+        lambda: build_income_query(received_date_range=RANGE),
+        Income,
+    ),
+    "policies_expiring": (
+        lambda: build_policy_query(column_filters={Policy.end_date: DATE_FILTER}),
+        Policy,
+    ),
+    "policies_of_deal": (lambda: build_policy_query(deal_id=7), Policy),
+    "deal_reminders": (
+        lambda: build_deal_query(column_filters={Deal.reminder_date: DATE_FILTER}),
+        Deal,
+    ),
+    "queued_tasks": (
+        lambda: build_task_query(only_queued=True, sort_field="queued_at"),
+        Task,
+    ),
+    "tasks_of_deal": (lambda: build_task_query(deal_id=7), Task),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_catalogue_index(seeded, name):
+    build, model = HOT_QUERIES[name]
+    plan = query_plan(build())
+    # основная таблица запроса всегда идёт под псевдонимом ``t1``
+    main = [line for line in plan if line.split()[1:2] == ["t1"]]
+    assert main, plan
+    assert not any(line == "SCAN t1" for line in main), plan
+    used = {
+        line.split(" INDEX ")[1].split()[0]
+        for line in main
+        if " INDEX " in line
+    }
+    # индекс внешнего ключа, который создаёт peewee, тоже подходит
+    fk_indexes = {
+        f"{model._meta.table_name}_{field.column_name}"
+        for field in model._meta.refs
+    }
+    assert used & (_index_names(model) | fk_indexes), plan
+
+
+def test_postgres_indexes_are_partial():
+    spec = IndexSpec(Task, ("dispatch_state", "is_deleted", "queued_at"))
+    assert spec.create_sql(PostgresqlDatabase("crm")) == (
+        'CREATE INDEX IF NOT EXISTS "task_dispatch_state_queued_at_active" '
+        'ON "task" ("dispatch_state", "queued_at") WHERE NOT "is_deleted"'
+    )
+    assert spec.create_sql(SqliteDatabase(":memory:")).endswith(
+        '("dispatch_state", "is_deleted", "queued_at")'
+    )
@@ -0,0 +1,168 @@
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from database.db import db
+from database.models import Income
+from services import reso_table_service as reso
+from services.reso_table_service import (
+    ACTION_ADD,
+    ACTION_MANUAL,
+    ACTION_SKIP,
+    ACTION_UPDATE,
+    commit_reso_payouts,
+    plan_reso_payouts,
+    resolve_reso_payouts,
+)
+
+
+def _table(rows) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "НОМЕР ПОЛИСА",
+            "НАЧИСЛЕНИЕ,С-ПО",
+            "arhvp",
+            "ПРЕМИЯ,РУБ.",
+            "СТРАХОВАТЕЛЬ",
+        ],
+    )
+
+
+def test_plan_groups_rows_by_policy():
+    df = _table(
+        [
+            [" B-2 ", "01.02.2024 -31.01.2025", "1 000,50", "20 000", "Петров [7]"],
+            ["A-1", "2024-03-01 - 2025-02-28", "200", None, None],
+            ["B-2", "bad", "99.5", "1", "Другой"],
+            [None, "", "5", "", ""],
+            ["A-1", "", "1000 + 10%", "", ""],
+        ]
+    )
+    payouts = plan_reso_payouts(df)
+
+    assert [p.policy_number for p in payouts] == ["B-2", "A-1"]
+    first, second = payouts
+    assert first.amount == pytest.approx(1100.0)
+    assert first.premium == 20000.0
+    assert (first.start_date, first.end_date) == (date(2024, 2, 1), date(2025, 1, 31))
+    assert first.client_name == "Петров [7]"
+    assert second.amount == pytest.approx(1200.1)
+    # как и ``_parse_date_range``, ISO-даты через дефис не разбираются
+    assert (second.start_date, second.end_date) == reso._parse_date_range(
+        "2024-03-01 - 2025-02-28"
+    )
+    assert second.premium == 0.0 and second.client_name == ""
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_resolve_uses_set_queries(make_policy_with_payment, monkeypatch):
+    _, _, _, open_pay = make_policy_with_payment(policy_kwargs={"policy_number": "A"})
+    open_income = Income.create(payment=open_pay, amount=Decimal("1"))
+    make_policy_with_payment(policy_kwargs={"policy_number": "B"})
+    df = _table([[n, "", "10", "", ""] for n in ["A", "B", "C"] * 20])
+
+    calls: list[str] = []
+    original = db.obj.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        calls.append(sql)
+        return original(sql, params, *args, **kwargs)
+
+    monkeypatch.setitem(vars(db.obj), "execute_sql", spy)
+    payouts = resolve_reso_payouts(plan_reso_payouts(df))
+
+    assert len(calls) == 3
+    by_number = {p.policy_number: p for p in payouts}
+    assert by_number["A"].income.id == open_income.id
+    assert by_number["A"].action == ACTION_UPDATE
+    assert by_number["B"].payment is not None and by_number["B"].income is None
+    assert by_number["B"].action == ACTION_ADD
+    assert by_number["C"].policy is None and by_number["C"].action == ACTION_MANUAL
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_commit_writes_incomes_in_one_pass(make_policy_with_payment, monkeypatch):
+    _, _, _, pay_a = make_policy_with_payment(policy_kwargs={"policy_number": "A"})
+    open_income = Income.create(payment=pay_a, amount=Decimal("1"))
+    _, _, _, pay_b = make_policy_with_payment(policy_kwargs={"policy_number": "B"})
+    make_policy_with_payment(policy_kwargs={"policy_number": "C"})
+    notified: list[list[int]] = []
+    monkeypatch.setattr(reso, "notify_incomes_received", notified.append)
+
+    df = _table(
+        [
+            ["A", "", "10,10", "", ""],
+            ["B", "", "20", "", ""],
+            ["C", "", "30", "", ""],
+            ["A", "", "5", "", ""],
+        ]
+    )
+    payouts = resolve_reso_payouts(plan_reso_payouts(df))
+    payouts[2].action = ACTION_SKIP
+    received = date(2024, 5, 1)
+
+    assert commit_reso_payouts(payouts, received_date=received) == {
+        "updated": 1,
+        "added": 1,
+    }
+    open_income = Income.get_by_id(open_income.id)
+    assert open_income.amount == Decimal("15.10")
+    assert open_income.received_date == received
+    added = Income.get(Income.payment == pay_b)
+    assert (added.amount, added.received_date) == (Decimal("20.00"), received)
+    assert Income.select().count() == 2
+    assert sorted(notified[0]) == sorted([open_income.id, added.id])
+
+
+@pytest.mark.usefixtures("in_memory_db")
+def test_table_without_amount_column_is_not_committed(make_policy_with_payment):
+    _, _, _, pay = make_policy_with_payment(policy_kwargs={"policy_number": "A"})
+    open_income = Income.create(payment=pay, amount=Decimal("7"))
+    df = _table([["A", "", "10", "", ""]]).drop(columns=["arhvp"])
+
+    assert reso.missing_reso_columns(df.columns) == ["arhvp"]
+    (payout,) = resolve_reso_payouts(plan_reso_payouts(df))
+
+    # без суммы открытый доход не обновляется по умолчанию
+    assert payout.amount_known is False
+    assert payout.income.id == open_income.id
+    assert payout.action == ACTION_MANUAL
+    payout.action = ACTION_UPDATE
+    with pytest.raises(ValueError):
+        commit_reso_payouts([payout], received_date=date(2024, 5, 1))
+    open_income = Income.get_by_id(open_income.id)
+    assert open_income.amount == Decimal("7.00")
+    assert open_income.received_date is None
+
+
+@pytest.mark.usefixtures("in_memory_db", "ui_settings_temp_path")
+def test_dialog_asks_for_columns_when_amount_is_missing(qapp, tmp_path):
+    from ui.forms.reso_import_dialog import ResoImportDialog
+
+    path = tmp_path / "reso.tsv"
+    _table([["A", "", "10", "", ""]]).drop(columns=["arhvp"]).rename(
+        columns={"ПРЕМИЯ,РУБ.": "СУММА,РУБ"}
+    ).to_csv(path, sep="\t", index=False)
+    seen: list[list[str]] = []
+
+    class Mapping:
+        def __init__(self, columns, parent=None):
+            seen.append(columns)
+
+        def exec(self):
+            return True
+
+        def get_mapping(self):
+            return {**reso.DEFAULT_MAPPING, "amount": "СУММА,РУБ"}
+
+    class Dialog(ResoImportDialog):
+        column_map_cls = Mapping
+
+    dlg = Dialog(str(path))
+
+    assert seen and "СУММА,РУБ" in seen[0]
+    assert dlg.mapping["amount"] == "СУММА,РУБ"
+    assert [p.amount_known for p in dlg.payouts] == [True]
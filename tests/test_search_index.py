@@ -0,0 +1,109 @@
+from datetime import date
+
+import pytest
+
+from database.models import Client, Deal, Payment, Policy
+from database.search_index import (
+    SqliteFtsBackend,
+    get_search_backend,
+    install_search_indexes,
+    reset_search_backend,
+)
+from services.payment_service import build_payment_query
+from services.query_utils import apply_search_and_filters, build_or_condition
+
+
+@pytest.fixture()
+def search_index(db_transaction):
+    reset_search_backend()
+    backend = install_search_indexes(db_transaction)
+    try:
+        yield backend
+    finally:
+        reset_search_backend()
+
+
+def _names(query):
+    return sorted(client.name for client in query)
+
+
+def test_sqlite_backend_uses_fts_subquery(search_index):
+    assert isinstance(search_index, SqliteFtsBackend)
+    assert search_index.is_indexed(Client)
+
+    query = apply_search_and_filters(Client.select(), Client, "Иван")
+    sql, _params = query.sql()
+
+    assert '"client_fts" MATCH' in sql
+    assert "LIKE" not in sql
+
+
+def test_fts_matches_substrings_case_insensitive(search_index):
+    Client.create(name="Иванов Пётр", phone="+7 900 111")
+    Client.create(name="Сидоров", note="Важный клиент")
+
+    def search(text):
+        return _names(apply_search_and_filters(Client.select(), Client, text))
+
+    assert search("иванов") == ["Иванов Пётр"]
+    assert search("ВАЖН") == ["Сидоров"]
+    assert search("900 1") == ["Иванов Пётр"]
+    assert search("ов") == ["Иванов Пётр", "Сидоров"]
+
+
+def test_triggers_keep_index_in_sync(search_index):
+    client = Client.create(name="Сидоров")
+
+    def search(text):
+        return _names(apply_search_and_filters(Client.select(), Client, text))
+
+    client.name = "Петров"
+    client.save()
+    assert search("Сидор") == []
+    assert search("Петр") == ["Петров"]
+
+    client.delete_instance()
+    assert search("Петр") == []
+
+
+def test_extra_fields_from_joined_models(search_index):
+    client = Client.create(name="Клиент Альфа")
+    deal = Deal.create(client=client, description="D", start_date=date.today())
+    policy = Policy.create(
+        client=client, deal=deal, policy_number="XYZ-42", start_date=date.today()
+    )
+    Payment.create(policy=policy, amount=10, payment_date=date.today())
+
+    found = list(build_payment_query(search_text="альфа"))
+    assert [payment.policy_id for payment in found] == [policy.id]
+
+    found = list(build_payment_query(search_text="xyz-4"))
+    assert [payment.policy_id for payment in found] == [policy.id]
+
+
+def test_short_and_numeric_values_fall_back_to_like(search_index):
+    condition = build_or_condition([Client.name, Client.id], "12")
+    sql = Client.select().where(condition).sql()[0]
+    assert "LIKE" in sql
+    assert "MATCH" not in sql
+
+
+def test_letters_skip_numeric_and_boolean_fields():
+    reset_search_backend()
+    condition = build_or_condition(
+        [Client.id, Client.is_company, Client.name], "Иван"
+    )
+    sql = Client.select().where(condition).sql()[0]
+
+    assert sql.count("LIKE") == 1
+    assert '"name"' in sql.split("WHERE", 1)[1]
+
+
+def test_backend_without_indexes_keeps_like(db_transaction):
+    reset_search_backend()
+    backend = get_search_backend(db_transaction)
+
+    indexed, remaining = backend.split_fields([Client.name], "Иванов")
+
+    assert indexed == []
+    assert remaining == [Client.name]
@@ -0,0 +1,185 @@
+from datetime import date
+
+import pytest
+
+from database.db import db
+from database.models import (
+    Client,
+    Deal,
+    DealCalculation,
+    Expense,
+    Income,
+    Payment,
+    Policy,
+    Task,
+)
+from services.clients import client_service
+from services.policies import policy_service
+from services.soft_delete import cascade_order, restore_cascade, soft_delete_cascade
+
+D1 = date(2024, 1, 1)
+
+
+@pytest.fixture
+def executed(monkeypatch) -> list[str]:
+    calls: list[str] = []
+    original = db.obj.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        calls.append(sql)
+        return original(sql, params, *args, **kwargs)
+
+    monkeypatch.setitem(vars(db.obj), "execute_sql", spy)
+    return calls
+
+
+def _client_tree(name: str, policies: int = 3) -> Client:
+    client = Client.create(name=name)
+    deal = Deal.create(client=client, description="D", start_date=D1)
+    DealCalculation.create(deal=deal, note="расчёт")
+    Task.create(title="T", deal=deal, due_date=D1)
+    for n in range(policies):
+        policy = Policy.create(
+            client=client, deal=deal, policy_number=f"{name}-{n}", start_date=D1
+        )
+        payment = Payment.create(policy=policy, amount=100, payment_date=D1)
+        Income.create(payment=payment, amount=10, received_date=D1)
+        Expense.create(
+            payment=payment, policy=policy, amount=5, expense_type="агент"
+        )
+    return client
+
+
+def _active(model) -> int:
+    return model.active().count()
+
+
+def test_cascade_order_follows_required_foreign_keys():
+    order = [model for model, _ in cascade_order(Client)]
+    assert order == [Deal, Policy, Payment, DealCalculation, Income, Expense]
+    # необязательные ссылки (задачи, полисы сделки) в каскад не входят
+    assert [model for model, _ in cascade_order(Deal)] == [DealCalculation]
+
+
+def test_client_cascade_is_set_based_and_restorable(in_memory_db, executed):
+    client = _client_tree("A", policies=4)
+    other = _client_tree("B", policies=1)
+    # платёж, удалённый отдельно, повторно не считается
+    Payment.active().join(Policy).where(Policy.client == client).get().soft_delete()
+    executed.clear()
+
+    counts = soft_delete_cascade(Client, [client.id])
+
+    assert counts == {
+        Client: 1,
+        Deal: 1,
+        Policy: 4,
+        Payment: 3,
+        DealCalculation: 1,
+        Income: 4,
+        Expense: 4,
+    }
+    updates = [sql for sql in executed if sql.lstrip().upper().startswith("UPDATE")]
+    assert len(updates) == len(counts)
+    assert _active(Policy) == 1 and _active(Income) == 1
+    assert Client.get_by_id(other.id).is_deleted is False
+    assert _active(Task) == 2
+
+    restored = restore_cascade(Client, [client.id])
+    # восстанавливается ровно то, что удалил каскад
+    assert restored == counts
+    assert _active(Payment) == 4 and _active(Expense) == 5
+
+
+def test_policy_cascade_with_many_roots(in_memory_db, monkeypatch):
+    import services.soft_delete as soft_delete
+
+    monkeypatch.setattr(soft_delete, "CASCADE_CHUNK_SIZE", 2)
+    client = _client_tree("A", policies=5)
+    ids = [p.id for p in Policy.select().where(Policy.client == client)]
+
+    counts = soft_delete_cascade(Policy, ids + ids[:1])
+
+    assert counts[Policy] == 5
+    assert counts[Payment] == counts[Income] == counts[Expense] == 5
+    assert Deal.get_by_id(Deal.select().get().id).is_deleted is False
+
+
+@pytest.fixture
+def folder_renames(monkeypatch) -> list[tuple]:
+    calls: list[tuple] = []
+
+    def fake(kind, new_name_arg):
+        def rename(*args, **kwargs):
+            calls.append((kind, args[1]))
+            return f"/{kind}/{args[new_name_arg]}", None
+
+        return rename
+
+    monkeypatch.setattr(
+        "services.folder_utils.rename_policy_folder", fake("policy", 4)
+    )
+    monkeypatch.setattr("services.folder_utils.rename_deal_folder", fake("deal", 3))
+    monkeypatch.setattr(client_service, "rename_client_folder", fake("client", 1))
+    monkeypatch.setattr(client_service, "get_drive_gateway", lambda: None)
+    return calls
+
+
+def test_client_delete_renames_cascaded_deals_and_policies(
+    in_memory_db, folder_renames
+):
+    client = _client_tree("A", policies=2)
+    other = _client_tree("B", policies=1)
+
+    assert client_service.delete_clients_by_ids([client.id]) == 1
+
+    # папки переименовываются от вложенных к внешним
+    assert folder_renames == [
+        ("policy", "A-0"),
+        ("policy", "A-1"),
+        ("deal", "D"),
+        ("client", "A deleted"),
+    ]
+    numbers = [p.policy_number for p in Policy.select().order_by(Policy.id)]
+    assert numbers == ["A-0 deleted", "A-1 deleted", "B-0"]
+    assert Deal.get(Deal.client == client).description == "D deleted"
+    assert Deal.get(Deal.client == other).description == "D"
+    assert Client.get_by_id(client.id).name == "A deleted"
+
+
+def test_restore_keeps_separately_deleted_descendants(in_memory_db, folder_renames):
+    client = _client_tree("A", policies=2)
+    first, second = Policy.select().where(Policy.client == client).order_by(Policy.id)
+
+    policy_service.mark_policy_deleted(first.id, gateway=object())
+    client_service.mark_client_deleted(client.id)
+    client_service.restore_client(client.id)
+
+    first, second = Policy.select().where(Policy.client == client).order_by(Policy.id)
+    assert first.is_deleted is True
+    assert first.policy_number == "A-0 deleted"
+    assert first.drive_folder_path == "/policy/A-0 deleted"
+    assert second.is_deleted is False
+    # удалённое каскадом возвращается под прежним номером и в прежнюю папку
+    assert second.policy_number == "A-1"
+    assert second.number_norm == "a1"
+    assert second.drive_folder_path == "/policy/A-1"
+    assert Payment.get(Payment.policy == first).is_deleted is True
+    assert Payment.get(Payment.policy == second).is_deleted is False
+    deal = Deal.get(Deal.client == client)
+    assert deal.is_deleted is False
+    assert deal.description == "D"
+    assert deal.drive_folder_path == "/deal/D"
+    assert folder_renames[-2:] == [("policy", "A-1 deleted"), ("deal", "D deleted")]
+
+
+def test_restore_keeps_suffix_when_number_is_taken(in_memory_db, folder_renames):
+    client = _client_tree("A", policies=1)
+    client_service.mark_client_deleted(client.id)
+    Policy.create(client=_client_tree("B", 0), policy_number="A-0", start_date=D1)
+
+    client_service.restore_client(client.id)
+
+    restored = Policy.get(Policy.client == client)
+    assert restored.is_deleted is False
+    assert restored.policy_number == "A-0 deleted"
@@ -1,6 +1,11 @@
+import contextlib
+import threading
 import types
 from unittest.mock import MagicMock
 
+from PySide6.QtCore import QCoreApplication, QEvent, QThread
+from PySide6.QtWidgets import QWidget
+
 from ui.base.table_controller import TableController
 from ui.common.multi_filter_proxy import ColumnFilterState
 from ui import settings as ui_settings
@@ -69,3 +74,164 @@ def test_get_filters_normalizes_display_only_choice():
     filters = controller.get_filters()
 
     assert filters["column_filters"] == {"executor": ["Имя"]}
+
+
+def _make_loading_controller(applied: list) -> TableController:
+    view = types.SimpleNamespace()
+    controller = TableController(view)
+    controller._show_progress = lambda: None
+    controller._close_progress = lambda: None
+    controller._apply_loaded_page = lambda items, total: applied.append(
+        (items, total)
+    )
+    return controller
+
+
+def test_load_page_applies_current_generation():
+    applied: list = []
+    controller = _make_loading_controller(applied)
+
+    generation = controller.load_page(lambda: ([1, 2], 2))
+
+    assert generation == 1
+    assert applied == [([1, 2], 2)]
+    assert not controller.is_loading()
+
+
+def test_stale_generation_is_discarded(monkeypatch):
+    applied: list = []
+    controller = _make_loading_controller(applied)
+    monkeypatch.setattr(controller, "_can_load_in_background", lambda: True)
+    started: list = []
+
+    class _FakeWorker:
+        def __init__(self, generation, task):
+            self.loaded = MagicMock()
+            self.failed = MagicMock()
+            self.finished = MagicMock()
+            self.generation = generation
+            self.task = task
+
+        def requestInterruption(self):
+            pass
+
+        def start(self):
+            started.append(self)
+
+    monkeypatch.setattr(
+        "ui.base.table_controller._PageLoadWorker", _FakeWorker
+    )
+
+    first = controller.load_page(lambda: (["old"], 1))
+    second = controller.load_page(lambda: (["new"], 1))
+
+    controller._on_page_loaded(first, ["old"], 1)
+    assert applied == []
+
+    controller._on_page_loaded(second, ["new"], 1)
+    assert applied == [(["new"], 1)]
+
+
+def test_only_latest_load_waits_for_running_one(monkeypatch):
+    applied: list = []
+    controller = _make_loading_controller(applied)
+    monkeypatch.setattr(controller, "_can_load_in_background", lambda: True)
+    started: list = []
+
+    class _FakeWorker:
+        def __init__(self, generation, task):
+            self.loaded = MagicMock()
+            self.failed = MagicMock()
+            self.finished = MagicMock()
+            self.generation = generation
+            self.interrupted = False
+
+        def requestInterruption(self):
+            self.interrupted = True
+
+        def start(self):
+            started.append(self)
+
+        def deleteLater(self):
+            pass
+
+    monkeypatch.setattr(
+        "ui.base.table_controller._PageLoadWorker", _FakeWorker
+    )
+
+    controller.load_page(lambda: ([1], 1))
+    controller.load_page(lambda: ([2], 1))
+    latest = controller.load_page(lambda: ([3], 1))
+
+    assert [w.generation for w in started] == [1]
+    assert started[0].interrupted
+
+    controller._on_worker_finished(started[0])
+    assert [w.generation for w in started] == [1, latest]
+
+    controller._on_worker_finished(started[1])
+    assert len(started) == 2
+
+
+def test_cancel_loading_discards_result(monkeypatch):
+    applied: list = []
+    controller = _make_loading_controller(applied)
+    monkeypatch.setattr(controller, "_can_load_in_background", lambda: True)
+
+    worker = MagicMock()
+    monkeypatch.setattr(
+        "ui.base.table_controller._PageLoadWorker", lambda *a: worker
+    )
+
+    generation = controller.load_page(lambda: ([1], 1))
+    assert controller.is_loading()
+
+    controller.cancel_loading()
+    controller._on_page_loaded(generation, [1], 1)
+
+    assert applied == []
+    assert not controller.is_loading()
+    worker.requestInterruption.assert_called()
+
+
+class _BlockingWorker(QThread):
+    def __init__(self, release: threading.Event) -> None:
+        super().__init__()
+        self._release = release
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            self._release.wait(0.01)
+
+
+def test_view_destruction_waits_for_workers(qapp, monkeypatch):
+    monkeypatch.setattr(
+        "ui.base.table_controller.thread_connection", contextlib.nullcontext
+    )
+    view = QWidget()
+    controller = TableController(view)
+    controller._show_progress = lambda: None
+    monkeypatch.setattr(controller, "_can_load_in_background", lambda: True)
+    view.destroyed.connect(controller.shutdown)
+
+    started = threading.Event()
+
+    def slow_page():
+        started.set()
+        while not page_worker.isInterruptionRequested():
+            started.wait(0.01)
+        return [], 0
+
+    controller.load_page(slow_page)
+    (page_worker,) = controller._workers
+    other = _BlockingWorker(threading.Event())
+    controller.watch_worker(other)
+    other.start()
+    assert started.wait(5)
+
+    view.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    assert not page_worker.isRunning()
+    assert not other.isRunning()
+    assert not controller.is_loading()
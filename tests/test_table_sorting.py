@@ -5,6 +5,7 @@ from PySide6.QtWidgets import QHeaderView
 
 from database.models import Client, Policy, Payment
 from ui.base.base_table_view import BaseTableView
+from ui.views.payment_table_view import PaymentTableView
 from ui.views.policy_table_view import PolicyTableView
 
 
@@ -72,3 +73,21 @@ def test_table_sorting(view_class, sort_order, in_memory_db, qapp, monkeypatch):
     header = view.table.horizontalHeader()
     assert header.sortIndicatorSection() == column
     assert header.sortIndicatorOrder() == sort_order
+
+
+@pytest.mark.usefixtures("ui_settings_temp_path")
+def test_virtual_payment_table_reloads_once_per_sort(in_memory_db, qapp, monkeypatch):
+    view = PaymentTableView()
+    qapp.processEvents()
+    assert view.controller.is_virtual()
+    column = view.get_column_index("payment_date")
+    view.table.sortByColumn(column, Qt.AscendingOrder)
+    qapp.processEvents()
+    loads = []
+    monkeypatch.setattr(view.controller, "load_data", lambda: loads.append(1))
+
+    view.table.sortByColumn(column, Qt.DescendingOrder)
+    qapp.processEvents()
+
+    assert view.current_sort_order == Qt.DescendingOrder
+    assert len(loads) == 1
@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+
+import pytest
+
+from database.db import db
+from database.models import Task
+from services import task_queue as tq
+from database.change_events import subscribe, unsubscribe
+from services.task_dispatch import HighWaterMarkWatcher, TaskDispatcher
+from services.task_states import IDLE, QUEUED, SENT
+
+pytestmark = pytest.mark.usefixtures("in_memory_db")
+
+
+@pytest.fixture(autouse=True)
+def no_drive_lookups(monkeypatch):
+    monkeypatch.setattr(tq, "schedule_drive_link_refresh", lambda *a, **k: None)
+
+
+def _queued_tasks(make_deal_with_executor, make_task, count, *, tg_id=1, **kwargs):
+    client, deal, _ = make_deal_with_executor(tg_id=tg_id, **kwargs)
+    return [
+        make_task(
+            client=client,
+            deal=deal,
+            title=f"T{n}",
+            queued_at=datetime.datetime.utcnow() - datetime.timedelta(seconds=n),
+        )[2]
+        for n in range(count)
+    ]
+
+
+def test_pop_dispatchable_tasks_uses_constant_queries(
+    monkeypatch, make_deal_with_executor, make_task
+):
+    ready = _queued_tasks(make_deal_with_executor, make_task, 3, tg_id=11)
+    ready += _queued_tasks(make_deal_with_executor, make_task, 2, tg_id=12)
+    blocked = _queued_tasks(
+        make_deal_with_executor, make_task, 2, tg_id=13, is_active=False
+    )
+    _, _, orphan = make_task(title="без исполнителя")
+
+    database = db.obj
+    executed: list[str] = []
+    original_execute_sql = database.execute_sql
+
+    def spy(sql, params=None, *args, **kwargs):
+        executed.append(sql)
+        return original_execute_sql(sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(database, "execute_sql", spy)
+    popped = tq.pop_dispatchable_tasks()
+    monkeypatch.undo()
+
+    assert {task.id: tg_id for task, tg_id in popped} == {
+        **{task.id: 11 for task in ready[:3]},
+        **{task.id: 12 for task in ready[3:]},
+    }
+    # выбор, UPDATE, выборка задач и prefetch сделок, полисов и клиентов
+    queries = [sql for sql in executed if not sql.startswith(("SAVEPOINT", "RELEASE"))]
+    assert len(queries) <= 6
+    for task in ready:
+        stored = Task.get_by_id(task.id)
+        assert stored.dispatch_state == SENT
+    for task in blocked + [orphan]:
+        assert Task.get_by_id(task.id).dispatch_state == QUEUED
+    assert tq.pop_dispatchable_tasks() == []
+
+
+def test_pop_dispatchable_tasks_skips_tasks_claimed_concurrently(
+    monkeypatch, make_deal_with_executor, make_task
+):
+    ready = _queued_tasks(make_deal_with_executor, make_task, 3, tg_id=11)
+    # UPDATE ... RETURNING, как в PostgreSQL
+    monkeypatch.setattr(db.obj, "returning_clause", True)
+    original_claim = tq._claim_tasks
+
+    def racing_claim(targets):
+        # пока выбирались задачи, одну выдал тот же чат через pop_task_by_id
+        tq.pop_task_by_id(11, ready[0].id)
+        return original_claim(targets)
+
+    monkeypatch.setattr(tq, "_claim_tasks", racing_claim)
+
+    popped = tq.pop_dispatchable_tasks()
+
+    assert {task.id for task, _ in popped} == {task.id for task in ready[1:]}
+    assert all(tg_id == 11 for _, tg_id in popped)
+
+
+def test_high_water_mark_watcher_detects_new_tasks(make_task):
+    watcher = HighWaterMarkWatcher()
+    assert watcher.probe() is False
+
+    make_task(queued_at=datetime.datetime(2024, 1, 1, 10, 0))
+    assert watcher.probe() is True
+    assert watcher.probe() is False
+
+    make_task(queued_at=datetime.datetime(2024, 1, 1, 10, 5))
+    assert watcher.probe() is True
+
+
+def test_queue_task_wakes_dispatcher(make_task):
+    _, _, task = make_task(dispatch_state=IDLE)
+    seen = []
+
+    def listener(model, ids):
+        seen.append((model, ids))
+
+    subscribe(listener)
+    try:
+        tq.queue_task(task.id)
+    finally:
+        unsubscribe(listener)
+
+    assert (Task, frozenset({task.id})) in seen
+
+
+def test_dispatcher_sends_links_and_records_latency(
+    make_deal_with_executor, make_task
+):
+    tasks = _queued_tasks(make_deal_with_executor, make_task, 2, tg_id=21)
+    sent = []
+
+    async def send(task, tg_id):
+        sent.append((task.id, tg_id))
+        return tg_id, 1000 + task.id
+
+    async def inline(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    dispatcher = TaskDispatcher(send, run_blocking=inline)
+    assert asyncio.run(dispatcher.dispatch_pending()) == 2
+
+    assert sorted(sent) == sorted((task.id, 21) for task in tasks)
+    for task in tasks:
+        stored = Task.get_by_id(task.id)
+        assert (stored.tg_chat_id, stored.tg_message_id) == (21, 1000 + task.id)
+    summary = dispatcher.metrics.summary()
+    assert summary["dispatched"] == 2
+    assert 0 <= summary["mean"] <= summary["max"] < 60
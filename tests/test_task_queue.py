@@ -20,7 +20,7 @@ from services.task_states import QUEUED, SENT
 @pytest.mark.usefixtures("in_memory_db")
 def test_pop_task_by_id_returns_task_and_marks_sent(monkeypatch, make_task):
     monkeypatch.setattr(
-        "services.task_queue.refresh_deal_drive_link",
+        "services.task_queue.schedule_drive_link_refresh",
         lambda *_args, **_kwargs: None,
     )
 
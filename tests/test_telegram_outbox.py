@@ -0,0 +1,138 @@
+import datetime
+
+import pytest
+
+import services.telegram_service as ts
+from database.models import Client, Deal, Task, TelegramOutbox
+from services.task_states import SENT
+from services.telegram_outbox import (
+    FAILED,
+    PENDING,
+    BotApiTransport,
+    OutboxSender,
+    RateLimiter,
+)
+from services.telegram_outbox import SENT as OUTBOX_SENT
+
+pytestmark = pytest.mark.usefixtures("in_memory_db")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sender(fake_telegram):
+    transport = BotApiTransport("TOKEN", fake_telegram.url)
+    clock = FakeClock()
+    sender = OutboxSender(
+        transport,
+        rate_limiter=RateLimiter(per_second=1000, clock=clock),
+        sleep=lambda _seconds: None,
+    )
+    sender.clock = clock
+    yield sender
+    transport.close()
+
+
+@pytest.fixture
+def bot_configured(monkeypatch):
+    monkeypatch.setattr(ts, "BOT_TOKEN", "TOKEN")
+    monkeypatch.setattr(ts, "ADMIN_CHAT_ID", 500)
+
+
+def test_notifications_only_enqueue(bot_configured, fake_telegram):
+    ts.notify_executor(101, "<b>Новый полис</b>")
+    ts.notify_admin_safe("Задача поставлена в очередь")
+
+    rows = list(TelegramOutbox.select().order_by(TelegramOutbox.id))
+    assert [(row.chat_id, row.status, row.parse_mode) for row in rows] == [
+        (101, PENDING, "HTML"),
+        (500, PENDING, "HTML"),
+    ]
+    assert fake_telegram.messages == []
+
+
+def test_drain_sends_and_links_task(bot_configured, fake_telegram, sender):
+    client = Client.create(name="C")
+    today = datetime.date.today()
+    deal = Deal.create(client=client, description="D", start_date=today)
+    task = Task.create(
+        title="Позвонить", due_date=today, deal=deal, dispatch_state=SENT
+    )
+
+    ts.send_exec_task(task, 77)
+    assert sender.drain_once() == 1
+
+    [message] = fake_telegram.messages
+    assert message["chat_id"] == 77
+    assert message["parse_mode"] == "HTML"
+    buttons = message["reply_markup"]["inline_keyboard"]
+    assert buttons[0][0]["callback_data"] == f"task_done:{task.id}"
+
+    row = TelegramOutbox.get()
+    assert row.status == OUTBOX_SENT and row.sent_at is not None
+    assert row.lock_token is None
+    task = Task.get_by_id(task.id)
+    assert (task.tg_chat_id, task.tg_message_id) == (77, 1)
+
+
+def test_rate_limited_messages_are_retried(bot_configured, fake_telegram, sender):
+    fake_telegram.fail_next(429, "Too Many Requests", retry_after=30)
+    ts.notify_executor(1, "первое")
+    before = datetime.datetime.utcnow()
+
+    assert sender.drain_once() == 1
+    row = TelegramOutbox.get()
+    assert (row.status, row.attempts) == (PENDING, 1)
+    assert row.next_attempt_at >= before + datetime.timedelta(seconds=29)
+    assert "429" in row.last_error
+
+    # до наступления next_attempt_at сообщение не захватывается
+    assert sender.drain_once() == 0
+
+    TelegramOutbox.update(next_attempt_at=before).execute()
+    sender.clock.now += 5
+    assert sender.drain_once() == 1
+    assert TelegramOutbox.get().status == OUTBOX_SENT
+    assert [m["text"] for m in fake_telegram.messages] == ["первое"]
+
+
+def test_permanent_errors_are_not_retried(bot_configured, fake_telegram, sender):
+    fake_telegram.fail_next(403, "Forbidden: bot was blocked by the user")
+    ts.notify_executor(2, "заблокирован")
+
+    sender.drain_once()
+
+    row = TelegramOutbox.get()
+    assert (row.status, row.attempts) == (FAILED, 1)
+
+
+def test_per_chat_limit_defers_second_message(bot_configured, fake_telegram, sender):
+    ts.notify_executor(3, "раз")
+    ts.notify_executor(3, "два")
+    ts.notify_executor(4, "другой чат")
+
+    assert sender.drain_once() == 2
+    assert [m["text"] for m in fake_telegram.messages] == ["раз", "другой чат"]
+    deferred = TelegramOutbox.get(TelegramOutbox.text == "два")
+    assert (deferred.status, deferred.locked_until) == (PENDING, None)
+
+    sender.clock.now += 1
+    assert sender.drain_once() == 1
+    assert fake_telegram.messages[-1]["text"] == "два"
+
+
+def test_claimed_rows_are_skipped_by_other_senders(bot_configured, sender):
+    ts.notify_executor(5, "в работе")
+    TelegramOutbox.update(
+        lock_token="other",
+        locked_until=datetime.datetime.utcnow() + datetime.timedelta(minutes=1),
+    ).execute()
+
+    assert sender.drain_once() == 0
+    assert TelegramOutbox.get().lock_token == "other"
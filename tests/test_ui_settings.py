@@ -0,0 +1,61 @@
+import json
+import time
+
+import pytest
+
+from ui import settings as ui_settings
+
+
+@pytest.fixture
+def writes(monkeypatch, ui_settings_temp_path) -> list[dict]:
+    ui_settings._CACHE = None
+    calls: list[dict] = []
+    original = ui_settings._write_file
+
+    def counting(path, data):
+        original(path, data)
+        calls.append(data)
+
+    monkeypatch.setattr(ui_settings, "_write_file", counting)
+    return calls
+
+
+def test_saves_are_coalesced_and_flushed(writes, ui_settings_temp_path):
+    for width in range(50):
+        ui_settings.set_table_settings("payments", {"widths": [width]})
+    ui_settings.set_window_settings("MainWindow", {"last_tab": 2})
+    assert writes == []
+
+    ui_settings.flush()
+    assert len(writes) == 1
+    saved = json.loads(ui_settings_temp_path.read_text(encoding="utf-8"))
+    assert saved["tables"]["payments"] == {"widths": [49]}
+    assert saved["windows"]["MainWindow"] == {"last_tab": 2}
+    assert list(ui_settings_temp_path.parent.glob("*.tmp")) == []
+
+    # сохранение без изменений файл не трогает
+    ui_settings.set_table_settings("payments", {"widths": [49]})
+    ui_settings.flush()
+    assert len(writes) == 1
+
+
+def test_readers_get_private_copies(writes):
+    ui_settings.set_window_settings("Dialog", {"size": [1, 2]})
+    settings = ui_settings.get_window_settings("Dialog")
+    settings["size"].append(3)
+    assert ui_settings.get_window_settings("Dialog") == {"size": [1, 2]}
+
+
+def test_background_writer_saves_after_delay(
+    writes, monkeypatch, ui_settings_temp_path
+):
+    monkeypatch.setattr(ui_settings, "SAVE_DELAY", 0.05)
+    ui_settings.set_table_filters("deals", {"search": "abc"})
+
+    deadline = time.monotonic() + 2
+    while not writes and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(writes) == 1
+    ui_settings._CACHE = None
+    assert ui_settings.get_table_filters("deals") == {"search": "abc"}
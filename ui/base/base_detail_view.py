@@ -116,8 +116,11 @@ class BaseDetailView(QDialog):
             self.info_layout.addWidget(empty_lbl)
             self.info_layout.addStretch()
             return
+        shadow = getattr(self.instance, "normalized_fields", {})
         for field in self.instance._meta.sorted_fields:
             name = field.name
+            if name in shadow:
+                continue
             value = getattr(self.instance, name)
             if hasattr(value, "__str__"):
                 value = str(value)
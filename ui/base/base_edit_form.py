@@ -241,7 +241,7 @@ class BaseEditForm(QDialog):
 
         for field in self.get_fields():
             name = field.name
-            if name in ("id", "is_deleted"):
+            if name in ("id", "is_deleted", "deleted_at"):
                 continue
 
             # ---------- ForeignKey → <name>_id ----------
@@ -425,8 +425,11 @@ class BaseEditForm(QDialog):
 
     # child‑hooks -------------------------------------------------------
     def get_fields(self):
-        HIDDEN = {"drive_folder_path", "drive_folder_link", "is_deleted"}
+        HIDDEN = {"drive_folder_path", "drive_folder_link", "is_deleted", "deleted_at"}
         custom_hidden = getattr(self, "EXTRA_HIDDEN", set())
+        custom_hidden = custom_hidden | set(
+            getattr(self.model_class, "normalized_fields", {})
+        )
         if not hasattr(self.model_class, "_meta") or not hasattr(
             self.model_class._meta, "sorted_fields"
         ):
@@ -11,19 +11,62 @@ from ui.common.ru_headers import RU_HEADERS
 
 HIDDEN_FIELDS = {"id", "is_deleted", "drive_folder_path", "link_to_drive", "deleted_at"}
 
+# Обращение к атрибутам ``Qt`` в PySide6 заметно дороже сравнения, а
+# ``data()`` вызывается для каждой видимой ячейки при каждой перерисовке.
+_DISPLAY_ROLE = Qt.ItemDataRole.DisplayRole
+_SORT_ROLE = Qt.ItemDataRole.UserRole
+_TOOLTIP_ROLE = Qt.ItemDataRole.ToolTipRole
+_ALIGNMENT_ROLE = Qt.ItemDataRole.TextAlignmentRole
+_RIGHT_ALIGNMENT = Qt.AlignRight | Qt.AlignVCenter
+_CACHED_ROLES = frozenset(
+    {_DISPLAY_ROLE, _SORT_ROLE, _TOOLTIP_ROLE, _ALIGNMENT_ROLE}
+)
+
+
+def table_fields(model_class) -> list:
+    """Поля модели, которые показываются столбцами таблицы."""
+    shadow = getattr(model_class, "normalized_fields", {})
+    return [
+        f
+        for f in model_class._meta.sorted_fields
+        if f.name not in HIDDEN_FIELDS and f.name not in shadow
+    ]
+
+
+class _ColumnCache:
+    """Готовые значения ролей одного столбца по строкам."""
+
+    __slots__ = ("field", "display", "sort", "tooltip", "alignment")
+
+    def __init__(self, field) -> None:
+        self.field = field
+        self.display: list = []
+        self.sort: list = []
+        self.tooltip: list = []
+        self.alignment: list = []
+
 
 class BaseTableModel(QAbstractTableModel):
+    """Модель таблицы поверх списка объектов.
+
+    Текст, ключ сортировки, подсказка и выравнивание ячеек вычисляются один
+    раз на столбец при первом обращении и хранятся массивами по строкам:
+    перерисовка, сортировка и фильтрация прокси сводятся к индексации.
+    Изменённые строки (``dataChanged``) пересчитываются, а сброс модели или
+    смена порядка столбцов сбрасывает кэш.
+    """
+
     def __init__(self, objects: list, model_class, parent=None):
         super().__init__(parent)
         self.objects = objects
         self.model_class = model_class
-        self.fields = [
-            f
-            for f in self.model_class._meta.sorted_fields
-            if f.name not in HIDDEN_FIELDS
-        ]
+        self.fields = table_fields(self.model_class)
 
         self.headers = [f.name for f in self.fields]
+        self._columns: dict[int, _ColumnCache] = {}
+        self.dataChanged.connect(self._on_data_changed)
+        self.modelReset.connect(self.invalidate_cache)
+        self.layoutChanged.connect(self.invalidate_cache)
 
     def rowCount(self, parent=None):
         return len(self.objects)
@@ -44,12 +87,48 @@ class BaseTableModel(QAbstractTableModel):
     def get_item(self, row):
         return self.objects[row]
 
-    def data(self, index, role=Qt.DisplayRole):
-        if not index.isValid():
+    def data(self, index, role=_DISPLAY_ROLE):
+        if role not in _CACHED_ROLES or not index.isValid():
             return None
+        column = index.column()
+        cache = self._columns.get(column)
+        if (
+            cache is None
+            or cache.field is not self.fields[column]
+            or len(cache.display) != len(self.objects)
+        ):
+            cache = self._build_column(column)
+        row = index.row()
 
-        obj = self.objects[index.row()]
-        field = self.fields[index.column()]
+        # ─── текст в ячейке ────────────────────────────
+        if role == _DISPLAY_ROLE:
+            return cache.display[row]
+
+        # ─── роль сортировки ───────────────────────────
+        if role == _SORT_ROLE:
+            return cache.sort[row]
+
+        # ─── подсказка при наведении ───────────────────
+        if role == _TOOLTIP_ROLE:
+            return cache.tooltip[row]
+
+        # ─── выравнивание ──────────────────────────────
+        return cache.alignment[row]
+
+    # --- кэш значений по столбцам -----------------------------------------
+    def invalidate_cache(self) -> None:
+        """Сбросить кэш ячеек, например после замены списка объектов."""
+        self._columns.clear()
+
+    def _build_column(self, column: int) -> _ColumnCache:
+        cache = _ColumnCache(self.fields[column])
+        for obj in self.objects:
+            self._append_cell(cache, obj)
+        self._columns[column] = cache
+        return cache
+
+    def _append_cell(self, cache: _ColumnCache, obj) -> None:
+        field = cache.field
         try:
             value = getattr(obj, field.name)
         except Exception as e:
@@ -58,42 +137,53 @@ class BaseTableModel(QAbstractTableModel):
             )
             value = None
 
-        # ─── роль сортировки ───────────────────────────
-        if role == Qt.UserRole:
-            if isinstance(value, datetime.date):
-                return QDate(value.year, value.month, value.day)
-            return value
-
-        # ─── текст в ячейке ────────────────────────────
-        if role == Qt.DisplayRole:
-            if isinstance(field, ForeignKeyField):
-                return str(value) if value else "—"
-
-            if isinstance(value, (datetime.date, datetime.datetime)):
-                return self.format_date(value)
-
-            if isinstance(value, (int, float)) and field.name in {
-                "amount",
-                "sum",
-                "price",
-            }:
-                return self.format_money(value)
-
-            if isinstance(value, str) and len(value) > 40:
-                return self.shorten_text(value)
+        cache.display.append(self.display_text(field, value))
+        if isinstance(value, datetime.date):
+            cache.sort.append(QDate(value.year, value.month, value.day))
+        else:
+            cache.sort.append(value)
+        cache.tooltip.append(
+            value if isinstance(value, str) and len(value) > 40 else None
+        )
+        cache.alignment.append(
+            _RIGHT_ALIGNMENT if isinstance(value, (int, float)) else None
+        )
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()) -> None:
+        if not self._columns:
+            return
+        first, last = top_left.row(), bottom_right.row()
+        for column in range(top_left.column(), bottom_right.column() + 1):
+            cache = self._columns.get(column)
+            if cache is None or len(cache.display) != len(self.objects):
+                continue
+            cell = _ColumnCache(cache.field)
+            for row in range(first, last + 1):
+                self._append_cell(cell, self.objects[row])
+            cache.display[first : last + 1] = cell.display
+            cache.sort[first : last + 1] = cell.sort
+            cache.tooltip[first : last + 1] = cell.tooltip
+            cache.alignment[first : last + 1] = cell.alignment
+
+    def display_text(self, field, value) -> str:
+        """Текст ячейки для значения ``value`` поля ``field``."""
+        if isinstance(field, ForeignKeyField):
+            return str(value) if value else "—"
 
-            return "—" if value is None else str(value)
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return self.format_date(value)
 
-        # ─── подсказка при наведении ───────────────────
-        if role == Qt.ToolTipRole and isinstance(value, str) and len(value) > 40:
-            return value
+        if isinstance(value, (int, float)) and field.name in {
+            "amount",
+            "sum",
+            "price",
+        }:
+            return self.format_money(value)
 
-        # ─── выравнивание ──────────────────────────────
-        if role == Qt.TextAlignmentRole:
-            if isinstance(value, (int, float)):
-                return Qt.AlignRight | Qt.AlignVCenter
+        if isinstance(value, str) and len(value) > 40:
+            return self.shorten_text(value)
 
-        return None
+        return "—" if value is None else str(value)
 
     def format_money(self, value):
         return f"{value:,.2f} ₽".replace(",", " ").replace(".00", ",00")
@@ -9,7 +9,7 @@ logger = logging.getLogger(__name__)
 
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Any, Callable, Mapping, Optional
+from typing import Any, Callable, Iterable, Mapping, Optional
 
 from peewee import (
     Field,
@@ -146,6 +146,8 @@ class BaseTableView(QWidget):
             filter_func=filter_func,
         )
         self.model_class = self.controller.model_class
+        # фоновые потоки контроллера не должны пережить представление
+        self.destroyed.connect(self.controller.shutdown)
 
         self.use_inline_details = True
         self.detail_widget = None
@@ -292,6 +294,8 @@ class BaseTableView(QWidget):
         self._column_filters: dict[int, ColumnFilterState] = {}
         self._column_filter_matchers: dict[int, Callable[[Any, Any], bool]] = {}
         self._column_filter_strings: dict[int, str] = {}
+        #: Фильтры, уже применённые сервисом к загруженным строкам.
+        self._server_column_filters: dict[int, ColumnFilterState] = {}
 
         self.table.setModel(self.proxy)
         self.proxy_model = self.proxy  # backward compatibility
@@ -1111,7 +1115,7 @@ class BaseTableView(QWidget):
         return None
 
     def _get_controller_distinct_values(
-        self, column: int
+        self, column: int, prefix: str | None = None
     ) -> list[Any] | None:
         controller = getattr(self, "controller", None)
         if not controller or not hasattr(controller, "get_distinct_values"):
@@ -1120,9 +1124,10 @@ class BaseTableView(QWidget):
         if not column_key:
             return None
         column_field = getattr(self, "COLUMN_FIELD_MAP", {}).get(column)
+        search = {"prefix": prefix} if prefix else {}
         try:
             values = controller.get_distinct_values(
-                column_key, column_field=column_field
+                column_key, column_field=column_field, **search
             )
         except Exception:  # noqa: BLE001 - не блокируем меню при ошибке контроллера
             logger.exception(
@@ -1176,10 +1181,14 @@ class BaseTableView(QWidget):
             }
             choices.append((label, payload))
 
-    def _fetch_distinct_choices(self, column: int) -> list[Any]:
-        controller_values = self._get_controller_distinct_values(column)
+    def _fetch_distinct_choices(
+        self, column: int, prefix: str | None = None
+    ) -> list[Any]:
+        controller_values = self._get_controller_distinct_values(column, prefix)
         if controller_values is not None:
             return controller_values
+        if prefix:
+            return []
 
         choices: list[tuple[str, dict[str, Any]]] = []
         seen_keys: set[tuple[Any, str]] = set()
@@ -1193,28 +1202,39 @@ class BaseTableView(QWidget):
         state: Optional[ColumnFilterState],
     ) -> Callable[[], None]:
         raw_items = self._fetch_distinct_choices(column)
+        # сервис вернул только самые частые значения: остальные ищем по префиксу
+        truncated = bool(getattr(raw_items, "truncated", False))
+        counts: dict[Any, int] = {}
 
         choices: list[tuple[str, dict[str, Any]]] = []
         seen_keys: set[tuple[Any, str]] = set()
 
-        for item in raw_items:
-            if isinstance(item, Mapping):
-                raw_value = item.get("value", item)
-                display_hint = item.get("display", raw_value)
-                payload: dict[str, Any] = dict(item)
-            else:
-                raw_value = item
-                display_hint = item
-                payload = {}
-            storage_value = self._normalize_choice_storage_value(raw_value)
-            label = self._format_choice_label(raw_value, display_hint)
-            key = (storage_value, label)
-            if key in seen_keys:
-                continue
-            seen_keys.add(key)
-            payload["value"] = storage_value
-            payload["display"] = payload.get("display", label)
-            choices.append((label, payload))
+        def collect_choices(items: Iterable[Any]) -> list[tuple[str, dict[str, Any]]]:
+            collected: list[tuple[str, dict[str, Any]]] = []
+            item_counts = getattr(items, "counts", None) or {}
+            for item in items:
+                if isinstance(item, Mapping):
+                    raw_value = item.get("value", item)
+                    display_hint = item.get("display", raw_value)
+                    payload: dict[str, Any] = dict(item)
+                else:
+                    raw_value = item
+                    display_hint = item
+                    payload = {}
+                storage_value = self._normalize_choice_storage_value(raw_value)
+                label = self._format_choice_label(raw_value, display_hint)
+                key = (storage_value, label)
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                if item_counts and raw_value in item_counts:
+                    counts[key] = item_counts[raw_value]
+                payload["value"] = storage_value
+                payload["display"] = payload.get("display", label)
+                collected.append((label, payload))
+            return collected
+
+        choices.extend(collect_choices(raw_items))
 
         state_choice_entries: list[tuple[tuple[Any, str], dict[str, Any]]] = []
         state_display_labels: list[Any] = []
@@ -1303,16 +1323,20 @@ class BaseTableView(QWidget):
         placeholder_label.setEnabled(False)
         placeholder_label.hide()
 
-        if choices:
-            for label, payload in choices:
-                checkbox = QCheckBox(label, list_widget)
-                key = payload.get("value")
-                if (key, label) in selected_keys:
-                    checkbox.setChecked(True)
-                list_layout.addWidget(checkbox)
-                checkbox_entries.append((checkbox, payload))
+        def add_checkbox(label: str, payload: dict[str, Any]) -> QCheckBox:
+            checkbox = QCheckBox(label, list_widget)
+            key = (payload.get("value"), label)
+            if key in selected_keys:
+                checkbox.setChecked(True)
+            if key in counts:
+                checkbox.setToolTip(f"Записей: {counts[key]}")
+            list_layout.insertWidget(list_layout.indexOf(placeholder_label), checkbox)
+            checkbox_entries.append((checkbox, payload))
+            return checkbox
 
         list_layout.addWidget(placeholder_label)
+        for label, payload in choices:
+            add_checkbox(label, payload)
 
         list_layout.addStretch(1)
         scroll_area.setWidget(list_widget)
@@ -1333,6 +1357,40 @@ class BaseTableView(QWidget):
         search_edit.textChanged.connect(update_filter)
         update_filter("")
 
+        if truncated:
+            hint_label = QLabel(
+                "Показаны самые частые значения — начните вводить значение "
+                "для поиска",
+                container,
+            )
+            hint_label.setWordWrap(True)
+            hint_label.setEnabled(False)
+            container_layout.insertWidget(1, hint_label)
+
+            search_timer = QTimer(container)
+            search_timer.setSingleShot(True)
+            search_timer.setInterval(350)
+
+            def search_more() -> None:
+                text = search_edit.text().strip()
+                if not text:
+                    return
+                found = self._fetch_distinct_choices(column, prefix=text)
+                added = collect_choices(found)
+                if not added:
+                    return
+                for label, payload in sorted(added, key=lambda c: c[0].casefold()):
+                    checkbox = add_checkbox(label, payload)
+                    checkbox.stateChanged.connect(on_checkbox_state_changed)
+                completer.model().setStringList(
+                    [checkbox.text() for checkbox, _ in checkbox_entries]
+                )
+                select_all_btn.setEnabled(True)
+                update_filter(search_edit.text())
+
+            search_timer.timeout.connect(search_more)
+            search_edit.textChanged.connect(lambda _text: search_timer.start())
+
         buttons_layout = QHBoxLayout()
         buttons_layout.setContentsMargins(0, 0, 0, 0)
         buttons_layout.setSpacing(6)
@@ -1512,13 +1570,21 @@ class BaseTableView(QWidget):
 
     def _filter_accepts_row(self, source_row: int, source_parent) -> bool:
         model = self.proxy.sourceModel()
-        if model is None:
+        if model is None or getattr(model, "filters_in_query", False):
             return True
         if not self._column_filter_matchers:
             return True
+        applied = self._server_column_filters
         for column, matcher in self._column_filter_matchers.items():
             if matcher is None:
                 continue
+            loaded_with = applied.get(column)
+            if loaded_with is not None and (
+                loaded_with is self._column_filters.get(column)
+                or loaded_with == self._column_filters.get(column)
+            ):
+                # строки загружены запросом с этим же фильтром
+                continue
             index = model.index(source_row, column, source_parent)
             raw_value = model.data(index, Qt.UserRole)
             display_role = self.proxy.filterRole()
@@ -1770,6 +1836,13 @@ class BaseTableView(QWidget):
         self.current_sort_column = column
         self.current_sort_order = order
         self.save_table_settings()
+        if (
+            self._settings_loaded
+            and self.controller is not None
+            and self.controller.is_virtual()
+        ):
+            # при прокрутке без страниц порядок строк задаёт запрос
+            self.controller.load_data()
 
     def _schedule_save_table_settings(self, *_):
         self._save_settings_timer.start()
@@ -1826,6 +1899,7 @@ class BaseTableView(QWidget):
         if not splitter_restored and self.splitter.count() > 1:
             self.splitter.setStretchFactor(0, 3)
             self.splitter.setStretchFactor(1, 2)
+        previous_sort = (self.current_sort_column, self.current_sort_order)
         column = saved.get("sort_column")
         order = saved.get("sort_order")
         if not self._block_pending_restore and column is not None and order is not None:
@@ -1897,7 +1971,17 @@ class BaseTableView(QWidget):
                     need_reload = True
             except (TypeError, ValueError):
                 pass
-        self.paginator.update(self.total_count, self.page, self.per_page)
+        virtual = self.controller is not None and self.controller.is_virtual()
+        if virtual:
+            # порядок строк задаёт запрос: восстановленная сортировка
+            # требует перезагрузки
+            sort = (self.current_sort_column, self.current_sort_order)
+            need_reload = need_reload or sort != previous_sort
+            model = getattr(self, "model", None)
+            rows = model.rowCount() if model is not None else 0
+            self.paginator.update_scroll(rows, self.total_count)
+        else:
+            self.paginator.update(self.total_count, self.page, self.per_page)
         if need_reload:
             self.load_data()
         self._block_pending_restore = False
@@ -0,0 +1,325 @@
+"""Виртуальная модель таблицы с подгрузкой строк блоками.
+
+:class:`BaseTableModel` держит в памяти объекты Peewee текущей страницы и
+форматирует ячейки при каждой перерисовке. :class:`LazyTableModel` вместо
+этого прокручивает всю выборку: строки подгружаются блоками через
+``canFetchMore``/``fetchMore`` и хранятся как кортежи готовых строк
+отображения. В памяти остаётся не больше :data:`MAX_CACHED_BLOCKS` блоков;
+вытесненный блок при обращении загружается заново по ключу сортировки.
+
+Соседние блоки выбираются условием ``WHERE (поле, id) > граница LIMIT n``
+(см. :func:`services.query_utils.keyset_condition`), поэтому стоимость
+подгрузки не растёт с глубиной прокрутки. Подписи внешних ключей
+загружаются одним запросом на блок и столбец.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Sequence
+
+from peewee import JOIN, Field, ForeignKeyField, ModelSelect
+from PySide6.QtCore import QModelIndex, Qt
+
+from services.query_utils import keyset_condition, nulls_sort_low
+from ui.base.base_table_model import (
+    _ALIGNMENT_ROLE,
+    _DISPLAY_ROLE,
+    _TOOLTIP_ROLE,
+    BaseTableModel,
+)
+
+logger = logging.getLogger(__name__)
+
+#: Строк в одном блоке подгрузки.
+BLOCK_SIZE = 200
+#: Сколько блоков держать в памяти одновременно.
+MAX_CACHED_BLOCKS = 50
+#: Подсказка показывается для текстов длиннее этого значения.
+_TOOLTIP_MIN_LENGTH = 40
+#: Типы столбцов, значения которых ``BaseTableModel`` выравнивает вправо
+#: (``int``, ``float`` и ``bool``).
+_RIGHT_ALIGNED_TYPES = {
+    "AUTO",
+    "BIGAUTO",
+    "BIGINT",
+    "BOOL",
+    "DOUBLE",
+    "FLOAT",
+    "INT",
+    "SMALLINT",
+}
+
+_HANDLED_ROLES = frozenset({_DISPLAY_ROLE, _TOOLTIP_ROLE, _ALIGNMENT_ROLE})
+
+#: Строка блока: ``(id, тексты ячеек, полные тексты для подсказок)``.
+Row = tuple[Any, tuple[str, ...], "tuple[str | None, ...] | None"]
+
+
+class RowBlockSource:
+    """Строки запроса Peewee, разбитые на блоки по ключу ``(поле, id)``.
+
+    Класс не зависит от Qt: первый блок можно загрузить в фоновом потоке, а
+    дальнейшие — из модели в потоке интерфейса.
+    """
+
+    def __init__(
+        self,
+        query: ModelSelect,
+        fields: Sequence[Field],
+        format_value: Callable[[Field, Any], str],
+        *,
+        order_field: Any = None,
+        descending: bool = False,
+        block_size: int = BLOCK_SIZE,
+        max_blocks: int = MAX_CACHED_BLOCKS,
+    ) -> None:
+        model = query.model
+        self.model = model
+        self.fields = list(fields)
+        self.block_size = block_size
+        self.max_blocks = max(2, max_blocks)
+        self._format_value = format_value
+        self._pk = model._meta.primary_key
+        self._descending = descending
+
+        if not isinstance(order_field, Field) or order_field.model is not model:
+            # ключ доступен только для столбцов основной модели
+            self._keyset_field = None
+        else:
+            self._keyset_field = order_field
+        order_exprs = []
+        if order_field is not None and hasattr(order_field, "asc"):
+            order_exprs.append(order_field.desc() if descending else order_field.asc())
+        if order_field is not self._pk:
+            order_exprs.append(self._pk.desc() if descending else self._pk.asc())
+        self.query = query.order_by(*order_exprs)
+        self._nulls_low = nulls_sort_low(self.query)
+        self._blocks: OrderedDict[int, list[Row]] = OrderedDict()
+        #: ключ последней строки каждого полного блока
+        self._boundaries: list[tuple[Any, Any]] = []
+        self._labels: dict[tuple[type, Any], str] = {}
+        self.row_count = 0
+        self.exhausted = False
+
+    # --- загрузка ---------------------------------------------------------
+    def _block_query(self, block: int) -> ModelSelect:
+        if block == 0:
+            return self.query.limit(self.block_size)
+        if self._keyset_field is not None and block - 1 < len(self._boundaries):
+            value, row_id = self._boundaries[block - 1]
+            condition = keyset_condition(
+                self._keyset_field,
+                self._pk,
+                value,
+                row_id,
+                descending=self._descending,
+                nulls_low=self._nulls_low,
+            )
+            return self.query.where(condition).limit(self.block_size)
+        return self.query.limit(self.block_size).offset(block * self.block_size)
+
+    def _related_labels(self, field: ForeignKeyField, ids: set) -> None:
+        rel_model = field.rel_model
+        missing = {i for i in ids if (rel_model, i) not in self._labels}
+        if not missing:
+            return
+        # ``__str__`` связанной модели может обращаться к её собственным
+        # внешним ключам (``Deal.__str__`` → ``client``) — присоединяем их
+        query = rel_model.select()
+        selected: list[Any] = [rel_model]
+        for fk in rel_model._meta.refs:
+            if fk.rel_model is rel_model:
+                continue
+            parent = fk.rel_model.alias()
+            query = query.switch(rel_model).join(
+                parent,
+                JOIN.LEFT_OUTER,
+                on=(fk == getattr(parent, fk.rel_field.name)),
+                attr=fk.name,
+            )
+            selected.append(parent)
+        query = query.select(*selected).where(
+            rel_model._meta.primary_key.in_(list(missing))
+        )
+        for obj in query:
+            self._labels[(rel_model, obj.get_id())] = str(obj)
+
+    def _format_rows(self, objects: list) -> list[Row]:
+        for field in self.fields:
+            if not isinstance(field, ForeignKeyField):
+                continue
+            ids = {
+                obj.__data__.get(field.name)
+                for obj in objects
+                if field.name not in obj.__rel__
+            }
+            ids.discard(None)
+            if ids:
+                self._related_labels(field, ids)
+
+        rows: list[Row] = []
+        for obj in objects:
+            texts: list[str] = []
+            tooltips: list[str | None] = []
+            has_tooltip = False
+            for field in self.fields:
+                if isinstance(field, ForeignKeyField) and field.name not in obj.__rel__:
+                    rel_id = obj.__data__.get(field.name)
+                    label = self._labels.get((field.rel_model, rel_id))
+                    texts.append(label if rel_id is not None and label else "—")
+                    tooltips.append(None)
+                    continue
+                value = getattr(obj, field.name, None)
+                texts.append(self._format_value(field, value))
+                if isinstance(value, str) and len(value) > _TOOLTIP_MIN_LENGTH:
+                    tooltips.append(value)
+                    has_tooltip = True
+                else:
+                    tooltips.append(None)
+            rows.append(
+                (obj.get_id(), tuple(texts), tuple(tooltips) if has_tooltip else None)
+            )
+        return rows
+
+    def _load_block(self, block: int) -> list[Row]:
+        objects = list(self._block_query(block))
+        if (
+            len(objects) == self.block_size
+            and self._keyset_field is not None
+            and block == len(self._boundaries)
+        ):
+            last = objects[-1]
+            self._boundaries.append(
+                (last.__data__.get(self._keyset_field.name), last.get_id())
+            )
+        rows = self._format_rows(objects)
+        self._blocks[block] = rows
+        self._blocks.move_to_end(block)
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return rows
+
+    def load_next(self) -> int:
+        """Загрузить блок после уже учтённых строк, не меняя ``row_count``.
+
+        Возвращает число строк блока; модель объявляет их вставку и затем
+        увеличивает ``row_count``.
+        """
+
+        if self.exhausted:
+            return 0
+        rows = self._load_block(self.row_count // self.block_size)
+        if len(rows) < self.block_size:
+            self.exhausted = True
+        return len(rows)
+
+    def fetch_next(self) -> int:
+        """Загрузить следующий блок. Возвращает число добавленных строк."""
+
+        added = self.load_next()
+        self.row_count += added
+        return added
+
+    # --- доступ -------------------------------------------------------------
+    def row(self, index: int) -> Row | None:
+        if not 0 <= index < self.row_count:
+            return None
+        block, offset = divmod(index, self.block_size)
+        rows = self._blocks.get(block)
+        if rows is None:
+            logger.debug("Повторная загрузка вытесненного блока %d", block)
+            rows = self._load_block(block)
+        else:
+            self._blocks.move_to_end(block)
+        return rows[offset] if offset < len(rows) else None
+
+    @property
+    def cached_blocks(self) -> int:
+        return len(self._blocks)
+
+
+class LazyTableModel(BaseTableModel):
+    """Табличная модель поверх :class:`RowBlockSource` с прокруткой без страниц.
+
+    Сортировка и фильтры столбцов применяются в запросе источника, поэтому
+    исходные значения ячеек (``Qt.UserRole``) не хранятся.
+    """
+
+    #: Фильтры столбцов уже учтены в запросе, прокси их не повторяет.
+    filters_in_query = True
+
+    def __init__(self, source: RowBlockSource, model_class, parent=None):
+        super().__init__([], model_class, parent)
+        self.source = source
+        self.fields = list(source.fields)
+        self.headers = [f.name for f in self.fields]
+        self._alignments = [
+            Qt.AlignRight | Qt.AlignVCenter
+            if field.field_type in _RIGHT_ALIGNED_TYPES
+            and not isinstance(field, ForeignKeyField)
+            else None
+            for field in self.fields
+        ]
+
+    def rowCount(self, parent=None):
+        if parent is not None and parent.isValid():
+            return 0
+        return self.source.row_count
+
+    def canFetchMore(self, parent=None):
+        if parent is not None and parent.isValid():
+            return False
+        return not self.source.exhausted
+
+    def fetchMore(self, parent=None):
+        if parent is not None and parent.isValid():
+            return
+        if self.source.exhausted:
+            return
+        first = self.source.row_count
+        try:
+            added = self.source.load_next()
+        except Exception:  # noqa: BLE001
+            logger.exception("Ошибка подгрузки строк таблицы")
+            self.source.exhausted = True
+            return
+        if not added:
+            return
+        self.beginInsertRows(QModelIndex(), first, first + added - 1)
+        self.source.row_count = first + added
+        self.endInsertRows()
+
+    def get_item(self, row):
+        entry = self.source.row(row)
+        if entry is None:
+            return None
+        return self.model_class.get_or_none(
+            self.model_class._meta.primary_key == entry[0]
+        )
+
+    def data(self, index, role=_DISPLAY_ROLE):
+        if role not in _HANDLED_ROLES or not index.isValid():
+            return None
+        column = index.column()
+        if role == _ALIGNMENT_ROLE:
+            return self._alignments[column]
+        entry = self.source.row(index.row())
+        if entry is None:
+            return None
+        if role == _DISPLAY_ROLE:
+            return entry[1][column]
+        tooltips = entry[2]
+        return tooltips[column] if tooltips else None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def setData(self, index, value, role=Qt.EditRole):
+        return False
+
+
+__all__ = ["BLOCK_SIZE", "LazyTableModel", "MAX_CACHED_BLOCKS", "RowBlockSource"]
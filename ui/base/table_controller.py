@@ -3,10 +3,14 @@ from collections.abc import Iterable as IterableABC
 
 from typing import Any, Callable, Iterable
 
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtWidgets import QApplication, QProgressDialog, QMessageBox
+from peewee import ModelSelect
+from PySide6.QtCore import Qt, QThread, QTimer, Signal
+from PySide6.QtWidgets import QProgressDialog, QMessageBox
 
+from database.db import supports_background_connections, thread_connection
+from services.query_utils import FilterValues, get_query_paginator
 from ui.base.base_table_model import BaseTableModel
+from ui.base.lazy_table_model import LazyTableModel, RowBlockSource
 
 
 logger = logging.getLogger(__name__)
@@ -34,8 +38,70 @@ def _normalize_filter_values(value: Any) -> list[str]:
     return [text] if text else []
 
 
+class _PageLoadWorker(QThread):
+    """Выполняет запрос страницы в отдельном потоке со своим соединением."""
+
+    loaded = Signal(int, list, object)
+    failed = Signal(int, str)
+
+    def __init__(self, generation: int, task: Callable[[], tuple[list, Any]]):
+        super().__init__()
+        self._generation = generation
+        self._task = task
+
+    def run(self):
+        try:
+            with thread_connection():
+                items, total = self._task()
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Ошибка при загрузке данных")
+            if not self.isInterruptionRequested():
+                self.failed.emit(self._generation, str(exc))
+            return
+        if self.isInterruptionRequested():
+            return
+        self.loaded.emit(self._generation, list(items), total)
+
+
+class _TotalRefineWorker(QThread):
+    """Считает точное число записей вместо оценки PostgreSQL."""
+
+    refined = Signal(int, object)
+
+    def __init__(self, generation: int, total: Any):
+        super().__init__()
+        self._generation = generation
+        self._total = total
+
+    def run(self):
+        try:
+            with thread_connection():
+                total = self._total.refine()
+        except Exception:  # noqa: BLE001
+            logger.exception("Ошибка при подсчёте количества записей")
+            return
+        if not self.isInterruptionRequested():
+            self.refined.emit(self._generation, total)
+
+
 class TableController:
-    """Контроллер таблицы: загрузка данных, пагинация и фильтрация."""
+    """Контроллер таблицы: загрузка данных, пагинация и фильтрация.
+
+    Страницы загружаются в фоновом потоке. Каждый запрос получает номер
+    поколения; более новый запрос вытесняет незавершённые, а их результаты
+    отбрасываются. Одновременно выполняется не больше одной загрузки: пока
+    прерванный запрос не завершился, ждёт только последний из новых. Если сервис вернул оценку количества записей
+    (:class:`services.query_utils.PageTotal` с ``estimated``), пагинатор
+    сразу показывает «≈N», а точное число досчитывается в фоне.
+    """
+
+    #: Загружать страницы в фоновом потоке, если это позволяет БД.
+    background_loading = True
+    #: Задержка перед показом окна прогресса, мс.
+    PROGRESS_DELAY_MS = 400
+    #: Прокручивать всю выборку без страниц через :class:`LazyTableModel`.
+    #: Требует ``get_query_func``, возвращающей запрос Peewee по фильтрам.
+    virtual_scroll = False
 
     def __init__(
         self,
@@ -45,12 +111,27 @@ class TableController:
         get_page_func: Callable[..., Iterable[Any]] | None = None,
         get_total_func: Callable[..., int] | None = None,
         filter_func: Callable[[dict], dict] | None = None,
+        get_query_func: Callable[..., Any] | None = None,
     ):
         self.view = view
         self.model_class = model_class
         self.get_page_func = get_page_func
         self.get_total_func = get_total_func
+        self.get_query_func = get_query_func
         self.filter_func = filter_func
+        self._generation = 0
+        self._pending_callbacks: dict[int, Callable[[list, Any], None]] = {}
+        #: Фильтры столбцов последнего ``get_filters`` и загрузки, которая
+        #: их применила в запросе: прокси не проверяет такие столбцы повторно.
+        self._requested_filter_states: dict[int, Any] = {}
+        self._pending_filter_states: dict[int, dict[int, Any]] = {}
+        self._workers: set[QThread] = set()
+        #: Выполняемая загрузка страницы и последний запрос, ждущий её конца.
+        self._page_worker: _PageLoadWorker | None = None
+        self._queued_load: tuple[int, Callable[[], tuple[list, Any]]] | None = None
+        #: Прочие фоновые потоки представления, см. :meth:`watch_worker`.
+        self._view_workers: set[QThread] = set()
+        self._progress: QProgressDialog | None = None
 
     # --- Работа с моделью -------------------------------------------------
     def _create_table_model(self, items: Iterable[Any], model_class: Any) -> BaseTableModel:
@@ -93,21 +174,7 @@ class TableController:
             QTimer.singleShot(0, self.view.load_table_settings)
 
     # --- Загрузка данных --------------------------------------------------
-    def load_data(self):
-        if not self.model_class or not self.get_page_func:
-            return
-
-        progress = QProgressDialog("Загрузка...", "Отмена", 0, 0, self.view)
-        progress.setWindowModality(Qt.WindowModal)
-        progress.setAutoClose(False)
-        progress.setAutoReset(False)
-        progress.show()
-        QApplication.processEvents()
-
-        filters = self.get_filters()
-        column_filters = filters.get("column_filters")
-        logger.debug("column_filters=%s", column_filters)
-
+    def _resolve_sort(self) -> tuple[Any, str]:
         sort_field = self.view.COLUMN_FIELD_MAP.get(
             self.view.current_sort_column
         )
@@ -130,17 +197,40 @@ class TableController:
             if self.view.current_sort_order == Qt.DescendingOrder
             else "asc"
         )
+        return sort_field, order_dir
+
+    def is_virtual(self) -> bool:
+        return bool(self.virtual_scroll and self.get_query_func and self.model_class)
+
+    def load_data(self):
+        if self.is_virtual():
+            self._load_virtual()
+            return
+        if not self.model_class or not self.get_page_func:
+            return
+
+        filters = self.get_filters()
+        column_filters = filters.get("column_filters")
+        logger.debug("column_filters=%s", column_filters)
+
+        sort_field, order_dir = self._resolve_sort()
+        page = self.view.page
+        per_page = self.view.per_page
 
         logger.debug("load_data filters=%s sort=%s %s", filters, sort_field, order_dir)
 
         def run_task() -> tuple[list, int]:
-            items = self.get_page_func(
-                self.view.page,
-                self.view.per_page,
+            page_items = self.get_page_func(
+                page,
+                per_page,
                 order_by=sort_field,
                 order_dir=order_dir,
                 **filters,
             )
+            items = list(page_items)
+            if isinstance(page_items, ModelSelect):
+                # по последней строке следующая страница выбирается без OFFSET
+                get_query_paginator().remember(page_items, items)
             total = (
                 self.get_total_func(
                     order_by=sort_field,
@@ -150,40 +240,259 @@ class TableController:
                 if self.get_total_func
                 else len(items)
             )
-            return list(items), total
+            return items, total
 
-        try:
-            items, total = run_task()
-            logger.debug("loaded %d items of %d", len(items), total)
-        except Exception as exc:  # noqa: BLE001
-            logger.exception("Ошибка при загрузке данных")
-            QMessageBox.critical(self.view, "Ошибка", str(exc))
-            progress.close()
-            return
-        progress.close()
-        if getattr(self.view, "model", None) is None:
-            self.set_model_class_and_items(
-                self.model_class, items, total_count=total
+        self.load_page(run_task)
+
+    # --- Прокрутка без страниц ---------------------------------------------
+    def virtual_summary(self, query) -> str | None:
+        """Итоговая строка пагинатора для всей выборки.
+
+        Вызывается в фоновом потоке вместе с загрузкой первого блока.
+        """
+
+        return None
+
+    def _load_virtual(self) -> None:
+        filters = self.get_filters()
+        sort_field, order_dir = self._resolve_sort()
+        template = BaseTableModel([], self.model_class)
+        fields, format_value = template.fields, template.display_text
+        logger.debug(
+            "load_virtual filters=%s sort=%s %s", filters, sort_field, order_dir
+        )
+
+        def run_task() -> tuple[list, int]:
+            query = self.get_query_func(**filters)
+            source = RowBlockSource(
+                query,
+                fields,
+                format_value,
+                order_field=sort_field,
+                descending=order_dir == "desc",
             )
+            source.fetch_next()
+            total = get_query_paginator().total(query, allow_estimate=False)
+            return [source, self.virtual_summary(query)], total
+
+        self.load_page(run_task, self._apply_virtual_source)
+
+    def _apply_virtual_source(self, items: list[Any], total: int | None) -> None:
+        source, summary = items
+        view = self.view
+        view.model = LazyTableModel(source, self.model_class)
+        view.proxy.setSourceModel(view.model)
+        view.table.setModel(view.proxy)
+        view.apply_saved_filters()
+
+        # порядок строк задаёт запрос: прокси не сортирует, а щелчок по
+        # заголовку перезагружает выборку (см. BaseTableView)
+        header = view.table.horizontalHeader()
+        view.table.setSortingEnabled(False)
+        header.setSortIndicatorShown(True)
+        header.blockSignals(True)
+        header.setSortIndicator(view.current_sort_column, view.current_sort_order)
+        header.blockSignals(False)
+
+        view.total_count = total or 0
+        view.paginator.update_scroll(source.row_count, view.total_count)
+        view.model.rowsInserted.connect(
+            lambda *_: view.paginator.update_scroll(source.row_count, view.total_count)
+        )
+        if summary is not None:
+            view.paginator.set_summary(summary)
+        view.data_loaded.emit(view.proxy.rowCount())
+
+        if not getattr(view, "_settings_loaded", False) and not getattr(
+            view, "_settings_restore_pending", False
+        ):
+            view._settings_restore_pending = True
+            QTimer.singleShot(0, view.load_table_settings)
+
+    def load_page(
+        self,
+        task: Callable[[], tuple[list[Any], int | None]],
+        on_loaded: Callable[[list[Any], int | None], None] | None = None,
+    ) -> int:
+        """Запускает загрузку страницы и возвращает номер поколения запроса.
+
+        ``task`` выполняется в фоновом потоке (или синхронно, если фоновая
+        загрузка недоступна) и должен вернуть пару ``(items, total)``.
+        Каждый новый вызов отменяет предыдущие: их результаты отбрасываются,
+        а ``on_loaded`` вызывается только для актуального поколения. Пока
+        прерванный запрос выполняется, новый откладывается до его окончания,
+        причём из отложенных запускается только последний.
+        """
+
+        if on_loaded is None:
+            on_loaded = self._apply_loaded_page
+
+        self._generation += 1
+        generation = self._generation
+        self._pending_callbacks = {generation: on_loaded}
+        self._pending_filter_states = {generation: self._requested_filter_states}
+        self._requested_filter_states = {}
+        self._show_progress()
+
+        if not self._can_load_in_background():
+            try:
+                items, total = task()
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Ошибка при загрузке данных")
+                self._on_page_failed(generation, str(exc))
+                return generation
+            self._on_page_loaded(generation, items, total)
+            return generation
+
+        if self._page_worker is not None:
+            self._page_worker.requestInterruption()
+            self._queued_load = (generation, task)
+            return generation
+        self._start_page_worker(generation, task)
+        return generation
+
+    def _start_page_worker(
+        self, generation: int, task: Callable[[], tuple[list, Any]]
+    ) -> None:
+        worker = _PageLoadWorker(generation, task)
+        worker.loaded.connect(self._on_page_loaded, Qt.QueuedConnection)
+        worker.failed.connect(self._on_page_failed, Qt.QueuedConnection)
+        worker.finished.connect(
+            lambda w=worker: self._on_worker_finished(w), Qt.QueuedConnection
+        )
+        self._page_worker = worker
+        self._workers.add(worker)
+        worker.start()
+
+    def cancel_loading(self) -> None:
+        """Отменяет текущую загрузку: её результат будет отброшен."""
+
+        if not self._pending_callbacks:
             return
+        logger.debug("Загрузка поколения %d отменена", self._generation)
+        self._generation += 1
+        self._pending_callbacks = {}
+        self._queued_load = None
+        for worker in self._workers:
+            worker.requestInterruption()
+        self._close_progress()
+
+    def watch_worker(self, worker: QThread) -> None:
+        """Остановить и дождаться ``worker`` вместе с потоками загрузки.
+
+        Для фоновых потоков представления, не связанных с загрузкой страниц:
+        их тоже нужно завершить до уничтожения представления.
+        """
 
-        self.view.model = self._create_table_model(items, self.model_class)
-        self.view.proxy.setSourceModel(self.view.model)
-        self.view.table.setModel(self.view.proxy)
-        self.view.apply_saved_filters()
-        self.view.save_table_settings()
+        self._view_workers.add(worker)
+        worker.finished.connect(
+            lambda w=worker: self._view_workers.discard(w), Qt.QueuedConnection
+        )
+
+    def shutdown(self, *_args) -> None:
+        """Прерывает фоновые потоки и дожидается их завершения.
+
+        Вызывается при уничтожении представления: ``QThread``, удалённый во
+        время работы, аварийно завершает приложение. Результаты прерванных
+        загрузок отбрасываются.
+        """
+
+        self._generation += 1
+        self._pending_callbacks = {}
+        self._pending_filter_states = {}
+        self._queued_load = None
+        workers = [*self._workers, *self._view_workers]
+        for worker in workers:
+            worker.requestInterruption()
+        for worker in workers:
+            worker.wait()
+        self._workers.clear()
+        self._view_workers.clear()
+        self._page_worker = None
+        self._close_progress()
+
+    def is_loading(self) -> bool:
+        return bool(self._pending_callbacks)
+
+    def _can_load_in_background(self) -> bool:
+        if not self.background_loading:
+            return False
+        return supports_background_connections()
+
+    def _on_page_loaded(self, generation: int, items: list, total) -> None:
+        callback = self._pending_callbacks.pop(generation, None)
+        if callback is None or generation != self._generation:
+            logger.debug("Отброшен устаревший результат поколения %d", generation)
+            return
+        self._close_progress()
+        logger.debug("loaded %d items of %s", len(items), total)
+        # строки уже отфильтрованы запросом по этим состояниям фильтров
+        self.view._server_column_filters = self._pending_filter_states.pop(
+            generation, {}
+        )
+        callback(items, total)
+        if getattr(total, "estimated", False):
+            self._refine_total(generation, total)
+
+    def _refine_total(self, generation: int, total: Any) -> None:
+        if not self._can_load_in_background():
+            self._on_total_refined(generation, total.refine())
+            return
+        worker = _TotalRefineWorker(generation, total)
+        worker.refined.connect(self._on_total_refined, Qt.QueuedConnection)
+        worker.finished.connect(
+            lambda w=worker: self._on_worker_finished(w), Qt.QueuedConnection
+        )
+        self._workers.add(worker)
+        worker.start()
+
+    def _on_total_refined(self, generation: int, total: Any) -> None:
+        if generation != self._generation:
+            return
+        self.view.total_count = total
+        self.view.paginator.update(total, self.view.page, self.view.per_page)
+
+    def _on_page_failed(self, generation: int, message: str) -> None:
+        callback = self._pending_callbacks.pop(generation, None)
+        if callback is None or generation != self._generation:
+            return
+        self._close_progress()
+        QMessageBox.critical(self.view, "Ошибка", message)
+
+    def _on_worker_finished(self, worker: QThread) -> None:
+        self._workers.discard(worker)
+        worker.deleteLater()
+        if worker is not self._page_worker:
+            return
+        self._page_worker = None
+        queued, self._queued_load = self._queued_load, None
+        if queued is not None and queued[0] == self._generation:
+            self._start_page_worker(*queued)
+
+    def _apply_loaded_page(self, items: list[Any], total: int | None) -> None:
+        self.set_model_class_and_items(self.model_class, items, total_count=total)
+
+    def _show_progress(self) -> None:
+        if self._progress is not None:
+            return
+        progress = QProgressDialog("Загрузка...", "Отмена", 0, 0, self.view)
+        progress.setWindowModality(Qt.NonModal)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setMinimumDuration(self.PROGRESS_DELAY_MS)
+        progress.canceled.connect(self.cancel_loading)
+        self._progress = progress
+
+    def _close_progress(self) -> None:
+        progress, self._progress = self._progress, None
+        if progress is None:
+            return
         try:
-            self.view.table.sortByColumn(
-                self.view.current_sort_column, self.view.current_sort_order
-            )
-        except NotImplementedError:
+            progress.canceled.disconnect(self.cancel_loading)
+        except (RuntimeError, TypeError):
             pass
-        if total is not None:
-            self.view.total_count = total
-            self.view.paginator.update(
-                self.view.total_count, self.view.page, self.view.per_page
-            )
-        self.view.data_loaded.emit(self.view.proxy.rowCount())
+        progress.close()
+        progress.deleteLater()
 
     def refresh(self):
         self.load_data()
@@ -221,6 +530,7 @@ class TableController:
         }
         header = self.view.table.horizontalHeader()
         column_filters = {}
+        requested: dict[int, Any] = {}
         for logical, state in self.view._column_filters.items():
             visual = header.visualIndex(logical)
             if visual < 0:
@@ -235,8 +545,10 @@ class TableController:
             values = _normalize_filter_values(backend_value)
             if not values:
                 continue
-            column_filters[field] = values
+            column_filters[field] = FilterValues(values, kind=state.type)
+            requested[logical_index] = state
         filters["column_filters"] = column_filters
+        self._requested_filter_states = requested
         date_range = self.view.get_date_filter()
         if date_range:
             filters.update(date_range)
@@ -246,12 +558,18 @@ class TableController:
 
     # --- Значения --------------------------------------------------------
     def get_distinct_values(
-        self, column_key: str, *, column_field: Any | None = None
+        self,
+        column_key: str,
+        *,
+        column_field: Any | None = None,
+        prefix: str | None = None,
     ) -> list[Any] | None:
         """Возвращает список уникальных значений для столбца.
 
         Базовая реализация не имеет доступа к данным и возвращает ``None``.
         Потомки могут переопределить метод для работы с сервисами/репозиториями.
+        ``prefix`` — строка поиска для столбцов, у которых сервис вернул не
+        все значения (см. :class:`services.distinct_values.DistinctValues`).
         """
 
         provider = getattr(self, "service", None)
@@ -267,14 +585,17 @@ class TableController:
         if not removed and column_key in column_filters:
             column_filters.pop(column_key, None)
         filters["column_filters"] = column_filters
+        search = {"prefix": prefix} if prefix else {}
 
         try:
             return provider.get_distinct_values(
-                column_key, column_field=column_field, filters=filters
+                column_key, column_field=column_field, filters=filters, **search
             )
         except TypeError:
             try:
-                return provider.get_distinct_values(column_key, filters=filters)
+                return provider.get_distinct_values(
+                    column_key, filters=filters, **search
+                )
             except Exception:  # noqa: BLE001
                 logger.exception(
                     "Ошибка провайдера distinct для столбца %s", column_key
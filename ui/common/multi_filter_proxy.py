@@ -15,7 +15,7 @@ from PySide6.QtCore import (
     QSortFilterProxyModel,
 )
 
-from utils.filter_constants import CHOICE_NULL_TOKEN
+from utils.filter_constants import CHOICE_NULL_TOKEN, DATE_RANGE_SEPARATOR
 
 
 @dataclass(eq=True)
@@ -116,7 +116,13 @@ class ColumnFilterState:
             if not is_multi:
                 return collected[0]
             return collected
-        # Для диапазонов и прочих сложных типов серверная фильтрация не поддерживается.
+        if self.type == "date_range" and isinstance(self.value, Mapping):
+            start = str(self.value.get("from") or "")
+            end = str(self.value.get("to") or "")
+            if not (start or end):
+                return None
+            return f"{start}{DATE_RANGE_SEPARATOR}{end}"
+        # Для прочих сложных типов серверная фильтрация не поддерживается.
         return None
 
     def to_dict(self) -> Dict[str, Any]:
@@ -49,7 +49,8 @@ class Paginator(QWidget):
             self.per_page_combo.addItem(str(option))
         self.per_page_combo.setCurrentText(str(self.per_page))
         self.per_page_combo.currentTextChanged.connect(self._on_per_page_changed)
-        layout.addWidget(QLabel("На странице:"))
+        self.per_page_label = QLabel("На странице:")
+        layout.addWidget(self.per_page_label)
         layout.addWidget(self.per_page_combo)
 
         layout.addStretch()
@@ -57,8 +58,34 @@ class Paginator(QWidget):
         self.summary_label = QLabel("")
         layout.addWidget(self.summary_label)
 
+    def _set_page_controls_visible(self, visible: bool) -> None:
+        for widget in (
+            self.prev_btn,
+            self.next_btn,
+            self.per_page_label,
+            self.per_page_combo,
+        ):
+            widget.setVisible(visible)
+
+    def update_scroll(self, loaded_count: int, total_count: int):
+        """Показать прогресс прокрутки вместо страниц (виртуальная таблица)."""
+        self._set_page_controls_visible(False)
+        if loaded_count >= total_count:
+            self.page_label.setText(f"{total_count} записей")
+        else:
+            self.page_label.setText(
+                f"Загружено {loaded_count} из {total_count} записей"
+            )
+
     def update(self, total_count: int, page: int, per_page: int | None = None):
-        """Обновить состояние пагинатора с учётом общего числа записей."""
+        """Обновить состояние пагинатора с учётом общего числа записей.
+
+        Если ``total_count`` — оценка (атрибут ``estimated``, см.
+        :class:`services.query_utils.PageTotal`), число показывается как «≈N»,
+        а переход вперёд не ограничивается.
+        """
+        estimated = bool(getattr(total_count, "estimated", False))
+        self._set_page_controls_visible(True)
         if per_page is not None:
             self.per_page = per_page
             self.per_page_combo.blockSignals(True)
@@ -66,11 +93,16 @@ class Paginator(QWidget):
             self.per_page_combo.blockSignals(False)
         self.current_page = page
         total_pages = max(1, math.ceil(total_count / self.per_page))
-        self.page_label.setText(
-            f"Страница {page} из {total_pages} ({total_count} записей)"
-        )
+        if estimated:
+            self.page_label.setText(
+                f"Страница {page} из ≈{total_pages} (≈{int(total_count)} записей)"
+            )
+        else:
+            self.page_label.setText(
+                f"Страница {page} из {total_pages} ({total_count} записей)"
+            )
         self.prev_btn.setEnabled(page > 1)
-        self.next_btn.setEnabled(page < total_pages)
+        self.next_btn.setEnabled(estimated or page < total_pages)
 
     def update_page(
         self,
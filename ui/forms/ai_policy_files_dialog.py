@@ -7,6 +7,7 @@ from typing import Iterable, Sequence
 from PySide6.QtCore import QThread, Qt, Signal
 from PySide6.QtGui import QKeySequence, QShortcut, QTextCursor
 from PySide6.QtWidgets import (
+    QCheckBox,
     QDialog,
     QHBoxLayout,
     QLabel,
@@ -18,10 +19,18 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
 )
 
+from services.policies.ai_policy_batch import (
+    STAGE_CANCELLED,
+    STAGE_DONE,
+    STAGE_FAILED,
+    STAGE_READING,
+    STAGE_RECOGNIZING,
+    PolicyBatch,
+    read_policy_texts,
+)
 from services.policies.ai_policy_service import (
     recognize_policy_interactive,
     AiPolicyError,
-    _read_text,
     _get_prompt,
 )
 from ui.forms.import_policy_json_form import ImportPolicyJsonForm
@@ -32,14 +41,29 @@ from ui import settings as ui_settings
 logger = logging.getLogger(__name__)
 
 
+def _bundle_messages(paths: Sequence[Path]) -> list[dict]:
+    """Начало диалога с ИИ: промпт и тексты всех файлов одним сообщением."""
+
+    texts = read_policy_texts(paths)
+    blocks = [f"===== {path.name} =====\n{text}" for path, text in zip(paths, texts)]
+    return [
+        {"role": "system", "content": _get_prompt()},
+        {"role": "user", "content": "\n\n".join(blocks)},
+    ]
+
+
 class _Worker(QThread):
+    """Ведёт диалог с ИИ; с ``paths`` сначала читает файлы в этом же потоке."""
+
+    prepared = Signal(list)
     progress = Signal(str, str)
     finished = Signal(dict, list, str)
     failed = Signal(str, list, str)
 
-    def __init__(self, messages):
+    def __init__(self, messages, paths: Sequence[Path] | None = None):
         super().__init__()
         self._messages = messages
+        self._paths = list(paths) if paths is not None else None
 
     def run(self):
         def cb(role, part):
@@ -51,6 +75,9 @@ class _Worker(QThread):
             return self.isInterruptionRequested()
 
         try:
+            if self._paths is not None:
+                self._messages = _bundle_messages(self._paths)
+                self.prepared.emit(self._messages)
             if self.isInterruptionRequested():
                 raise InterruptedError("Распознавание отменено пользователем")
             data, transcript, messages = recognize_policy_interactive(
@@ -68,6 +95,31 @@ class _Worker(QThread):
             self.failed.emit(str(exc), self._messages, "")
 
 
+class _BatchWorker(QThread):
+    """Распознаёт файлы пачкой, каждый файл — отдельный полис."""
+
+    stage = Signal(int, str)
+    done = Signal(list)
+
+    def __init__(self, paths: Sequence[Path]):
+        super().__init__()
+        self.batch = PolicyBatch(
+            paths, progress_cb=lambda index, _path, stage: self.stage.emit(index, stage)
+        )
+
+    def run(self):
+        self.done.emit(self.batch.run())
+
+
+_STAGE_LABELS = {
+    STAGE_READING: "чтение",
+    STAGE_RECOGNIZING: "распознавание",
+    STAGE_DONE: "готово",
+    STAGE_FAILED: "ошибка",
+    STAGE_CANCELLED: "отменено",
+}
+
+
 class AiPolicyFilesDialog(QDialog):
     """Диалог для распознавания полиса из одного или нескольких файлов."""
 
@@ -115,6 +167,9 @@ class AiPolicyFilesDialog(QDialog):
         self.input_edit.setVisible(False)
         layout.addWidget(self.input_edit)
 
+        self.separate_check = QCheckBox("Каждый файл — отдельный полис", self)
+        layout.addWidget(self.separate_check)
+
         btns = QHBoxLayout()
         self.remove_btn = QPushButton("Удалить выбранные", self)
         self.remove_btn.clicked.connect(self.on_remove_selected)
@@ -132,6 +187,7 @@ class AiPolicyFilesDialog(QDialog):
         self._skipped_items: list[tuple[Path, str]] = []
         self._messages: list[dict] = []
         self._worker: _Worker | None = None
+        self._batch_worker: _BatchWorker | None = None
 
         self._delete_shortcuts: list[QShortcut] = []
         for key in (Qt.Key_Delete, Qt.Key_Backspace):
@@ -159,19 +215,29 @@ class AiPolicyFilesDialog(QDialog):
             cursor.insertText(f"{role}:\n{text}\n")
         self.conv_edit.setTextCursor(cursor)
 
-    def _start_worker(self):
+    def _start_worker(self, paths: Sequence[Path] | None = None):
         if self._worker:
             if self._worker.isRunning():
                 return
             self._cleanup_worker()
 
-        self._worker = _Worker(self._messages)
+        self._worker = _Worker(self._messages, paths)
+        self._worker.prepared.connect(self._on_prepared)
         self._worker.progress.connect(self._append)
         self._worker.finished.connect(self._on_finished)
         self._worker.failed.connect(self._on_failed)
         self._worker.start()
 
     def _cleanup_worker(self, *, wait: bool = False):
+        batch_worker = self._batch_worker
+        if batch_worker is not None:
+            if wait and batch_worker.isRunning():
+                batch_worker.batch.cancel()
+                batch_worker.wait()
+            if not batch_worker.isRunning():
+                batch_worker.deleteLater()
+                self._batch_worker = None
+
         if not self._worker:
             return
 
@@ -196,6 +262,12 @@ class AiPolicyFilesDialog(QDialog):
         if not selected_rows:
             return
 
+        if self._batch_worker and self._batch_worker.isRunning():
+            # во время распознавания выбранные файлы отменяются
+            for row in selected_rows:
+                self._batch_worker.batch.cancel(row)
+            return
+
         for row in selected_rows:
             if 0 <= row < self.list_widget.count():
                 self.list_widget.takeItem(row)
@@ -205,6 +277,11 @@ class AiPolicyFilesDialog(QDialog):
         self._update_process_button_state()
 
     # ------------------------------------------------------------------
+    def _on_prepared(self, messages: list) -> None:
+        self._messages = messages
+        for m in messages:
+            self._append(m["role"], m["content"])
+
     def _on_finished(self, data, messages, transcript):
         self._cleanup_worker()
         self._messages = messages
@@ -227,6 +304,14 @@ class AiPolicyFilesDialog(QDialog):
         msg.setDetailedText(transcript)
         msg.exec()
 
+        if self._import_policy(data, self.files):
+            self.accept()
+        else:
+            self.process_btn.setEnabled(True)
+
+    def _import_policy(self, data: dict, files: Sequence[Path]) -> bool:
+        """Открыть форму импорта полиса и перенести ``files`` в его папку."""
+
         json_text = _json.dumps(data, ensure_ascii=False, indent=2)
         dlg = ImportPolicyJsonForm(
             parent=self,
@@ -234,22 +319,80 @@ class AiPolicyFilesDialog(QDialog):
             forced_deal=self.forced_deal,
             json_text=json_text,
         )
-        if dlg.exec():
-            policy = getattr(dlg, "imported_policy", None)
-            dest = None
-            if policy:
-                dest = (
-                    getattr(policy, "drive_folder_link", None)
-                    or getattr(policy, "drive_folder_path", None)
+        if not dlg.exec():
+            return False
+        policy = getattr(dlg, "imported_policy", None)
+        dest = None
+        if policy:
+            dest = (
+                getattr(policy, "drive_folder_link", None)
+                or getattr(policy, "drive_folder_path", None)
+            )
+        if dest:
+            from services.folder_utils import move_file_to_folder
+
+            for src in files:
+                move_file_to_folder(str(src), dest)
+        return True
+
+    # ------------------------------------------------------------------
+    def _start_batch(self):
+        self.conv_edit.clear()
+        self._set_file_stages({})
+        worker = _BatchWorker(self.files)
+        worker.stage.connect(self._on_batch_stage, Qt.QueuedConnection)
+        worker.done.connect(self._on_batch_finished, Qt.QueuedConnection)
+        self._batch_worker = worker
+        self.process_btn.setEnabled(False)
+        self.separate_check.setEnabled(False)
+        worker.start()
+
+    def _set_file_stages(self, stages: dict[int, str]) -> None:
+        for row, path in enumerate(self.files):
+            item = self.list_widget.item(row)
+            if item is None:
+                continue
+            label = stages.get(row)
+            item.setText(f"{path} — {label}" if label else str(path))
+
+    def _on_batch_stage(self, index: int, stage: str) -> None:
+        item = self.list_widget.item(index)
+        if item is not None and index < len(self.files):
+            item.setText(f"{self.files[index]} — {_STAGE_LABELS.get(stage, stage)}")
+
+    def _on_batch_finished(self, results: list) -> None:
+        """Показать ошибки пачки и предложить импорт распознанных полисов."""
+
+        if self._batch_worker is not None:
+            self._batch_worker.wait()
+        self._cleanup_worker()
+        self.separate_check.setEnabled(True)
+        self._update_process_button_state()
+
+        failed = [r for r in results if not r.ok and not r.cancelled]
+        for result in failed:
+            self._append("error", f"{result.path}: {result.error}")
+        if failed:
+            msg = QMessageBox(self)
+            msg.setIcon(QMessageBox.Warning)
+            msg.setWindowTitle("Распознавание полисов")
+            msg.setText(
+                f"Не удалось распознать файлов: {len(failed)} из {len(results)}. "
+                "Остальные можно импортировать."
+            )
+            msg.setDetailedText(
+                "\n\n".join(
+                    f"{r.path}: {r.error}\n{r.transcript}".rstrip() for r in failed
                 )
-            if dest:
-                from services.folder_utils import move_file_to_folder
+            )
+            msg.exec()
 
-                for src in self.files:
-                    move_file_to_folder(str(src), dest)
+        imported = False
+        for result in results:
+            if result.ok and self._import_policy(result.data, [Path(result.path)]):
+                imported = True
+        if imported:
             self.accept()
-        else:
-            self.process_btn.setEnabled(True)
 
     def _on_failed(self, error, messages, transcript):
         self._cleanup_worker()
@@ -358,6 +501,10 @@ class AiPolicyFilesDialog(QDialog):
             self.process_btn.setEnabled(False)
             return
 
+        if self._batch_worker and self._batch_worker.isRunning():
+            self.process_btn.setEnabled(False)
+            return
+
         if self.process_btn.text() == "Отправить":
             self.process_btn.setEnabled(True)
             return
@@ -381,21 +528,16 @@ class AiPolicyFilesDialog(QDialog):
             QMessageBox.warning(self, "Ошибка", "Добавьте файлы.")
             return
 
-        blocks = [
-            f"===== {path.name} =====\n{_read_text(str(path))}"
-            for path in self.files
-        ]
-        text = "\n\n".join(blocks)
-        self.conv_edit.clear()
-        self._messages = [
-            {"role": "system", "content": _get_prompt()},
-            {"role": "user", "content": text},
-        ]
-        for m in self._messages:
-            self._append(m["role"], m["content"])
+        if self.separate_check.isChecked():
+            self._start_batch()
+            return
 
+        # файлы читаются в потоке распознавания: большие и сканированные PDF
+        # не должны останавливать интерфейс
+        self.conv_edit.clear()
+        self._messages = []
         self.process_btn.setEnabled(False)
-        self._start_worker()
+        self._start_worker(self.files)
 
     def closeEvent(self, event):  # noqa: D401 - Qt override
         self._save_geometry()
@@ -408,6 +550,7 @@ class AiPolicyFilesDialog(QDialog):
 
     def reject(self):  # noqa: D401 - Qt override
         self._save_geometry()
+        self._cleanup_worker(wait=True)
         super().reject()
 
     def _restore_geometry(self) -> None:
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import base64
+from datetime import date
+from pathlib import Path
 
 from PySide6.QtWidgets import (
+    QComboBox,
     QDialog,
     QVBoxLayout,
     QLabel,
@@ -12,18 +15,39 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QFileDialog,
     QLineEdit,
+    QMessageBox,
+)
+from services.reso_table_service import (
+    ACTION_LABELS,
+    ACTION_MANUAL,
+    ACTION_SKIP,
+    DEFAULT_MAPPING,
+    ResoPayout,
+    commit_reso_payouts,
+    import_reso_payouts,
+    load_reso_table,
+    missing_reso_columns,
+    plan_reso_payouts,
+    resolve_reso_payouts,
 )
-from database.models import Policy
-from services.reso_table_service import load_reso_table, import_reso_payouts
-from services.validators import normalize_number
 from ui import settings as ui_settings
+from ui.forms.column_mapping_dialog import ColumnMappingDialog
 
 
 SETTINGS_KEY = "reso_import_dialog"
 
 
 class ResoImportDialog(QDialog):
-    """Предварительный просмотр импорта выплат RESO."""
+    """Предварительный просмотр импорта выплат RESO.
+
+    Таблица группируется по полисам и сверяется с базой заранее; для каждого
+    полиса выбирается действие. Обновления и новые доходы записываются одной
+    транзакцией, полисы с действием «Вручную» проходят пошаговый импорт.
+    Если в таблице нет стандартных столбцов номера или суммы, перед
+    просмотром открывается :class:`ColumnMappingDialog`.
+    """
+
+    column_map_cls: type[QDialog] = ColumnMappingDialog
 
     def __init__(self, path: str | None = None, parent=None):
         super().__init__(parent)
@@ -31,6 +55,8 @@ class ResoImportDialog(QDialog):
         self.resize(800, 500)
         self._restore_geometry()
         self.path = path or ""
+        self.payouts: list[ResoPayout] = []
+        self.mapping: dict[str, str] | None = None
 
         layout = QVBoxLayout(self)
 
@@ -44,11 +70,12 @@ class ResoImportDialog(QDialog):
 
         layout.addWidget(
             QLabel(
-                "Ниже показаны найденные записи. После проверки нажмите 'Импортировать'."
+                "Ниже показаны найденные записи. Проверьте действия и нажмите "
+                "'Импортировать'."
             )
         )
 
-        self.table = QTableWidget(0, 6)
+        self.table = QTableWidget(0, 7)
         self.table.setHorizontalHeaderLabels(
             [
                 "Полис",
@@ -56,6 +83,7 @@ class ResoImportDialog(QDialog):
                 "Период",
                 "Премия",
                 "Сумма",
+                "Доход",
                 "Действие",
             ]
         )
@@ -105,50 +133,87 @@ class ResoImportDialog(QDialog):
     # ------------------------------------------------------------------
     def _populate(self):
         self.table.setRowCount(0)
+        self.payouts = []
+        self.mapping = None
         if not self.path:
             return
 
         df = load_reso_table(self.path)
-        policy_col = "НОМЕР ПОЛИСА"
-        period_col = "НАЧИСЛЕНИЕ,С-ПО"
-        amount_col = "arhvp"
-        prem_col = "ПРЕМИЯ,РУБ."
-        client_col = "СТРАХОВАТЕЛЬ"
-        policies = [str(n).strip() for n in df[policy_col].dropna().unique()]
-        for num in policies:
-            rows = df[df[policy_col].astype(str).str.strip() == num]
-            amount = (
-                rows[amount_col]
-                .map(
-                    lambda v: float(normalize_number(v)) if v not in (None, "") else 0.0
-                )
-                .sum()
-            )
-            prem = (
-                rows[prem_col]
-                .map(
-                    lambda v: float(normalize_number(v)) if v not in (None, "") else 0.0
-                )
-                .sum()
-            ) if prem_col in df.columns else 0.0
-            client = rows.iloc[0].get(client_col, "") if client_col in df.columns else ""
-            period = rows.iloc[0].get(period_col, "")
-            exists = Policy.get_or_none(Policy.policy_number == num)
-            action = "Обновить" if exists else "Создать"
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(num))
-            self.table.setItem(row, 1, QTableWidgetItem(client))
-            self.table.setItem(row, 2, QTableWidgetItem(str(period)))
-            self.table.setItem(row, 3, QTableWidgetItem(str(prem)))
-            self.table.setItem(row, 4, QTableWidgetItem(str(amount)))
-            self.table.setItem(row, 5, QTableWidgetItem(action))
+        self.mapping = self._choose_mapping(list(df.columns))
+        if self.mapping is None:
+            return
+        self.payouts = resolve_reso_payouts(plan_reso_payouts(df, self.mapping))
+        self.table.setRowCount(len(self.payouts))
+        for row, payout in enumerate(self.payouts):
+            period = payout.row.get(self.mapping.get("period"))
+            income = payout.income
+            if income is not None:
+                current = f"#{income.id}: {income.amount}"
+            elif payout.payment is not None:
+                current = "нет"
+            else:
+                current = "нет полиса" if payout.policy is None else "нет платежа"
+            cells = [
+                payout.policy_number,
+                payout.client_name,
+                "" if period is None else str(period),
+                f"{payout.premium:.2f}",
+                f"{payout.amount:.2f}" if payout.amount_known else "—",
+                current,
+            ]
+            for col, text in enumerate(cells):
+                self.table.setItem(row, col, QTableWidgetItem(text))
+            self.table.setCellWidget(row, 6, self._action_combo(payout))
         self.table.resizeColumnsToContents()
 
+    def _choose_mapping(self, columns: list[str]) -> dict[str, str] | None:
+        """Стандартные столбцы или выбранные пользователем; ``None`` — отмена."""
+        if not missing_reso_columns(columns):
+            return dict(DEFAULT_MAPPING)
+        dlg = self.column_map_cls(columns, parent=self)
+        if not dlg.exec():
+            return None
+        return dlg.get_mapping()
+
+    def _action_combo(self, payout: ResoPayout) -> QComboBox:
+        combo = QComboBox()
+        allowed = [payout.action, ACTION_MANUAL, ACTION_SKIP]
+        for action in dict.fromkeys(allowed):
+            combo.addItem(ACTION_LABELS[action], action)
+
+        def on_changed(_index: int) -> None:
+            payout.action = combo.currentData()
+
+        combo.currentIndexChanged.connect(on_changed)
+        return combo
+
     def _do_import(self):
         if not self.path:
             return
-        self.processed = import_reso_payouts(self.path, parent=self)
+        if not self.payouts:
+            # нестандартная таблица: пошаговый импорт с выбором столбцов
+            self.processed = import_reso_payouts(
+                self.path, parent=self, mapping=self.mapping
+            )
+            self.accept()
+            return
+
+        file_date = date.fromtimestamp(Path(self.path).stat().st_ctime)
+        try:
+            result = commit_reso_payouts(self.payouts, received_date=file_date)
+        except Exception as exc:  # pragma: no cover - отображение ошибки
+            QMessageBox.critical(self, "Ошибка импорта", str(exc))
+            return
+        self.processed = result["updated"] + result["added"]
+
+        manual = [p.policy_number for p in self.payouts if p.action == ACTION_MANUAL]
+        if manual:
+            self.processed += import_reso_payouts(
+                self.path,
+                parent=self,
+                numbers=manual,
+                mapping=self.mapping,
+            )
         self.accept()
 
     # ------------------------------------------------------------------
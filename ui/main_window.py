@@ -242,4 +242,6 @@ class MainWindow(QMainWindow):
             }
         )
         ui_settings.set_window_settings("MainWindow", st)
+        # настройки пишутся с задержкой: последние изменения сохраняем сейчас
+        ui_settings.flush()
         super().closeEvent(event)
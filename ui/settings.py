@@ -1,88 +1,186 @@
+"""Хранилище настроек интерфейса (``ui_settings.json``).
+
+Настройки держатся в памяти неизменяемым снимком: чтение возвращает копию
+только запрошенного раздела, а запись заменяет раздел в новом снимке.
+Изменённый снимок записывается фоновым потоком через :data:`SAVE_DELAY`
+секунд после последнего изменения, поэтому частые сохранения (ширина
+столбцов, загрузка страниц таблиц) сливаются в одну запись, а сохранение
+без изменений файл не трогает. Файл заменяется атомарно: данные пишутся во
+временный файл рядом и переименовываются.
+
+:func:`flush` записывает отложенные изменения сразу; его вызывают при
+закрытии главного окна и при выходе из процесса.
+"""
+
+import atexit
 import copy
 import json
 import logging
+import os
+import tempfile
+import threading
+import time
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 SETTINGS_PATH = Path.home() / ".crm_desktop" / "ui_settings.json"
+#: Задержка записи файла после последнего изменения, секунд.
+SAVE_DELAY = 1.0
+
 _CACHE: dict | None = None
+_lock = threading.Lock()
+_changed = threading.Condition(_lock)
+#: Один поток записи за раз: снимки попадают в файл в порядке изменений.
+_write_lock = threading.Lock()
+#: Несохранённые снимки по пути файла.
+_pending: dict[Path, dict] = {}
+_deadline = 0.0
+_writer: threading.Thread | None = None
+
+
+def _read_file(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:  # pragma: no cover - logging only
+        logger.exception("Не удалось загрузить настройки: %s", e)
+        return {}
 
 
-def _load_data() -> dict:
+def _write_file(path: Path, data: dict) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(text)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    except Exception as e:  # pragma: no cover - logging only
+        logger.exception("Не удалось сохранить настройки: %s", e)
+
+
+def _snapshot() -> dict:
     global _CACHE
     if _CACHE is None:
-        if SETTINGS_PATH.exists():
-            try:
-                _CACHE = json.loads(SETTINGS_PATH.read_text(encoding="utf-8"))
-            except Exception as e:  # pragma: no cover - logging only
-                logger.exception("Не удалось загрузить настройки: %s", e)
-                _CACHE = {}
-        else:
-            _CACHE = {}
-    return copy.deepcopy(_CACHE)
+        _CACHE = _read_file(SETTINGS_PATH)
+    return _CACHE
 
 
-def _save_data(data: dict) -> None:
-    global _CACHE
-    _CACHE = copy.deepcopy(data)
-    SETTINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
-    try:
-        SETTINGS_PATH.write_text(
-            json.dumps(_CACHE, ensure_ascii=False, indent=2), encoding="utf-8"
+def _load_data() -> dict:
+    """Текущий снимок настроек. Изменять его нельзя."""
+    with _lock:
+        return _snapshot()
+
+
+def _write_pending() -> None:
+    with _write_lock:
+        with _lock:
+            batch = list(_pending.items())
+            _pending.clear()
+        for path, data in batch:
+            _write_file(path, data)
+
+
+def _writer_loop() -> None:
+    while True:
+        with _changed:
+            while not _pending or time.monotonic() < _deadline:
+                timeout = _deadline - time.monotonic() if _pending else None
+                _changed.wait(timeout)
+        _write_pending()
+
+
+def _schedule_save(data: dict) -> None:
+    """Отложить запись снимка ``data``. Вызывается под ``_lock``."""
+    global _deadline, _writer
+    _pending[SETTINGS_PATH] = data
+    _deadline = time.monotonic() + SAVE_DELAY
+    if _writer is None or not _writer.is_alive():
+        _writer = threading.Thread(
+            target=_writer_loop, name="ui-settings-writer", daemon=True
         )
-    except Exception as e:  # pragma: no cover - logging only
-        logger.exception("Не удалось сохранить настройки: %s", e)
+        _writer.start()
+    _changed.notify()
+
+
+def flush() -> None:
+    """Записать отложенные изменения настроек немедленно."""
+    _write_pending()
+
+
+atexit.register(flush)
+
+
+def _get_section(section: str, name: str | None = None) -> dict:
+    value = _load_data().get(section, {})
+    if name is not None:
+        value = value.get(name, {})
+    return copy.deepcopy(value)
+
+
+def _set_section(section: str, name: str | None, value: dict) -> None:
+    global _CACHE
+    with _lock:
+        data = _snapshot()
+        current = data.get(section, {})
+        if name is None:
+            if section in data and current == value:
+                return
+            updated = copy.deepcopy(value)
+        else:
+            if name in current and current[name] == value:
+                return
+            updated = dict(current)
+            updated[name] = copy.deepcopy(value)
+        data = dict(data)
+        data[section] = updated
+        _CACHE = data
+        _schedule_save(data)
 
 
 def get_table_settings(name: str) -> dict:
-    data = _load_data()
-    return data.get("tables", {}).get(name, {})
+    return _get_section("tables", name)
 
 
 def set_table_settings(name: str, settings: dict) -> None:
-    data = _load_data()
-    tables = data.setdefault("tables", {})
-    tables[name] = settings
-    _save_data(data)
+    _set_section("tables", name, settings)
 
 
 def get_table_filters(name: str) -> dict:
     """Возвращает сохранённые фильтры для таблицы."""
-    data = _load_data()
-    return data.get("table_filters", {}).get(name, {})
+    return _get_section("table_filters", name)
 
 
 def set_table_filters(name: str, filters: dict) -> None:
     """Сохраняет фильтры таблицы."""
-    data = _load_data()
-    table_filters = data.setdefault("table_filters", {})
-    table_filters[name] = filters
-    _save_data(data)
+    _set_section("table_filters", name, filters)
 
 
 def get_app_settings() -> dict:
     """Возвращает общие настройки приложения."""
-    data = _load_data()
-    return data.get("app", {})
+    return _get_section("app")
 
 
 def set_app_settings(settings: dict) -> None:
     """Сохраняет общие настройки приложения."""
-    data = _load_data()
-    data["app"] = settings
-    _save_data(data)
+    _set_section("app", None, settings)
 
 
 def get_window_settings(name: str) -> dict:
     """Возвращает сохранённые настройки окна."""
-    data = _load_data()
-    return data.get("windows", {}).get(name, {})
+    return _get_section("windows", name)
 
 
 def set_window_settings(name: str, settings: dict) -> None:
     """Сохраняет настройки окна."""
-    data = _load_data()
-    windows = data.setdefault("windows", {})
-    windows[name] = settings
-    _save_data(data)
+    _set_section("windows", name, settings)
@@ -12,6 +12,7 @@ from core.app_context import AppContext
 
 from database.models import Client, Deal, Expense, Payment, Policy
 from services import expense_service
+from services.query_utils import get_query_paginator
 from ui.base.base_table_model import BaseTableModel
 from ui.base.base_table_view import BaseTableView
 from ui.base.table_controller import TableController
@@ -353,20 +354,31 @@ class ExpenseTableView(BaseTableView):
             self.order_dir,
             self.page,
         )
-        paged_query, total = expense_service.fetch_expenses_page_with_total(
-            self.page,
-            self.per_page,
-            order_by=self.order_by,
-            order_dir=self.order_dir,
-            **filters,
-        )
-        items = list(paged_query)
-        if not items:
-            logger.info("Расходы не найдены для фильтров: %s", filters)
-        logger.debug("Expense result rows=%d", len(items))
+        page = self.page
+        per_page = self.per_page
+        order_by = self.order_by
+        order_dir = self.order_dir
+
+        def run_task():
+            paged_query, total = expense_service.fetch_expenses_page_with_total(
+                page,
+                per_page,
+                order_by=order_by,
+                order_dir=order_dir,
+                **filters,
+            )
+            items = list(paged_query)
+            get_query_paginator().remember(paged_query, items)
+            if not items:
+                logger.info("Расходы не найдены для фильтров: %s", filters)
+            logger.debug("Expense result rows=%d", len(items))
+            return items, total
 
         # 3) обновляем модель и пагинатор
-        self.set_model_class_and_items(Expense, items, total_count=total)
+        def apply(items, total):
+            self.set_model_class_and_items(Expense, items, total_count=total)
+
+        self.controller.load_page(run_task, apply)
 
     def refresh(self):
         self.load_data()
@@ -5,7 +5,9 @@ from PySide6.QtWidgets import (
     QListWidget,
     QListWidgetItem,
 )
-from PySide6.QtCore import Qt
+import logging
+
+from PySide6.QtCore import Qt, QThread, QTimer, Signal
 from PySide6.QtGui import QPainter
 from PySide6.QtCharts import (
     QChart,
@@ -17,11 +19,11 @@ from PySide6.QtCharts import (
 )
 
 from core.app_context import AppContext, get_app_context
+from database.db import supports_background_connections, thread_connection
 from services.dashboard_service import (
-    get_dashboard_counters,
-    get_upcoming_tasks,
-    get_expiring_policies,
-    get_upcoming_deal_reminders,
+    DASHBOARD_TTL,
+    DashboardSnapshot,
+    get_dashboard_cache,
     get_deal_reminder_counts,
 )
 
@@ -30,8 +32,30 @@ from ui.views.policy_detail_view import PolicyDetailView
 from ui.views.deal_detail import DealDetailView
 
 
+logger = logging.getLogger(__name__)
+
+
+class _SnapshotWorker(QThread):
+    """Строит снимок дашборда в фоновом потоке со своим соединением."""
+
+    loaded = Signal(object)
+
+    def run(self):
+        try:
+            with thread_connection():
+                snapshot = get_dashboard_cache().refresh()
+        except Exception:  # noqa: BLE001
+            logger.exception("Не удалось обновить дашборд")
+            return
+        self.loaded.emit(snapshot)
+
+
 class HomeTab(QWidget):
-    """Стартовая страница со сводной информацией."""
+    """Стартовая страница со сводной информацией.
+
+    Вкладка сразу показывает последний снимок дашборда, а свежий строится в
+    фоновом потоке и подставляется по готовности.
+    """
 
     def __init__(self, parent=None, *, context: AppContext | None = None):
         super().__init__(parent)
@@ -81,10 +105,49 @@ class HomeTab(QWidget):
         layout.addWidget(self.reminder_chart)
 
         layout.addStretch()
+
+        self._worker: _SnapshotWorker | None = None
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(int(DASHBOARD_TTL * 1000))
+        self._refresh_timer.timeout.connect(self._on_refresh_timer)
+        self._refresh_timer.start()
         self.update_stats()
 
     def update_stats(self):
-        counters = get_dashboard_counters()
+        """Показать последний снимок и при необходимости обновить его."""
+        cache = get_dashboard_cache()
+        snapshot = cache.peek()
+        if snapshot is not None:
+            self.render_snapshot(snapshot)
+        elif not self.info_label.text():
+            self.info_label.setText("Загрузка…")
+        if cache.is_fresh():
+            return
+        if supports_background_connections():
+            self._refresh_in_background()
+        else:
+            self.render_snapshot(cache.refresh())
+
+    def _on_refresh_timer(self):
+        if self.isVisible():
+            self.update_stats()
+
+    def _refresh_in_background(self):
+        if self._worker is not None and self._worker.isRunning():
+            return
+        worker = _SnapshotWorker()
+        worker.loaded.connect(self.render_snapshot, Qt.QueuedConnection)
+        worker.finished.connect(self._on_worker_finished, Qt.QueuedConnection)
+        self._worker = worker
+        worker.start()
+
+    def _on_worker_finished(self):
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.deleteLater()
+
+    def render_snapshot(self, snapshot: DashboardSnapshot):
+        counters = snapshot.counters
         stats = counters["entities"]
         html = (
             f"Клиентов: <b>{stats['clients']}</b><br>"
@@ -105,7 +168,7 @@ class HomeTab(QWidget):
         )
 
         self.upcoming_tasks_list.clear()
-        tasks = get_upcoming_tasks()
+        tasks = snapshot.upcoming_tasks
         for t in tasks:
             note = (t.note or "").strip()
             short_note = note[:30] + ("…" if len(note) > 30 else "") if note else ""
@@ -131,7 +194,7 @@ class HomeTab(QWidget):
             self.upcoming_tasks_list.addItem(empty)
 
         self.expiring_policies_list.clear()
-        policies = get_expiring_policies()
+        policies = snapshot.expiring_policies
         for p in policies:
             note = (p.note or "").strip()
             short_note = note[:30] + ("…" if len(note) > 30 else "") if note else ""
@@ -153,7 +216,7 @@ class HomeTab(QWidget):
             self.expiring_policies_list.addItem(empty)
 
         self.deal_reminders_list.clear()
-        deals = get_upcoming_deal_reminders()
+        deals = snapshot.deal_reminders
         for d in deals:
             parts = [
                 d.reminder_date.strftime("%d.%m.%Y") if d.reminder_date else "",
@@ -169,7 +232,7 @@ class HomeTab(QWidget):
             empty.setFlags(Qt.NoItemFlags)
             self.deal_reminders_list.addItem(empty)
 
-        self.update_reminder_chart()
+        self.update_reminder_chart(snapshot.reminder_counts)
 
     def open_task_detail(self, item):
         task = item.data(Qt.UserRole)
@@ -201,8 +264,9 @@ class HomeTab(QWidget):
             self._context = get_app_context()
         return self._context
 
-    def update_reminder_chart(self):
-        counts = get_deal_reminder_counts()
+    def update_reminder_chart(self, counts: dict | None = None):
+        if counts is None:
+            counts = get_deal_reminder_counts()
         chart = QChart()
         bar_set = QBarSet("Напоминания")
         categories = []
@@ -10,12 +10,14 @@ from PySide6.QtWidgets import QHeaderView, QAbstractItemView
 from core.app_context import AppContext
 
 from database.models import Client, Income, Payment, Policy, Deal, Executor, DealExecutor
+from services.distinct_values import distinct_values
 from services.income_service import (
     build_income_query,
     fetch_incomes_page_with_total,
     mark_income_deleted,
     mark_incomes_deleted,
 )
+from services.query_utils import get_query_paginator
 from ui.base.base_table_model import BaseTableModel
 from ui.base.base_table_view import BaseTableView
 from ui.base.table_controller import TableController
@@ -44,7 +46,11 @@ class IncomeTableController(TableController):
         return filters
 
     def get_distinct_values(
-        self, column_key: str, *, column_field: Any | None = None
+        self,
+        column_key: str,
+        *,
+        column_field: Any | None = None,
+        prefix: str | None = None,
     ) -> list[dict[str, Any]]:
         filters = self.get_filters()
         column_filters = dict(filters.get("column_filters") or {})
@@ -91,28 +97,13 @@ class IncomeTableController(TableController):
         if target_field is None:
             return []
 
-        values_query = (
-            query.select(target_field)
-            .where(target_field.is_null(False))
-            .distinct()
-            .order_by(target_field.asc())
+        return distinct_values(
+            query,
+            target_field,
+            prefix=prefix,
+            models=(Payment, Policy, Client, Deal, DealExecutor, Executor),
         )
 
-        values = [
-            {"value": value, "display": value}
-            for (value,) in values_query.tuples()
-        ]
-
-        if (
-            query.select(target_field)
-            .where(target_field.is_null(True))
-            .limit(1)
-            .exists()
-        ):
-            values.insert(0, {"value": None, "display": "—"})
-
-        return values
-
 
 class IncomeTableModel(BaseTableModel):
     VIRTUAL_FIELDS = [
@@ -331,81 +322,90 @@ class IncomeTableView(BaseTableView):
             order_dir,
             self.page,
         )
-        paged_query, total = fetch_incomes_page_with_total(
-            self.page,
-            self.per_page,
-            order_by=order_field,
-            order_dir=order_dir,
-            join_executor=join_executor,
-            **filters,
-        )
-        items = list(
-            prefetch(
-                paged_query,
-                Payment,
-                Policy,
-                Client,
-                Deal,
-                DealExecutor,
-                Executor,
-            )
-        )
-        if not items:
-            logger.warning(
-                "No incomes found for filters=%s page=%d per_page=%d",
-                filters,
-                self.page,
-                self.per_page,
+        page = self.page
+        per_page = self.per_page
+
+        def run_task():
+            paged_query, total = fetch_incomes_page_with_total(
+                page,
+                per_page,
+                order_by=order_field,
+                order_dir=order_dir,
+                join_executor=join_executor,
+                **filters,
             )
-        deals = set()
-        for income in items:
-            payment = getattr(income, "payment", None)
-            if not payment:
-                continue
-            policy = getattr(payment, "policy", None)
-            if not policy:
-                continue
-            deal = getattr(policy, "deal", None)
-            if deal is not None:
-                deals.add(deal)
-        if deals:
-            deal_ids = [deal.id for deal in deals]
-            executors_by_deal: Dict[int, list[DealExecutor]] = {
-                deal_id: [] for deal_id in deal_ids
-            }
-            deal_executors = (
-                DealExecutor.select(DealExecutor, Executor)
-                .join(Executor)
-                .where(DealExecutor.deal.in_(deal_ids))
+            items = list(
+                prefetch(
+                    paged_query,
+                    Payment,
+                    Policy,
+                    Client,
+                    Deal,
+                    DealExecutor,
+                    Executor,
+                )
             )
-            total_assignments = 0
-            for deal_executor in deal_executors:
-                executors_by_deal[deal_executor.deal_id].append(deal_executor)
-                total_assignments += 1
-            for deal in deals:
-                assigned = executors_by_deal.get(deal.id, [])
-                setattr(deal, "executors_prefetch", assigned)
-                primary_executor = assigned[0].executor if assigned else None
-                setattr(deal, "_cached_executor", primary_executor)
+            get_query_paginator().remember(paged_query, items)
+            if not items:
+                logger.warning(
+                    "No incomes found for filters=%s page=%d per_page=%d",
+                    filters,
+                    page,
+                    per_page,
+                )
+            deals = set()
             for income in items:
                 payment = getattr(income, "payment", None)
-                policy = getattr(payment, "policy", None) if payment else None
-                deal = getattr(policy, "deal", None) if policy else None
+                if not payment:
+                    continue
+                policy = getattr(payment, "policy", None)
+                if not policy:
+                    continue
+                deal = getattr(policy, "deal", None)
                 if deal is not None:
-                    setattr(income, "_executor", getattr(deal, "_cached_executor", None))
+                    deals.add(deal)
+            if deals:
+                deal_ids = [deal.id for deal in deals]
+                executors_by_deal: Dict[int, list[DealExecutor]] = {
+                    deal_id: [] for deal_id in deal_ids
+                }
+                deal_executors = (
+                    DealExecutor.select(DealExecutor, Executor)
+                    .join(Executor)
+                    .where(DealExecutor.deal.in_(deal_ids))
+                )
+                total_assignments = 0
+                for deal_executor in deal_executors:
+                    executors_by_deal[deal_executor.deal_id].append(deal_executor)
+                    total_assignments += 1
+                for deal in deals:
+                    assigned = executors_by_deal.get(deal.id, [])
+                    setattr(deal, "executors_prefetch", assigned)
+                    primary_executor = assigned[0].executor if assigned else None
+                    setattr(deal, "_cached_executor", primary_executor)
+                for income in items:
+                    payment = getattr(income, "payment", None)
+                    policy = getattr(payment, "policy", None) if payment else None
+                    deal = getattr(policy, "deal", None) if policy else None
+                    if deal is not None:
+                        setattr(income, "_executor", getattr(deal, "_cached_executor", None))
+                logger.debug(
+                    "👥 Подгружены исполнители для %d сделок (%d назначений) одним запросом",
+                    len(deals),
+                    total_assignments,
+                )
+            logger.debug("Income result rows=%d", len(items))
             logger.debug(
-                "👥 Подгружены исполнители для %d сделок (%d назначений) одним запросом",
-                len(deals),
-                total_assignments,
+                "\U0001F4E6 Загружено доходов: %d из %d",
+                len(items),
+                total,
             )
-        logger.debug("Income result rows=%d", len(items))
-        logger.debug(
-            "\U0001F4E6 Загружено доходов: %d из %d",
-            len(items),
-            total,
-        )
+            return items, total
+
+        def apply(items, total):
+            self.set_model_class_and_items(self.model_class, items, total_count=total)
 
-        self.set_model_class_and_items(self.model_class, items, total_count=total)
+        self.controller.load_page(run_task, apply)
 
     def refresh(self):
         self.load_data()
@@ -8,14 +8,17 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QBrush, QColor
 from PySide6.QtWidgets import QAbstractItemView, QMenu
 
-from database.models import Payment, Policy
+from database.models import Client, Expense, Income, Payment, Policy
 from services.payment_service import (
     build_payment_query,
     fetch_payments_page_with_total,
     mark_payment_deleted,
+    mark_payments_deleted,
     mark_payments_paid,
 )
+from services.distinct_values import distinct_values
 from services.folder_utils import copy_text_to_clipboard
+from services.query_utils import sum_column
 from ui.base.base_table_model import BaseTableModel
 from ui.base.base_table_view import BaseTableView
 from ui.base.table_controller import TableController
@@ -27,6 +30,8 @@ from ui.views.payment_detail_view import PaymentDetailView
 
 
 class PaymentTableController(TableController):
+    virtual_scroll = True
+
     def __init__(
         self,
         view,
@@ -43,11 +48,26 @@ class PaymentTableController(TableController):
             get_page_func=self._get_page,
             get_total_func=self._get_total,
             filter_func=filter_func,
+            get_query_func=self._get_query,
         )
 
     def _prepare_kwargs(self, filters: dict[str, Any]) -> dict[str, Any]:
         return self._service_kwargs_factory(dict(filters))
 
+    def _get_query(self, **filters):
+        return build_payment_query(**self._prepare_kwargs(filters))
+
+    def virtual_summary(self, query) -> str:
+        total_sum = sum_column(query, Payment.amount)
+        overdue_sum = sum_column(
+            query.where(
+                Payment.actual_payment_date.is_null(True)
+                & (Payment.payment_date < date.today())
+            ),
+            Payment.amount,
+        )
+        return f"Сумма: {total_sum} ₽ (просрочено: {overdue_sum} ₽)"
+
     def _get_page(
         self,
         page: int,
@@ -102,7 +122,11 @@ class PaymentTableController(TableController):
         )
 
     def get_distinct_values(
-        self, column_key: str, *, column_field: Any | None = None
+        self,
+        column_key: str,
+        *,
+        column_field: Any | None = None,
+        prefix: str | None = None,
     ) -> list[dict[str, Any]]:
         filters = self.get_filters()
         column_filters = dict(filters.get("column_filters") or {})
@@ -143,28 +167,13 @@ class PaymentTableController(TableController):
         if target_field is None:
             return []
 
-        values_query = (
-            query.select(target_field)
-            .where(target_field.is_null(False))
-            .distinct()
-            .order_by(target_field.asc())
+        return distinct_values(
+            query,
+            target_field,
+            prefix=prefix,
+            models=(Policy, Client, Income, Expense),
         )
 
-        values = [
-            {"value": value, "display": value}
-            for (value,) in values_query.tuples()
-        ]
-
-        if (
-            query.select(target_field)
-            .where(target_field.is_null(True))
-            .limit(1)
-            .exists()
-        ):
-            values.insert(0, {"value": None, "display": "—"})
-
-        return values
-
 
 class PaymentTableView(BaseTableView):
     COLUMN_FIELD_MAP = {
@@ -255,6 +264,9 @@ class PaymentTableView(BaseTableView):
         self.current_sort_column = column
         self.current_sort_order = order
 
+        if self.controller is not None and self.controller.is_virtual():
+            # без страниц запрос перезапускает _on_sort_indicator_changed
+            return
         field = self.COLUMN_FIELD_MAP.get(column)
         if field is None:
             return
@@ -297,12 +309,19 @@ class PaymentTableView(BaseTableView):
                 self.refresh()
 
     def delete_selected(self):
-        payment = self.get_selected()
-        if not payment:
+        payments = self.get_selected_multiple()
+        if not payments:
             return
-        if confirm(f"Удалить платёж на {payment.amount} ₽?"):
+        if len(payments) == 1:
+            message = f"Удалить платёж на {payments[0].amount} ₽?"
+        else:
+            message = f"Удалить {len(payments)} платеж(ей)?"
+        if confirm(message):
             try:
-                mark_payment_deleted(payment.id)
+                if len(payments) == 1:
+                    mark_payment_deleted(payments[0].id)
+                else:
+                    mark_payments_deleted([p.id for p in payments])
                 self.refresh()
             except Exception as e:
                 show_error(str(e))
@@ -5,14 +5,19 @@ import logging
 from typing import Iterable
 
 from dateutil.relativedelta import relativedelta
-from PySide6.QtCore import QDate, Qt
+from PySide6.QtCore import QDate, Qt, QThread, Signal
 from PySide6.QtWidgets import QAbstractItemView, QMenu
 
 from core.app_context import AppContext
+from database.db import supports_background_connections, thread_connection
 from database.models import Policy
-from services.deal_service import get_all_deals, get_deal_by_id
+from services.deal_service import get_deal_by_id
 from services.folder_utils import copy_text_to_clipboard
-from services.policies import CandidateDeal, find_candidate_deals, update_policy
+from services.policies import (
+    LinkCandidates,
+    resolve_link_candidates,
+    update_policy,
+)
 from services.policies.policy_app_service import policy_app_service
 from services.policies.policy_table_controller import PolicyTableController
 from services.policies.dto import PolicyRowDTO
@@ -28,6 +33,29 @@ from ui.views.policy_detail_view import PolicyDetailView
 logger = logging.getLogger(__name__)
 
 
+class _LinkCandidatesWorker(QThread):
+    """Подбирает сделки для привязки полисов в фоновом потоке."""
+
+    loaded = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, policy_ids: list[int]):
+        super().__init__()
+        self._policy_ids = policy_ids
+
+    def run(self):
+        try:
+            with thread_connection():
+                result = resolve_link_candidates(self._policy_ids)
+        except Exception as e:  # noqa: BLE001
+            logger.exception("Не удалось подобрать сделки для полисов")
+            if not self.isInterruptionRequested():
+                self.failed.emit(str(e))
+            return
+        if not self.isInterruptionRequested():
+            self.loaded.emit(result)
+
+
 class PolicyTableModel(BaseTableModel):
     """Модель таблицы полисов с поддержкой инлайн-редактирования."""
 
@@ -128,6 +156,7 @@ class PolicyTableView(BaseTableView):
     ):
         self._context = context
         self.deal_id = deal_id
+        self._link_worker: _LinkCandidatesWorker | None = None
         service = service or policy_app_service
         checkbox_map = {
             "Показывать продленное": self.on_filter_changed,
@@ -329,105 +358,67 @@ class PolicyTableView(BaseTableView):
         policies = self.get_selected_multiple()
         if not policies:
             return
-        mapping, missing = self._load_policy_instances(policies)
-        if missing:
-            missing_str = ", ".join(map(str, missing))
+        if self._link_worker is not None and self._link_worker.isRunning():
+            return
+        policy_ids = [dto.id for dto in policies]
+        if not supports_background_connections():
+            try:
+                result = resolve_link_candidates(policy_ids)
+            except Exception as e:  # noqa: BLE001
+                show_error(str(e))
+                return
+            self._on_link_candidates(result)
+            return
+        worker = _LinkCandidatesWorker(policy_ids)
+        worker.loaded.connect(self._on_link_candidates, Qt.QueuedConnection)
+        worker.failed.connect(show_error, Qt.QueuedConnection)
+        worker.finished.connect(self._on_link_worker_finished, Qt.QueuedConnection)
+        self._link_worker = worker
+        # контроллер дождётся потока при уничтожении представления
+        self.controller.watch_worker(worker)
+        self.link_deal_btn.setEnabled(False)
+        worker.start()
+
+    def _on_link_worker_finished(self):
+        worker, self._link_worker = self._link_worker, None
+        self.link_deal_btn.setEnabled(True)
+        if worker is not None:
+            worker.deleteLater()
+
+    def _on_link_candidates(self, result: LinkCandidates):
+        if result.missing_ids:
+            missing_str = ", ".join(map(str, result.missing_ids))
             show_error(f"Не найдены полисы с id: {missing_str}")
             return
-        policy_models = [mapping[dto.id] for dto in policies]
+        policy_models = result.policies
         try:
-            deals = list(get_all_deals())
-            if not deals:
+            if result.auto_link is not None:
+                deal = result.auto_link
+                for policy in policy_models:
+                    update_policy(policy, deal_id=deal.id)
+                self.refresh()
+                deal_name = deal.description or f"ID {deal.id}"
+                show_info(
+                    "Полисы автоматически привязаны к сделке "
+                    f'"{deal_name}"'
+                )
+                return
+            if not result.candidates and not result.choices:
                 show_error("Нет доступных сделок")
                 return
 
-            deals_by_id = {deal.id: deal for deal in deals}
-
-            aggregated_candidates: dict[int, dict] = {}
-            strict_matches: dict[int, CandidateDeal] = {}
-            auto_link_possible = True
-            for policy in policy_models:
-                policy_candidates = find_candidate_deals(policy, limit=5)
-                strict_candidates = [
-                    candidate
-                    for candidate in policy_candidates
-                    if getattr(candidate, "is_strict", False)
-                ]
-                if len(strict_candidates) == 1:
-                    strict_candidate = strict_candidates[0]
-                    deal_obj = strict_candidate.deal or deals_by_id.get(
-                        strict_candidate.deal_id
-                    )
-                    if deal_obj is None:
-                        auto_link_possible = False
-                    else:
-                        if strict_candidate.deal is None:
-                            strict_candidate.deal = deal_obj
-                        strict_matches[policy.id] = strict_candidate
-                else:
-                    auto_link_possible = False
-                for candidate in policy_candidates:
-                    deal = candidate.deal or deals_by_id.get(candidate.deal_id)
-                    if deal is None:
-                        continue
-                    entry = aggregated_candidates.setdefault(
-                        candidate.deal_id,
-                        {
-                            "deal": deal,
-                            "score": 0.0,
-                            "combined_reasons": [],
-                            "policy_reasons": {},
-                            "supported_policies": set(),
-                        },
-                    )
-                    entry["score"] += float(candidate.score or 0.0)
-                    entry["supported_policies"].add(policy.id)
-                    policy_reasons = list(candidate.reasons or [])
-                    entry["policy_reasons"][policy.id] = policy_reasons
-                    for reason in policy_reasons:
-                        if reason not in entry["combined_reasons"]:
-                            entry["combined_reasons"].append(reason)
-
-            if (
-                auto_link_possible
-                and strict_matches
-                and len(strict_matches) == len(policy_models)
-            ):
-                unique_deal_ids = {candidate.deal_id for candidate in strict_matches.values()}
-                if len(unique_deal_ids) == 1:
-                    deal_id = unique_deal_ids.pop()
-                    deal = deals_by_id.get(deal_id)
-                    if deal is None and strict_matches:
-                        deal = next(iter(strict_matches.values())).deal
-                    if deal is not None:
-                        for policy in policy_models:
-                            update_policy(policy, deal_id=deal.id)
-                        self.refresh()
-                        deal_name = deal.description or f"ID {deal.id}"
-                        show_info(
-                            "Полисы автоматически привязаны к сделке "
-                            f'"{deal_name}"'
-                        )
-                        return
-
             candidate_items = []
-            selected_policies = list(policy_models)
-            for deal_id, entry in aggregated_candidates.items():
-                deal = entry["deal"]
-                if deal is None:
-                    continue
-                client_name = getattr(deal.client, "name", "Без клиента")
-                description = deal.description or ""
+            for candidate in result.candidates:
                 missing_policies = [
                     policy
-                    for policy in selected_policies
-                    if policy.id not in entry["policy_reasons"]
+                    for policy in policy_models
+                    if policy.id not in candidate.policy_reasons
                 ]
 
                 details: list[str] = []
-                for policy in selected_policies:
+                for policy in policy_models:
                     policy_label = policy.policy_number or f"ID {policy.id}"
-                    reasons = entry["policy_reasons"].get(policy.id)
+                    reasons = candidate.policy_reasons.get(policy.id)
                     if reasons:
                         detail = f"Полис {policy_label}: {', '.join(reasons)}"
                     else:
@@ -435,8 +426,8 @@ class PolicyTableView(BaseTableView):
                     details.append(detail)
 
                 comment_parts: list[str] = []
-                if entry["combined_reasons"]:
-                    comment_parts.append("; ".join(entry["combined_reasons"]))
+                if candidate.reasons:
+                    comment_parts.append("; ".join(candidate.reasons))
                 if missing_policies:
                     missing_labels = ", ".join(
                         policy.policy_number or f"ID {policy.id}"
@@ -446,14 +437,14 @@ class PolicyTableView(BaseTableView):
 
                 candidate_items.append(
                     {
-                        "score": entry["score"],
-                        "title": client_name,
-                        "subtitle": description,
+                        "score": candidate.score,
+                        "title": candidate.client_name,
+                        "subtitle": candidate.deal.description or "",
                         "comment": " | ".join(comment_parts),
                         "value": {
                             "type": "candidate",
-                            "deal": deal,
-                            "supported_policy_ids": list(entry["supported_policies"]),
+                            "deal_id": candidate.deal_id,
+                            "supported_policy_ids": candidate.supported_policy_ids,
                             "unsupported_policy_ids": [
                                 policy.id for policy in missing_policies
                             ],
@@ -462,83 +453,35 @@ class PolicyTableView(BaseTableView):
                     }
                 )
 
-            def _candidate_sort_key(item: dict):
-                score = -float(item.get("score") or 0.0)
-                value = item.get("value") or {}
-                deal_obj = value.get("deal")
-                deal_id = getattr(deal_obj, "id", 0) if deal_obj is not None else 0
-                return (score, deal_id)
-
-            candidate_items.sort(key=_candidate_sort_key)
-            max_candidates = 5
-            if len(candidate_items) > max_candidates:
-                candidate_items = candidate_items[:max_candidates]
-
-            used_ids = {
-                getattr(item.get("value", {}).get("deal"), "id", None)
-                for item in candidate_items
-                if item.get("value", {}).get("deal") is not None
-            }
-
-            manual_items = []
-            for deal in deals:
-                if deal.id in used_ids:
-                    continue
-                client_name = getattr(deal.client, "name", "Без клиента")
-                manual_items.append(
-                    {
-                        "score": None,
-                        "title": client_name,
-                        "subtitle": deal.description or "",
-                        "comment": "",
-                        "value": {"type": "manual", "deal": deal},
-                        "details": [],
-                    }
-                )
+            manual_items = [
+                {
+                    "score": None,
+                    "title": choice.client_name,
+                    "subtitle": choice.description,
+                    "comment": "",
+                    "value": {"type": "manual", "deal_id": choice.id},
+                    "details": [],
+                }
+                for choice in result.choices
+            ]
 
-            dialog_items = candidate_items + manual_items
             dlg = SearchDialog(
-                dialog_items,
+                candidate_items + manual_items,
                 parent=self,
                 make_deal_callback=lambda: self._on_make_deal(),
             )
             if not dlg.exec():
                 return
             selected = dlg.selected_index
-            if not selected:
-                return
-            deal = None
-            unsupported_policy_ids: list[int] = []
-            value_type = None
-            if isinstance(selected, dict):
-                deal = selected.get("deal")
-                unsupported_policy_ids = list(selected.get("unsupported_policy_ids") or [])
-                value_type = selected.get("type")
-            else:
-                if isinstance(selected, str):
-                    deal = next(
-                        (
-                            item["value"]["deal"]
-                            for item in dialog_items
-                            if selected
-                            in {
-                                item.get("title"),
-                                f"{item.get('title', '')} — {item.get('subtitle', '')}".strip(" —"),
-                            }
-                        ),
-                        None,
-                    )
-                elif hasattr(selected, "id"):
-                    deal = selected
-            if not deal:
+            if not isinstance(selected, dict) or not selected.get("deal_id"):
                 return
+            deal_id = selected["deal_id"]
 
+            unsupported_ids = set(selected.get("unsupported_policy_ids") or [])
             unsupported_policies = [
-                policy
-                for policy in policy_models
-                if policy.id in set(unsupported_policy_ids)
+                policy for policy in policy_models if policy.id in unsupported_ids
             ]
-            if value_type == "candidate" and unsupported_policies:
+            if selected.get("type") == "candidate" and unsupported_policies:
                 policy_labels = ", ".join(
                     policy.policy_number or f"ID {policy.id}"
                     for policy in unsupported_policies
@@ -551,7 +494,7 @@ class PolicyTableView(BaseTableView):
                     return
 
             for policy in policy_models:
-                update_policy(policy, deal_id=deal.id)
+                update_policy(policy, deal_id=deal_id)
             self.refresh()
         except Exception as e:  # noqa: BLE001
             show_error(str(e))
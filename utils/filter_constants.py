@@ -1,3 +1,7 @@
 """Общие константы для фильтрации."""
 
 CHOICE_NULL_TOKEN = "__NULL__"
+
+#: Разделитель границ диапазона дат при передаче фильтра в сервисы
+#: (``"2024-01-01..2024-01-31"``, любая граница может быть пустой).
+DATE_RANGE_SEPARATOR = ".."